@@ -144,15 +144,18 @@ class App:
         parser.add_argument('--config', help='Additional config file')
         return vars(parser.parse_args())
 
-    def _create_strategy(self) -> StrategyBase:
-        """ Create strategy class"""
-        exchange = Exchange(self.config)
-
+    def _strategy_class(self):
+        """ Strategy class of the config """
         strategy_file = "strategy." + self.config["pytrade2.strategy"]
         strategy_class_name = strategy_file.split(".")[-1]
         self._logger.info(f"Running the strategy: {strategy_file}")
         module = importlib.import_module(strategy_file, strategy_class_name)
-        strategy = getattr(module, strategy_class_name)(config=self.config, exchange_provider=exchange)
+        return getattr(module, strategy_class_name)
+
+    def _create_strategy(self) -> StrategyBase:
+        """ Create strategy class"""
+        exchange = Exchange(self.config)
+        strategy = self._strategy_class()(config=self.config, exchange_provider=exchange)
         return strategy
 
     def run(self):
@@ -0,0 +1,22 @@
+import json
+
+from pytrade2.App import App
+from pytrade2.exch.backtest.ReplayEngine import ReplayEngine
+
+
+class BacktestApp(App):
+    """
+    Replay recorded raw data of DataStreamDownloadApp through the strategy with simulated broker.
+    Data dir and time range: pytrade2.backtest.data.dir, pytrade2.backtest.start, pytrade2.backtest.end
+    """
+
+    def run(self):
+        engine = ReplayEngine(self.config)
+        strategy = engine.new_strategy(self._strategy_class())
+        report = engine.run(strategy)
+        self._logger.info(f"Backtest report:\n{json.dumps(report, indent=2, default=str)}")
+        return report
+
+
+if __name__ == "__main__":
+    BacktestApp().run()
@@ -63,27 +63,27 @@ class DataStreamDownloadApp(App):
 
         # Run feeds
         [feed.run() for feed in [self.candles_feed, self.bid_ask_feed, self.level2_feed]]
-        last_save_time_local = datetime.now()
         last_save_time_s3 = datetime.now()
+        # Files saved locally, but not uploaded to s3 yet
+        s3_pending_paths = set()
         # processing loop
-        saved_s3_flag = False
         while True:
             # Get from buffers
             new_candles, new_bid_ask, new_level2 = self.get_accumulated_data()
 
-            # Save
+            # Save locally
             for tag, df in {"candles": new_candles, "bid_ask": new_bid_ask, "level2": new_level2}.items():
                 if not df.empty:
-                    # Save locally
-                    file_path = self.data_persister.persist_df(df, str(Path(self.download_dir, tag)), tag, self.ticker)
+                    s3_pending_paths.add(
+                        self.data_persister.persist_df(df, str(Path(self.download_dir, tag)), tag, self.ticker))
 
-                    # Copy to s3
-                    if (datetime.now() - last_save_time_s3) > self.save_interval_s3:
-                        self.data_persister.copy2s3(file_path)
-                        saved_s3_flag = True # Set the flag to update last s3 save time later
-
-            # If saving to s3 happened, update the last s3 save time
-            if saved_s3_flag: last_save_time_s3 = datetime.now()
+            # Copy to s3 by interval. Previous day files are copied before they are purged.
+            is_new_day = len({path.name[:10] for path in s3_pending_paths}) > 1
+            if s3_pending_paths and (is_new_day or (datetime.now() - last_save_time_s3) > self.save_interval_s3):
+                for path in s3_pending_paths:
+                    self.data_persister.copy2s3(path)
+                s3_pending_paths.clear()
+                last_save_time_s3 = datetime.now()
 
             # Remove previous days data
             for subdir in ["candles", "bid_ask", "level2"]:
@@ -101,17 +101,17 @@ class DataStreamDownloadApp(App):
         if self.candles_feed.new_data_event.is_set():
             # Get new candles buffer
             for period in self.candles_feed.candles_by_interval_buf:
-                with self.candles_feed.data_lock:
+                with self.candles_feed.buf_lock:
                     new_candles = self.candles_feed.candles_by_interval_buf[period]
                     self.candles_feed.candles_by_interval_buf[period] = pd.DataFrame(columns=new_candles.columns)
         # New bid ask
         if self.bid_ask_feed.new_data_event.is_set():
-            with self.bid_ask_feed.data_lock:
+            with self.bid_ask_feed.buf_lock:
                 new_bid_ask = self.bid_ask_feed.bid_ask_buf
                 self.bid_ask_feed.bid_ask_buf = pd.DataFrame(columns=self.bid_ask_feed.bid_ask_buf.columns)
         # Mew level2
         if self.level2_feed.new_data_event.is_set():
-            with self.level2_feed.data_lock:
+            with self.level2_feed.buf_lock:
                 new_level2 = self.level2_feed.level2_buf
                 self.level2_feed.level2_buf = pd.DataFrame(columns=self.level2_feed.level2_buf.columns)
 
@@ -0,0 +1,423 @@
+import asyncio
+import gzip
+import json
+import logging
+import time
+from collections import defaultdict
+from typing import Optional, Dict, List
+
+from aiohttp import web, WSMsgType
+
+from pytrade2.exch.AsyncioLoop import AsyncioLoop
+
+
+class FakeHuobiHbdm:
+    """
+    Local fake of Huobi derivatives exchange for latency benchmark and tests.
+    Websocket: gzip frames, heartbeat pings, market bbo, depth, kline channels and orders_cross notifications.
+    Rest: order, sl/tp, order history, balance and kline history endpoints used by the broker and feeds.
+    Market data is streamed by /fake/stream control endpoint with given message rate. Orders are filled immediately
+    by requested price, the position is closed by sl/tp trigger or after given ticks.
+    Each tick has unique ask and bid prices, so the exchange matches an order to the tick it was created for
+    and measures tick to order latency. Times are time.monotonic(), comparable between processes of one host.
+    """
+
+    market_path = "/linear-swap-ws"
+    notification_path = "/linear-swap-notification"
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, close_after_ticks: int = 1,
+                 ping_interval_sec: float = 5.0, balance: float = 1000.0, compress_level: int = 1):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self.host, self.port = host, port
+        self.close_after_ticks = close_after_ticks
+        self.ping_interval_sec = ping_interval_sec
+        self.balance = balance
+        self.compress_level = compress_level
+        self.aloop = AsyncioLoop("fake-huobi-hbdm")
+        self._runner: Optional[web.AppRunner] = None
+
+        # Websocket topic -> subscribed sockets
+        self.subscribers: Dict[str, set] = defaultdict(set)
+        self.pongs = 0
+        self._next_id = 1_000_000_000
+
+        # Last prices and candles of contract code, period
+        self.bid = self.ask = None
+        self.candles: Dict[tuple, List[dict]] = defaultdict(list)
+
+        # Orders and opened position
+        self.orders: Dict[int, dict] = {}
+        self.client_orders: Dict[int, dict] = {}
+        self.tpsl_orders: Dict[int, List[dict]] = {}
+        self.position: Optional[dict] = None
+
+        # Measurements: tick price -> sent time, order price -> latency from its tick
+        self.tick_times: Dict[float, float] = {}
+        self.sent = 0
+        self.order_latencies: List[float] = []
+
+        self.rest_handlers = {
+            "/linear-swap-api/v1/swap_cross_switch_position_mode": self.switch_position_mode,
+            "/linear-swap-api/v1/swap_balance_valuation": self.balance_valuation,
+            "/linear-swap-api/v1/swap_cross_order": self.cross_order,
+            "/linear-swap-api/v1/swap_cross_order_info": self.cross_order_info,
+            "/linear-swap-api/v1/swap_cross_relation_tpsl_order": self.relation_tpsl_order,
+            "/linear-swap-api/v1/swap_cross_tpsl_order": self.tpsl_order,
+            "/linear-swap-api/v1/swap_cross_tpsl_cancel": self.tpsl_cancel,
+            "/linear-swap-api/v1/swap_cross_tpsl_cancelall": self.tpsl_cancel,
+            "/linear-swap-api/v3/swap_cross_hisorders": self.cross_hisorders}
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def ws_url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    def start(self):
+        """ Start the server in own event loop thread, port 0 means any free port """
+        self.aloop.run(self._start())
+        self._logger.info(f"Fake Huobi hbdm started at {self.url}")
+        return self
+
+    def stop(self):
+        if self._runner:
+            self.aloop.run(self._runner.cleanup())
+            self._runner = None
+        self.aloop.stop()
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_get(self.market_path, self.on_websocket)
+        app.router.add_get(self.notification_path, self.on_websocket)
+        for path, handler in self.rest_handlers.items():
+            app.router.add_post(path, self._rest_handler_of(handler))
+        app.router.add_get("/linear-swap-ex/market/history/kline", self.kline_history)
+        app.router.add_post("/fake/stream", self.on_stream)
+        app.router.add_get("/fake/stats", self.on_stats)
+        app.router.add_post("/fake/reset", self.on_reset)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    @staticmethod
+    def serve(port: int, ready_queue, close_after_ticks: int = 1, log_level: int = logging.WARNING):
+        """ Run the server in separate process until terminated, put the port to the queue when ready """
+        logging.basicConfig(level=log_level)
+        fake = FakeHuobiHbdm(port=port, close_after_ticks=close_after_ticks).start()
+        ready_queue.put(fake.port)
+        while True:
+            time.sleep(60)
+
+    def new_id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    @staticmethod
+    def now_millis() -> int:
+        return int(time.time() * 1000)
+
+    # Websocket
+
+    def frame_of(self, msg: dict) -> bytes:
+        return gzip.compress(json.dumps(msg).encode(), compresslevel=self.compress_level)
+
+    async def on_websocket(self, request: web.Request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        is_notification = request.path == self.notification_path
+        ping_task = asyncio.ensure_future(self._ping_loop(ws, is_notification))
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                await self.on_ws_message(ws, json.loads(msg.data))
+        finally:
+            ping_task.cancel()
+            for sockets in self.subscribers.values():
+                sockets.discard(ws)
+        return ws
+
+    async def on_ws_message(self, ws: web.WebSocketResponse, msg: dict):
+        if "pong" in msg or msg.get("op") == "pong":
+            self.pongs += 1
+        elif msg.get("op") == "auth":
+            await ws.send_bytes(self.frame_of({"op": "auth", "type": "api", "err-code": 0,
+                                               "ts": self.now_millis(), "data": {"user-id": "1"}}))
+        elif msg.get("op") == "sub":
+            self.subscribers[msg["topic"].lower()].add(ws)
+            await ws.send_bytes(self.frame_of({"op": "sub", "topic": msg["topic"], "ts": self.now_millis(),
+                                               "err-code": 0}))
+        elif "sub" in msg:
+            self.subscribers[msg["sub"].lower()].add(ws)
+            await ws.send_bytes(self.frame_of({"id": msg.get("id"), "subbed": msg["sub"], "ts": self.now_millis(),
+                                               "status": "ok"}))
+
+    async def _ping_loop(self, ws: web.WebSocketResponse, is_notification: bool):
+        while not ws.closed:
+            await asyncio.sleep(self.ping_interval_sec)
+            ping = {"op": "ping", "ts": str(self.now_millis())} if is_notification else {"ping": self.now_millis()}
+            await ws.send_bytes(self.frame_of(ping))
+
+    async def publish(self, topic: str, msg: dict) -> int:
+        """ Send the message to subscribers of the topic, return sockets count """
+        sockets = [ws for ws in self.subscribers.get(topic.lower(), ()) if not ws.closed]
+        if sockets:
+            frame = self.frame_of(msg)
+            for ws in sockets:
+                await ws.send_bytes(frame)
+        return len(sockets)
+
+    async def publish_bbo(self, symbol: str, bid: float, ask: float, bid_vol: float = 1.0, ask_vol: float = 1.0):
+        self.bid, self.ask = bid, ask
+        ch = f"market.{symbol}.bbo"
+        ts = self.now_millis()
+        self.tick_times[ask] = self.tick_times[bid] = time.monotonic()
+        await self.publish(ch, {"ch": ch, "ts": ts,
+                                "tick": {"ch": ch, "mrid": ts, "id": ts // 1000, "bid": [bid, bid_vol],
+                                         "ask": [ask, ask_vol], "ts": ts, "version": ts}})
+        self.sent += 1
+        await self.on_price(symbol)
+
+    async def publish_depth(self, symbol: str, bid: float, ask: float, levels: int = 20, step: float = 1.0):
+        ch = f"market.{symbol}.depth.step0"
+        ts = self.now_millis()
+        await self.publish(ch, {"ch": ch, "ts": ts,
+                                "tick": {"ch": ch, "mrid": ts, "id": ts // 1000, "ts": ts, "version": ts,
+                                         "bids": [[bid - i * step, 1.0] for i in range(levels)],
+                                         "asks": [[ask + i * step, 1.0] for i in range(levels)]}})
+
+    async def publish_kline(self, symbol: str, period: str, price: float):
+        """ Update last candle of the period by the price, send it """
+        ch = f"market.{symbol}.kline.{period}"
+        period_sec = self.period_sec_of(period)
+        candle_id = int(time.time()) // period_sec * period_sec
+        candles = self.candles[(symbol.upper(), period)]
+        if candles and candles[-1]["id"] == candle_id:
+            candle = candles[-1]
+            candle.update({"high": max(candle["high"], price), "low": min(candle["low"], price), "close": price})
+            candle["vol"] += 1
+        else:
+            candle = {"id": candle_id, "open": price, "high": price, "low": price, "close": price, "vol": 1,
+                      "amount": 1.0, "count": 1, "trade_turnover": price}
+            candles.append(candle)
+        await self.publish(ch, {"ch": ch, "ts": self.now_millis(), "tick": dict(candle, mrid=candle_id)})
+
+    @staticmethod
+    def period_sec_of(period: str) -> int:
+        units = {"min": 60, "hour": 3600, "day": 86400, "week": 604800, "mon": 2592000}
+        for unit, sec in units.items():
+            if period.endswith(unit):
+                return int(period[:-len(unit)] or 1) * sec
+        raise ValueError(f"Unknown kline period {period}")
+
+    async def notify_order(self, order: dict):
+        """ Filled order notification to orders_cross subscribers """
+        topic = f"orders_cross.{order['contract_code'].lower()}"
+        msg = dict(order, op="notify", topic=topic, ts=self.now_millis(), uid="1")
+        await self.publish(topic, msg)
+
+    async def stream(self, symbol: str, rate: float, count: int, start_price: float = 60000.0,
+                     depth_every: int = 0, depth_levels: int = 20, kline_every: int = 0,
+                     kline_period: str = "1min") -> dict:
+        """
+        Send count bbo ticks with given rate per second, each by absolute schedule, so slow sends do not shift next.
+        Prices grow by one for each tick. Depth and kline messages are sent after each n-th tick if configured.
+        """
+        loop = asyncio.get_running_loop()
+        interval = 1.0 / rate if rate > 0 else 0.0
+        start_time = loop.time()
+        start_sent = self.sent
+        for i in range(count):
+            delay = start_time + i * interval - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            ask = float(start_price + 2 * i)
+            bid = ask - 1.0
+            await self.publish_bbo(symbol, bid, ask)
+            if depth_every and i % depth_every == 0:
+                await self.publish_depth(symbol, bid, ask, depth_levels)
+            if kline_every and i % kline_every == 0:
+                await self.publish_kline(symbol, kline_period, ask)
+        duration = loop.time() - start_time
+        sent = self.sent - start_sent
+        return {"sent": sent, "duration_sec": duration, "rate": sent / duration if duration > 0 else 0.0}
+
+    # Trading
+
+    async def on_price(self, symbol: str):
+        """ Close opened position by sl/tp trigger or after close_after_ticks """
+        position = self.position
+        if not position or position["order"]["contract_code"].upper() != symbol.upper():
+            return
+        position["ticks"] += 1
+        # Client did not receive the order yet, close event would be missed
+        if not position["confirmed"]:
+            return
+        direction = 1 if position["order"]["direction"] == "buy" else -1
+        close_price = self.bid if direction == 1 else self.ask
+        sl, tp = position["sl"], position["tp"]
+        is_sl = sl and (close_price - sl) * direction <= 0
+        is_tp = tp and (close_price - tp) * direction >= 0
+        if is_sl or is_tp or position["ticks"] >= self.close_after_ticks:
+            await self.close_position(close_price)
+
+    async def close_position(self, price: float):
+        open_order = self.position["order"]
+        self.position = None
+        direction = "sell" if open_order["direction"] == "buy" else "buy"
+        order = self.filled_order(open_order["contract_code"], direction, open_order["volume"], price, None)
+        order["reduce_only"] = 1
+        await self.notify_order(order)
+
+    def filled_order(self, contract_code: str, direction: str, volume: float, price: float,
+                     client_order_id: Optional[int]) -> dict:
+        order_id = self.new_id()
+        now = self.now_millis()
+        order = {"contract_code": contract_code, "symbol": contract_code.split("-")[0], "direction": direction,
+                 "offset": "both", "volume": volume, "price": price, "lever_rate": 1, "order_id": order_id,
+                 "order_id_str": str(order_id), "client_order_id": client_order_id, "created_at": now,
+                 "update_time": now, "trade_volume": volume, "trade_turnover": price * volume, "fee": 0.0,
+                 "trade_avg_price": price, "margin_frozen": 0, "profit": 0, "status": 6, "order_type": 1,
+                 "order_source": "api", "fee_asset": "USDT", "reduce_only": 0}
+        self.orders[order_id] = order
+        if client_order_id is not None:
+            self.client_orders[int(client_order_id)] = order
+        return order
+
+    def tpsl_order_of(self, kind: str, direction: str, volume: float, trigger_price: float,
+                      order_price: Optional[float]) -> dict:
+        order_id = self.new_id()
+        return {"volume": volume, "direction": direction, "tpsl_order_type": kind, "order_id": order_id,
+                "order_id_str": str(order_id), "trigger_type": "ge" if kind == "tp" else "le",
+                "trigger_price": trigger_price, "order_price": order_price, "created_at": self.now_millis(),
+                "order_price_type": "limit", "status": 2}
+
+    # Rest
+
+    def _rest_handler_of(self, handler):
+        async def rest_handler(request: web.Request):
+            params = await request.json() if request.can_read_body else {}
+            res = handler(params or {})
+            if asyncio.iscoroutine(res):
+                res = await res
+            return web.json_response(res)
+
+        return rest_handler
+
+    def ok(self, data) -> dict:
+        return {"status": "ok", "data": data, "ts": self.now_millis()}
+
+    def switch_position_mode(self, params: dict) -> dict:
+        return self.ok([{"margin_account": params.get("margin_account"),
+                         "position_mode": params.get("position_mode")}])
+
+    def balance_valuation(self, params: dict) -> dict:
+        return self.ok([{"valuation_asset": params.get("valuation_asset", "USDT"), "balance": str(self.balance)}])
+
+    async def cross_order(self, params: dict) -> dict:
+        """ Fill new order immediately by requested price, latency is from the tick of this price """
+        arrival_time = time.monotonic()
+        direction = params["direction"].lower()
+        price = params.get("price") or (self.ask if direction == "buy" else self.bid)
+        tick_time = self.tick_times.get(float(price))
+        if tick_time is not None:
+            self.order_latencies.append(arrival_time - tick_time)
+        if self.position:
+            return {"status": "error", "err_code": 1048, "err_msg": "Position exists", "ts": self.now_millis()}
+
+        order = self.filled_order(params["contract_code"], direction, params["volume"], float(price),
+                                  params.get("client_order_id"))
+        close_direction = "sell" if direction == "buy" else "buy"
+        tpsl = [self.tpsl_order_of("sl", close_direction, order["volume"], params["sl_trigger_price"],
+                                   params.get("sl_order_price"))]
+        if params.get("tp_trigger_price"):
+            tpsl.append(self.tpsl_order_of("tp", close_direction, order["volume"], params["tp_trigger_price"],
+                                           params.get("tp_order_price")))
+        self.tpsl_orders[order["order_id"]] = tpsl
+        self.position = {"order": order, "ticks": 0, "confirmed": False,
+                         "sl": params.get("sl_trigger_price"), "tp": params.get("tp_trigger_price")}
+        await self.notify_order(order)
+        return self.ok({"order_id": order["order_id"], "order_id_str": order["order_id_str"],
+                        "client_order_id": order["client_order_id"]})
+
+    def cross_order_info(self, params: dict) -> dict:
+        order = self.client_orders.get(int(params["client_order_id"])) if params.get("client_order_id") \
+            else self.orders.get(int(params["order_id"]))
+        return self.ok([order] if order else [])
+
+    def relation_tpsl_order(self, params: dict) -> dict:
+        """ Sl/tp of the main order. Broker asks it after the trade is set, so closing events won't be missed. """
+        order_id = int(params["order_id"])
+        if self.position and self.position["order"]["order_id"] == order_id:
+            self.position["confirmed"] = True
+        order = self.orders.get(order_id, {})
+        return self.ok(dict(order, tpsl_order_info=self.tpsl_orders.get(order_id, [])))
+
+    def tpsl_order(self, params: dict) -> dict:
+        tpsl = {}
+        for kind in ["sl", "tp"]:
+            if params.get(f"{kind}_trigger_price"):
+                order = self.tpsl_order_of(kind, params["direction"].lower(), params["volume"],
+                                           params[f"{kind}_trigger_price"], params.get(f"{kind}_order_price"))
+                tpsl[f"{kind}_order"] = {"order_id": order["order_id"], "order_id_str": order["order_id_str"]}
+                if self.position:
+                    self.position[kind] = params[f"{kind}_trigger_price"]
+        return self.ok(tpsl)
+
+    def tpsl_cancel(self, params: dict) -> dict:
+        order_ids = [order_id for order_id in str(params.get("order_id") or "").split(",") if order_id]
+        return self.ok({"errors": [], "successes": ",".join(order_ids)})
+
+    def cross_hisorders(self, params: dict) -> dict:
+        """ Filled orders of the trade type since start time """
+        direction = {17: "buy", 18: "sell"}.get(params.get("trade_type"))
+        start_time = params.get("start_time") or 0
+        orders = [order for order in self.orders.values()
+                  if (not direction or order["direction"] == direction) and order["update_time"] >= start_time]
+        return {"code": 200, "msg": "ok", "data": orders, "ts": self.now_millis()}
+
+    async def kline_history(self, request: web.Request):
+        code, period = request.query["contract_code"], request.query["period"]
+        candles = self.candles.get((code.upper(), period), [])
+        if "from" in request.query:
+            candles = [c for c in candles if c["id"] >= int(request.query["from"])]
+        if "to" in request.query:
+            candles = [c for c in candles if c["id"] <= int(request.query["to"])]
+        if "size" in request.query:
+            candles = candles[-int(request.query["size"]):]
+        return web.json_response({"ch": f"market.{code}.kline.{period}", "status": "ok",
+                                  "ts": self.now_millis(), "data": candles})
+
+    # Control
+
+    async def on_stream(self, request: web.Request):
+        params = await request.json()
+        return web.json_response(await self.stream(**params))
+
+    async def on_stats(self, request: web.Request):
+        stats = self.stats()
+        if request.query.get("ticks"):
+            stats["tick_times"] = list(self.tick_times.items())
+        return web.json_response(stats)
+
+    async def on_reset(self, request: web.Request):
+        self.reset()
+        return web.json_response(self.stats())
+
+    def stats(self) -> dict:
+        return {"sent": self.sent,
+                "pongs": self.pongs,
+                "orders": len(self.orders),
+                "in_position": self.position is not None,
+                "order_latencies": list(self.order_latencies),
+                "subscriptions": {topic: len(sockets) for topic, sockets in self.subscribers.items() if sockets}}
+
+    def reset(self):
+        """ Clear measurements between benchmark steps """
+        self.tick_times.clear()
+        self.order_latencies.clear()
+        self.sent = 0
@@ -0,0 +1,234 @@
+import argparse
+import gc
+import json
+import logging
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from pytrade2.benchmark.SyntheticData import SyntheticData
+from pytrade2.features.CandlesMultiIndiFeatures import CandlesMultiIndiFeatures
+from pytrade2.features.FeatureCleaner import FeatureCleaner
+from pytrade2.features.LowHighTargets import LowHighTargets
+from pytrade2.features.PredictBidAskFeatures import PredictBidAskFeatures
+from pytrade2.features.level2.Level2Buckets import Level2Buckets
+from pytrade2.features.level2.Level2MultiIndiFeatures import Level2MultiIndiFeatures
+from pytrade2.feed.history.Preprocessor import Preprocessor
+
+
+class FeatureBenchmark:
+    """
+    Time and memory of feature engineering hot paths over synthetic data of 1d, 7d, 30d scales.
+    Data is generated before the measurement. Peak memory is traced in the first run, time is min and median
+    of the next runs. Tick and depth data cases are limited by tick scale, the data is too large for a month.
+    Run: python -m pytrade2.benchmark.FeatureBenchmark run --scales 1d,7d --out bench.json
+    Compare: python -m pytrade2.benchmark.FeatureBenchmark compare base.json bench.json
+    """
+
+    default_scales = ["1d", "7d", "30d"]
+
+    def __init__(self, repeat: int = 3, tick_scale_max: str = "1d", tick_freq: str = "1s", level2_freq: str = "10s",
+                 level2_levels: int = 150, seed: int = 1):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self.repeat = max(repeat, 1)
+        self.tick_scale_max = tick_scale_max
+        self.tick_freq = tick_freq
+        self.level2_freq = level2_freq
+        self.level2_levels = level2_levels
+        self.data = SyntheticData(seed=seed)
+        self.candles_periods = ["1min", "5min", "15min"]
+        self.level2_periods = ["1min", "5min"]
+
+        # Case name: function of scale, returns rows count, data setup, and measured function of the data
+        self.cases = {"candles_multi_indi_features": self.candles_multi_indi_features,
+                      "level2_multi_indi_features": self.level2_multi_indi_features,
+                      "predict_bid_ask_features_targets": self.predict_bid_ask_features_targets,
+                      "level2_buckets": self.level2_buckets,
+                      "low_high_targets": self.low_high_targets,
+                      "low_high_signal": self.low_high_signal,
+                      "feature_cleaner": self.feature_cleaner,
+                      "preprocessor_transform_candles": self.preprocessor_transform_candles,
+                      "preprocessor_transform_level2": self.preprocessor_transform_level2}
+
+    def tick_scale_of(self, scale: str) -> str:
+        return min(scale, self.tick_scale_max, key=pd.Timedelta)
+
+    def candles_multi_indi_features(self, scale: str):
+        candles = self.data.candles_1min(scale)
+        candles_by_periods = CandlesMultiIndiFeatures.resample_by_periods(candles, self.candles_periods)
+        return len(candles), lambda: candles_by_periods, CandlesMultiIndiFeatures.multi_indi_features
+
+    def level2_multi_indi_features(self, scale: str):
+        level2 = self.data.level2_1min(scale)
+        return len(level2), lambda: level2, \
+            lambda df: Level2MultiIndiFeatures.level2_features_of(df, self.level2_periods, {})
+
+    def predict_bid_ask_features_targets(self, scale: str):
+        scale = self.tick_scale_of(scale)
+        bid_ask = self.data.bid_ask(scale, self.tick_freq)
+        level2 = self.data.level2(scale, self.level2_freq, self.level2_levels)
+        candles_by_interval = CandlesMultiIndiFeatures.resample_by_periods(self.data.candles_1min(scale),
+                                                                           ["1min", "5min"])
+        for candles in candles_by_interval.values():
+            candles["close_time"] = candles.index
+        candles_cnt_by_interval = {"1min": 5, "5min": 5}
+        return len(bid_ask) + len(level2), lambda: bid_ask, \
+            lambda df: PredictBidAskFeatures.features_targets_of(df, level2, candles_by_interval,
+                                                                 candles_cnt_by_interval, predict_window="10s",
+                                                                 past_window="10s")
+
+    def level2_buckets(self, scale: str):
+        level2 = self.data.level2(self.tick_scale_of(scale), self.level2_freq, self.level2_levels)
+        return len(level2), lambda: level2, lambda df: Level2Buckets().level2_buckets(df, past_window="10s")
+
+    def low_high_targets(self, scale: str):
+        candles = self.data.candles_1min(scale)
+        return len(candles), lambda: candles, lambda df: LowHighTargets.fut_lohi(df, "10min")
+
+    def low_high_signal(self, scale: str):
+        candles = self.data.candles_1min(scale)
+        return len(candles), lambda: candles, lambda df: LowHighTargets.fut_lohi_signal(df, "10min", 0.002, 2)
+
+    def feature_cleaner(self, scale: str):
+        # Candles with gaps, each gap day
+        candles = self.data.candles_1min(scale, gaps=max(int(pd.Timedelta(scale) / pd.Timedelta("1d")), 1) * 10)
+        return len(candles), lambda: candles, \
+            lambda df: FeatureCleaner.clean(df, df, start_delta=pd.Timedelta("30min"))
+
+    def preprocessor_transform_candles(self, scale: str):
+        candles = self.data.candles_1min(scale)
+        preprocessor = Preprocessor(data_dir="")
+        # Transform changes the data, each run gets a copy
+        return len(candles), lambda: candles.copy(), lambda df: preprocessor.transform(df, "candles")
+
+    def preprocessor_transform_level2(self, scale: str):
+        level2 = self.data.level2(self.tick_scale_of(scale), self.level2_freq, self.level2_levels)
+        preprocessor = Preprocessor(data_dir="")
+        return len(level2), lambda: level2.copy(), lambda df: preprocessor.transform(df, "level2")
+
+    def measure(self, case: str, scale: str) -> dict:
+        """ Peak memory of the first run, min and median time of the next runs """
+        rows, setup, func = self.cases[case](scale)
+
+        data = setup()
+        gc.collect()
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        start_mem = tracemalloc.get_traced_memory()[0]
+        func(data)
+        peak_mem = tracemalloc.get_traced_memory()[1] - start_mem
+        tracemalloc.stop()
+
+        times = []
+        for _ in range(self.repeat):
+            data = setup()
+            gc.collect()
+            start_time = time.perf_counter()
+            func(data)
+            times.append(time.perf_counter() - start_time)
+        result = {"case": case,
+                  "scale": scale,
+                  "rows": rows,
+                  "time_min_sec": float(np.min(times)),
+                  "time_median_sec": float(np.median(times)),
+                  "peak_mem_mb": peak_mem / 2 ** 20}
+        self._logger.info(f"{result}")
+        return result
+
+    def run(self, scales: List[str] = None, cases: List[str] = None) -> dict:
+        """ Measure all cases of all scales """
+        scales = scales or self.default_scales
+        cases = cases or list(self.cases.keys())
+        unknown = set(cases) - set(self.cases.keys())
+        if unknown:
+            raise ValueError(f"Unknown benchmark cases: {unknown}, available: {list(self.cases.keys())}")
+        results = [self.measure(case, scale) for scale in scales for case in cases]
+        return {"meta": self.meta(), "results": results}
+
+    def meta(self) -> dict:
+        """ Environment of the run, results of different environments are not comparable """
+        return {"time": datetime.now().isoformat(),
+                "python": sys.version.split()[0],
+                "numpy": np.__version__,
+                "pandas": pd.__version__,
+                "platform": platform.platform(),
+                "processor": platform.processor(),
+                "repeat": self.repeat,
+                "tick_scale_max": self.tick_scale_max,
+                "tick_freq": self.tick_freq,
+                "level2_freq": self.level2_freq,
+                "level2_levels": self.level2_levels}
+
+    @staticmethod
+    def compare(baseline: dict, current: dict, threshold: float = 0.2, min_time_sec: float = 0.005,
+                min_mem_mb: float = 1.0) -> List[dict]:
+        """
+        Regressions of current results: min time or peak memory grew more than threshold ratio.
+        Small values below min time or memory are noise, they are not compared.
+        """
+        baseline_results = {(r["case"], r["scale"]): r for r in baseline["results"]}
+        regressions = []
+        for result in current["results"]:
+            base = baseline_results.get((result["case"], result["scale"]))
+            if not base:
+                continue
+            for metric, min_value in [("time_min_sec", min_time_sec), ("peak_mem_mb", min_mem_mb)]:
+                base_value, value = base[metric], result[metric]
+                if value > min_value and value > base_value * (1 + threshold):
+                    regressions.append({"case": result["case"],
+                                        "scale": result["scale"],
+                                        "metric": metric,
+                                        "baseline": base_value,
+                                        "current": value,
+                                        "ratio": value / base_value if base_value else float("inf")})
+        return regressions
+
+    @staticmethod
+    def _parse_args(args: Optional[List[str]] = None):
+        parser = argparse.ArgumentParser(description="Feature engineering benchmarks")
+        commands = parser.add_subparsers(dest="command", required=True)
+        run_parser = commands.add_parser("run", help="Run benchmarks, write json results")
+        run_parser.add_argument("--scales", default=",".join(FeatureBenchmark.default_scales),
+                                help="Data durations, example: 1d,7d,30d")
+        run_parser.add_argument("--cases", default=None, help="Comma separated case names, all by default")
+        run_parser.add_argument("--repeat", type=int, default=3, help="Timed runs of each case")
+        run_parser.add_argument("--tick-scale-max", default="1d", help="Max duration of bid/ask and depth data")
+        run_parser.add_argument("--out", default=None, help="Results json file, stdout by default")
+        compare_parser = commands.add_parser("compare", help="Compare two json results, exit 1 on regressions")
+        compare_parser.add_argument("baseline")
+        compare_parser.add_argument("current")
+        compare_parser.add_argument("--threshold", type=float, default=0.2, help="Allowed growth ratio, 0.2 is 20%%")
+        return parser.parse_args(args)
+
+    @staticmethod
+    def main(args: Optional[List[str]] = None) -> int:
+        logging.basicConfig(level=logging.INFO)
+        args = FeatureBenchmark._parse_args(args)
+        if args.command == "run":
+            benchmark = FeatureBenchmark(repeat=args.repeat, tick_scale_max=args.tick_scale_max)
+            results = benchmark.run(scales=args.scales.split(","), cases=args.cases.split(",") if args.cases else None)
+            out = json.dumps(results, indent=2)
+            if args.out:
+                with open(args.out, "w") as file:
+                    file.write(out)
+            else:
+                print(out)
+            return 0
+
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        with open(args.current) as file:
+            current = json.load(file)
+        regressions = FeatureBenchmark.compare(baseline, current, args.threshold)
+        print(json.dumps({"threshold": args.threshold, "regressions": regressions}, indent=2))
+        return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(FeatureBenchmark.main())
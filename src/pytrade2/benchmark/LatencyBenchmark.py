@@ -0,0 +1,260 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import requests
+import yaml
+
+from pytrade2.benchmark.FakeHuobiHbdm import FakeHuobiHbdm
+from pytrade2.benchmark.LatencyProbeStrategy import LatencyProbeStrategy
+from pytrade2.exch.Exchange import Exchange
+from pytrade2.exch.huobi.hbdm.HuobiExchangeHbdm import HuobiExchangeHbdm
+from pytrade2.metrics.MetricServer import MetricServer
+from pytrade2.metrics.Metrics import Metrics
+
+
+class LatencyBenchmark:
+    """
+    End to end tick to order latency of the app against local fake Huobi derivatives exchange.
+    The app is built like App.run: default config, exchange provider, strategy with feeds and broker, but without
+    metrics gateway. Fake exchange runs in own process by default, not to share GIL with the app.
+    Market data is streamed with stepped rates. Each step reports percentiles of tick to order POST latency and
+    of processing lag of ticks. Max sustainable rate is the last step when the app kept up with the rate.
+    Run: python -m pytrade2.benchmark.LatencyBenchmark --rates 10,100,1000 --duration 10 --out latency.json
+    """
+
+    default_rates = [10, 50, 100, 500, 1000, 2000]
+    symbol = "BTC-USDT"
+
+    def __init__(self, rates: List[float] = None, duration_sec: float = 5.0, max_lag_ms: float = 100.0,
+                 close_after_ticks: int = 1, transport: str = "threads", in_process: bool = False,
+                 depth_every: int = 0, kline_every: int = 0, settle_sec: float = 5.0):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self.rates = rates or self.default_rates
+        self.duration_sec = duration_sec
+        self.max_lag_ms = max_lag_ms
+        self.close_after_ticks = close_after_ticks
+        self.transport = transport
+        self.in_process = in_process
+        self.depth_every = depth_every
+        self.kline_every = kline_every
+        self.settle_sec = settle_sec
+
+        self.url: Optional[str] = None
+        self.fake: Optional[FakeHuobiHbdm] = None
+        self._fake_process = None
+        self._session = requests.Session()
+        self.strategy: Optional[LatencyProbeStrategy] = None
+        self.next_price = 60000.0
+
+    def start_exchange(self):
+        """ Fake exchange in own process or in this one """
+        if self.in_process:
+            self.fake = FakeHuobiHbdm(close_after_ticks=self.close_after_ticks).start()
+            self.url = self.fake.url
+        else:
+            # Spawn, not fork the process with threads
+            context = multiprocessing.get_context("spawn")
+            ready_queue = context.Queue()
+            self._fake_process = context.Process(target=FakeHuobiHbdm.serve,
+                                                 args=(0, ready_queue, self.close_after_ticks), daemon=True)
+            self._fake_process.start()
+            self.url = f"http://127.0.0.1:{ready_queue.get(timeout=60)}"
+        self._logger.info(f"Fake exchange is at {self.url}")
+
+    def config_of(self, data_dir: str) -> dict:
+        """ App defaults with the fake exchange and probe strategy """
+        with open(Path(Path(__file__).parent.parent, "cfg", "app-defaults.yaml")) as file:
+            config = yaml.safe_load(file)
+        topics = "market.{ticker}.bbo" + (",market.{ticker}.depth.step0" if self.depth_every else "")
+        config.update({"pytrade2.exchange": "huobi.hbdm.HuobiExchangeHbdm",
+                       "pytrade2.exchange.huobi.hbdm.rest.url": self.url,
+                       "pytrade2.exchange.huobi.hbdm.ws.url": self.url.replace("http://", "ws://"),
+                       "pytrade2.exchange.huobi.transport": self.transport,
+                       "pytrade2.exchange.huobi.connector.key": "benchmark",
+                       "pytrade2.exchange.huobi.connector.secret": "benchmark",
+                       "pytrade2.exchange.feed.huobi.websocket.sub.topics.template": topics,
+                       "pytrade2.strategy": LatencyProbeStrategy.__name__,
+                       "pytrade2.tickers": self.symbol,
+                       "pytrade2.broker.trade.allow": "true",
+                       "pytrade2.data.dir": data_dir,
+                       "pytrade2.s3.enabled": "false",
+                       "pytrade2.strategy.learn.enabled": "false",
+                       "pytrade2.strategy.processing.interval": "0s",
+                       "pytrade2.strategy.riskmanager.wait_after_loss": "0s",
+                       "pytrade2.strategy.history.min.window": "0s",
+                       "pytrade2.strategy.history.max.window": "1min",
+                       "pytrade2.strategy.predict.window": "0s",
+                       # Idle time between benchmark steps is not a feed lag
+                       "pytrade2.feed.lag.max": "1d"})
+        return config
+
+    def start_app(self, config: dict):
+        """ What App.run does: exchange, strategy, feeds and broker. Exchange points to the fake. """
+        if not MetricServer.has_metrics():
+            MetricServer.metrics = Metrics("pytrade2", config["pytrade2.strategy"])
+        exchange_provider = Exchange(config)
+        exchange_provider.exchanges[config["pytrade2.exchange"]] = HuobiExchangeHbdm(config)
+        self.strategy = LatencyProbeStrategy(config=config, exchange_provider=exchange_provider)
+        self.strategy.run()
+        self.wait_subscribed([f"market.{self.symbol.lower()}.bbo", f"orders_cross.{self.symbol.lower()}"])
+
+    def wait_subscribed(self, topics: List[str], timeout_sec: float = 30.0):
+        deadline = time.monotonic() + timeout_sec
+        while time.monotonic() < deadline:
+            subscriptions = self.control("get", "/fake/stats")["subscriptions"]
+            if all(subscriptions.get(topic) for topic in topics):
+                return
+            time.sleep(0.1)
+        raise TimeoutError(f"App did not subscribe to {topics} in {timeout_sec} seconds")
+
+    def control(self, method: str, path: str, params: dict = None) -> dict:
+        """ Call control endpoint of the fake exchange """
+        query, body = (params, None) if method == "get" else (None, params)
+        res = self._session.request(method, f"{self.url}{path}", params=query, json=body, timeout=600)
+        res.raise_for_status()
+        return res.json()
+
+    def run_step(self, rate: float) -> dict:
+        """ Stream the ticks with the rate, wait until the app processed them, measure """
+        self.control("post", "/fake/reset")
+        self.strategy.processed_times = {}
+        count = max(int(rate * self.duration_sec), 1)
+        start_price, self.next_price = self.next_price, self.next_price + 2 * count + 1000
+        stream = self.control("post", "/fake/stream", {"symbol": self.symbol, "rate": rate, "count": count,
+                                                       "start_price": start_price,
+                                                       "depth_every": self.depth_every,
+                                                       "kline_every": self.kline_every})
+        # Wait for the last tick to be processed and the last trade to be closed
+        last_ask = start_price + 2 * (count - 1)
+        deadline = time.monotonic() + self.settle_sec
+        while time.monotonic() < deadline and (last_ask not in self.strategy.processed_times
+                                               or self.strategy.broker.cur_trade):
+            time.sleep(0.01)
+        stats = self.control("get", "/fake/stats", {"ticks": 1})
+        return self.step_report(rate, stream, stats, self.strategy.processed_times, last_ask)
+
+    def step_report(self, rate: float, stream: dict, stats: dict, processed_times: dict, last_ask: float) -> dict:
+        tick_times = dict(stats["tick_times"])
+        processed_times = dict(processed_times)
+        lags = [processed_time - tick_times[ask] for ask, processed_time in processed_times.items()
+                if ask in tick_times]
+        last_lag = processed_times[last_ask] - tick_times[last_ask] \
+            if last_ask in processed_times and last_ask in tick_times else None
+        lag_ms = self.percentiles_ms(lags)
+        sent_rate = stream["rate"]
+        is_sustained = bool(sent_rate >= 0.9 * rate and last_lag is not None
+                            and lag_ms["p99"] <= self.max_lag_ms)
+        report = {"rate": rate,
+                  "sent": stream["sent"],
+                  "sent_rate": sent_rate,
+                  "processed": len(lags),
+                  # Strategy processes the last tick of its buffer, ticks between are coalesced
+                  "processed_ratio": len(lags) / stream["sent"] if stream["sent"] else 0.0,
+                  "orders": len(stats["order_latencies"]),
+                  "order_latency_ms": self.percentiles_ms(stats["order_latencies"]),
+                  "processing_lag_ms": lag_ms,
+                  "last_tick_lag_ms": last_lag * 1000 if last_lag is not None else None,
+                  "is_sustained": is_sustained}
+        self._logger.info(f"{report}")
+        return report
+
+    @staticmethod
+    def percentiles_ms(values: List[float]) -> dict:
+        if not values:
+            return {"count": 0, "p50": None, "p90": None, "p99": None, "max": None}
+        values_ms = np.asarray(values) * 1000
+        p50, p90, p99 = np.percentile(values_ms, [50, 90, 99])
+        return {"count": len(values_ms), "p50": float(p50), "p90": float(p90), "p99": float(p99),
+                "max": float(values_ms.max())}
+
+    def run(self) -> dict:
+        """ Start fake exchange and the app, run steps of growing rates until the app lags """
+        self.start_exchange()
+        with tempfile.TemporaryDirectory() as data_dir:
+            try:
+                self.start_app(self.config_of(data_dir))
+                steps = []
+                for rate in sorted(self.rates):
+                    steps.append(self.run_step(rate))
+                    if not steps[-1]["is_sustained"]:
+                        break
+            finally:
+                self.stop()
+        sustained = [step["rate"] for step in steps if step["is_sustained"]]
+        return {"meta": self.meta(),
+                "max_sustainable_rate": max(sustained) if sustained else None,
+                "steps": steps}
+
+    def stop(self):
+        if self.strategy and self.strategy.broker:
+            self.strategy.stop()
+            # Let current processing cycle finish its orders before the exchange goes away
+            deadline = time.monotonic() + self.settle_sec
+            while self.strategy.is_processing and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.strategy.broker.ws_client.close()
+            self.strategy.bid_ask_feed.websocket_feed.stop()
+        if self.fake:
+            self.fake.stop()
+        if self._fake_process:
+            self._fake_process.terminate()
+            self._fake_process.join()
+
+    def meta(self) -> dict:
+        return {"time": datetime.now().isoformat(),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "processor": platform.processor(),
+                "transport": self.transport,
+                "in_process": self.in_process,
+                "duration_sec": self.duration_sec,
+                "max_lag_ms": self.max_lag_ms,
+                "close_after_ticks": self.close_after_ticks,
+                "depth_every": self.depth_every,
+                "kline_every": self.kline_every}
+
+    @staticmethod
+    def _parse_args(args: Optional[List[str]] = None):
+        parser = argparse.ArgumentParser(description="Tick to order latency benchmark against fake Huobi exchange")
+        parser.add_argument("--rates", default=",".join(map(str, LatencyBenchmark.default_rates)),
+                            help="Bid/ask messages per second of each step, example: 10,100,1000")
+        parser.add_argument("--duration", type=float, default=5.0, help="Seconds of each step")
+        parser.add_argument("--max-lag-ms", type=float, default=100.0, help="Max processing lag p99 to sustain")
+        parser.add_argument("--close-after-ticks", type=int, default=1, help="Ticks before the fake closes a trade")
+        parser.add_argument("--transport", default="threads", choices=["threads", "asyncio"])
+        parser.add_argument("--in-process", action="store_true", help="Run fake exchange in the app process")
+        parser.add_argument("--depth-every", type=int, default=0, help="Depth message after each n-th bid/ask")
+        parser.add_argument("--kline-every", type=int, default=0, help="Kline message after each n-th bid/ask")
+        parser.add_argument("--out", default=None, help="Results json file, stdout by default")
+        return parser.parse_args(args)
+
+    @staticmethod
+    def main(args: Optional[List[str]] = None) -> int:
+        logging.basicConfig(level=logging.WARNING)
+        args = LatencyBenchmark._parse_args(args)
+        benchmark = LatencyBenchmark(rates=[float(rate) for rate in args.rates.split(",")],
+                                     duration_sec=args.duration, max_lag_ms=args.max_lag_ms,
+                                     close_after_ticks=args.close_after_ticks, transport=args.transport,
+                                     in_process=args.in_process, depth_every=args.depth_every,
+                                     kline_every=args.kline_every)
+        out = json.dumps(benchmark.run(), indent=2)
+        if args.out:
+            with open(args.out, "w") as file:
+                file.write(out)
+        else:
+            print(out)
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(LatencyBenchmark.main())
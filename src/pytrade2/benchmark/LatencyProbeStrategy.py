@@ -0,0 +1,67 @@
+import time
+from typing import Dict
+
+import pandas as pd
+from sklearn.dummy import DummyClassifier
+
+from pytrade2.exch.Exchange import Exchange
+from pytrade2.strategy.common.StrategyBase import StrategyBase
+
+
+class LatencyProbeStrategy(StrategyBase):
+    """
+    Strategy of tick to order latency benchmark. Full processing cycle of bid/ask strategy with trivial model:
+    buffers, last features, predict, current trade check, broker order, data persister.
+    Buys by ask of the last tick when out of market, keeps processing time of each processed tick.
+    """
+
+    def __init__(self, config: Dict, exchange_provider: Exchange):
+        StrategyBase.__init__(self, config=config,
+                              exchange_provider=exchange_provider,
+                              is_candles_feed=False,
+                              is_bid_ask_feed=True,
+                              is_level2_feed=False)
+        # Model is not learned, it always gives buy signal
+        self.model_source = "create"
+        self.is_learn_enabled = False
+        self.is_learned = True
+        self.stop_loss_coeff = float(config.get("pytrade2.strategy.stoploss.coeff", 0.01))
+        self.is_stopped = False
+        # Ask price of processed tick -> time.monotonic() when it was processed
+        self.processed_times: Dict[float, float] = {}
+
+    def create_model(self, x_size=None, y_size=None):
+        return DummyClassifier(strategy="constant", constant=1).fit([[0.0, 0.0]], [1])
+
+    def prepare_xy(self) -> (pd.DataFrame, pd.DataFrame):
+        return pd.DataFrame(), pd.DataFrame()
+
+    def prepare_last_x(self) -> pd.DataFrame:
+        return self.bid_ask_feed.bid_ask[["bid", "ask"]].tail(1)
+
+    def predict(self, x: pd.DataFrame) -> pd.DataFrame:
+        with self.stage("predict_model"):
+            signal = self.model.predict(x.to_numpy())
+        return pd.DataFrame({"signal": signal, "bid": x["bid"], "ask": x["ask"]}, index=x.index)
+
+    def process_prediction(self, y_pred: pd.DataFrame):
+        signal, ask = int(y_pred["signal"].iloc[-1]), float(y_pred["ask"].iloc[-1])
+        self.processed_times[ask] = time.monotonic()
+        if signal and not self.broker.cur_trade and self.risk_manager.can_trade():
+            stop_loss_price = ask - signal * ask * self.stop_loss_coeff
+            take_profit_price = ask + signal * ask * self.stop_loss_coeff * self.profit_loss_ratio
+            self.broker.create_cur_trade(symbol=self.ticker,
+                                         direction=signal,
+                                         quantity=self.order_quantity,
+                                         price=ask,
+                                         stop_loss_price=stop_loss_price,
+                                         take_profit_price=take_profit_price,
+                                         trailing_delta=None)
+
+    def is_alive(self):
+        return not self.is_stopped and super().is_alive()
+
+    def stop(self):
+        """ Exit processing loop """
+        self.is_stopped = True
+        self.new_data_event.set()
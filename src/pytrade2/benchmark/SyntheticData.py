@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+
+class SyntheticData:
+    """
+    Generators of synthetic market data in the shapes of feeds and raw files: 1min candles, bid/ask ticks,
+    level2 depth snapshots and 1min preprocessed level2. Prices are random walk, the same seed gives the same data.
+    """
+
+    def __init__(self, seed: int = 1, start: str = "2025-06-22", price: float = 60000.0, volatility: float = 0.0005,
+                 tick_size: float = 0.1):
+        self.seed = seed
+        self.start = pd.Timestamp(start)
+        self.price = price
+        self.volatility = volatility
+        self.tick_size = tick_size
+
+    def rng(self) -> np.random.Generator:
+        return np.random.default_rng(self.seed)
+
+    def times_of(self, duration: str, freq: str) -> pd.DatetimeIndex:
+        count = int(pd.Timedelta(duration) // pd.Timedelta(freq))
+        return pd.date_range(self.start + pd.Timedelta(freq), periods=count, freq=freq)
+
+    def prices_of(self, rng: np.random.Generator, count: int, freq: str) -> np.ndarray:
+        """ Random walk, volatility is of 1min """
+        scale = self.volatility * np.sqrt(pd.Timedelta(freq) / pd.Timedelta("1min"))
+        return self.price * np.exp(np.cumsum(rng.normal(0, scale, count)))
+
+    def candles_1min(self, duration: str = "1d", gaps: int = 0) -> pd.DataFrame:
+        """ 1min candles indexed by close time, like candles feed. Gaps are missing random candle ranges """
+        rng = self.rng()
+        close_times = self.times_of(duration, "1min")
+        # Ticks inside each candle to get consistent open, high, low, close
+        ticks_per_candle = 12
+        ticks = self.prices_of(rng, len(close_times) * ticks_per_candle, "5s").reshape(-1, ticks_per_candle)
+        candles = pd.DataFrame({"open_time": close_times - pd.Timedelta("1min"),
+                                "close_time": close_times,
+                                "open": ticks[:, 0],
+                                "high": ticks.max(axis=1),
+                                "low": ticks.min(axis=1),
+                                "close": ticks[:, -1],
+                                "vol": rng.exponential(10.0, len(close_times))},
+                               index=pd.DatetimeIndex(close_times, name="close_time"))
+        if gaps and len(candles) > 2:
+            is_gap = np.zeros(len(candles), dtype=bool)
+            for start in rng.integers(1, len(candles) - 1, gaps):
+                is_gap[start:start + int(rng.integers(2, 30))] = True
+            candles = candles[~is_gap]
+        return candles
+
+    def bid_ask(self, duration: str = "1h", freq: str = "1s", symbol: str = "BTC-USDT") -> pd.DataFrame:
+        """ Bid/ask ticks indexed by time, like bid ask feed """
+        rng = self.rng()
+        times = self.times_of(duration, freq)
+        mid = self.prices_of(rng, len(times), freq)
+        spread = self.tick_size * rng.integers(1, 5, len(times))
+        bid = np.round((mid - spread / 2) / self.tick_size) * self.tick_size
+        return pd.DataFrame({"datetime": times,
+                             "symbol": symbol,
+                             "bid": bid,
+                             "bid_vol": rng.exponential(1.0, len(times)),
+                             "ask": bid + spread,
+                             "ask_vol": rng.exponential(1.0, len(times))},
+                            index=pd.DatetimeIndex(times, name="datetime"))
+
+    def level2(self, duration: str = "1h", freq: str = "10s", levels: int = 150,
+               symbol: str = "BTC-USDT") -> pd.DataFrame:
+        """ Raw depth snapshots: levels of bids, then levels of asks for each time, like level2 feed and raw files """
+        rng = self.rng()
+        times = self.times_of(duration, freq)
+        mid = self.prices_of(rng, len(times), freq)
+        best_bid = np.round(mid / self.tick_size) * self.tick_size
+        steps = self.tick_size * np.arange(levels)
+        bids = best_bid[:, None] - steps
+        asks = best_bid[:, None] + self.tick_size + steps
+        count = len(times) * levels
+        nan = np.full(count, np.nan)
+        df = pd.DataFrame({"datetime": np.concatenate([np.repeat(times, levels)] * 2),
+                           "symbol": symbol,
+                           "bid": np.concatenate([bids.ravel(), nan]),
+                           "bid_vol": np.concatenate([rng.exponential(1.0, count), nan]),
+                           "ask": np.concatenate([nan, asks.ravel()]),
+                           "ask_vol": np.concatenate([nan, rng.exponential(1.0, count)])})
+        # Snapshot items are together, sorted by time
+        order = np.argsort(df["datetime"].to_numpy(), kind="stable")
+        df = df.iloc[order]
+        return df.set_index(pd.DatetimeIndex(df["datetime"], name="datetime"))
+
+    def level2_1min(self, duration: str = "1d") -> pd.DataFrame:
+        """ Level2 expectations resampled to 1min, like preprocessed level2 """
+        rng = self.rng()
+        times = self.times_of(duration, "1min")
+        mid = self.prices_of(rng, len(times), "1min")
+        half_spread = self.tick_size * rng.integers(1, 5, len(times)) / 2
+        bid_vol, ask_vol = rng.exponential(150.0, len(times)), rng.exponential(150.0, len(times))
+        bid_expect = mid - half_spread - rng.exponential(5.0, len(times))
+        ask_expect = mid + half_spread + rng.exponential(5.0, len(times))
+        return pd.DataFrame({"datetime": times,
+                             "l2_bid_max": mid - half_spread,
+                             "l2_bid_vol": bid_vol,
+                             "l2_bid_expect": bid_expect,
+                             "l2_ask_min": mid + half_spread,
+                             "l2_ask_vol": ask_vol,
+                             "l2_ask_expect": ask_expect,
+                             "l2_bid_ask_expect": (bid_expect * bid_vol + ask_expect * ask_vol) / (bid_vol + ask_vol),
+                             "l2_bid_ask_vol": bid_vol + ask_vol},
+                            index=pd.DatetimeIndex(times, name="datetime"))
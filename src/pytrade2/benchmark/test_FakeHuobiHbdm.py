@@ -0,0 +1,126 @@
+import time
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from pytrade2.benchmark.FakeHuobiHbdm import FakeHuobiHbdm
+from pytrade2.exch.huobi.hbdm.HuobiRestClient import HuobiRestClient
+from pytrade2.exch.huobi.hbdm.HuobiWebSocketClient import HuobiWebSocketClient
+from pytrade2.exch.huobi.hbdm.feed.HuobiCandlesFeedHbdm import HuobiCandlesFeedHbdm
+from pytrade2.metrics.MetricServer import MetricServer
+
+
+class TestFakeHuobiHbdm(TestCase):
+    """ Real Huobi clients against the fake exchange """
+
+    def setUp(self):
+        self.metrics = MetricServer.metrics
+        MetricServer.metrics = MagicMock()
+        MetricServer.metrics.exchange.websocket.of_topic.return_value = (MagicMock(), MagicMock())
+        self.fake = FakeHuobiHbdm(close_after_ticks=1, ping_interval_sec=0.05).start()
+        self.rest_client = HuobiRestClient("key123", "secret123", base_url=self.fake.url)
+        self.clients = []
+
+    def tearDown(self):
+        for client in self.clients:
+            client.close()
+        self.fake.stop()
+        MetricServer.metrics = self.metrics
+
+    def new_ws_client(self, path: str, is_broker: bool) -> HuobiWebSocketClient:
+        client = HuobiWebSocketClient(host="127.0.0.1", path=path, access_key="key123", secret_key="secret123",
+                                      be_spot=False, is_broker=is_broker, base_url=self.fake.ws_url)
+        self.clients.append(client)
+        return client
+
+    @staticmethod
+    def wait_for(condition, timeout_sec: float = 5.0) -> bool:
+        deadline = time.monotonic() + timeout_sec
+        while time.monotonic() < deadline:
+            if condition():
+                return True
+            time.sleep(0.01)
+        return False
+
+    @staticmethod
+    def order_params(price: float) -> dict:
+        return {"contract_code": "BTC-USDT", "client_order_id": 123, "volume": 1, "direction": "BUY",
+                "price": price, "sl_trigger_price": price - 100, "sl_order_price": price - 101,
+                "tp_trigger_price": price + 100}
+
+    def test_websocket_should_push_subscribed_bbo_and_get_pongs(self):
+        consumer = MagicMock()
+        client = self.new_ws_client(FakeHuobiHbdm.market_path, is_broker=False)
+        client.add_consumer("market.btc-usdt.bbo", {"sub": "market.BTC-USDT.bbo"}, consumer)
+        client.open()
+        self.assertTrue(self.wait_for(lambda: self.fake.subscribers.get("market.btc-usdt.bbo")))
+
+        self.fake.aloop.run(self.fake.stream("BTC-USDT", rate=1000, count=3, start_price=100))
+
+        self.assertTrue(self.wait_for(lambda: consumer.on_socket_data.call_count == 3))
+        topic, msg = consumer.on_socket_data.call_args[0]
+        self.assertEqual("market.btc-usdt.bbo", topic)
+        self.assertEqual([104.0, 1.0], msg["tick"]["ask"])
+        self.assertEqual([103.0, 1.0], msg["tick"]["bid"])
+        self.assertTrue(self.wait_for(lambda: self.fake.pongs > 0))
+
+    def test_order_should_be_filled_notified_and_closed_after_ticks(self):
+        consumer = MagicMock()
+        client = self.new_ws_client(FakeHuobiHbdm.notification_path, is_broker=True)
+        client.add_consumer("orders_cross.btc-usdt", {"op": "sub", "topic": "orders_cross.btc-usdt"}, consumer)
+        client.open()
+        self.assertTrue(self.wait_for(lambda: self.fake.subscribers.get("orders_cross.btc-usdt")))
+        self.fake.aloop.run(self.fake.publish_bbo("BTC-USDT", 999.0, 1000.0))
+
+        res = self.rest_client.post("/linear-swap-api/v1/swap_cross_order", self.order_params(1000.0))
+        info = self.rest_client.post("/linear-swap-api/v1/swap_cross_order_info",
+                                     {"client_order_id": 123, "contract_code": "BTC-USDT"})
+        sltp = self.rest_client.post("/linear-swap-api/v1/swap_cross_relation_tpsl_order",
+                                     {"contract_code": "BTC-USDT", "order_id": res["data"]["order_id"]})
+        self.fake.aloop.run(self.fake.publish_bbo("BTC-USDT", 1001.0, 1002.0))
+
+        self.assertEqual("ok", res["status"])
+        self.assertEqual(6, info["data"][0]["status"])
+        self.assertEqual(1000.0, info["data"][0]["trade_avg_price"])
+        self.assertEqual([900.0, 1100.0], sorted(o["trigger_price"] for o in sltp["data"]["tpsl_order_info"]))
+        self.assertEqual(1, len(self.fake.order_latencies))
+        # Open, then close notifications
+        self.assertTrue(self.wait_for(lambda: consumer.on_socket_data.call_count == 2))
+        close_msg = consumer.on_socket_data.call_args[0][1]
+        self.assertEqual(("sell", 1001.0, "notify"),
+                         (close_msg["direction"], close_msg["trade_avg_price"], close_msg["op"]))
+        self.assertIsNone(self.fake.position)
+        history = self.rest_client.post("/linear-swap-api/v3/swap_cross_hisorders",
+                                        {"contract": "BTC-USDT", "trade_type": 18, "start_time": 0})
+        self.assertEqual([1001.0], [o["trade_avg_price"] for o in history["data"]])
+
+    def test_position_should_not_be_closed_before_confirmed(self):
+        self.fake.aloop.run(self.fake.publish_bbo("BTC-USDT", 999.0, 1000.0))
+        self.rest_client.post("/linear-swap-api/v1/swap_cross_order", self.order_params(1000.0))
+
+        self.fake.aloop.run(self.fake.publish_bbo("BTC-USDT", 1001.0, 1002.0))
+
+        self.assertIsNotNone(self.fake.position)
+
+    def test_position_should_be_closed_by_stop_loss(self):
+        self.fake.close_after_ticks = 100
+        self.fake.aloop.run(self.fake.publish_bbo("BTC-USDT", 999.0, 1000.0))
+        res = self.rest_client.post("/linear-swap-api/v1/swap_cross_order", self.order_params(1000.0))
+        self.rest_client.post("/linear-swap-api/v1/swap_cross_relation_tpsl_order",
+                              {"contract_code": "BTC-USDT", "order_id": res["data"]["order_id"]})
+
+        self.fake.aloop.run(self.fake.publish_bbo("BTC-USDT", 950.0, 951.0))
+        self.assertIsNotNone(self.fake.position)
+        self.fake.aloop.run(self.fake.publish_bbo("BTC-USDT", 899.0, 900.0))
+        self.assertIsNone(self.fake.position)
+
+    def test_kline_history_should_return_published_candles(self):
+        for price in [100.0, 105.0, 95.0]:
+            self.fake.aloop.run(self.fake.publish_kline("BTC-USDT", "1day", price))
+
+        res = self.rest_client.get("/linear-swap-ex/market/history/kline",
+                                   {"contract_code": "BTC-USDT", "period": "1day", "size": 10})
+        candles = HuobiCandlesFeedHbdm.rawcandles2list(res)
+
+        self.assertEqual(1, len(candles))
+        self.assertEqual((100.0, 105.0, 95.0, 95.0, 3),
+                         tuple(candles[0][col] for col in ["open", "high", "low", "close", "vol"]))
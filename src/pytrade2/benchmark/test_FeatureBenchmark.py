@@ -0,0 +1,63 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+from pytrade2.benchmark.FeatureBenchmark import FeatureBenchmark
+
+
+class TestFeatureBenchmark(TestCase):
+
+    @staticmethod
+    def results_of(*results):
+        return {"meta": {}, "results": [{"case": case, "scale": "1d", "rows": 1440, "time_min_sec": time_sec,
+                                         "time_median_sec": time_sec, "peak_mem_mb": mem_mb}
+                                        for case, time_sec, mem_mb in results]}
+
+    def test_run_should_measure_each_case_and_scale(self):
+        benchmark = FeatureBenchmark(repeat=1, tick_scale_max="10min", level2_levels=10)
+
+        results = benchmark.run(scales=["12h", "1d"])
+
+        self.assertEqual(2 * len(benchmark.cases), len(results["results"]))
+        for result in results["results"]:
+            self.assertGreater(result["rows"], 0)
+            self.assertGreater(result["time_min_sec"], 0)
+            self.assertGreaterEqual(result["peak_mem_mb"], 0)
+        self.assertEqual(1, results["meta"]["repeat"])
+        json.dumps(results)
+
+    def test_run_should_raise_on_unknown_case(self):
+        with self.assertRaises(ValueError):
+            FeatureBenchmark().run(scales=["1h"], cases=["no_such_case"])
+
+    def test_tick_scale_should_be_limited(self):
+        self.assertEqual("1d", FeatureBenchmark(tick_scale_max="1d").tick_scale_of("30d"))
+        self.assertEqual("1h", FeatureBenchmark(tick_scale_max="1d").tick_scale_of("1h"))
+
+    def test_compare_should_flag_regressions_above_threshold(self):
+        baseline = self.results_of(("slower", 1.0, 100), ("bigger", 1.0, 100), ("same", 1.0, 100))
+        current = self.results_of(("slower", 1.5, 100), ("bigger", 1.0, 150), ("same", 1.1, 110))
+
+        regressions = FeatureBenchmark.compare(baseline, current, threshold=0.2)
+
+        self.assertEqual([("slower", "time_min_sec"), ("bigger", "peak_mem_mb")],
+                         [(r["case"], r["metric"]) for r in regressions])
+        self.assertAlmostEqual(1.5, regressions[0]["ratio"])
+
+    def test_compare_should_skip_noise_and_new_cases(self):
+        baseline = self.results_of(("tiny", 0.001, 0.1))
+        current = self.results_of(("tiny", 0.004, 0.9), ("new", 10, 1000))
+
+        self.assertEqual([], FeatureBenchmark.compare(baseline, current))
+
+    def test_main_compare_should_exit_1_on_regressions(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            baseline_path, current_path = os.path.join(tmp_dir, "base.json"), os.path.join(tmp_dir, "cur.json")
+            with open(baseline_path, "w") as file:
+                json.dump(self.results_of(("case", 1.0, 100)), file)
+            with open(current_path, "w") as file:
+                json.dump(self.results_of(("case", 2.0, 100)), file)
+
+            self.assertEqual(1, FeatureBenchmark.main(["compare", baseline_path, current_path]))
+            self.assertEqual(0, FeatureBenchmark.main(["compare", baseline_path, baseline_path]))
@@ -0,0 +1,58 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from pytrade2.benchmark.LatencyBenchmark import LatencyBenchmark
+from pytrade2.metrics.MetricServer import MetricServer
+
+
+class TestLatencyBenchmark(TestCase):
+
+    def setUp(self):
+        self.metrics = MetricServer.metrics
+        MetricServer.metrics = MagicMock()
+        MetricServer.metrics.exchange.websocket.of_topic.return_value = (MagicMock(), MagicMock())
+
+    def tearDown(self):
+        MetricServer.metrics = self.metrics
+
+    def test_percentiles_ms(self):
+        percentiles = LatencyBenchmark.percentiles_ms([0.001 * i for i in range(1, 101)])
+
+        self.assertEqual(100, percentiles["count"])
+        self.assertAlmostEqual(50.5, percentiles["p50"])
+        self.assertAlmostEqual(100, percentiles["max"])
+        self.assertIsNone(LatencyBenchmark.percentiles_ms([])["p99"])
+
+    def test_step_report_should_match_processed_ticks_by_price(self):
+        benchmark = LatencyBenchmark(max_lag_ms=50)
+        stream = {"sent": 3, "rate": 10.0}
+        stats = {"tick_times": [[100.0, 1.0], [102.0, 1.1], [104.0, 1.2]], "order_latencies": [0.005]}
+
+        report = benchmark.step_report(10, stream, stats, {100.0: 1.01, 104.0: 1.22}, last_ask=104.0)
+
+        self.assertEqual(2, report["processed"])
+        self.assertAlmostEqual(20, report["last_tick_lag_ms"])
+        self.assertAlmostEqual(5, report["order_latency_ms"]["p50"])
+        self.assertTrue(report["is_sustained"])
+
+    def test_step_report_should_not_be_sustained_if_last_tick_is_lost(self):
+        benchmark = LatencyBenchmark(max_lag_ms=50)
+        stream = {"sent": 2, "rate": 10.0}
+        stats = {"tick_times": [[100.0, 1.0], [102.0, 1.1]], "order_latencies": []}
+
+        report = benchmark.step_report(10, stream, stats, {100.0: 1.01}, last_ask=102.0)
+
+        self.assertIsNone(report["last_tick_lag_ms"])
+        self.assertFalse(report["is_sustained"])
+
+    def test_run_should_trade_against_fake_exchange(self):
+        benchmark = LatencyBenchmark(rates=[5], duration_sec=1, in_process=True, max_lag_ms=10000)
+
+        report = benchmark.run()
+
+        step = report["steps"][0]
+        self.assertEqual(5, step["sent"])
+        self.assertGreater(step["orders"], 0)
+        self.assertGreater(step["processed"], 0)
+        self.assertIsNotNone(step["order_latency_ms"]["p99"])
+        self.assertEqual(5, report["max_sustainable_rate"])
@@ -0,0 +1,49 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from pytrade2.benchmark.SyntheticData import SyntheticData
+
+
+class TestSyntheticData(TestCase):
+
+    def test_candles_1min_should_be_consistent(self):
+        candles = SyntheticData().candles_1min("1d")
+
+        self.assertEqual(1440, len(candles))
+        self.assertTrue(candles.index.is_monotonic_increasing)
+        self.assertTrue((candles["high"] >= candles[["open", "close"]].max(axis=1)).all())
+        self.assertTrue((candles["low"] <= candles[["open", "close"]].min(axis=1)).all())
+
+    def test_candles_1min_should_have_gaps(self):
+        candles = SyntheticData().candles_1min("1d", gaps=3)
+
+        self.assertLess(len(candles), 1440)
+        self.assertTrue((candles.index.to_series().diff().dropna() > pd.Timedelta("1min")).any())
+
+    def test_same_seed_should_give_same_data(self):
+        pd.testing.assert_frame_equal(SyntheticData(seed=2).bid_ask("10min"), SyntheticData(seed=2).bid_ask("10min"))
+        self.assertFalse(SyntheticData(seed=2).bid_ask("10min").equals(SyntheticData(seed=3).bid_ask("10min")))
+
+    def test_bid_ask_should_have_spread(self):
+        bid_ask = SyntheticData().bid_ask("10min", freq="1s")
+
+        self.assertEqual(600, len(bid_ask))
+        self.assertTrue((bid_ask["ask"] > bid_ask["bid"]).all())
+
+    def test_level2_should_have_levels_of_each_side(self):
+        level2 = SyntheticData().level2("1min", freq="10s", levels=150)
+
+        self.assertEqual(6 * 300, len(level2))
+        snapshot = level2[level2["datetime"] == level2["datetime"].iloc[0]]
+        self.assertEqual(150, snapshot["bid"].notna().sum())
+        self.assertEqual(150, snapshot["ask"].notna().sum())
+        self.assertLess(snapshot["bid"].max(), snapshot["ask"].min())
+
+    def test_level2_1min_should_have_preprocessed_columns(self):
+        level2 = SyntheticData().level2_1min("1h")
+
+        self.assertEqual(60, len(level2))
+        self.assertTrue({"l2_bid_max", "l2_ask_min", "l2_bid_expect", "l2_ask_expect"}.issubset(level2.columns))
+        self.assertTrue(np.all(level2["l2_bid_max"] < level2["l2_ask_min"]))
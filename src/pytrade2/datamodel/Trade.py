@@ -1,4 +1,4 @@
-from sqlalchemy import DateTime, Column, Float, String
+from sqlalchemy import DateTime, Column, Float, String, Index
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -12,6 +12,8 @@ class Trade(Base):
     """
 
     __tablename__ = "trade"
+    # Opened trade lookup
+    __table_args__ = (Index("ix_trade_status_open_time", "status", "open_time"),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     ticker: Mapped[str] = mapped_column(String)
@@ -18,9 +18,20 @@ class AccountManagerBase:
         self.data_dir = Path(config["pytrade2.data.dir"], config["pytrade2.strategy"], "account")
         self.data_dir.mkdir(parents=True, exist_ok=True)
 
-        threading.Timer(self._write_interval_sec, self.write).start()
+        self._schedule_write()
+
+    def _schedule_write(self):
+        """ Periodical write, daemon timer does not keep the process alive """
+        timer = threading.Timer(self._write_interval_sec, self.write)
+        timer.daemon = True
+        timer.start()
 
     def write(self):
+        """ Write buffer to history and schedule next write """
+        self.flush()
+        self._schedule_write()
+
+    def flush(self):
         """ Write buffer to history """
         if self._buffer:
             self._logger.debug(f"Writing account updates to dir {self.data_dir}")
@@ -40,6 +51,3 @@ class AccountManagerBase:
 
         else:
             self._logger.debug("No new account updates to write ")
-
-        # Schedule next write
-        threading.Timer(self._write_interval_sec, self.write).start()
@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Callable, Coroutine, Optional
+
+
+class AsyncioLoop:
+    """
+    One asyncio event loop in one daemon thread, shared by exchange transport clients.
+    Blocking code of strategies, brokers and feeds calls coroutines through run() bridge.
+    """
+
+    def __init__(self, name: str = "asyncio-loop"):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self.name = name
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> asyncio.AbstractEventLoop:
+        """ Start the loop thread once, return the loop """
+        with self._lock:
+            if not self.loop:
+                self.loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._run_forever, name=self.name, daemon=True)
+                self._thread.start()
+                self._logger.info(f"Event loop {self.name} started")
+        return self.loop
+
+    def _run_forever(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def stop(self):
+        """ Stop the loop and wait for the thread """
+        with self._lock:
+            if not self.loop:
+                return
+            loop, thread = self.loop, self._thread
+            self.loop, self._thread = None, None
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not threading.current_thread():
+            thread.join()
+        loop.close()
+        self._logger.info(f"Event loop {self.name} stopped")
+
+    def in_loop_thread(self) -> bool:
+        """ Is current code running inside the loop thread """
+        return self._thread is threading.current_thread()
+
+    def submit(self, coro: Coroutine) -> Future:
+        """ Schedule the coroutine from any thread """
+        return asyncio.run_coroutine_threadsafe(coro, self.start())
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None):
+        """ Blocking bridge: run the coroutine in the loop and wait for the result """
+        if self.in_loop_thread():
+            coro.close()
+            raise RuntimeError("Blocking call inside event loop thread would deadlock")
+        return self.submit(coro).result(timeout)
+
+    def call_soon(self, func: Callable, *args):
+        """ Call the function inside the loop thread """
+        self.start().call_soon_threadsafe(func, *args)
@@ -4,11 +4,8 @@ from pathlib import Path
 from threading import RLock
 from typing import Optional, Dict
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-
 from pytrade2.datamodel.Trade import Trade
-from pytrade2.datamodel.TradeStatus import TradeStatus
+from pytrade2.exch.TradeJournal import TradeJournal
 from pytrade2.metrics.MetricServer import MetricServer
 
 
@@ -50,9 +47,8 @@ class Broker:
         Path(data_dir).mkdir(parents=True, exist_ok=True)
         db_path = f"{data_dir}/{strategy}.db"
         self._logger.info(f"Init database, path: {db_path}")
-        engine = create_engine(f"sqlite:///{db_path}")
-        Trade.metadata.create_all(engine)
-        self.db_session = sessionmaker(engine)()
+        # Session-like journal, writes in background
+        self.db_session = TradeJournal(db_path)
 
     def run(self):
         pass
@@ -79,10 +75,7 @@ class Broker:
 
     def read_last_opened_trade(self) -> Trade:
         """ Returns current opened trade, stored in db or none """
-        return self.db_session \
-            .query(Trade) \
-            .where(Trade.status.isnot(TradeStatus.closed)) \
-            .order_by(Trade.open_time.desc()).first()
+        return self.db_session.read_last_opened_trade()
 
     def update_cur_trade_status(self):
         """ Update current trade sl/tp status from exchange.
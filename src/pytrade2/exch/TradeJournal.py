@@ -0,0 +1,128 @@
+import atexit
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Optional, List
+
+from sqlalchemy import create_engine, event, select, func
+from sqlalchemy.dialects.sqlite import insert
+
+from pytrade2.datamodel.Trade import Trade
+from pytrade2.datamodel.TradeStatus import TradeStatus
+
+
+class TradeJournal:
+    """
+    Trade persistence off the trading path: session-like add() and commit() put trade snapshots
+    to a bounded queue, background writer thread upserts them to WAL-mode SQLite with group commit.
+    Commit of a newly added trade waits until it is durable, other commits do not wait.
+    """
+
+    def __init__(self, db_path: str, queue_size: int = 1000, batch_size: int = 100):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.engine = create_engine(f"sqlite:///{db_path}")
+        event.listen(self.engine, "connect", self._on_connect)
+        Trade.metadata.create_all(self.engine)
+        # Indexes are created with new table only, ensure they exist in older databases
+        for index in Trade.__table__.indexes:
+            index.create(self.engine, checkfirst=True)
+        self._columns = [column.key for column in Trade.__table__.columns]
+
+        # Trades to save on commit, new trades not saved yet
+        self._lock = threading.RLock()
+        self._tracked: List[Trade] = []
+        self._new: List[Trade] = []
+        with self.engine.connect() as conn:
+            self._last_id = conn.execute(select(func.max(Trade.id))).scalar() or 0
+
+        # Queue of (trade snapshots, future)
+        self._queue = queue.Queue(queue_size)
+        self._writer = threading.Thread(target=self._write_loop, name="TradeJournalWriter", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    @staticmethod
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=FULL")
+        cursor.close()
+
+    def add(self, trade: Trade):
+        """ Track new trade, it will be saved on commit """
+        with self._lock:
+            if trade.id is None:
+                self._last_id += 1
+                trade.id = self._last_id
+            if not any(t is trade for t in self._tracked):
+                self._tracked.append(trade)
+                self._new.append(trade)
+
+    def commit(self, timeout: Optional[float] = None) -> Future:
+        """
+        Save snapshots of tracked trades in background.
+        If new trades were added, wait until they are written to disk.
+        """
+        with self._lock:
+            snapshots = [self._snapshot(trade) for trade in self._tracked]
+            has_new = bool(self._new)
+            self._new = []
+            # Closed trades will not change anymore
+            self._tracked = [t for t in self._tracked if t.status != TradeStatus.closed]
+        future = Future()
+        self._queue.put((snapshots, future))
+        if has_new:
+            future.result(timeout)
+        return future
+
+    def flush(self, timeout: Optional[float] = None):
+        """ Wait until all commits are written """
+        self.commit().result(timeout)
+
+    def close(self):
+        if self._writer.is_alive():
+            self.flush(timeout=10)
+
+    def read_last_opened_trade(self) -> Optional[Trade]:
+        """ Last not closed trade, it is tracked for next commits """
+        with self.engine.connect() as conn:
+            row = conn.execute(select(Trade.__table__)
+                               .where(Trade.status.isnot(TradeStatus.closed))
+                               .order_by(Trade.open_time.desc())
+                               .limit(1)).first()
+        if not row:
+            return None
+        trade = Trade(**row._asdict())
+        with self._lock:
+            self._tracked.append(trade)
+        return trade
+
+    def _snapshot(self, trade: Trade) -> dict:
+        return {column: getattr(trade, column) for column in self._columns}
+
+    def _write_loop(self):
+        """ Take all queued commits and write them in one transaction """
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            # Latest snapshot of each trade
+            snapshots = {snapshot["id"]: snapshot for snapshots, _ in batch for snapshot in snapshots}
+            try:
+                if snapshots:
+                    with self.engine.begin() as conn:
+                        for snapshot in snapshots.values():
+                            stmt = insert(Trade.__table__).values(snapshot)
+                            conn.execute(stmt.on_conflict_do_update(index_elements=["id"], set_=snapshot))
+                for _, future in batch:
+                    future.set_result(len(snapshots))
+            except Exception as e:
+                self._logger.error(f"Error writing trades: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
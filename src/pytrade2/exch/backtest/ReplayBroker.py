@@ -0,0 +1,131 @@
+from typing import Optional, List, Dict
+
+from pytrade2.datamodel.Trade import Trade
+from pytrade2.datamodel.TradeStatus import TradeStatus
+from pytrade2.exch.Broker import Broker
+from pytrade2.exch.backtest.ReplayClock import ReplayClock
+
+
+class ReplayBroker(Broker):
+    """
+    Simulated broker for the replay. Market orders are filled at replayed bid/ask,
+    stop loss, take profit and trailing stop are filled by bid/ask of next tickers.
+    Trades are kept in memory, nothing is written to database.
+    """
+
+    def __init__(self, config: dict, clock: ReplayClock):
+        self.clock = clock
+        self.trades: List[Trade] = []
+        self.bid = self.ask = None
+        self.is_ticker_replayed = False
+        super().__init__(config)
+        self.allow_trade = True
+        # Fee of the price for each side, like Broker.fee
+        self.fee = float(config.get("pytrade2.backtest.fee", 0))
+
+    def __init_db__(self, config: Dict[str, str]):
+        self.db_session = None
+
+    def read_last_opened_trade(self) -> Optional[Trade]:
+        return None
+
+    def update_cur_trade_status(self):
+        """ Trade status is updated on each ticker, nothing to reconcile """
+        pass
+
+    def on_ticker(self, ticker: dict):
+        self.is_ticker_replayed = True
+        self.update_price(ticker.get("bid"), ticker.get("ask"))
+
+    def on_candle(self, candle: dict):
+        """ If bid/ask was not recorded, trade by candles close price """
+        if not self.is_ticker_replayed:
+            self.update_price(candle["close"], candle["close"])
+
+    def update_price(self, bid: Optional[float], ask: Optional[float]):
+        self.bid, self.ask = bid, ask
+        if self.cur_trade:
+            self.check_cur_trade_exit()
+
+    def create_cur_trade(self, symbol: str, direction: int,
+                         quantity: float,
+                         price: Optional[float],
+                         stop_loss_price: float,
+                         take_profit_price: Optional[float],
+                         trailing_delta: Optional[float]) -> Optional[Trade]:
+        """ Open the trade by market: buy at ask, sell at bid """
+        with self.trade_lock:
+            if self.cur_trade or direction not in {1, -1}:
+                return None
+            market_price = self.ask if direction == 1 else self.bid
+            open_price = market_price if market_price is not None else price
+            if open_price is None:
+                self._logger.info("Cannot open the trade, no price yet")
+                return None
+            self.cur_trade = Trade(ticker=symbol, side=Trade.order_side_names[direction],
+                                   open_time=self.clock.now(), open_price=open_price,
+                                   open_order_id=str(len(self.trades) + 1),
+                                   stop_loss_price=stop_loss_price, take_profit_price=take_profit_price,
+                                   stop_loss_order_id=None, trailing_delta=trailing_delta,
+                                   quantity=quantity, status=TradeStatus.opened)
+            self.last_trade_time = self.clock.now()
+            self._logger.debug(f"Opened trade {self.cur_trade}")
+            return self.cur_trade
+
+    def check_cur_trade_exit(self):
+        """ Move trailing stop, close the trade if stop loss or take profit is reached """
+        trade = self.cur_trade
+        direction = trade.direction()
+        # Closing is by bid for buy, by ask for sell
+        close_price, trail_price = (self.bid, self.ask) if direction == 1 else (self.ask, self.bid)
+        if close_price is None:
+            return
+
+        if trade.trailing_delta and trail_price is not None and trade.take_profit_price is not None \
+                and direction * (trail_price - trade.take_profit_price) > 0:
+            # Like TrailingStopSupport: take profit follows the price, stop loss follows take profit
+            trade.take_profit_price = trail_price
+            trade.stop_loss_price = trail_price - direction * trade.trailing_delta
+
+        if trade.stop_loss_price is not None and direction * (close_price - trade.stop_loss_price) <= 0:
+            # Stop is a market order after trigger
+            self.close_cur_trade(close_price)
+        elif not trade.trailing_delta and trade.take_profit_price is not None \
+                and direction * (close_price - trade.take_profit_price) >= 0:
+            self.close_cur_trade(trade.take_profit_price)
+
+    def close_cur_trade(self, close_price: float):
+        with self.trade_lock:
+            trade = self.cur_trade
+            trade.close_price = close_price
+            trade.close_time = self.clock.now()
+            trade.close_order_id = f"{trade.open_order_id}-close"
+            trade.status = TradeStatus.closed
+            self.trades.append(trade)
+            self.cur_trade, self.prev_trade = None, trade
+            self._logger.debug(f"Closed trade {trade}")
+
+    def profit_of(self, trade: Trade) -> float:
+        """ Trade profit with fees """
+        return (trade.direction() * (trade.close_price - trade.open_price)
+                - self.fee * (trade.open_price + trade.close_price)) * float(trade.quantity)
+
+    def pnl_report(self) -> dict:
+        """ Profit and loss of closed trades """
+        profits = [self.profit_of(trade) for trade in self.trades]
+        return {"trades": len(profits),
+                "wins": sum(1 for profit in profits if profit > 0),
+                "losses": sum(1 for profit in profits if profit <= 0),
+                "pnl": sum(profits),
+                "max_drawdown": self.max_drawdown(profits),
+                "open_trade": str(self.cur_trade) if self.cur_trade else None}
+
+    @staticmethod
+    def max_drawdown(profits: List[float]) -> float:
+        """ Max fall of cumulative profit from its previous max """
+        cum = max_cum = drawdown = 0.0
+        for profit in profits:
+            cum += profit
+            max_cum = max(max_cum, cum)
+            drawdown = max(drawdown, max_cum - cum)
+        return drawdown
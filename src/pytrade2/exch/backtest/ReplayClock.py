@@ -0,0 +1,15 @@
+from datetime import datetime
+from typing import Optional
+
+
+class ReplayClock:
+    """ Simulated time of the replay, moved forward by replayed events, not by wall clock """
+
+    def __init__(self, time: Optional[datetime] = None):
+        self.time = time
+
+    def now(self) -> Optional[datetime]:
+        return self.time
+
+    def set(self, time: datetime):
+        self.time = time
@@ -0,0 +1,195 @@
+import logging
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from pytrade2.exch.Exchange import Exchange
+from pytrade2.exch.backtest.ReplayClock import ReplayClock
+from pytrade2.exch.backtest.ReplayExchange import ReplayExchange
+from pytrade2.feed.OrderBookSnapshot import OrderBookSnapshot
+from pytrade2.feed.history.HistoryStorage import HistoryStorage
+from pytrade2.metrics.MetricServer import MetricServer
+from pytrade2.metrics.Metrics import Metrics
+from pytrade2.strategy.common.RiskManager import RiskManager
+from pytrade2.strategy.common.StrategyBase import StrategyBase
+
+
+class ReplayEngine:
+    """
+    Deterministic backtest: recorded raw candles, bid/ask and level2 of DataStreamDownloadApp are replayed in time order
+    through the same consumer interfaces as live feeds, as fast as possible, with simulated clock and broker.
+    Strategy learns and processes the data by simulated time instead of its own threads and timers.
+    """
+
+    # Order of events of the same time
+    CANDLE, LEVEL2, BID_ASK = 0, 1, 2
+
+    def __init__(self, config: dict):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self.config = config
+        self.ticker = config["pytrade2.tickers"].split(",")[-1]
+        self.storage = HistoryStorage.of_config(config)
+        self.raw_dir = Path(config.get("pytrade2.backtest.data.dir") or Path(config["pytrade2.data.dir"], "raw"))
+        self.start = pd.Timestamp(config["pytrade2.backtest.start"]) \
+            if config.get("pytrade2.backtest.start") else None
+        self.end = pd.Timestamp(config["pytrade2.backtest.end"]) if config.get("pytrade2.backtest.end") else None
+
+        self.clock = ReplayClock()
+        self.exchange = ReplayExchange(config, self.clock)
+        # Strategies get replay exchange by configured exchange name
+        self.exchange_provider = Exchange(config)
+        self.exchange_provider.exchanges[config["pytrade2.exchange"]] = self.exchange
+        if not MetricServer.has_metrics():
+            MetricServer.metrics = Metrics("pytrade2", "ReplayEngine")
+
+        self.candles = self.bid_ask = self.level2 = pd.DataFrame()
+
+    def read_data(self):
+        """ Read recorded data of the ticker and time range """
+        self.candles = self.read_history("candles", "close_time")
+        self.bid_ask = self.read_history("bid_ask", "datetime")
+        self.level2 = self.read_history("level2", "datetime")
+        self.exchange.websocket_feed().candles = self.candles
+        self._logger.info(f"Read {len(self.candles)} candles, {len(self.bid_ask)} bid ask, "
+                          f"{len(self.level2)} level2 items from {self.raw_dir}")
+
+    def read_history(self, tag: str, time_col: str) -> pd.DataFrame:
+        """ Daily files of the tag, sorted by time """
+        data_dir = Path(self.raw_dir, tag)
+        files = [file for file in self.storage.list_files(str(data_dir)) if f"_{self.ticker}_" in file]
+        if self.start is not None:
+            files = [file for file in files if file[:10] >= str(self.start.date())]
+        if self.end is not None:
+            files = [file for file in files if file[:10] <= str(self.end.date())]
+        dfs = [self.storage.read(Path(data_dir, file), start=self.start, end=self.end, datetime_col=time_col)
+               for file in files]
+        dfs = [df for df in dfs if not df.empty]
+        if not dfs:
+            return pd.DataFrame()
+        df = pd.concat(dfs, ignore_index=True)
+        df[time_col] = pd.to_datetime(df[time_col])
+        return df.sort_values(time_col, kind="stable", ignore_index=True)
+
+    def new_strategy(self, strategy_class) -> StrategyBase:
+        """ Strategy with replay exchange """
+        return strategy_class(config=self.config, exchange_provider=self.exchange_provider)
+
+    def prepare_strategy(self, strategy: StrategyBase):
+        """ Do what strategy run() does, but don't start the threads and feeds """
+        strategy.broker = self.exchange_provider.broker(self.config["pytrade2.exchange"])
+        strategy.risk_manager = RiskManager(strategy.broker, strategy._wait_after_loss)
+        if strategy.candles_feed:
+            # Candles come from the replay only
+            strategy.candles_feed.is_history_loaded = True
+            strategy.candles_feed.now = self.clock.now
+
+    def events(self) -> (np.ndarray, np.ndarray, np.ndarray):
+        """ Times, kinds and row positions of all events in replay order. Level2 rows of the same time are one event """
+        candle_times = self.times_of(self.candles, "close_time")
+        bid_ask_times = self.times_of(self.bid_ask, "datetime")
+        level2_times = self.times_of(self.level2, "datetime")
+        level2_starts = np.flatnonzero(np.diff(level2_times, prepend=np.int64(level2_times[0] - 1))) \
+            if len(level2_times) else np.empty(0, dtype=np.int64)
+
+        times = np.concatenate([candle_times, level2_times[level2_starts], bid_ask_times])
+        kinds = np.concatenate([np.full(len(candle_times), self.CANDLE),
+                                np.full(len(level2_starts), self.LEVEL2),
+                                np.full(len(bid_ask_times), self.BID_ASK)])
+        rows = np.concatenate([np.arange(len(candle_times)), level2_starts, np.arange(len(bid_ask_times))])
+        order = np.lexsort((kinds, times))
+        return times[order], kinds[order], rows[order]
+
+    @staticmethod
+    def times_of(df: pd.DataFrame, col: str) -> np.ndarray:
+        if df.empty:
+            return np.empty(0, dtype=np.int64)
+        return df[col].to_numpy(dtype="datetime64[ns]").view(np.int64)
+
+    def run(self, strategy: StrategyBase) -> dict:
+        """ Replay all events through the strategy, return throughput and pnl report """
+        if self.candles.empty and self.bid_ask.empty and self.level2.empty:
+            self.read_data()
+        self.prepare_strategy(strategy)
+        feed = self.exchange.websocket_feed()
+        broker = strategy.broker
+
+        # Strategy timers are replaced by simulated schedule
+        learn_interval, strategy.learn_interval = strategy.learn_interval, None
+        processing_interval = strategy.processing_interval
+        next_learn_time: Optional[pd.Timestamp] = None
+        next_process_time: Optional[pd.Timestamp] = None
+
+        candles = self.candles.to_dict("records")
+        bid_ask_cols = [self.column_of(self.bid_ask, col) for col in ["bid", "bid_vol", "ask", "ask_vol"]]
+        bid_ask_symbols = self.column_of(self.bid_ask, "symbol", self.ticker)
+        level2 = self.level2
+        level2_times = self.times_of(level2, "datetime")
+        level2_bids = np.column_stack([self.column_of(level2, "bid"), self.column_of(level2, "bid_vol")])
+        level2_asks = np.column_stack([self.column_of(level2, "ask"), self.column_of(level2, "ask_vol")])
+        level2_symbols = self.column_of(level2, "symbol", self.ticker)
+
+        times, kinds, rows = self.events()
+        start_time = time.perf_counter()
+        processed = learned = 0
+        for time_ns, kind, row in zip(times.tolist(), kinds.tolist(), rows.tolist()):
+            now = pd.Timestamp(time_ns)
+            self.clock.set(now)
+
+            # Replay the event
+            if kind == self.BID_ASK:
+                bid, bid_vol, ask, ask_vol = (col[row] for col in bid_ask_cols)
+                feed.on_ticker({"datetime": now, "symbol": bid_ask_symbols[row],
+                                "bid": bid, "bid_vol": bid_vol, "ask": ask, "ask_vol": ask_vol})
+            elif kind == self.LEVEL2:
+                end = int(np.searchsorted(level2_times, time_ns, side="right"))
+                bids, asks = level2_bids[row:end], level2_asks[row:end]
+                feed.on_level2_snapshot(OrderBookSnapshot(now, level2_symbols[row],
+                                                          bids[~np.isnan(bids[:, 0])], asks[~np.isnan(asks[:, 0])]))
+            else:
+                feed.on_candle(candles[row])
+
+            # Learn by simulated schedule when feeds have enough history
+            if strategy.is_learn_enabled and (next_learn_time is None or now >= next_learn_time) \
+                    and (learn_interval or not strategy.is_learned) and self.has_min_history(strategy):
+                strategy.learn()
+                learned += 1
+                next_learn_time = now + learn_interval if learn_interval else None
+
+            # Process new data like processing loop, not often than processing interval
+            if strategy.is_learned and (next_process_time is None or now >= next_process_time) \
+                    and (strategy.is_periodical or strategy.new_data_event.is_set()):
+                strategy.new_data_event.clear()
+                strategy.process_new_data()
+                processed += 1
+                next_process_time = now + processing_interval
+
+        duration = time.perf_counter() - start_time
+        # Leave the feeds with all replayed data
+        strategy.apply_buffers()
+        strategy.learn_interval = learn_interval
+        report = {"events": len(times),
+                  "duration_sec": duration,
+                  "events_per_sec": len(times) / duration if duration > 0 else 0.0,
+                  "start": str(pd.Timestamp(times[0])) if len(times) else None,
+                  "end": str(pd.Timestamp(times[-1])) if len(times) else None,
+                  "learned": learned,
+                  "processed": processed}
+        report.update(broker.pnl_report())
+        self._logger.info(f"Replay completed: {report}")
+        return report
+
+    @staticmethod
+    def has_min_history(strategy: StrategyBase) -> bool:
+        """ Apply new data and check the history is enough to learn """
+        strategy.apply_buffers()
+        return all(feed.has_min_history() for feed in strategy._feeds)
+
+    @staticmethod
+    def column_of(df: pd.DataFrame, col: str, default=np.nan) -> np.ndarray:
+        """ Column values, default values if the column was not recorded """
+        if col in df.columns:
+            return df[col].to_numpy(dtype=np.float64 if default is np.nan else object)
+        return np.full(len(df), default, dtype=np.float64 if default is np.nan else object)
@@ -0,0 +1,32 @@
+import logging
+from typing import Optional
+
+from pytrade2.exch.backtest.ReplayBroker import ReplayBroker
+from pytrade2.exch.backtest.ReplayClock import ReplayClock
+from pytrade2.exch.backtest.ReplayFeed import ReplayFeed
+
+
+class ReplayExchange:
+    """ Exchange of recorded data replay: one feed for market data and candles, simulated broker """
+
+    def __init__(self, config: dict, clock: ReplayClock = None):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self.config = config
+        self.clock = clock or ReplayClock()
+        self.__feed: Optional[ReplayFeed] = None
+        self.__broker: Optional[ReplayBroker] = None
+
+    def websocket_feed(self) -> ReplayFeed:
+        if not self.__feed:
+            self.__feed = ReplayFeed(self.config)
+        return self.__feed
+
+    def candles_feed(self) -> ReplayFeed:
+        return self.websocket_feed()
+
+    def broker(self) -> ReplayBroker:
+        if not self.__broker:
+            self.__broker = ReplayBroker(self.config, self.clock)
+            # Simulated fills by replayed bid/ask
+            self.websocket_feed().consumers.add(self.__broker)
+        return self.__broker
@@ -0,0 +1,58 @@
+import logging
+from datetime import datetime
+from typing import List, Dict
+
+import pandas as pd
+
+from pytrade2.feed.OrderBookSnapshot import OrderBookSnapshot
+
+
+class ReplayFeed:
+    """
+    Websocket and candles feed of the replay exchange.
+    Replay engine pushes recorded events here, they go to consumers like from live exchange feeds.
+    """
+
+    def __init__(self, config: dict):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self.consumers = set()
+        # Recorded candles are 1min, strategy periods are aggregated by consumers from them
+        periods_str = config.get("pytrade2.feed.candles.periods", "1min") or "1min"
+        self.candle_periods = [s.strip() for s in str(periods_str).replace("'", "").split(",") if s.strip()]
+        # Recorded 1min candles to read like from exchange rest
+        self.candles = pd.DataFrame()
+
+    def run(self):
+        """ Replay engine pushes the events, nothing to run """
+        pass
+
+    def on_ticker(self, ticker: dict):
+        for consumer in [c for c in self.consumers if hasattr(c, 'on_ticker')]:
+            consumer.on_ticker(ticker)
+
+    def on_level2_snapshot(self, snapshot: OrderBookSnapshot):
+        for consumer in self.consumers:
+            if hasattr(consumer, 'on_level2_snapshot'):
+                consumer.on_level2_snapshot(snapshot)
+            elif hasattr(consumer, 'on_level2'):
+                consumer.on_level2(snapshot.to_dicts())
+
+    def on_candle(self, candle: dict):
+        """ Send the candle for each strategy period """
+        for consumer in [c for c in self.consumers if hasattr(c, 'on_candle')]:
+            for period in self.candle_periods:
+                consumer.on_candle({**candle, "interval": period})
+
+    def read_candles(self, ticker: str, interval: str, limit: int, from_: datetime = None, to: datetime = None) \
+            -> List[Dict]:
+        """ Recorded candles like from exchange rest, used to fill the gaps """
+        candles = self.candles
+        if candles.empty:
+            return []
+        if from_ is not None:
+            candles = candles[candles["close_time"] >= pd.Timestamp(from_)]
+        if to is not None:
+            candles = candles[candles["close_time"] <= pd.Timestamp(to)]
+        if limit:
+            candles = candles.tail(limit)
+        return candles.assign(interval=interval).to_dict("records")
@@ -0,0 +1,161 @@
+import itertools
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from pytrade2.features.LowHighTargets import LowHighTargets
+
+
+class VectorBacktest:
+    """
+    Fast backtest of signal strategies over precomputed features, without event replay.
+    All rows are predicted in one model call. Stop loss and take profit exits are searched in forward low/high windows
+    of candles by numpy, like targets of LowHighTargets. Parameter sweeps run in a process pool.
+    Predictions are signal column of SignalClassificationStrategy
+    or fut_low_diff, fut_high_diff columns of LgbLowHighRegressionStrategy.
+    """
+
+    def __init__(self, candles: pd.DataFrame, predict_window: str, period: str = "1min", fee: float = 0.0,
+                 max_workers: int = None):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        candles = candles.sort_index()
+        self.index = candles.index
+        self.close = candles["close"].to_numpy(dtype=np.float64)
+        self.high = candles["high"].to_numpy(dtype=np.float64)
+        self.low = candles["low"].to_numpy(dtype=np.float64)
+        # Candles in predict window, the trade is closed by the market after it
+        self.window = max(int(pd.Timedelta(predict_window) // pd.Timedelta(period)), 1)
+        # Fee of the price for each side, like ReplayBroker
+        self.fee = fee
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.predictions = pd.DataFrame()
+
+    @staticmethod
+    def of_config(config: dict, candles: pd.DataFrame):
+        return VectorBacktest(candles,
+                              predict_window=config["pytrade2.strategy.predict.window"],
+                              fee=float(config.get("pytrade2.backtest.fee", 0)),
+                              max_workers=int(config.get("pytrade2.backtest.workers", 0) or 0) or None)
+
+    def predict(self, model, x: pd.DataFrame, x_pipe=None, y_pipe=None, columns: List[str] = None) -> pd.DataFrame:
+        """ Predict all features rows in one call """
+        columns = columns or ["signal"]
+        y_arr = model.predict(x_pipe.transform(x) if x_pipe else x)
+        if y_pipe:
+            y_arr = y_pipe.inverse_transform(y_arr)
+        self.predictions = pd.DataFrame(np.asarray(y_arr).reshape((len(x), len(columns))),
+                                        index=x.index, columns=columns)
+        return self.predictions
+
+    def signals_of(self, stop_loss_coeff: float, profit_loss_ratio: float) -> (np.ndarray, np.ndarray):
+        """ Candle positions and directions of buy or sell signals """
+        positions = self.index.get_indexer(self.predictions.index)
+        predictions = self.predictions[positions >= 0]
+        positions = positions[positions >= 0]
+        if "signal" in predictions.columns:
+            signals = predictions["signal"].to_numpy()
+        else:
+            # Regression of future low/high, signal is by the same rule as classification targets
+            signals = LowHighTargets.signal_of(self.close[positions],
+                                               predictions["fut_low_diff"].to_numpy(dtype=np.float64),
+                                               predictions["fut_high_diff"].to_numpy(dtype=np.float64),
+                                               stop_loss_coeff, profit_loss_ratio)
+        signals = np.asarray(signals, dtype=np.int64)
+        # Trade needs full predict window after the signal
+        is_trade = (signals != 0) & (positions + self.window < len(self.close))
+        positions, signals = positions[is_trade], signals[is_trade]
+        order = np.argsort(positions, kind="stable")
+        return positions[order], signals[order]
+
+    def simulate(self, positions: np.ndarray, directions: np.ndarray, stop_loss_coeff: float,
+                 profit_loss_ratio: float) -> dict:
+        """ Open by close of signal candle, exit by stop loss, take profit or by close at the end of predict window """
+        n = len(self.close)
+        window = self.window
+        positions = np.asarray(positions, dtype=np.int64)
+        directions = np.asarray(directions, dtype=np.int64)
+        open_prices = self.close[positions]
+        sl = open_prices * (1 - directions * stop_loss_coeff)
+        tp = open_prices * (1 + directions * stop_loss_coeff * profit_loss_ratio)
+
+        # Low and high of window candles after each signal
+        pad = np.full(window, np.nan)
+        fut_lows = sliding_window_view(np.concatenate([self.low[1:], pad]), window)[positions]
+        fut_highs = sliding_window_view(np.concatenate([self.high[1:], pad]), window)[positions]
+        is_buy = (directions > 0)[:, None]
+        sl_hits = np.where(is_buy, fut_lows <= sl[:, None], fut_highs >= sl[:, None])
+        tp_hits = np.where(is_buy, fut_highs >= tp[:, None], fut_lows <= tp[:, None])
+        first_sl = np.where(sl_hits.any(axis=1), sl_hits.argmax(axis=1), window)
+        first_tp = np.where(tp_hits.any(axis=1), tp_hits.argmax(axis=1), window)
+
+        # Stop loss wins if both are in the same candle, we don't know what was first
+        is_sl = (first_sl < window) & (first_sl <= first_tp)
+        is_tp = (first_tp < window) & ~is_sl
+        exit_offsets = np.minimum(np.minimum(first_sl, first_tp) + 1, window)
+        exit_positions = np.minimum(positions + exit_offsets, n - 1)
+        close_prices = np.where(is_sl, sl, np.where(is_tp, tp, self.close[exit_positions]))
+
+        # One trade at a time: signals during opened trade are skipped
+        taken = self.sequential(positions, exit_positions)
+        profits = directions[taken] * (close_prices[taken] - open_prices[taken]) \
+                  - self.fee * (open_prices[taken] + close_prices[taken])
+        return {"trades": len(taken),
+                "wins": int((profits > 0).sum()),
+                "losses": int((profits <= 0).sum()),
+                "stop_losses": int(is_sl[taken].sum()),
+                "take_profits": int(is_tp[taken].sum()),
+                "pnl": float(profits.sum()),
+                "pnl_pct": float((profits / open_prices[taken]).sum() * 100),
+                "max_drawdown": self.max_drawdown(profits)}
+
+    @staticmethod
+    def sequential(positions: np.ndarray, exit_positions: np.ndarray) -> np.ndarray:
+        """ Indices of trades, opened each after previous exit. Loop is by taken trades only """
+        taken = []
+        i = 0
+        while i < len(positions):
+            taken.append(i)
+            i = max(int(np.searchsorted(positions, exit_positions[i], side="left")), i + 1)
+        return np.asarray(taken, dtype=np.int64)
+
+    @staticmethod
+    def max_drawdown(profits: np.ndarray) -> float:
+        """ Max fall of cumulative profit from its previous max """
+        if not len(profits):
+            return 0.0
+        cum = np.cumsum(profits)
+        return float(np.max(np.maximum.accumulate(np.maximum(cum, 0)) - cum))
+
+    def run(self, stop_loss_coeff: float, profit_loss_ratio: float) -> dict:
+        """ Backtest the predictions with given stop loss coeff and profit loss ratio """
+        positions, directions = self.signals_of(stop_loss_coeff, profit_loss_ratio)
+        report = {"stop_loss_coeff": stop_loss_coeff, "profit_loss_ratio": profit_loss_ratio}
+        report.update(self.simulate(positions, directions, stop_loss_coeff, profit_loss_ratio))
+        return report
+
+    def run_all(self, params: List[tuple]) -> List[dict]:
+        return [self.run(stop_loss_coeff, profit_loss_ratio) for stop_loss_coeff, profit_loss_ratio in params]
+
+    def sweep(self, stop_loss_coeffs: Iterable[float], profit_loss_ratios: Iterable[float],
+              max_workers: Optional[int] = None) -> pd.DataFrame:
+        """ Backtest each stop loss coeff and profit loss ratio, sorted by pnl """
+        params = list(itertools.product(stop_loss_coeffs, profit_loss_ratios))
+        workers = min(max_workers or self.max_workers, len(params))
+        self._logger.info(f"Sweep {len(params)} params over {len(self.predictions)} predictions "
+                          f"in {max(workers, 1)} processes")
+        if workers > 1:
+            # Backtest data is sent once per chunk, not per params. Spawn, not fork the process with threads.
+            size = -(-len(params) // workers)
+            chunks = [params[i:i + size] for i in range(0, len(params), size)]
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+                reports = list(itertools.chain.from_iterable(executor.map(self.run_all, chunks)))
+        else:
+            reports = self.run_all(params)
+        return pd.DataFrame(reports).sort_values("pnl", ascending=False, kind="stable",
+                                                 ignore_index=True)
@@ -0,0 +1,82 @@
+from datetime import datetime
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from pytrade2.datamodel.TradeStatus import TradeStatus
+from pytrade2.exch.backtest.ReplayBroker import ReplayBroker
+from pytrade2.exch.backtest.ReplayClock import ReplayClock
+from pytrade2.metrics.MetricServer import MetricServer
+
+
+class TestReplayBroker(TestCase):
+
+    def setUp(self):
+        self.metrics = MetricServer.metrics
+        MetricServer.metrics = MagicMock()
+        self.clock = ReplayClock(datetime(2025, 6, 22, 16, 50))
+        self.broker = ReplayBroker({"pytrade2.backtest.fee": 0.001}, self.clock)
+
+    def tearDown(self):
+        MetricServer.metrics = self.metrics
+
+    def ticker(self, bid: float, ask: float):
+        self.broker.on_ticker({"datetime": self.clock.now(), "bid": bid, "ask": ask})
+
+    def test_buy_should_open_at_ask_and_close_at_take_profit(self):
+        self.ticker(100, 101)
+        trade = self.broker.create_cur_trade("BTC-USDT", 1, 1, 100, 90, 110, None)
+
+        self.ticker(109, 110)
+        self.assertEqual(TradeStatus.opened, trade.status)
+        self.ticker(111, 112)
+
+        self.assertEqual(101, trade.open_price)
+        self.assertEqual(110, trade.close_price)
+        self.assertEqual(TradeStatus.closed, trade.status)
+        self.assertIsNone(self.broker.cur_trade)
+        self.assertIs(trade, self.broker.prev_trade)
+
+    def test_sell_should_close_at_ask_after_stop_loss(self):
+        self.ticker(100, 101)
+        trade = self.broker.create_cur_trade("BTC-USDT", -1, 1, 100, 105, 90, None)
+
+        self.ticker(105, 106)
+
+        self.assertEqual(100, trade.open_price)
+        self.assertEqual(106, trade.close_price)
+        self.assertAlmostEqual(-6 - 0.001 * 206, self.broker.pnl_report()["pnl"])
+
+    def test_trailing_stop_should_follow_price(self):
+        self.ticker(100, 100)
+        trade = self.broker.create_cur_trade("BTC-USDT", 1, 1, 100, 95, 101, 5)
+
+        # Price goes up, trailing stop moves, no take profit exit
+        self.ticker(110, 110)
+        self.assertEqual(105, trade.stop_loss_price)
+        self.assertEqual(TradeStatus.opened, trade.status)
+        # Price goes down to the stop
+        self.ticker(104, 104)
+
+        self.assertEqual(104, trade.close_price)
+        self.assertEqual(TradeStatus.closed, trade.status)
+
+    def test_should_not_open_second_trade(self):
+        self.ticker(100, 101)
+        self.broker.create_cur_trade("BTC-USDT", 1, 1, 100, 90, 110, None)
+
+        self.assertIsNone(self.broker.create_cur_trade("BTC-USDT", -1, 1, 100, 110, 90, None))
+
+    def test_pnl_report(self):
+        self.broker.fee = 0
+        for open_price, close_price in [(100, 110), (100, 90), (100, 95)]:
+            self.ticker(open_price, open_price)
+            self.broker.create_cur_trade("BTC-USDT", 1, 1, open_price, 95, 110, None)
+            self.ticker(close_price, close_price)
+
+        report = self.broker.pnl_report()
+
+        self.assertEqual(3, report["trades"])
+        self.assertEqual(1, report["wins"])
+        self.assertEqual(2, report["losses"])
+        self.assertEqual(10 - 10 - 5, report["pnl"])
+        self.assertEqual(15, report["max_drawdown"])
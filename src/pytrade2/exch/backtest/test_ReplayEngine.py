@@ -0,0 +1,121 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+from pytrade2.exch.backtest.ReplayEngine import ReplayEngine
+from pytrade2.feed.history.HistoryStorage import HistoryStorage
+from pytrade2.metrics.MetricServer import MetricServer
+from pytrade2.strategy.common.StrategyBase import StrategyBase
+
+
+class TestReplayEngine(TestCase):
+    class BuyStrategy(StrategyBase):
+        """ Buys with stop loss and take profit of fixed distance if predicted ask is above bid """
+
+        def __init__(self, config: dict, exchange_provider):
+            super().__init__(config, exchange_provider, is_candles_feed=False, is_bid_ask_feed=True,
+                             is_level2_feed=True)
+            self.model_source = None
+            self.model_persister = MagicMock()
+            self.processing_interval = pd.Timedelta("5s")
+
+        def prepare_xy(self):
+            bid_ask = self.bid_ask_feed.bid_ask
+            return bid_ask[["bid"]], bid_ask[["ask"]]
+
+        def prepare_last_x(self):
+            return self.bid_ask_feed.bid_ask[["bid"]].tail(1)
+
+        def create_model(self, x_size=None, y_size=None):
+            return LinearRegression()
+
+        def predict(self, x):
+            y = self.y_pipe.inverse_transform(self.model.predict(self.X_pipe.transform(x)))
+            return pd.DataFrame({"ask": y[:, 0]}, index=x.index)
+
+        def process_prediction(self, y_pred):
+            bid = self.bid_ask_feed.bid_ask["bid"].iloc[-1]
+            if y_pred["ask"].iloc[-1] > bid and not self.broker.cur_trade:
+                self.broker.create_cur_trade(self.ticker, 1, 1, bid, bid - 5, bid + 2, None)
+
+    def setUp(self):
+        self.metrics = MetricServer.metrics
+        MetricServer.metrics = MagicMock()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.config = {"pytrade2.tickers": "BTC-USDT",
+                       "pytrade2.exchange": "replay",
+                       "pytrade2.strategy": "BuyStrategy",
+                       "pytrade2.data.dir": self.tmp_dir.name,
+                       "pytrade2.data.format": "parquet",
+                       "pytrade2.order.quantity": 1,
+                       "pytrade2.strategy.history.min.window": "10s",
+                       "pytrade2.strategy.history.max.window": "10min",
+                       "pytrade2.strategy.riskmanager.wait_after_loss": "0s"}
+        self.write_raw_data()
+
+    def tearDown(self):
+        MetricServer.metrics = self.metrics
+        self.tmp_dir.cleanup()
+
+    def write_raw_data(self):
+        """ 10 minutes of bid/ask growing 0.1 each second, order book each 10 seconds """
+        storage = HistoryStorage("parquet")
+        times = pd.date_range("2025-06-22 16:50", periods=600, freq="1s")
+        bid = 100 + np.arange(600) * 0.1
+        bid_ask = pd.DataFrame({"datetime": times, "symbol": "BTC-USDT", "bid": bid, "bid_vol": 1,
+                                "ask": bid + 0.1, "ask_vol": 1})
+        level2_times = times[::10]
+        level2 = pd.DataFrame({"datetime": np.repeat(level2_times, 2), "symbol": "BTC-USDT",
+                               "bid": np.tile([100, np.nan], len(level2_times)),
+                               "bid_vol": np.tile([1, np.nan], len(level2_times)),
+                               "ask": np.tile([np.nan, 101], len(level2_times)),
+                               "ask_vol": np.tile([np.nan, 1], len(level2_times))})
+        for tag, df in {"bid_ask": bid_ask, "level2": level2}.items():
+            path = Path(self.tmp_dir.name, "raw", tag)
+            path.mkdir(parents=True)
+            storage.write(df, Path(path, f"2025-06-22_BTC-USDT_{tag}.parquet"))
+
+    def test_events_should_be_in_time_order(self):
+        engine = ReplayEngine(self.config)
+        engine.read_data()
+
+        times, kinds, rows = engine.events()
+
+        self.assertEqual(600 + 60, len(times))
+        self.assertTrue(np.all(np.diff(times) >= 0))
+        # Order book of the same time goes before bid ask
+        self.assertEqual([ReplayEngine.LEVEL2, ReplayEngine.BID_ASK], kinds[:2].tolist())
+        self.assertEqual([0, 0, 1, 2], rows[:4].tolist())
+        self.assertEqual(2, rows[kinds == ReplayEngine.LEVEL2][1])
+
+    def test_run_should_replay_through_strategy_and_trade(self):
+        engine = ReplayEngine(self.config)
+        strategy = engine.new_strategy(TestReplayEngine.BuyStrategy)
+
+        report = engine.run(strategy)
+
+        self.assertEqual(660, report["events"])
+        self.assertEqual(1, report["learned"])
+        self.assertGreater(report["events_per_sec"], 0)
+        self.assertEqual("2025-06-22 16:50:00", report["start"])
+        # Each trade takes profit in about 20 seconds of rising price
+        self.assertGreater(report["trades"], 10)
+        self.assertEqual(report["trades"], report["wins"])
+        self.assertGreater(report["pnl"], 0)
+        # Feeds got the replayed data
+        self.assertEqual(pd.Timestamp("2025-06-22 16:59:59"), strategy.bid_ask_feed.bid_ask.index.max())
+        self.assertFalse(strategy.level2_feed.level2.empty)
+
+    def test_run_should_be_deterministic(self):
+        reports = []
+        for _ in range(2):
+            engine = ReplayEngine(self.config)
+            report = engine.run(engine.new_strategy(TestReplayEngine.BuyStrategy))
+            reports.append({key: val for key, val in report.items() if key not in {"duration_sec", "events_per_sec"}})
+
+        self.assertEqual(reports[0], reports[1])
@@ -0,0 +1,100 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from pytrade2.exch.backtest.VectorBacktest import VectorBacktest
+
+
+class TestVectorBacktest(TestCase):
+
+    @staticmethod
+    def candles_of(closes, highs=None, lows=None) -> pd.DataFrame:
+        index = pd.date_range("2025-06-22 16:50", periods=len(closes), freq="1min")
+        return pd.DataFrame({"close": closes,
+                             "high": highs if highs is not None else closes,
+                             "low": lows if lows is not None else closes}, index=index)
+
+    def backtest_of(self, candles, signals: dict, fee=0.0) -> VectorBacktest:
+        backtest = VectorBacktest(candles, predict_window="3min", fee=fee, max_workers=1)
+        backtest.predictions = pd.DataFrame({"signal": list(signals.values())},
+                                            index=candles.index[list(signals.keys())])
+        return backtest
+
+    def test_buy_should_exit_by_take_profit(self):
+        candles = self.candles_of([100, 101, 111, 100, 100, 100])
+        report = self.backtest_of(candles, {0: 1}).run(0.05, 2)
+
+        self.assertEqual(1, report["trades"])
+        self.assertEqual(1, report["take_profits"])
+        self.assertAlmostEqual(10, report["pnl"])
+
+    def test_sell_should_exit_by_stop_loss_with_fee(self):
+        candles = self.candles_of([100, 100, 106, 90, 100, 100])
+        report = self.backtest_of(candles, {0: -1}, fee=0.001).run(0.05, 2)
+
+        self.assertEqual(1, report["stop_losses"])
+        self.assertAlmostEqual(-5 - 0.001 * 205, report["pnl"])
+        self.assertAlmostEqual(5 + 0.001 * 205, report["max_drawdown"])
+
+    def test_stop_loss_should_win_in_the_same_candle(self):
+        candles = self.candles_of([100, 100, 100, 100, 100], highs=[100, 120, 100, 100, 100],
+                                  lows=[100, 90, 100, 100, 100])
+        report = self.backtest_of(candles, {0: 1}).run(0.05, 2)
+
+        self.assertEqual(1, report["stop_losses"])
+        self.assertEqual(0, report["take_profits"])
+
+    def test_should_exit_by_close_after_predict_window(self):
+        candles = self.candles_of([100, 101, 102, 103, 104])
+        report = self.backtest_of(candles, {0: 1}).run(0.5, 2)
+
+        self.assertEqual(0, report["stop_losses"] + report["take_profits"])
+        self.assertAlmostEqual(3, report["pnl"])
+
+    def test_signals_during_opened_trade_should_be_skipped(self):
+        candles = self.candles_of([100, 100, 100, 100, 100, 100, 100, 100])
+        report = self.backtest_of(candles, {0: 1, 1: 1, 2: -1, 3: 1, 4: 1}).run(0.5, 2)
+
+        # Trade at 0 is closed at 3 by the window end, the next one is opened at 3
+        self.assertEqual(2, report["trades"])
+
+    def test_lohi_predictions_should_give_signals_by_params(self):
+        candles = self.candles_of([100, 101, 111, 100, 100, 100])
+        backtest = VectorBacktest(candles, predict_window="3min", max_workers=1)
+        backtest.predictions = pd.DataFrame({"fut_low_diff": [-1.0], "fut_high_diff": [11.0]},
+                                            index=candles.index[:1])
+
+        self.assertEqual(1, backtest.run(0.05, 2)["trades"])
+        self.assertEqual(0, backtest.run(0.05, 3)["trades"])
+
+    def test_predict_should_predict_all_rows(self):
+        class ModelStub:
+            def predict(self, x):
+                return np.where(x["f"] > 0, 1, -1)
+
+        candles = self.candles_of([100, 101, 102])
+        backtest = VectorBacktest(candles, predict_window="1min")
+        predictions = backtest.predict(ModelStub(), pd.DataFrame({"f": [1, -1, 0]}, index=candles.index))
+
+        self.assertEqual([1, -1, -1], predictions["signal"].tolist())
+
+    def test_sweep_should_report_each_params(self):
+        candles = self.candles_of([100, 101, 111, 100, 100, 100])
+        backtest = self.backtest_of(candles, {0: 1})
+
+        report = backtest.sweep([0.05, 0.5], [1, 2, 3], max_workers=1)
+
+        self.assertEqual(6, len(report))
+        self.assertEqual({"stop_loss_coeff", "profit_loss_ratio", "trades", "pnl", "max_drawdown"},
+                         {"stop_loss_coeff", "profit_loss_ratio", "trades", "pnl", "max_drawdown"} & set(report.columns))
+        self.assertEqual(report["pnl"].max(), report["pnl"].iloc[0])
+
+    def test_sweep_in_processes_should_equal_sequential(self):
+        candles = self.candles_of(list(100 + np.sin(np.arange(200) / 5) * 10))
+        backtest = self.backtest_of(candles, {i: 1 if i % 3 else -1 for i in range(0, 190, 2)})
+
+        sequential = backtest.sweep([0.01, 0.02], [1, 2], max_workers=1)
+        parallel = backtest.sweep([0.01, 0.02], [1, 2], max_workers=2)
+
+        pd.testing.assert_frame_equal(sequential, parallel)
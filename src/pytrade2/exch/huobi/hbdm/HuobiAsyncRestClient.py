@@ -0,0 +1,84 @@
+import time
+from typing import Optional
+
+import aiohttp
+
+from pytrade2.exch.AsyncioLoop import AsyncioLoop
+from pytrade2.exch.huobi.hbdm.HuobiRestClient import HuobiRestClient
+
+
+class HuobiAsyncRestClient(HuobiRestClient):
+    """
+    Huobi rest client on asyncio event loop with keep-alive connections pool.
+    get/post are blocking bridges for existing callers, aget/apost are coroutines.
+    """
+
+    def __init__(self, access_key: str, secret_key: str, aloop: AsyncioLoop = None, pool_size: int = 10,
+                 retries: int = 3, timeout_sec: float = 10, timeouts: dict = None, keepalive_sec: float = 60,
+                 base_url: str = 'https://api.hbdm.vn'):
+        super().__init__(access_key, secret_key, pool_size=pool_size, retries=retries, timeout_sec=timeout_sec,
+                         timeouts=timeouts, base_url=base_url)
+        self.aloop = aloop or AsyncioLoop()
+        self.pool_size = pool_size
+        self.keepalive_sec = keepalive_sec
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _session_of_loop(self) -> aiohttp.ClientSession:
+        """ Lazy session, created inside event loop """
+        if not self._session or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=self.keepalive_sec)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def aget(self, path: str, params: dict = None):
+        """ Authorized GET request coroutine """
+        start_time = time.perf_counter()
+        try:
+            url = f'{self.base_url}{path}?' + self._auth_params_of('get', path)
+            self._logger.debug(f"Doing get request to url: {url}, params: {params}")
+            headers = {'Content-type': 'application/x-www-form-urlencoded'}
+            timeout = aiohttp.ClientTimeout(total=self.timeout_of(path))
+            async with self._session_of_loop().get(url, params=params, headers=headers, timeout=timeout) as res:
+                res_json = await res.json(content_type=None)
+            self._logger.debug(f"Got response: {res_json}")
+            return res_json
+        except Exception as e:
+            self._logger.error(e)
+        finally:
+            self._observe('get', path, start_time)
+        return None
+
+    async def apost(self, path: str, data: dict = None):
+        """ Authorized POST request coroutine """
+        start_time = time.perf_counter()
+        try:
+            url = f'{self.base_url}{path}?' + self._auth_params_of('post', path)
+            self._logger.debug(f"Doing post request to url: {url}, data: {data}")
+            headers = {'Accept': 'application/json', 'Content-type': 'application/json'}
+            timeout = aiohttp.ClientTimeout(total=self.timeout_of(path))
+            async with self._session_of_loop().post(url, json=data, headers=headers, timeout=timeout) as res:
+                res_json = await res.json(content_type=None)
+            self._logger.debug(f"Got response: {res_json}")
+            return res_json
+        except Exception as e:
+            self._logger.error(e)
+        finally:
+            self._observe('post', path, start_time)
+        return None
+
+    def get(self, path: str, params: dict = None):
+        """ Blocking GET. Socket consumers run inside the loop, they cannot wait for it, so use blocking client."""
+        if self.aloop.in_loop_thread():
+            return super().get(path, params)
+        return self.aloop.run(self.aget(path, params))
+
+    def post(self, path: str, data: dict = None):
+        """ Blocking POST. Socket consumers run inside the loop, they cannot wait for it, so use blocking client."""
+        if self.aloop.in_loop_thread():
+            return super().post(path, data)
+        return self.aloop.run(self.apost(path, data))
+
+    def close(self):
+        """ Close pooled connections """
+        if self._session and not self._session.closed and self.aloop.loop:
+            self.aloop.run(self._session.close())
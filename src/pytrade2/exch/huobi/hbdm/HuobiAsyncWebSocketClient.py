@@ -0,0 +1,111 @@
+import asyncio
+import random
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Optional
+
+import aiohttp
+
+from pytrade2.exch.AsyncioLoop import AsyncioLoop
+from pytrade2.exch.huobi.hbdm.HuobiWebSocketClient import HuobiWebSocketClient
+
+
+class HuobiAsyncWebSocketClient(HuobiWebSocketClient):
+    """
+    Huobi websocket client on asyncio event loop, without socket and watchdog threads.
+    Reconnects with exponential backoff and jitter if heartbeat timeout elapsed or socket is closed.
+    Consumers on_socket_data are called inside the loop, one message at a time,
+    so slow consumers hold socket reading instead of growing a queue.
+    """
+
+    def __init__(self, host: str, path: str, access_key: str, secret_key: str, be_spot: bool, is_broker: bool,
+                 aloop: AsyncioLoop = None, base_url: str = None):
+        super().__init__(host, path, access_key, secret_key, be_spot, is_broker, base_url=base_url)
+        self.aloop = aloop or AsyncioLoop()
+        self.reconnect_delay_min = timedelta(seconds=1)
+        self.reconnect_delay_max = timedelta(seconds=60)
+        self._reconnect_delay = self.reconnect_delay_min
+        # Outgoing messages: auth, subscriptions, pongs
+        self.send_queue_size = 1000
+        self._send_queue: Optional[asyncio.Queue] = None
+        self._task: Optional[Future] = None
+
+    def open(self):
+        """ Start connect and read coroutine in the event loop """
+        if self._task and not self._task.done():
+            return
+        self._logger.info(f"Opening socket: {self.url}")
+        self.is_running = True
+        self.last_heartbeat = datetime.utcnow()
+        self._task = self.aloop.submit(self._run())
+
+    def close(self):
+        self._logger.info("Closing socket")
+        self.is_running = False
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def _send(self, data: str):
+        """ Put the message to send queue of current connection """
+        if self._send_queue is None:
+            self._logger.warning(f"Socket is not connected, message is not sent: {data}")
+        elif self.aloop.in_loop_thread():
+            self._put_to_send_queue(self._send_queue, data)
+        else:
+            self.aloop.call_soon(self._put_to_send_queue, self._send_queue, data)
+
+    def _put_to_send_queue(self, queue: asyncio.Queue, data: str):
+        try:
+            queue.put_nowait(data)
+        except asyncio.QueueFull:
+            self._logger.error(f"Send queue is full, message is not sent: {data}")
+
+    def _on_error(self, ws, error):
+        # Reconnect is done in _run
+        self._logger.error(f"Socket error: {error}")
+
+    async def _run(self):
+        """ Connect and read messages, reconnect with backoff while running """
+        async with aiohttp.ClientSession() as session:
+            while self.is_running:
+                try:
+                    await self._connect_and_read(session)
+                except asyncio.TimeoutError:
+                    self._logger.error(f"Heartbeat timeout {self.heartbeat_timeout} elapsed. Reconnecting...")
+                except Exception as e:
+                    self._on_error(None, e)
+                if self.is_running:
+                    delay = self._reconnect_delay.total_seconds()
+                    await asyncio.sleep(random.uniform(delay / 2, delay))
+                    self._reconnect_delay = min(self._reconnect_delay * 2, self.reconnect_delay_max)
+
+    async def _connect_and_read(self, session: aiohttp.ClientSession):
+        """ One connection lifetime """
+        async with session.ws_connect(self.url, max_msg_size=0) as ws:
+            self._reconnect_delay = self.reconnect_delay_min
+            self.last_heartbeat = datetime.utcnow()
+            self._send_queue = asyncio.Queue(self.send_queue_size)
+            sender = asyncio.create_task(self._send_from_queue(ws, self._send_queue))
+            try:
+                self._on_open(ws)
+                timeout = self.heartbeat_timeout.total_seconds()
+                while self.is_running:
+                    msg = await ws.receive(timeout)
+                    if msg.type in (aiohttp.WSMsgType.BINARY, aiohttp.WSMsgType.TEXT):
+                        self._on_msg(ws, msg.data)
+                    elif msg.type == aiohttp.WSMsgType.ERROR:
+                        self._on_error(ws, ws.exception())
+                        break
+                    else:
+                        # Closed
+                        break
+            finally:
+                self._send_queue = None
+                sender.cancel()
+        self._on_close(ws)
+
+    async def _send_from_queue(self, ws: aiohttp.ClientWebSocketResponse, queue: asyncio.Queue):
+        while True:
+            data = await queue.get()
+            await ws.send_str(data)
@@ -1,6 +1,10 @@
 import logging
 from typing import Optional
+from urllib import parse
 
+from pytrade2.exch.AsyncioLoop import AsyncioLoop
+from pytrade2.exch.huobi.hbdm.HuobiAsyncRestClient import HuobiAsyncRestClient
+from pytrade2.exch.huobi.hbdm.HuobiAsyncWebSocketClient import HuobiAsyncWebSocketClient
 from pytrade2.exch.huobi.hbdm.HuobiRestClient import HuobiRestClient
 from pytrade2.exch.huobi.hbdm.HuobiWebSocketClient import HuobiWebSocketClient
 from pytrade2.exch.huobi.hbdm.broker.HuobiBrokerHbdm import HuobiBrokerHbdm
@@ -14,6 +18,12 @@ class HuobiExchangeHbdm:
     def __init__(self, config: dict):
         self._logger = logging.getLogger(self.__class__.__name__)
         self.config = config
+        # Transport: threads - blocking clients with own threads, asyncio - clients on one event loop
+        self.transport = config.get("pytrade2.exchange.huobi.transport", "threads")
+        # Exchange urls, local fake exchange in latency benchmark
+        self.rest_url = config.get("pytrade2.exchange.huobi.hbdm.rest.url") or "https://api.hbdm.vn"
+        self.ws_url = config.get("pytrade2.exchange.huobi.hbdm.ws.url") or "wss://api.hbdm.com"
+        self.__aloop: Optional[AsyncioLoop] = None
         self.__rest_client: Optional[HuobiRestClient] = None
         self.__websocket_client_market: Optional[HuobiWebSocketClient] = None
         self.__websocket_client_broker: Optional[HuobiWebSocketClient] = None
@@ -56,24 +66,46 @@ class HuobiExchangeHbdm:
         if not self.__websocket_client_market:
             # wss://api.hbdm.com/swap-ws
             key, secret = self._key_secret()
-            self.__websocket_client_market = HuobiWebSocketClient(host="api.hbdm.com",
-                                                                  path="/linear-swap-ws",
-                                                                  access_key=key,
-                                                                  secret_key=secret,
-                                                                  be_spot=False, is_broker=False)
+            self.__websocket_client_market = self._new_websocket_client(path="/linear-swap-ws",
+                                                                        access_key=key,
+                                                                        secret_key=secret,
+                                                                        is_broker=False)
         return self.__websocket_client_market
 
     def _websocket_client_broker(self) -> HuobiWebSocketClient:
         if not self.__websocket_client_broker:
             key, secret = self._key_secret()
-            self.__websocket_client_broker = HuobiWebSocketClient(host="api.hbdm.com",
-                                                                  path="/linear-swap-notification",
-                                                                  access_key=key,
-                                                                  secret_key=secret,
-                                                                  be_spot=False, is_broker=True)
+            self.__websocket_client_broker = self._new_websocket_client(path="/linear-swap-notification",
+                                                                        access_key=key,
+                                                                        secret_key=secret,
+                                                                        is_broker=True)
         return self.__websocket_client_broker
 
     def _rest_client(self):
         if not self.__rest_client:
-            self.__rest_client = HuobiRestClient(*self._key_secret())
+            params = {"pool_size": int(self.config.get("pytrade2.exchange.huobi.rest.pool.size", 10)),
+                      "retries": int(self.config.get("pytrade2.exchange.huobi.rest.retries", 3)),
+                      "timeout_sec": float(self.config.get("pytrade2.exchange.huobi.rest.timeout", 10)),
+                      "timeouts": self.config.get("pytrade2.exchange.huobi.rest.timeouts") or {},
+                      "base_url": self.rest_url}
+            if self.transport == "asyncio":
+                self.__rest_client = HuobiAsyncRestClient(*self._key_secret(), aloop=self._aloop(), **params)
+            else:
+                self.__rest_client = HuobiRestClient(*self._key_secret(), **params)
         return self.__rest_client
+
+    def _new_websocket_client(self, path: str, access_key: str, secret_key: str, is_broker: bool) \
+            -> HuobiWebSocketClient:
+        host = parse.urlparse(self.ws_url).netloc
+        if self.transport == "asyncio":
+            return HuobiAsyncWebSocketClient(host=host, path=path, access_key=access_key,
+                                             secret_key=secret_key, be_spot=False, is_broker=is_broker,
+                                             aloop=self._aloop(), base_url=self.ws_url)
+        return HuobiWebSocketClient(host=host, path=path, access_key=access_key, secret_key=secret_key,
+                                    be_spot=False, is_broker=is_broker, base_url=self.ws_url)
+
+    def _aloop(self) -> AsyncioLoop:
+        """ One event loop for all asyncio clients of the exchange """
+        if not self.__aloop:
+            self.__aloop = AsyncioLoop("huobi-hbdm")
+        return self.__aloop
@@ -1,7 +1,9 @@
 import logging
+import time
 
 import requests
-import yaml
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from urllib import parse
 import json
 from datetime import datetime
@@ -9,6 +11,8 @@ import hmac
 import base64
 from hashlib import sha256
 
+from pytrade2.metrics.MetricServer import MetricServer
+
 
 class HuobiRestClient:
     """
@@ -16,67 +20,106 @@ class HuobiRestClient:
     https://huobiapi.github.io/docs/coin_margined_swap/v1/en/#introduction
     """
 
-    def __init__(self, access_key: str, secret_key: str):
+    def __init__(self, access_key: str, secret_key: str, pool_size: int = 10, retries: int = 3,
+                 timeout_sec: float = 10, timeouts: dict = None, base_url: str = 'https://api.hbdm.vn'):
         self._logger = logging.getLogger(self.__class__.__name__)
 
         self.access_key, self.secret_key = access_key, secret_key
-        # Futures, coins url
-        self.host = 'api.hbdm.vn'
+        # Futures, coins url. Local fake exchange url in benchmarks.
+        self.base_url = base_url.rstrip('/')
+        self.host = parse.urlparse(self.base_url).netloc
+
+        # Secret key is encoded once, signature of each request starts from a copy of this hmac
+        self._hmac = hmac.new(key=secret_key.encode('utf8'), digestmod=sha256)
+        self._auth_prefix = f'AccessKeyId={access_key}&SignatureMethod=HmacSHA256&SignatureVersion=2&Timestamp='
+
+        # Request timeout of each path, default for others
+        self.timeout_sec = timeout_sec
+        self.timeouts = timeouts or {}
+        # path -> request duration metric
+        self._path_metrics = {}
 
-    @staticmethod
-    def _auth_params_of(method: str, access_key: str, secret_key: str, host: str, path: str) -> str:
+        # Keep-alive connections pool. Only idempotent GET is retried on server errors, with jittered backoff.
+        retry = Retry(total=retries, backoff_factor=0.1, backoff_jitter=0.1,
+                      status_forcelist=[429, 500, 502, 503, 504], allowed_methods=frozenset(["GET"]),
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self._session = requests.Session()
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def _auth_params_of(self, method: str, path: str) -> str:
         """ Fill authorization parameters in rest call url """
 
         # Format and url encode timestamp
         timestamp = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S')
         timestamp = parse.quote(timestamp)
 
-        suffix = f'AccessKeyId={access_key}&SignatureMethod=HmacSHA256&SignatureVersion=2&Timestamp={timestamp}'
-        payload = f'{method.upper()}\n{host}\n{path}\n{suffix}'
+        suffix = self._auth_prefix + timestamp
+        payload = f'{method.upper()}\n{self.host}\n{path}\n{suffix}'
 
-        digest = hmac.new(key=secret_key.encode('utf8'),
-                          msg=payload.encode('utf8'),
-                          digestmod=sha256).digest()  # make sha256 with binary data
+        digest = self._hmac.copy()
+        digest.update(payload.encode('utf8'))  # make sha256 with binary data
 
         # base64 encode with binary data and then get string
-        signature = base64.b64encode(digest).decode()
+        signature = base64.b64encode(digest.digest()).decode()
         signature = parse.quote(signature)  # url encode
 
         suffix = '{}&Signature={}'.format(suffix, signature)
         return suffix
 
+    def timeout_of(self, path: str) -> float:
+        return self.timeouts.get(path, self.timeout_sec)
+
+    def _observe(self, method: str, path: str, start_time: float):
+        """ Request duration to histogram of the path """
+        try:
+            metric = self._path_metrics.get((method, path))
+            if metric is None and MetricServer.has_metrics():
+                metric = self._path_metrics[(method, path)] = MetricServer.metrics.exchange.rest.of_path(method, path)
+            if metric is not None:
+                metric.observe(time.perf_counter() - start_time)
+        except Exception as e:
+            # Called from finally of the request, never lose the response because of metrics
+            self._logger.debug(f"Cannot observe request duration of {method} {path}: {e}")
+
     def get(self, path: str, params: dict = None) -> json:
         """ Make authorized GET request to given service with given parameters """
+        start_time = time.perf_counter()
         try:
             # Compose url and headers
-            url = f'https://{self.host}{path}?'
+            url = f'{self.base_url}{path}?'
             self._logger.debug(f"Doing get request to url: {url}, params: {params}")
-            url_suffix = self._auth_params_of('get', self.access_key, self.secret_key, self.host, path)
+            url_suffix = self._auth_params_of('get', path)
             url = url + url_suffix
             headers = {'Content-type': 'application/x-www-form-urlencoded'}
             # Request
-            res_json = requests.get(url, params=params, headers=headers).json()
+            res_json = self._session.get(url, params=params, headers=headers, timeout=self.timeout_of(path)).json()
             self._logger.debug(f"Got response: {res_json}")
             return res_json
         except Exception as e:
             self._logger.error(e)
+        finally:
+            self._observe('get', path, start_time)
         return None
 
     def post(self, path: str, data: dict = None) -> json:
         """ Make authorized POST request to given service with given parameters """
-
+        start_time = time.perf_counter()
         try:
             # Compose url and headers
-            url = f'https://{self.host}{path}?'
+            url = f'{self.base_url}{path}?'
             self._logger.debug(f"Doing post request to url: {url}, data: {data}")
-            url_suffix = self._auth_params_of('post', self.access_key, self.secret_key, self.host, path)
+            url_suffix = self._auth_params_of('post', path)
             url = url + url_suffix
             # url = f'https://{self.host}{path}?{url_suffix}'
             headers = {'Accept': 'application/json', 'Content-type': 'application/json'}
             # Post request to huobi rest service
-            res_json = requests.post(url, json=data, headers=headers).json()
+            res_json = self._session.post(url, json=data, headers=headers, timeout=self.timeout_of(path)).json()
             self._logger.debug(f"Got response: {res_json}")
             return res_json
         except Exception as e:
             self._logger.error(e)
+        finally:
+            self._observe('post', path, start_time)
         return None
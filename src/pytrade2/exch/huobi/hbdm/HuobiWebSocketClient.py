@@ -1,10 +1,10 @@
 import base64
-import gzip
 import hmac
 import json
 import logging
 import threading
 import time
+import zlib
 from collections import defaultdict
 from datetime import datetime, timedelta
 from hashlib import sha256
@@ -12,6 +12,16 @@ from urllib import parse
 
 import websocket
 
+from pytrade2.metrics.MetricServer import MetricServer
+
+try:
+    # Faster json parser if installed
+    import orjson
+
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
 
 class HuobiWebSocketClient:
     """
@@ -35,17 +45,24 @@ class HuobiWebSocketClient:
     System status updates subscription ：wss://api.btcgateway.pro/center-notification
     """
 
-    def __init__(self, host: str, path: str, access_key: str, secret_key: str, be_spot: bool, is_broker: bool):
+    def __init__(self, host: str, path: str, access_key: str, secret_key: str, be_spot: bool, is_broker: bool,
+                 base_url: str = None):
         self._logger = logging.getLogger(self.__class__.__name__)
         self._host = host
         self._path = path
-        self.url = 'wss://{}{}'.format(self._host, self._path)
+        # Base url like wss://api.hbdm.com, or ws:// url of local fake exchange
+        self.url = '{}{}'.format(base_url.rstrip('/'), self._path) if base_url \
+            else 'wss://{}{}'.format(self._host, self._path)
         self._access_key = access_key
         self._secret_key = secret_key
         self._be_spot = be_spot
         self._is_broker = is_broker
         self._ws = None
         self._consumers = defaultdict(set)
+        # topic -> consumers on_socket_data methods, not to filter consumers on each message
+        self._handlers = {}
+        # topic -> decode and dispatch duration metrics
+        self._topic_metrics = {}
         self.is_running = False
         self.watchdog_thread = None
         self.heartbeat_timeout = timedelta(seconds=60)
@@ -90,18 +107,27 @@ class HuobiWebSocketClient:
         if self._is_broker:
             # Some endpoints requires this signature data, others just returns invalid command error and continue to work.
             signature_data = self._get_signature_data()  # signature data
-            self._ws.send(json.dumps(signature_data))  # as json string to be send
+            self._send(json.dumps(signature_data))  # as json string to be send
 
         self.subscribe_events()
 
+        # Let consumers know that events could be missed before
+        for consumer in {consumer for topic_consumers in self._consumers.values() for _, consumer in topic_consumers}:
+            if hasattr(consumer, "on_socket_open"):
+                consumer.on_socket_open()
+
     def subscribe_events(self):
         """Subscribe to messages for consumers"""
         for topic_consumers in self._consumers.values():
             for params, consumer in topic_consumers:
                 self._logger.info(f"Subscribing to socket data, params: {params}, consumer: {consumer}")
-                self._ws.send(params)  # as json string to be send
+                self._send(params)  # as json string to be send
         self._logger.info("All consumers subscribed")
 
+    def _send(self, data: str):
+        """ Send text message to the socket """
+        self._ws.send(data)
+
     def _get_signature_data(self) -> dict:
         # it's utc time and an example is 2017-05-11T15:19:30
         timestamp = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S")
@@ -147,56 +173,77 @@ class HuobiWebSocketClient:
             }
         return data
 
+    # Heartbeats of market, orders and spot v2 endpoints: {"ping": 1}, {"op":"ping"}, {"action":"ping"}
+    ping_prefixes = (b'{"ping"', b'{"op":"ping"', b'{"action":"ping"')
+    # Gzip header and deflate stream of hbdm message
+    gzip_wbits = 16 + zlib.MAX_WBITS
+
     def _on_msg(self, ws, message):
         self.last_heartbeat = datetime.utcnow()
         try:
+            start_time = time.perf_counter()
             plain = message
             if not self._be_spot:
-                plain = gzip.decompress(message).decode()
+                plain = zlib.decompress(message, self.gzip_wbits)
+            elif isinstance(plain, str):
+                plain = plain.encode()
 
-            jdata = json.loads(plain)
+            # Heartbeat is answered without parsing
+            if plain.startswith(self.ping_prefixes):
+                self._send(plain.replace(b'ping', b'pong').decode())
+                return
+
+            jdata = json_loads(plain)
+            decode_time = time.perf_counter()
             if 'ping' in jdata:
-                sdata = plain.replace('ping', 'pong')
-                self._ws.send(sdata)
+                self._send(plain.replace(b'ping', b'pong').decode())
                 return
             elif 'op' in jdata:
                 # Order and accounts notifications like {op: "notify", topic: "orders_cross@btc-usdt", data: []}
                 opdata = jdata['op']
                 if opdata == 'notify' and 'topic' in jdata:
                     # Pass the event to subscribers: broker, account, feed
-                    topic = jdata['topic'].lower()
-                    for params, consumer in [(params, consumer) for (params, consumer) in self._consumers[topic]
-                                             if hasattr(consumer, 'on_socket_data')]:
-                        consumer.on_socket_data(topic, jdata)
+                    self._dispatch(jdata['topic'].lower(), jdata, start_time, decode_time)
                 elif opdata == 'ping':
-                    sdata = plain.replace('ping', 'pong')
-                    self._ws.send(sdata)
+                    self._send(plain.replace(b'ping', b'pong').decode())
                 else:
                     pass
             elif 'action' in jdata:
                 opdata = jdata['action']
                 if opdata == 'ping':
-                    sdata = plain.replace('ping', 'pong')
-                    self._ws.send(sdata)
+                    self._send(plain.replace(b'ping', b'pong').decode())
                     return
                 else:
                     pass
             elif 'ch' in jdata:
                 # Pass the event to subscribers: broker, account, feed
-                topic = jdata['ch'].lower()
-                for params, consumer in [(params, consumer) for (params, consumer) in self._consumers[topic]
-                                         if hasattr(consumer, 'on_socket_data')]:
-                    consumer.on_socket_data(topic, jdata)
+                self._dispatch(jdata['ch'].lower(), jdata, start_time, decode_time)
             elif jdata.get('status') == 'error':
                 self._logger.error(f"Got message with error: {jdata}")
         except Exception as e:
             self._logger.error(e)
 
+    def _dispatch(self, topic: str, jdata: dict, start_time: float, decode_time: float):
+        """ Pass the message to topic consumers, measure decode and dispatch durations """
+        for handler in self._handlers.get(topic, ()):
+            handler(topic, jdata)
+
+        metrics = self._topic_metrics.get(topic)
+        if metrics is None and MetricServer.has_metrics():
+            metrics = self._topic_metrics[topic] = MetricServer.metrics.exchange.websocket.of_topic(topic)
+        if metrics is not None:
+            decode_metric, dispatch_metric = metrics
+            decode_metric.observe(decode_time - start_time)
+            dispatch_metric.observe(time.perf_counter() - decode_time)
+
     def _on_close(self, ws):
         self._logger.info("Socket closed")
 
     def _on_error(self, ws, error):
         self._logger.error(f"Socket error: {error}")
+        if not self.is_running:
+            # Closed by the app, don't reconnect
+            return
         # Reopen
         self.close()
         self.open()
@@ -206,9 +253,12 @@ class HuobiWebSocketClient:
         self._logger.debug(f"Adding consumer, topic: {topic}, params: {params}, consumer: {consumer}")
         # topic -> (params, consumer obj)
         self._consumers[topic].add((json.dumps(params), consumer))
+        self._handlers[topic] = tuple(consumer.on_socket_data for _, consumer in self._consumers[topic]
+                                      if hasattr(consumer, 'on_socket_data'))
 
     def close(self):
         self._logger.info("Closing socket")
+        self.is_running = False
         if self._ws: self._ws.close()
 
     def _watchdog(self):
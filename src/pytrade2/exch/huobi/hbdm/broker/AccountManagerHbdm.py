@@ -53,8 +53,8 @@ class AccountManagerHbdm(AccountManagerBase):
             res = self._rest_client.post("/linear-swap-api/v1/swap_balance_valuation", {"valuation_asset": "USDT"})
             self._logger.debug(f"Got new balance: {res}")
             self._buffer.extend(self.response_to_list(res))
-            # Write and clean the buffer
-            self.write()
+            # Write and clean the buffer, periodical write is already scheduled
+            self.flush()
         except Exception as e:
             self._logger.error(e)
 
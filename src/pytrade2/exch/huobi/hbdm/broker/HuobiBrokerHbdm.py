@@ -8,7 +8,6 @@ from pytrade2.exch.huobi.hbdm.broker.OrderFollower import OrderFollower
 from pytrade2.exch.huobi.hbdm.broker.OrderCreator import OrderCreator
 from pytrade2.exch.huobi.hbdm.broker.TrailingStopSupport import TrailingStopSupport
 from pytrade2.exch.huobi.hbdm.feed.HuobiWebSocketFeedHbdm import HuobiWebSocketFeedHbdm
-from pytrade2.datamodel.Trade import Trade
 from pytrade2.metrics.MetricServer import MetricServer
 
 
@@ -20,7 +19,7 @@ class HuobiBrokerHbdm(OrderCreator, TrailingStopSupport, OrderFollower, Broker):
         self._logger = logging.getLogger(self.__class__.__name__)
 
         OrderCreator.__init__(self, conf)
-        OrderFollower.__init__(self)
+        OrderFollower.__init__(self, conf)
         TrailingStopSupport.__init__(self, conf=conf, ws_feed=ws_feed, rest_client=rest_client)
         Broker.__init__(self, conf)
 
@@ -75,30 +74,9 @@ class HuobiBrokerHbdm(OrderCreator, TrailingStopSupport, OrderFollower, Broker):
     def on_socket_data(self, topic, msg):
         """ Got subscribed data from socket"""
         try:
-            status = msg.get("status")
             self._logger.info(f"Got order event: {msg}")
-
-            if not self.cur_trade \
-                    or not status \
-                    or not status == self.HuobiOrderStatus.filled \
-                    or not topic \
-                    or not topic.startswith("orders_cross."):
-                return
-            with self.trade_lock:
-                if self.cur_trade:
-                    order_direction = Trade.order_side_codes[msg["direction"].upper()]
-                    if order_direction == self.cur_trade.direction():
-                        # Current trade is opened
-                        self.update_trade_opened_event(msg, self.cur_trade)
-                        self.db_session.commit()
-                        self._logger.info("Current trade is opened")
-
-                    elif order_direction == - self.cur_trade.direction():
-                        # Current trade is closed
-                        t = self.update_trade_closed_event(msg, self.cur_trade)
-                        self.finalize_closed_trade()
-                        self._logger.info(f"Current trade is closed: {t}")
-
+            if topic and topic.startswith("orders_cross."):
+                self.on_order_event(msg)
         except Exception as e:
             self._logger.error(f"Socket message processing error: {e}")
 
@@ -6,8 +6,7 @@ from logging import Logger
 from multiprocessing import RLock
 from typing import Optional
 
-from sqlalchemy.orm.session import Session
-
+from pytrade2.exch.TradeJournal import TradeJournal
 from pytrade2.exch.huobi.hbdm.HuobiRestClient import HuobiRestClient
 from pytrade2.exch.huobi.hbdm.broker.AccountManagerHbdm import AccountManagerHbdm
 from pytrade2.datamodel.Trade import Trade
@@ -51,7 +50,7 @@ class OrderCreator:
         self.cur_trade: Optional[Trade] = None
         self.prev_trade: Optional[Trade] = None
         self.account_manager: Optional[AccountManagerHbdm] = None
-        self.db_session: Optional[Session] = None
+        self.db_session: Optional[TradeJournal] = None
         self.rest_client: Optional[HuobiRestClient] = None
         self.trade_lock: Optional[RLock] = None
         self.allow_trade = False
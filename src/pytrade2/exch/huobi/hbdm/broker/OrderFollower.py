@@ -1,13 +1,14 @@
 import datetime
 import logging
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 from logging import Logger
 from multiprocessing import RLock
 from typing import Optional
 
-from sqlalchemy.orm.session import Session
+import pandas as pd
 
+from pytrade2.exch.TradeJournal import TradeJournal
 from pytrade2.exch.huobi.hbdm.HuobiRestClient import HuobiRestClient
 from pytrade2.exch.huobi.hbdm.broker.AccountManagerHbdm import AccountManagerHbdm
 from pytrade2.exch.huobi.hbdm.broker.OrderCreator import OrderCreator
@@ -19,18 +20,28 @@ from pytrade2.metrics.MetricServer import MetricServer
 class OrderFollower:
     """ Following order events from exchange"""
 
-    def __init__(self):
+    def __init__(self, conf: dict = None):
         # All variables will be redefined in child classes
         self._logger = logging.getLogger(self.__class__.__name__)
         self.cur_trade: Optional[Trade] = None
         self.prev_trade: Optional[Trade] = None
         self.account_manager: Optional[AccountManagerHbdm] = None
-        self.db_session: Optional[Session] = None
+        self.db_session: Optional[TradeJournal] = None
         self.rest_client: Optional[HuobiRestClient] = None
         self.trade_lock: Optional[RLock] = None
         self.allow_trade = False
         self.price_precision = 2
 
+        # Trade status is driven by order socket events.
+        # Rest history is queried only if events could be missed: on start, socket reconnect or inconsistent event.
+        self.trade_reconcile_needed = True
+        # Safety rest check, even if socket looks fine
+        self.trade_reconcile_interval = timedelta(seconds=pd.Timedelta(
+            (conf or {}).get("pytrade2.broker.trade.reconcile.interval", "10min")).total_seconds())
+        self.last_trade_reconcile_time = datetime.utcnow()
+        # Incremental cursor: last order update time in reconciled rest history, epoch millis
+        self.orders_cursor = 0
+
     @staticmethod
     def update_trade_closed(raw, trade):
         # Response example:
@@ -52,8 +63,48 @@ class OrderFollower:
         trade.status = TradeStatus.closed
         MetricServer.metrics.broker.trade.trade_close_price.set(trade.close_price)
 
+    def on_socket_open(self):
+        """ Socket is (re)connected, order events could be missed while disconnected """
+        self._logger.info("Order events socket opened, current trade status will be reconciled")
+        self.trade_reconcile_needed = True
+
+    def on_order_event(self, msg: dict):
+        """ Order state machine of current trade, driven by orders_cross socket events """
+        # Orders cursor is not moved by events: a push after reconnect would skip the fill missed while disconnected
+        if msg.get("status") != OrderCreator.HuobiOrderStatus.filled:
+            return
+        with self.trade_lock:
+            if not self.cur_trade:
+                return
+            order_direction = Trade.order_side_codes[msg["direction"].upper()]
+            if order_direction == self.cur_trade.direction():
+                # Current trade is opened
+                self.update_trade_opened_event(msg, self.cur_trade)
+                self.db_session.commit()
+                self._logger.info("Current trade is opened")
+
+            elif order_direction == - self.cur_trade.direction():
+                # Current trade is closed
+                t = self.update_trade_closed_event(msg, self.cur_trade)
+                self.finalize_closed_trade()
+                self._logger.info(f"Current trade is closed: {t}")
+
     def update_cur_trade_status(self):
+        """ Reconcile current trade with exchange order history if order events could be missed """
+        if not self.cur_trade:
+            return
+        if not self.trade_reconcile_needed \
+                and datetime.utcnow() - self.last_trade_reconcile_time < self.trade_reconcile_interval:
+            # Socket events are consistent, nothing to do
+            return
+        self.reconcile_cur_trade()
+
+    def reconcile_cur_trade(self):
+        """ Query order history since last seen order, update current trade if it was closed """
         with self.trade_lock:
+            # Flags are reset before the query, so events during the query can request next reconcile
+            self.trade_reconcile_needed = False
+            self.last_trade_reconcile_time = datetime.utcnow()
             if not self.cur_trade:
                 return
             # Get close order example:
@@ -70,15 +121,20 @@ class OrderFollower:
 
             # Call history
             self._logger.debug(f"Updating current trade status:: {self.cur_trade}")
-            params = self.huobi_history_close_order_query_params(self.cur_trade)
+            params = self.huobi_history_close_order_query_params(self.cur_trade, self.orders_cursor)
             self._logger.debug(
                 f"Order history query start_time: {datetime.utcfromtimestamp(params['start_time'] / 1000)}, tz:{time.tzname}, params: {params}")
             res = self.rest_client.post("/linear-swap-api/v3/swap_cross_hisorders", params)
+            if not res or "data" not in res:
+                self._logger.error(f"Error getting order history: {res}")
+                self.trade_reconcile_needed = True
+                return
 
             # Handle situation when server time zone is not UTC and it can return several previous orders
             if len(res["data"]) >= 1:
                 # Get last order
-                raw = sorted(res["data"], key=lambda o: o["update_time"])[-1]
+                raw = max(res["data"], key=lambda o: o["update_time"])
+                self.orders_cursor = max(self.orders_cursor, raw["update_time"])
                 raw_update_time = datetime.utcfromtimestamp(raw["update_time"] / 1000)
                 if raw_update_time > self.cur_trade.open_time:
                     # Got closing order - after cur trade
@@ -117,12 +173,13 @@ class OrderFollower:
         self.account_manager.refresh_balance()
 
     @staticmethod
-    def huobi_history_close_order_query_params(trade: Trade):
+    def huobi_history_close_order_query_params(trade: Trade, since: int = 0):
+        """ History query of trade close orders, updated after since epoch millis cursor if set """
         # Closing trade type - opposite for main order
         close_trade_type = [OrderCreator.HuobiTradeType.buy, None, OrderCreator.HuobiTradeType.sell][
             trade.direction() + 1]
         # Temporary hack, search from an hour before start time to get orders, not executed immediately
-        start_ts = trade.open_time_epoch_millis() - 1000 * 60 * 60
+        start_ts = max(trade.open_time_epoch_millis() - 1000 * 60 * 60, since)
         # return {"contract": "BTC-USDT", "trade_type": close_trade_type,
         #         "type": HuobiBrokerHbdm.HuobiOrderType.finished, "status": HuobiBrokerHbdm.HuobiOrderStatus.filled}
 
@@ -1,21 +1,27 @@
 import atexit
 import logging
+import threading
+import time
 from datetime import timedelta, datetime
-from multiprocessing import RLock, Lock, Semaphore
+from multiprocessing import RLock
 from typing import Optional
 
-from sqlalchemy.orm.session import Session
-
+from pytrade2.exch.TradeJournal import TradeJournal
 from pytrade2.exch.huobi.hbdm.HuobiRestClient import HuobiRestClient
 from pytrade2.exch.huobi.hbdm.broker.AccountManagerHbdm import AccountManagerHbdm
 from pytrade2.exch.huobi.hbdm.broker.OrderCreator import OrderCreator
 from pytrade2.exch.huobi.hbdm.feed.HuobiWebSocketFeedHbdm import HuobiWebSocketFeedHbdm
 from pytrade2.datamodel.Trade import Trade
+from pytrade2.datamodel.TradeStatus import TradeStatus
 from pytrade2.metrics.MetricServer import MetricServer
 
 
 class TrailingStopSupport:
-    """ Huobi does not have trailing stop orders, so here it is. """
+    """
+    Huobi does not have trailing stop orders, so here it is.
+    New stop is calculated on ticker, exchange calls are done in trailing stop worker thread,
+    so ticker never waits for http. Pending moves are coalesced, the latest wins.
+    """
 
     def __init__(self, conf, ws_feed: HuobiWebSocketFeedHbdm, rest_client: HuobiRestClient):
         self._logger = logging.getLogger(self.__class__.__name__)
@@ -24,7 +30,7 @@ class TrailingStopSupport:
         self.cur_trade: Optional[Trade] = None
         self.prev_trade: Optional[Trade] = None
         self.account_manager: Optional[AccountManagerHbdm] = None
-        self.db_session: Optional[Session] = None
+        self.db_session: Optional[TradeJournal] = None
         self.rest_client: Optional[HuobiRestClient] = None
         self.trade_lock: Optional[RLock] = None
         self.allow_trade = False
@@ -34,54 +40,123 @@ class TrailingStopSupport:
         self.tickers: Optional[str] = None
 
         # Will be initialized in child class
-        self.db_session: Optional[Session] = None
+        self.db_session: Optional[TradeJournal] = None
 
         self.ws_feed = ws_feed
         self.rest_client = rest_client
         self.ws_feed.consumers.add(self)
-        self.ts_moving_lock = RLock()
+        self.ts_moving_lock = threading.RLock()
+
+        # Pending move: trade, new take profit, request time. Only the latest is kept.
+        self._ts_pending: Optional[tuple] = None
+        self._ts_moving = False
+        self._ts_condition = threading.Condition()
+        self._ts_worker: Optional[threading.Thread] = None
         atexit.register(self.at_exit)
 
     def at_exit(self):
         # Wait until critical sl movement completed
-        with(self.ts_moving_lock):
-            return
+        self.wait_ts_moved(timeout=10)
 
     def on_ticker(self, ticker: dict):
         """ Look at current price and possibly move trailing stop or close the order """
 
-        if (not self.cur_trade
-                or not self.cur_trade.trailing_delta
-                or (datetime.utcnow() - self.last_ts_move_time) < self.min_trade_timedelta):
+        if not self.cur_trade or not self.cur_trade.trailing_delta:
             # We are out of market or no trailing delta set in the order
             return
 
         # Move trailing stop if needed
-        if self.cur_trade.direction() == 1 and ticker["ask"] > self.cur_trade.take_profit_price:
-            self.move_ts(ticker["ask"])
-        elif self.cur_trade.direction() == -1 and ticker["bid"] < self.cur_trade.take_profit_price:
-            self.move_ts(ticker["bid"])
-
-    def cancel_prev_sl(self):
+        if self.cur_trade.direction() == 1 and ticker["ask"] > self._ts_target_tp():
+            self.request_ts_move(ticker["ask"])
+        elif self.cur_trade.direction() == -1 and ticker["bid"] < self._ts_target_tp():
+            self.request_ts_move(ticker["bid"])
+
+    def _ts_target_tp(self) -> float:
+        """ Pending take profit of current trade if requested, current take profit otherwise """
+        pending = self._ts_pending
+        if pending and pending[0] is self.cur_trade:
+            return pending[1]
+        return self.cur_trade.take_profit_price
+
+    def request_ts_move(self, new_tp: float):
+        """ Put new take profit for trailing stop worker, does not wait for exchange """
+        with self._ts_condition:
+            self._ts_pending = (self.cur_trade, new_tp, time.perf_counter())
+            if not self._ts_worker:
+                self._ts_worker = threading.Thread(target=self._ts_worker_loop, name="TrailingStopWorker",
+                                                   daemon=True)
+                self._ts_worker.start()
+            self._ts_condition.notify_all()
+
+    def wait_ts_moved(self, timeout: float = None) -> bool:
+        """ Wait until pending trailing stop moves are completed """
+        with self._ts_condition:
+            return self._ts_condition.wait_for(lambda: not self._ts_pending and not self._ts_moving, timeout)
+
+    def _ts_worker_loop(self):
+        """ Take the latest pending move and do exchange calls, not often than min_trade_timedelta """
+        while True:
+            with self._ts_condition:
+                while True:
+                    wait_sec = ((self.last_ts_move_time + self.min_trade_timedelta) - datetime.utcnow()) \
+                        .total_seconds() if self.last_ts_move_time > datetime.min else 0
+                    if self._ts_pending and wait_sec <= 0:
+                        break
+                    self._ts_condition.wait(wait_sec if self._ts_pending else None)
+                trade, new_tp, request_time = self._ts_pending
+                self._ts_pending = None
+                self._ts_moving = True
+            # Trade lock is never taken under the condition: ticker holds trade lock when it requests a move.
+            # move_ts drops the move if the trade was closed while the move was pending.
+            try:
+                self.move_ts(new_tp, trade, request_time)
+            except Exception as e:
+                self._logger.error(f"Error moving trailing stop: {e}")
+            finally:
+                with self._ts_condition:
+                    self._ts_moving = False
+                    self._ts_condition.notify_all()
+
+    def is_ts_trade_actual(self, trade: Trade) -> bool:
+        """ Trailing stop is moved only for current not closed trade """
+        with self.trade_lock or self.ts_moving_lock:
+            return trade is not None and trade is self.cur_trade and trade.status != TradeStatus.closed
+
+    def cancel_prev_sl(self, trade: Trade = None):
         """
         Cancel existing stop loss to move trailing stop
         https://www.huobi.com/en-us/opend/newApiPages/?id=8cb87edb-77b5-11ed-9966-0242ac110003
         """
+        trade = trade or self.cur_trade
         self._logger.info(f"Cancelling existing sl/tp orders")
         res = self.rest_client.post("/linear-swap-api/v1/swap_cross_tpsl_cancelall",
-                                    {"contract_code": self.cur_trade.ticker})
+                                    {"contract_code": trade.ticker})
         if res["status"] != "ok":
             self._logger.error(f"Error cancelling stop loss order: {res}")
             return
 
-    def create_ts_order(self, new_tp: float):
+    def cancel_sl_orders(self, ticker: str, order_ids: str) -> bool:
+        """
+        Cancel given sl/tp orders, ids are comma separated
+        https://www.huobi.com/en-us/opend/newApiPages/?id=8cb87c4a-77b5-11ed-9966-0242ac110003
+        """
+        self._logger.info(f"Cancelling sl/tp orders {order_ids}")
+        res = self.rest_client.post("/linear-swap-api/v1/swap_cross_tpsl_cancel",
+                                    {"contract_code": ticker, "order_id": order_ids})
+        if not res or res.get("status") != "ok" or (res.get("data") or {}).get("errors"):
+            self._logger.error(f"Error cancelling sl/tp orders {order_ids}: {res}")
+            return False
+        return True
+
+    def create_ts_order(self, new_tp: float, trade: Trade = None) -> Optional[dict]:
         """
         Create stop loss order to move trailing stop
         https://www.huobi.com/en-us/opend/newApiPages/?id=8cb87a6f-77b5-11ed-9966-0242ac110003
+        Returns exchange response if created
         """
 
         # Prepare params
-        t = self.cur_trade
+        t = trade or self.cur_trade
         new_sl_trigger = new_tp - t.direction() * t.trailing_delta
         new_sl_order = OrderCreator.sl_order_price(t.direction(), new_sl_trigger)
         self._logger.info(f"Creating new sl order for trailing stop with new tp: {new_tp}, "
@@ -95,17 +170,48 @@ class TrailingStopSupport:
         # Place the order
         sl_res = self.rest_client.post("/linear-swap-api/v1/swap_cross_tpsl_order", sl_params)
 
-        if "status" in sl_res and sl_res["status"] == "ok":
-            self.cur_trade.take_profit_price = new_tp
-            self.db_session.commit()
-            MetricServer.metrics.broker.trade.trade_tp.set(self.cur_trade.take_profit_price)
-        else:
-            self._logger.error(f"Error moving trailing stop: ${sl_res}")
+        if sl_res and sl_res.get("status") == "ok":
+            return sl_res
+        self._logger.error(f"Error moving trailing stop: ${sl_res}")
+        return None
 
-    def move_ts(self, new_tp: float):
-        """ Move trailing stop of current trade"""
+    @staticmethod
+    def sl_order_id_of(sl_res: dict) -> Optional[str]:
+        """ Created stop loss order id from swap_cross_tpsl_order response """
+        sl_order = (sl_res.get("data") or {}).get("sl_order") or {}
+        return sl_order.get("order_id_str")
+
+    def move_ts(self, new_tp: float, trade: Trade = None, request_time: float = None):
+        """
+        Move trailing stop of the trade. If previous sl order ids are known, place new stop loss first,
+        then cancel previous, so the position is always protected. Otherwise cancel all, then create.
+        """
+        trade = trade or self.cur_trade
+        start_time = time.perf_counter()
+        request_time = request_time or start_time
         self._logger.info(f"Moving trailing stop to new take profit:{new_tp}")
         with self.ts_moving_lock:
-            self.cancel_prev_sl()
-            self.create_ts_order(new_tp)
+            if not self.is_ts_trade_actual(trade):
+                self._logger.info(f"Trade is not current anymore, trailing stop is not moved to {new_tp}")
+                return
+            prev_order_ids = trade.stop_loss_order_id
+            if prev_order_ids:
+                sl_res = self.create_ts_order(new_tp, trade)
+                if sl_res and self.is_ts_trade_actual(trade):
+                    self.cancel_sl_orders(trade.ticker, prev_order_ids)
+            else:
+                self.cancel_prev_sl(trade)
+                sl_res = self.create_ts_order(new_tp, trade)
             self.last_ts_move_time = datetime.utcnow()
+        if not sl_res:
+            return
+
+        with self.trade_lock or self.ts_moving_lock:
+            trade.take_profit_price = new_tp
+            trade.stop_loss_order_id = self.sl_order_id_of(sl_res)
+            self.db_session.commit()
+        if MetricServer.has_metrics():
+            MetricServer.metrics.broker.trade.trade_tp.set(trade.take_profit_price)
+            ts_metrics = MetricServer.metrics.broker.trailing_stop
+            ts_metrics.move_wait_sec.observe(start_time - request_time)
+            ts_metrics.move_sec.observe(time.perf_counter() - start_time)
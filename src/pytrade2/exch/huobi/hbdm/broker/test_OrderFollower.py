@@ -1,3 +1,4 @@
+import threading
 from datetime import datetime, timezone, timedelta
 from unittest import TestCase
 from unittest.mock import MagicMock
@@ -64,4 +65,94 @@ class TestOrderManager(TestCase):
         expected_ts = (dt - timedelta(hours=1)).timestamp() * 1000
         self.assertEqual(expected_ts, actual["start_time"])
 
+    def test_huobi_history_close_order_query_params_since_cursor(self):
+        trade = Trade()
+        trade.open_time = pd.Timestamp(year=2023, month=6, day=18, hour=11, minute=28, second=1)
+        trade.side = "BUY"
+        since = int(trade.open_time.timestamp() * 1000) + 1000
+
+        actual = HuobiBrokerHbdm.huobi_history_close_order_query_params(trade, since)
+
+        self.assertEqual(since, actual["start_time"])
+
+    @staticmethod
+    def new_follower():
+        follower = OrderFollower()
+        follower.trade_lock = threading.RLock()
+        follower.db_session = MagicMock()
+        follower.account_manager = MagicMock()
+        follower.rest_client = MagicMock()
+        trade = Trade()
+        trade.side = "BUY"
+        trade.status = "opened"
+        trade.open_time = datetime(2023, 6, 18, 11, 28, 1)
+        follower.cur_trade = trade
+        return follower
+
+    def test_on_order_event_should_close_trade(self):
+        follower = self.new_follower()
+        trade = follower.cur_trade
+
+        follower.on_order_event({"status": 6, "direction": "sell", "order_id": 2, "trade_avg_price": 3,
+                                 "created_at": 1687087682000, "ts": 1687087682001})
+
+        self.assertIsNone(follower.cur_trade)
+        self.assertEqual(trade, follower.prev_trade)
+        self.assertEqual("closed", trade.status)
+        self.assertEqual(0, follower.orders_cursor)
+
+    def test_on_order_event_not_filled_should_not_change_trade(self):
+        follower = self.new_follower()
+
+        follower.on_order_event({"status": 3, "direction": "sell", "order_id": 2, "ts": 1687087682001})
+
+        self.assertEqual("opened", follower.cur_trade.status)
+
+    def test_update_cur_trade_status_should_not_query_if_events_consistent(self):
+        follower = self.new_follower()
+        follower.trade_reconcile_needed = False
+
+        follower.update_cur_trade_status()
+
+        follower.rest_client.post.assert_not_called()
+
+    def test_update_cur_trade_status_should_reconcile_after_reconnect(self):
+        follower = self.new_follower()
+        follower.trade_reconcile_needed = False
+        follower.orders_cursor = 1687087682001
+        follower.rest_client.post.return_value = {"data": [
+            {"order_id": 3, "trade_avg_price": 4, "update_time": 1687087690000},
+            {"order_id": 2, "trade_avg_price": 3, "update_time": 1687087685000}]}
+
+        follower.on_socket_open()
+        follower.update_cur_trade_status()
+
+        self.assertEqual(1687087682001, follower.rest_client.post.call_args.args[1]["start_time"])
+        self.assertEqual("3", follower.prev_trade.close_order_id)
+        self.assertIsNone(follower.cur_trade)
+        self.assertFalse(follower.trade_reconcile_needed)
+        self.assertEqual(1687087690000, follower.orders_cursor)
+
+    def test_reconcile_should_find_fill_missed_before_event_after_reconnect(self):
+        follower = self.new_follower()
+        follower.orders_cursor = 1687087682001
+        follower.rest_client.post.return_value = {"data": [
+            {"order_id": 3, "trade_avg_price": 4, "update_time": 1687087685000}]}
+
+        # Close fill at 1687087685000 is missed while disconnected, other order event comes after reconnect
+        follower.on_socket_open()
+        follower.on_order_event({"status": 3, "direction": "buy", "order_id": 4, "ts": 1687087699000})
+        follower.update_cur_trade_status()
+
+        self.assertEqual(1687087682001, follower.rest_client.post.call_args.args[1]["start_time"])
+        self.assertIsNone(follower.cur_trade)
+        self.assertEqual("3", follower.prev_trade.close_order_id)
+
+    def test_update_cur_trade_status_error_should_reconcile_again(self):
+        follower = self.new_follower()
+        follower.rest_client.post.return_value = None
+
+        follower.update_cur_trade_status()
 
+        self.assertTrue(follower.trade_reconcile_needed)
+        self.assertIsNotNone(follower.cur_trade)
@@ -1,14 +1,23 @@
 import logging
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timedelta
 from unittest import TestCase
 from unittest.mock import MagicMock
 
 from pytrade2.exch.huobi.hbdm.broker.TrailingStopSupport import TrailingStopSupport
 from pytrade2.datamodel.Trade import Trade
+from pytrade2.datamodel.TradeStatus import TradeStatus
+from pytrade2.metrics.MetricServer import MetricServer
 
 
 class TestTrailingStopSupport(TestCase):
-    MetricServer = MagicMock()
+    def setUp(self):
+        self.metrics = MetricServer.metrics
+        MetricServer.metrics = MagicMock()
+
+    def tearDown(self):
+        MetricServer.metrics = self.metrics
 
     @staticmethod
     def tss_mock():
@@ -38,6 +47,7 @@ class TestTrailingStopSupport(TestCase):
 
         # Call
         tss.on_ticker({"ask": 13, "bid": 9})
+        tss.wait_ts_moved(5)
         self.assertEqual(tss.rest_client.post.call_count, 2)
         self.assertEqual(tss.cur_trade.take_profit_price, 13)
 
@@ -45,6 +55,7 @@ class TestTrailingStopSupport(TestCase):
         tss.last_ts_move_time = datetime.min
         # Call
         tss.on_ticker({"ask": 12, "bid": 9})
+        tss.wait_ts_moved(5)
         self.assertEqual(tss.rest_client.post.call_count, 0)
         self.assertEqual(tss.cur_trade.take_profit_price, 13)
 
@@ -52,6 +63,7 @@ class TestTrailingStopSupport(TestCase):
         tss.last_ts_move_time = datetime.min
         # Call
         tss.on_ticker({"ask": 14, "bid": 9})
+        tss.wait_ts_moved(5)
         self.assertEqual(tss.rest_client.post.call_count, 2)
         self.assertEqual(tss.cur_trade.take_profit_price, 14)
 
@@ -63,6 +75,7 @@ class TestTrailingStopSupport(TestCase):
 
         # Call
         tss.on_ticker({"ask": 11, "bid": 8})
+        tss.wait_ts_moved(5)
         self.assertEqual(tss.rest_client.post.call_count, 2)
         self.assertEqual(tss.cur_trade.take_profit_price, 8)
 
@@ -70,6 +83,7 @@ class TestTrailingStopSupport(TestCase):
         tss.last_ts_move_time = datetime.min
         # Call
         tss.on_ticker({"ask": 11, "bid": 9})
+        tss.wait_ts_moved(5)
         self.assertEqual(tss.rest_client.post.call_count, 0)
         self.assertEqual(tss.cur_trade.take_profit_price, 8)
 
@@ -77,7 +91,127 @@ class TestTrailingStopSupport(TestCase):
         tss.last_ts_move_time = datetime.min
         # Call
         tss.on_ticker({"ask": 11, "bid": 7})
+        tss.wait_ts_moved(5)
         self.assertEqual(tss.rest_client.post.call_count, 2)
         self.assertEqual(tss.cur_trade.take_profit_price, 7)
 
-        self.assertNotEqual(tss.last_ts_move_time, datetime.min)
\ No newline at end of file
+        self.assertNotEqual(tss.last_ts_move_time, datetime.min)
+
+    def test_move_should_place_new_sl_before_cancel_prev(self):
+        trade = self.new_trade()
+        trade.side = "BUY"
+        trade.ticker = "BTC-USDT"
+        trade.stop_loss_order_id = "1,2"
+        tss = self.tss_mock()
+        tss.cur_trade = trade
+        tss.rest_client.post.side_effect = [{"status": "ok", "data": {"sl_order": {"order_id_str": "3"}}},
+                                            {"status": "ok", "data": {"errors": []}}]
+
+        tss.on_ticker({"ask": 13, "bid": 9})
+        tss.wait_ts_moved(5)
+
+        self.assertEqual(["/linear-swap-api/v1/swap_cross_tpsl_order", "/linear-swap-api/v1/swap_cross_tpsl_cancel"],
+                         [call.args[0] for call in tss.rest_client.post.call_args_list])
+        self.assertEqual({"contract_code": "BTC-USDT", "order_id": "1,2"}, tss.rest_client.post.call_args.args[1])
+        self.assertEqual("3", trade.stop_loss_order_id)
+        self.assertEqual(13, trade.take_profit_price)
+
+    def test_move_failed_should_keep_prev_sl(self):
+        trade = self.new_trade()
+        trade.side = "BUY"
+        trade.stop_loss_order_id = "1"
+        tss = self.tss_mock()
+        tss.cur_trade = trade
+        tss.rest_client.post.return_value = {"status": "error"}
+
+        tss.on_ticker({"ask": 13, "bid": 9})
+        tss.wait_ts_moved(5)
+
+        # Only create attempt, previous sl is not cancelled
+        self.assertEqual(1, tss.rest_client.post.call_count)
+        self.assertEqual("1", trade.stop_loss_order_id)
+        self.assertEqual(10, trade.take_profit_price)
+
+    def test_on_ticker_should_not_wait_for_exchange_and_coalesce(self):
+        trade = self.new_trade()
+        trade.side = "BUY"
+        tss = self.tss_mock()
+        tss.cur_trade = trade
+        # Exchange is slow until released
+        released = threading.Event()
+        tss.rest_client.post.side_effect = lambda *args: released.wait(5) and {"status": "ok"}
+
+        start = time.time()
+        tss.on_ticker({"ask": 13, "bid": 9})
+        # Wait until the worker took the first move
+        self.assertTrue(self.wait_until(lambda: tss.rest_client.post.called))
+        for ask in [14, 16, 15]:
+            tss.on_ticker({"ask": ask, "bid": 9})
+        self.assertLess(time.time() - start, 1)
+
+        tss.min_trade_timedelta = timedelta(0)
+        released.set()
+        tss.wait_ts_moved(5)
+
+        # First move and the latest of pending moves, 15 is not higher than pending 16
+        self.assertEqual(4, tss.rest_client.post.call_count)
+        self.assertEqual(16, trade.take_profit_price)
+
+    def test_pending_move_of_closed_trade_should_be_dropped(self):
+        trade = self.new_trade()
+        trade.side = "BUY"
+        tss = self.tss_mock()
+        tss.cur_trade = trade
+        # Previous move was just now, so the next one waits in pending
+        tss.min_trade_timedelta = timedelta(seconds=0.2)
+        tss.last_ts_move_time = datetime.utcnow()
+
+        tss.on_ticker({"ask": 13, "bid": 9})
+        tss.cur_trade, tss.prev_trade = None, trade
+        tss.wait_ts_moved(5)
+
+        self.assertFalse(tss.rest_client.post.called)
+        self.assertEqual(10, trade.take_profit_price)
+
+    def test_move_ts_should_not_move_closed_trade(self):
+        trade = self.new_trade()
+        trade.side = "BUY"
+        trade.status = TradeStatus.closed
+        tss = self.tss_mock()
+        tss.cur_trade = trade
+
+        tss.move_ts(13, trade)
+
+        self.assertFalse(tss.rest_client.post.called)
+
+    def test_ticker_under_trade_lock_should_not_deadlock_with_pending_move(self):
+        trade = self.new_trade()
+        trade.side = "BUY"
+        tss = self.tss_mock()
+        tss.trade_lock = threading.RLock()
+        tss.cur_trade = trade
+        # Previous move was just now, so the next one waits in pending
+        tss.min_trade_timedelta = timedelta(seconds=0.2)
+        tss.last_ts_move_time = datetime.utcnow()
+        tss.on_ticker({"ask": 13, "bid": 9})
+        ticker_done = threading.Event()
+
+        def ticker_under_trade_lock():
+            # Like broker on_ticker: trade lock is held while the pending move becomes due
+            with tss.trade_lock:
+                time.sleep(0.4)
+                tss.on_ticker({"ask": 14, "bid": 9})
+            ticker_done.set()
+
+        threading.Thread(target=ticker_under_trade_lock, daemon=True).start()
+
+        self.assertTrue(ticker_done.wait(3))
+        self.assertTrue(tss.wait_ts_moved(5))
+        self.assertIn(trade.take_profit_price, [13, 14])
+
+    @staticmethod
+    def wait_until(condition, timeout_sec=5):
+        deadline = time.time() + timeout_sec
+        while not condition() and time.time() < deadline:
+            time.sleep(0.01)
+        return condition()
@@ -23,6 +23,10 @@ class HuobiFeedBase:
         if not self._client.is_running:
             self._client.open()
 
+    def stop(self):
+        """ Close web socket """
+        self._client.close()
+
     @staticmethod
     def ticker_of_ch(ch):
         return re.match("market\\.([\\w\\-]*)\\..*", ch).group(1)
@@ -5,6 +5,7 @@ from typing import Dict, List
 from pytrade2.exch.huobi.hbdm.HuobiRestClient import HuobiRestClient
 from pytrade2.exch.huobi.hbdm.HuobiWebSocketClient import HuobiWebSocketClient
 from pytrade2.exch.huobi.hbdm.feed.HuobiFeedBase import HuobiFeedBase
+from pytrade2.feed.OrderBookSnapshot import OrderBookSnapshot
 
 
 class HuobiWebSocketFeedHbdm(HuobiFeedBase):
@@ -70,9 +71,15 @@ class HuobiWebSocketFeedHbdm(HuobiFeedBase):
                 for consumer in [c for c in self.consumers if hasattr(c, 'on_ticker')]:
                     consumer.on_ticker(bidask)
             elif self.is_level2(topic):
-                l2 = self.rawlevel2model(msg["tick"])
-                for consumer in [c for c in self.consumers if hasattr(c, 'on_level2')]:
-                    consumer.on_level2(l2)
+                # Compact snapshot if consumer supports it, list of order book items otherwise
+                snapshot = self.rawlevel2snapshot(msg["tick"])
+                l2 = None
+                for consumer in self.consumers:
+                    if hasattr(consumer, 'on_level2_snapshot'):
+                        consumer.on_level2_snapshot(snapshot)
+                    elif hasattr(consumer, 'on_level2'):
+                        l2 = l2 if l2 is not None else snapshot.to_dicts()
+                        consumer.on_level2(l2)
         except Exception as e:
             self._logger.error(e)
 
@@ -87,6 +94,13 @@ class HuobiWebSocketFeedHbdm(HuobiFeedBase):
                             for price, vol in tick["asks"]]
         return bids + asks
 
+    @staticmethod
+    def rawlevel2snapshot(tick: dict) -> OrderBookSnapshot:
+        # dt = datetime.utcfromtimestamp(tick["ts"] / 1000)
+        dt = datetime.utcnow()
+        ticker = HuobiWebSocketFeedHbdm.ticker_of_ch(tick["ch"])
+        return OrderBookSnapshot.of_levels(dt, ticker, tick["bids"], tick["asks"])
+
     @staticmethod
     def rawticker2model(tick: dict) -> Dict:
         # dt = datetime.utcfromtimestamp(tick["ts"] / 1000)
@@ -29,6 +29,36 @@ class TestHuobiWebSocketFeedHbdm(TestCase):
         self.assertListEqual([2.1, 2.2], sorted([a["ask_vol"] for a in actual if "ask_vol" in a]))
         self.assertListEqual(["BTC-USDT"] * 4, [a["symbol"] for a in actual])
 
+    def test_rawlevel2snapshot(self):
+        msg = {'ch': 'market.BTC-USDT.depth.step0', 'ts': 1686980108772, 'version': 1,
+               'mrid': 100010780581381, 'id': 1686980108,
+               'bids': [['1.01', '1.1'], ['1.02', '1.2']],
+               'asks': [['2.01', '2.1'], ['2.02', '2.2']]}
+
+        actual = HuobiWebSocketFeedHbdm.rawlevel2snapshot(msg)
+
+        self.assertEqual("BTC-USDT", actual.symbol)
+        self.assertEqual([[1.01, 1.1], [1.02, 1.2]], actual.bids.tolist())
+        self.assertEqual([[2.01, 2.1], [2.02, 2.2]], actual.asks.tolist())
+
+    def test_on_socket_data_level2(self):
+        msg = {'ch': 'market.BTC-USDT.depth.step0',
+               'tick': {'ch': 'market.BTC-USDT.depth.step0', 'ts': 1686980108772, 'version': 1,
+                        'bids': [['1.01', '1.1']], 'asks': [['2.01', '2.1']]}}
+        feed = HuobiWebSocketFeedHbdm(config={"pytrade2.tickers": "BTC-USDT"}, rest_client=MagicMock(),
+                                      ws_client=MagicMock())
+        snapshot_consumer = MagicMock(spec=["on_level2_snapshot", "on_level2"])
+        items_consumer = MagicMock(spec=["on_level2"])
+        feed.consumers.update([snapshot_consumer, items_consumer])
+
+        # Call
+        feed.on_socket_data('market.BTC-USDT.depth.step0', msg)
+
+        snapshot_consumer.on_level2_snapshot.assert_called_once()
+        snapshot_consumer.on_level2.assert_not_called()
+        items = items_consumer.on_level2.call_args[0][0]
+        self.assertEqual([1.01, 2.01], [items[0]["bid"], items[1]["ask"]])
+
     def test_rawticker2model(self):
         msg = {'mrid': 100010776952278, 'id': 1686966700, 'bid': [26216.3, 5633], 'ask': [26216.4, 2],
                'ts': 1686966700177, 'version': 100010776952278, 'ch': 'market.BTC-USDT.bbo'}
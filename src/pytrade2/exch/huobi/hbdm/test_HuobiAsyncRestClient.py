@@ -0,0 +1,71 @@
+from unittest import TestCase
+
+from aiohttp import web
+
+from pytrade2.exch.AsyncioLoop import AsyncioLoop
+from pytrade2.exch.huobi.hbdm.HuobiAsyncRestClient import HuobiAsyncRestClient
+
+
+class TestHuobiAsyncRestClient(TestCase):
+    """ Client against local fake Huobi rest server """
+
+    def setUp(self):
+        self.requests = []
+        self.server_loop = AsyncioLoop("fake-huobi")
+        app = web.Application()
+        app.router.add_get("/linear-swap-ex/market/history/kline", self.on_get)
+        app.router.add_post("/linear-swap-api/v1/swap_cross_order", self.on_post)
+        self.runner = web.AppRunner(app)
+        port = self.server_loop.run(self.start_server())
+
+        self.aloop = AsyncioLoop("client")
+        self.client = HuobiAsyncRestClient("key123", "secret123", aloop=self.aloop)
+        self.client.base_url = f"http://127.0.0.1:{port}"
+
+    def tearDown(self):
+        self.client.close()
+        self.server_loop.run(self.runner.cleanup())
+        self.aloop.stop()
+        self.server_loop.stop()
+
+    async def start_server(self) -> int:
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        return self.runner.addresses[0][1]
+
+    async def on_get(self, request: web.Request):
+        self.requests.append((request.method, dict(request.query), request.remote, request.transport))
+        return web.json_response({"status": "ok", "data": [{"id": 1}]})
+
+    async def on_post(self, request: web.Request):
+        self.requests.append((request.method, await request.json(), request.remote, request.transport))
+        return web.json_response({"status": "ok", "data": {"order_id": 2}})
+
+    def test_get(self):
+        res = self.client.get("/linear-swap-ex/market/history/kline", {"contract_code": "BTC-USDT", "size": 2})
+
+        self.assertEqual({"status": "ok", "data": [{"id": 1}]}, res)
+        method, query = self.requests[0][:2]
+        self.assertEqual("GET", method)
+        self.assertEqual("BTC-USDT", query["contract_code"])
+        self.assertEqual("key123", query["AccessKeyId"])
+        self.assertIn("Signature", query)
+
+    def test_post(self):
+        res = self.client.post("/linear-swap-api/v1/swap_cross_order", {"contract_code": "BTC-USDT"})
+
+        self.assertEqual({"status": "ok", "data": {"order_id": 2}}, res)
+        self.assertEqual(("POST", {"contract_code": "BTC-USDT"}), self.requests[0][:2])
+
+    def test_requests_should_keep_connection_alive(self):
+        for _ in range(3):
+            self.client.post("/linear-swap-api/v1/swap_cross_order", {"contract_code": "BTC-USDT"})
+
+        # The same tcp connection for all requests
+        self.assertEqual(1, len({id(transport) for *_, transport in self.requests}))
+
+    def test_request_error_should_return_none(self):
+        self.client.base_url = "http://127.0.0.1:1"
+
+        self.assertIsNone(self.client.get("/linear-swap-ex/market/history/kline"))
@@ -0,0 +1,110 @@
+import gzip
+import json
+import time
+from datetime import timedelta
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from aiohttp import web
+
+from pytrade2.exch.AsyncioLoop import AsyncioLoop
+from pytrade2.exch.huobi.hbdm.HuobiAsyncWebSocketClient import HuobiAsyncWebSocketClient
+
+
+class TestHuobiAsyncWebSocketClient(TestCase):
+    """ Client against local fake Huobi websocket server """
+
+    def setUp(self):
+        # Fake server messages of each connection
+        self.received = []
+        self.connections = 0
+        self.server_loop = AsyncioLoop("fake-huobi")
+        self.runner = web.AppRunner(self.new_app())
+        port = self.server_loop.run(self.start_server())
+
+        self.aloop = AsyncioLoop("client")
+        self.client = HuobiAsyncWebSocketClient(host="127.0.0.1", path="/linear-swap-ws", access_key="key123",
+                                                secret_key="secret123", be_spot=False, is_broker=False,
+                                                aloop=self.aloop)
+        self.client.url = f"ws://127.0.0.1:{port}/linear-swap-ws"
+        self.client.reconnect_delay_min = timedelta(milliseconds=10)
+
+    def tearDown(self):
+        self.client.close()
+        self.server_loop.run(self.runner.cleanup())
+        self.aloop.stop()
+        self.server_loop.stop()
+
+    def new_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/linear-swap-ws", self.on_connect)
+        return app
+
+    async def start_server(self) -> int:
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        return self.runner.addresses[0][1]
+
+    async def on_connect(self, request):
+        """ Ping, wait for subscription, push one message, then close the first connection only """
+        self.connections += 1
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        await ws.send_bytes(gzip.compress(b'{"ping":123}'))
+        for _ in range(2):
+            msg = await ws.receive()
+            self.received.append(json.loads(msg.data))
+        await ws.send_bytes(gzip.compress(json.dumps({"ch": "market.btc-usdt.bbo", "tick": {}}).encode()))
+        if self.connections == 1:
+            await ws.close()
+        else:
+            async for _ in ws:
+                pass
+        return ws
+
+    @staticmethod
+    def wait_until(condition, timeout_sec=5):
+        deadline = time.time() + timeout_sec
+        while not condition() and time.time() < deadline:
+            time.sleep(0.01)
+        return condition()
+
+    def test_should_pong_subscribe_and_dispatch(self):
+        consumer = MagicMock()
+        self.client.add_consumer("market.btc-usdt.bbo", {"sub": "market.btc-usdt.bbo"}, consumer)
+
+        self.client.open()
+
+        self.assertTrue(self.wait_until(lambda: consumer.on_socket_data.called))
+        consumer.on_socket_data.assert_called_with("market.btc-usdt.bbo", {"ch": "market.btc-usdt.bbo", "tick": {}})
+        self.assertCountEqual([{"pong": 123}, {"sub": "market.btc-usdt.bbo"}], self.received[:2])
+
+    def test_should_reconnect_and_resubscribe(self):
+        consumer = MagicMock()
+        self.client.add_consumer("market.btc-usdt.bbo", {"sub": "market.btc-usdt.bbo"}, consumer)
+
+        self.client.open()
+
+        self.assertTrue(self.wait_until(lambda: consumer.on_socket_data.call_count >= 2))
+        self.assertEqual(2, self.connections)
+        self.assertEqual(2, self.received.count({"sub": "market.btc-usdt.bbo"}))
+
+    def test_should_reconnect_if_heartbeat_timeout(self):
+        self.client.heartbeat_timeout = timedelta(milliseconds=100)
+
+        # No subscriptions, server waits for them after ping and client does not receive anything
+        self.client.open()
+
+        self.assertTrue(self.wait_until(lambda: self.connections >= 2))
+
+    def test_close_should_stop(self):
+        self.client.open()
+        self.wait_until(lambda: self.connections >= 1)
+
+        self.client.close()
+
+        self.assertFalse(self.client.is_running)
+        connections = self.connections
+        time.sleep(0.1)
+        self.assertEqual(connections, self.connections)
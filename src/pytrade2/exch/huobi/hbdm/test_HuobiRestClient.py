@@ -0,0 +1,110 @@
+import base64
+import hmac
+from hashlib import sha256
+from unittest import TestCase
+from unittest.mock import MagicMock
+from urllib import parse
+
+from aiohttp import web
+
+from pytrade2.exch.AsyncioLoop import AsyncioLoop
+from pytrade2.exch.huobi.hbdm.HuobiRestClient import HuobiRestClient
+from pytrade2.metrics.MetricServer import MetricServer
+
+
+class TestHuobiRestClient(TestCase):
+    """ Client against local fake Huobi rest server """
+
+    def setUp(self):
+        self.metrics = MetricServer.metrics
+        MetricServer.metrics = MagicMock()
+        self.requests = []
+        # Server errors before successful response
+        self.errors = 0
+        self.server_loop = AsyncioLoop("fake-huobi")
+        app = web.Application()
+        app.router.add_get("/linear-swap-ex/market/history/kline", self.on_request)
+        app.router.add_post("/linear-swap-api/v1/swap_cross_order", self.on_request)
+        self.runner = web.AppRunner(app)
+        port = self.server_loop.run(self.start_server())
+
+        self.client = HuobiRestClient("key123", "secret123", retries=2,
+                                      timeouts={"/linear-swap-api/v1/swap_cross_order": 3})
+        self.client.base_url = f"http://127.0.0.1:{port}"
+
+    def tearDown(self):
+        MetricServer.metrics = self.metrics
+        self.server_loop.run(self.runner.cleanup())
+        self.server_loop.stop()
+
+    async def start_server(self) -> int:
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        return self.runner.addresses[0][1]
+
+    async def on_request(self, request: web.Request):
+        self.requests.append((request.method, request.transport))
+        if self.errors > 0:
+            self.errors -= 1
+            return web.json_response({"status": "error"}, status=503)
+        return web.json_response({"status": "ok"})
+
+    def test_auth_params_should_sign_like_huobi(self):
+        auth_params = self.client._auth_params_of("post", "/linear-swap-api/v1/swap_cross_order")
+
+        params = dict(parse.parse_qsl(auth_params))
+        payload = f"POST\napi.hbdm.vn\n/linear-swap-api/v1/swap_cross_order\n" + \
+                  auth_params[:auth_params.index("&Signature=")]
+        expected = base64.b64encode(hmac.new(b"secret123", payload.encode(), digestmod=sha256).digest()).decode()
+        self.assertEqual("key123", params["AccessKeyId"])
+        self.assertEqual(expected, params["Signature"])
+
+    def test_requests_should_keep_connection_alive(self):
+        for _ in range(3):
+            self.assertEqual({"status": "ok"}, self.client.get("/linear-swap-ex/market/history/kline"))
+            self.assertEqual({"status": "ok"}, self.client.post("/linear-swap-api/v1/swap_cross_order"))
+
+        self.assertEqual(1, len({id(transport) for _, transport in self.requests}))
+
+    def test_get_should_retry(self):
+        self.errors = 2
+
+        self.assertEqual({"status": "ok"}, self.client.get("/linear-swap-ex/market/history/kline"))
+        self.assertEqual(3, len(self.requests))
+
+    def test_post_should_not_retry(self):
+        self.errors = 1
+
+        self.assertEqual({"status": "error"}, self.client.post("/linear-swap-api/v1/swap_cross_order"))
+        self.assertEqual(1, len(self.requests))
+
+    def test_timeout_of(self):
+        self.assertEqual(3, self.client.timeout_of("/linear-swap-api/v1/swap_cross_order"))
+        self.assertEqual(10, self.client.timeout_of("/linear-swap-ex/market/history/kline"))
+
+    def test_should_observe_request_duration_of_path(self):
+        self.client.get("/linear-swap-ex/market/history/kline")
+        self.client.get("/linear-swap-ex/market/history/kline")
+        self.client.post("/linear-swap-api/v1/swap_cross_order")
+
+        rest_metrics = MetricServer.metrics.exchange.rest
+        self.assertEqual([(("get", "/linear-swap-ex/market/history/kline"),),
+                          (("post", "/linear-swap-api/v1/swap_cross_order"),)],
+                         [(call.args,) for call in rest_metrics.of_path.call_args_list])
+        self.assertEqual(3, rest_metrics.of_path.return_value.observe.call_count)
+
+    def test_should_return_response_if_metrics_are_not_set(self):
+        # Like in downloader app, which does not set metrics
+        MetricServer.metrics = None
+
+        res = self.client.get("/linear-swap-ex/market/history/kline")
+
+        self.assertEqual("ok", res["status"])
+
+    def test_should_return_response_if_metrics_failed(self):
+        MetricServer.metrics.exchange.rest.of_path.side_effect = AttributeError("metrics")
+
+        res = self.client.post("/linear-swap-api/v1/swap_cross_order")
+
+        self.assertEqual("ok", res["status"])
@@ -0,0 +1,106 @@
+import gzip
+import json
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from pytrade2.exch.huobi.hbdm.HuobiWebSocketClient import HuobiWebSocketClient
+from pytrade2.metrics.MetricServer import MetricServer
+
+
+class TestHuobiWebSocketClient(TestCase):
+    def setUp(self):
+        self.metrics = MetricServer.metrics
+        MetricServer.metrics = MagicMock()
+
+    def tearDown(self):
+        MetricServer.metrics = self.metrics
+
+    @staticmethod
+    def new_client():
+        client = HuobiWebSocketClient(host="api.hbdm.com", path="/linear-swap-ws", access_key="key123",
+                                      secret_key="secret123", be_spot=False, is_broker=False)
+        client._ws = MagicMock()
+        return client
+
+    @staticmethod
+    def gzipped(data: dict) -> bytes:
+        return gzip.compress(json.dumps(data).encode())
+
+    def test_on_msg_ping_should_pong(self):
+        client = self.new_client()
+
+        client._on_msg(None, self.gzipped({"ping": 1492420473027}))
+        client._on_msg(None, self.gzipped({"op": "ping", "ts": "1492420473027"}))
+
+        self.assertEqual(['{"pong": 1492420473027}', '{"op": "pong", "ts": "1492420473027"}'],
+                         [call.args[0] for call in client._ws.send.call_args_list])
+
+    def test_on_msg_compact_ping_should_pong_without_parsing(self):
+        client = self.new_client()
+
+        client._on_msg(None, gzip.compress(b'{"ping":1492420473027}'))
+
+        client._ws.send.assert_called_once_with('{"pong":1492420473027}')
+
+    def test_on_msg_should_dispatch_channel_to_consumers(self):
+        client = self.new_client()
+        consumer, other_consumer = MagicMock(), MagicMock()
+        client.add_consumer("market.btc-usdt.bbo", {"sub": "market.btc-usdt.bbo"}, consumer)
+        client.add_consumer("market.btc-usdt.depth.step0", {"sub": "market.btc-usdt.depth.step0"}, other_consumer)
+        msg = {"ch": "market.BTC-USDT.bbo", "tick": {"bid": [1, 2]}}
+
+        client._on_msg(None, self.gzipped(msg))
+
+        consumer.on_socket_data.assert_called_once_with("market.btc-usdt.bbo", msg)
+        other_consumer.on_socket_data.assert_not_called()
+        client._ws.send.assert_not_called()
+
+    def test_on_msg_should_dispatch_notify_topic(self):
+        client = self.new_client()
+        consumer = MagicMock()
+        client.add_consumer("orders_cross@btc-usdt", {"op": "sub", "topic": "orders_cross@btc-usdt"}, consumer)
+        msg = {"op": "notify", "topic": "orders_cross@BTC-USDT", "data": []}
+
+        client._on_msg(None, self.gzipped(msg))
+
+        consumer.on_socket_data.assert_called_once_with("orders_cross@btc-usdt", msg)
+
+    def test_on_msg_should_skip_consumer_without_handler(self):
+        client = self.new_client()
+        consumer = MagicMock(spec=["on_ticker"])
+        client.add_consumer("market.btc-usdt.bbo", {"sub": "market.btc-usdt.bbo"}, consumer)
+
+        client._on_msg(None, self.gzipped({"ch": "market.btc-usdt.bbo", "tick": {}}))
+
+        consumer.on_ticker.assert_not_called()
+
+    def test_on_msg_should_observe_topic_metrics(self):
+        client = self.new_client()
+        client.add_consumer("market.btc-usdt.bbo", {"sub": "market.btc-usdt.bbo"}, MagicMock())
+
+        client._on_msg(None, self.gzipped({"ch": "market.btc-usdt.bbo", "tick": {}}))
+        client._on_msg(None, self.gzipped({"ch": "market.btc-usdt.bbo", "tick": {}}))
+
+        websocket_metrics = MetricServer.metrics.exchange.websocket
+        websocket_metrics.of_topic.assert_called_once_with("market.btc-usdt.bbo")
+
+    def test_on_msg_should_dispatch_if_metrics_are_not_set(self):
+        MetricServer.metrics = None
+        client = self.new_client()
+        consumer = MagicMock()
+        client.add_consumer("market.btc-usdt.bbo", {"sub": "market.btc-usdt.bbo"}, consumer)
+        msg = {"ch": "market.btc-usdt.bbo", "tick": {}}
+
+        client._on_msg(None, self.gzipped(msg))
+
+        consumer.on_socket_data.assert_called_once_with("market.btc-usdt.bbo", msg)
+
+    def test_on_msg_spot_should_not_decompress(self):
+        client = self.new_client()
+        client._be_spot = True
+        consumer = MagicMock()
+        client.add_consumer("market.btcusdt.bbo", {"sub": "market.btcusdt.bbo"}, consumer)
+
+        client._on_msg(None, '{"ch": "market.btcusdt.bbo", "tick": {}}')
+
+        consumer.on_socket_data.assert_called_once()
@@ -0,0 +1,86 @@
+import os
+import sqlite3
+import tempfile
+from datetime import datetime
+from unittest import TestCase
+
+from pytrade2.datamodel.Trade import Trade
+from pytrade2.datamodel.TradeStatus import TradeStatus
+from pytrade2.exch.TradeJournal import TradeJournal
+
+
+class TestTradeJournal(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "trades.db")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def select(self, sql: str) -> list:
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute(sql).fetchall()
+
+    @staticmethod
+    def new_trade(open_time=datetime(2025, 5, 21, 10), status=TradeStatus.opened) -> Trade:
+        return Trade(ticker="BTC-USDT", side="BUY", open_time=open_time, open_order_id="1", quantity=1,
+                     take_profit_price=10, status=status)
+
+    def test_commit_new_trade_should_be_durable(self):
+        journal = TradeJournal(self.db_path)
+        trade = self.new_trade()
+
+        journal.add(trade)
+        journal.commit()
+
+        # Written before commit returned
+        self.assertEqual([(1, "BTC-USDT", "opened")], self.select("select id, ticker, status from trade"))
+
+    def test_commit_update_should_be_written_in_background(self):
+        journal = TradeJournal(self.db_path)
+        trade = self.new_trade()
+        journal.add(trade)
+        journal.commit()
+
+        trade.take_profit_price = 11
+        journal.commit()
+        trade.take_profit_price = 12
+        trade.status = TradeStatus.closed
+        journal.commit()
+        journal.flush()
+
+        self.assertEqual([(1, 12, "closed")], self.select("select id, take_profit_price, status from trade"))
+
+    def test_read_last_opened_trade(self):
+        journal = TradeJournal(self.db_path)
+        for trade in [self.new_trade(datetime(2025, 5, 21, 10)),
+                      self.new_trade(datetime(2025, 5, 21, 11)),
+                      self.new_trade(datetime(2025, 5, 21, 12), status=TradeStatus.closed)]:
+            journal.add(trade)
+        journal.commit()
+
+        # Reopen and update
+        journal = TradeJournal(self.db_path)
+        trade = journal.read_last_opened_trade()
+        trade.take_profit_price = 13
+        journal.commit()
+        journal.flush()
+        # New trade id continues
+        new_trade = self.new_trade()
+        journal.add(new_trade)
+        journal.commit()
+
+        self.assertEqual(2, trade.id)
+        self.assertEqual(datetime(2025, 5, 21, 11), trade.open_time)
+        self.assertEqual(4, new_trade.id)
+        self.assertEqual([(13,)], self.select("select take_profit_price from trade where id = 2"))
+
+    def test_read_last_opened_trade_empty(self):
+        self.assertIsNone(TradeJournal(self.db_path).read_last_opened_trade())
+
+    def test_should_be_wal_with_open_trade_index(self):
+        TradeJournal(self.db_path)
+
+        self.assertEqual([("wal",)], self.select("pragma journal_mode"))
+        self.assertIn(("ix_trade_status_open_time",), self.select("select name from sqlite_master where type='index'"))
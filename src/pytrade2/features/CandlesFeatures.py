@@ -15,57 +15,98 @@ class CandlesFeatures:
 
     @staticmethod
     def rolling_ohlc(candles_1min, window):
-        """ Unlike resample, rolling window does not work with first, last aggregations and with datetime there.
-            Some hacks needed """
-        df = candles_1min.copy()
-        # Convert datetime to numeric because rolling window does not work with times for getting first in aggregation
-        df['open_time'] = pd.to_datetime(df['open_time']).astype('int64')
-        df['close_time'] = pd.to_datetime(df['close_time']).astype('int64')
-        # Aggregate
-        df = df.rolling(window, closed = 'both').agg({
-            'open_time': 'min',
-            'close_time': 'max',      # Equivalent to 'last' for time
-            'open': lambda x: x.iloc[0],    # First value
-            'high': 'max',
-            'low': 'min',
-            'close': lambda x: x.iloc[-1],   # Last value
-            'vol': 'sum'})
-        df['open_time'] = pd.to_datetime(df['open_time'], unit = 'ns')
-        df['close_time'] = pd.to_datetime(df['close_time'], unit = 'ns')
-
+        """ Rolling candles of the time window, closed both sides. Vectorized, no python aggregation per window """
+        times = candles_1min.index.values.astype("datetime64[ns]").view(np.int64)
+        starts = CandlesFeatures.window_starts(times, window, closed="both")
+        ends = np.arange(1, len(times) + 1)
+
+        # Rolling window aggregated times as floats, keep the same precision
+        open_times = CandlesFeatures.window_agg(
+            np.fmin, pd.to_datetime(candles_1min["open_time"]).astype("int64").to_numpy(dtype=np.float64), starts)
+        close_times = CandlesFeatures.window_agg(
+            np.fmax, pd.to_datetime(candles_1min["close_time"]).astype("int64").to_numpy(dtype=np.float64), starts)
+        open_ = candles_1min["open"].to_numpy(dtype=np.float64)
+        close = candles_1min["close"].to_numpy(dtype=np.float64)
+        high = candles_1min["high"].to_numpy(dtype=np.float64)
+        low = candles_1min["low"].to_numpy(dtype=np.float64)
+        df = pd.DataFrame({
+            "open_time": pd.to_datetime(open_times, unit="ns"),
+            "close_time": pd.to_datetime(close_times, unit="ns"),
+            "open": open_[starts],
+            "high": CandlesFeatures.window_agg(np.fmax, high, starts),
+            "low": CandlesFeatures.window_agg(np.fmin, low, starts),
+            "close": close[ends - 1],
+            "vol": CandlesFeatures.window_sum(candles_1min["vol"].to_numpy(dtype=np.float64), starts)},
+            index=candles_1min.index)
         return df
 
     @staticmethod
     def rolling_candles_of_bid_ask(bid_ask: pd.DataFrame, period: str = "1min"):
         """ Calculate candles from bidask data. Consider price as (bid+ask)/2 """
 
-        df = pd.DataFrame(bid_ask)
-        df["price"] = (df["bid"] + df["ask"])/2
-        df["vol"] = df["bid_vol"] + df["ask_vol"]
-
-        # datetime hack to avooid numeric type error when rolling agg
-        df["datetime"] = df["datetime"].astype('int64')
-
-        df = df[[ "datetime", "price", "vol"]].rolling(period, closed = "right").agg({
-            'datetime': [lambda x: x.iloc[0], lambda x: x.iloc[-1]],     # Open/close times
-            'price': [lambda x: x.iloc[0], 'max', 'min', lambda x: x.iloc[-1]],
-            'vol': 'sum',
-        })
-        df.columns = [
-            'open_time',   # First datetime
-            'close_time',  # Last datetime
-            'open',        # First price
-            'high',        # Max price
-            'low',         # Min price
-            'close',       # Last price
-            'vol',         # Summed volume
-        ]
-        # Set back to datetime
-        df["open_time"] = pd.to_datetime(df["open_time"])
-        df["close_time"] = pd.to_datetime(df["close_time"])
+        price = ((bid_ask["bid"] + bid_ask["ask"]) / 2).to_numpy(dtype=np.float64)
+        vol = (bid_ask["bid_vol"] + bid_ask["ask_vol"]).to_numpy(dtype=np.float64)
+        times = bid_ask.index.values.astype("datetime64[ns]").view(np.int64)
+        starts = CandlesFeatures.window_starts(times, period, closed="right")
+        ends = np.arange(1, len(times) + 1)
+        # Rolling window aggregated times as floats, keep the same precision
+        datetimes = bid_ask["datetime"].astype("int64").to_numpy(dtype=np.float64)
+
+        df = pd.DataFrame({
+            "open_time": pd.to_datetime(datetimes[starts]),  # First datetime
+            "close_time": pd.to_datetime(datetimes[ends - 1]),  # Last datetime
+            "open": price[starts],  # First price
+            "high": CandlesFeatures.window_agg(np.fmax, price, starts),  # Max price
+            "low": CandlesFeatures.window_agg(np.fmin, price, starts),  # Min price
+            "close": price[ends - 1],  # Last price
+            "vol": CandlesFeatures.window_sum(vol, starts)  # Summed volume
+        }, index=bid_ask.index)
         df.set_index("close_time", inplace=True, drop=False)
         return df
 
+    @staticmethod
+    def window_starts(times: np.ndarray, window: str, closed: str = "right") -> np.ndarray:
+        """ Start row of the time window, ending at each row, like in rolling(window, closed=closed) """
+        if len(times) > 1 and (np.diff(times) < 0).any():
+            raise ValueError("index must be monotonic")
+        side = "left" if closed in ("both", "left") else "right"
+        return np.searchsorted(times, times - pd.Timedelta(window).value, side=side)
+
+    @staticmethod
+    def window_agg(ufunc: np.ufunc, values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+        """
+        Sliding max or min of values[start:i+1] windows, nans are skipped like rolling does.
+        Each window is covered by two overlapped power of 2 blocks, blocks are aggregated level by level.
+        O(n log(max window)) vectorized.
+        """
+        n = len(values)
+        out = np.full(n, np.nan)
+        if not n:
+            return out
+        ends = np.arange(1, n + 1)
+        # Level of each window: floor(log2(window length))
+        levels = np.frexp(ends - starts)[1] - 1
+        block = values.astype(np.float64)
+        for level in range(levels.max() + 1):
+            size = 1 << level
+            if level:
+                block = ufunc(block[:-(size >> 1)], block[(size >> 1):])
+            rows = np.flatnonzero(levels == level)
+            out[rows] = ufunc(block[starts[rows]], block[ends[rows] - size])
+        return out
+
+    @staticmethod
+    def window_sum(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+        """ Sliding sum of values[start:i+1] windows. Nan are skipped, all nan window sum is nan like rolling does"""
+        is_valid = ~np.isnan(values)
+        # Extended precision cumulative sum to keep the differences precise
+        sums = np.r_[0, np.cumsum(np.where(is_valid, values, 0), dtype=np.longdouble)]
+        counts = np.r_[0, np.cumsum(is_valid)]
+        ends = np.arange(1, len(values) + 1)
+        out = (sums[ends] - sums[starts]).astype(np.float64)
+        out[counts[ends] - counts[starts] == 0] = np.nan
+        return out
+
     @staticmethod
     def candles_last_combined_features_of(candles_by_periods: Dict[str, pd.DataFrame],
                                           cnt_by_period: Dict[str, int]) -> pd.DataFrame:
@@ -55,15 +55,10 @@ class CandlesMultiIndiFeatures:
         # Indicators
         indicators_features = []
         for period, candles in candles_by_periods.items():
-            #  pandas  DatetimeIndex interpolation does not natively support
-            # the "time" interpolation method at the array level.
-            # (despite the method being documented for DataFrame.interpolate()).
-            # Cannot directly interpolate with "time" method, use this hack
-            #candles_interpolated = candles.set_index(candles.index.view('int64')).interpolate(method='time').set_index(candles.index)
-            #candles =candles.resample(period, closed='right', label='right').last().dropna()
+            # Nan prices are forward filled, like CandlesMultiIndiStream does with the last candles
             candles = candles.sort_index()
             period_indicators = CandlesMultiIndiFeatures.indicators_of(
-                candles.interpolate(),
+                candles.ffill(),
                 period,
                 params.get(period, CandlesMultiIndiFeatures.default_params))
 
@@ -98,13 +93,28 @@ class CandlesMultiIndiFeatures:
 
     @staticmethod
     def indicators_of(candles, period, params: dict):
-        """ Single period indicators"""
+        """
+        Single period indicators. Gap in candles starts the indicators again, like CandlesMultiIndiStream does,
+        so learn and predict features are the same after the gap.
+        """
 
         if not params:
             params = CandlesMultiIndiFeatures.default_params
 
         resampled = candles.resample(period, closed="right").agg(
             {'high': 'max', 'low': 'min', 'open': 'first', 'close': 'last', 'vol': 'sum'})
+        # Empty bucket is a gap, each part between the gaps is calculated separately
+        resampled = resampled[candles["close"].resample(period, closed="right").size() > 0]
+        gap_ids = (resampled.index.to_series().diff() != pd.Timedelta(period)).cumsum()
+        parts = [CandlesMultiIndiFeatures.indicators_of_resampled(part, period, params)
+                 for _, part in resampled.groupby(gap_ids)]
+        if not parts:
+            return CandlesMultiIndiFeatures.indicators_of_resampled(resampled, period, params)
+        return pd.concat(parts)
+
+    @staticmethod
+    def indicators_of_resampled(resampled, period, params: dict):
+        """ Indicators of candles of the period without gaps """
         df = CandlesMultiIndiFeatures.ichimoku_of(resampled,
                                                   period,
                                                   params["ichimoku"]["window1"],
@@ -112,11 +122,12 @@ class CandlesMultiIndiFeatures:
                                                   params["ichimoku"]["window3"], )
         df[f'cci_{period}_diff'] = trend.cci(resampled['high'], resampled['low'], resampled['close'],
                                              window=params["cca"]["window"], fillna=False).diff()
-        if not resampled.empty:
+        if len(resampled) >= 2 * params["adx"]["window"]:
             df[f'adx_{period}_diff'] = trend.adx(resampled['high'], resampled['low'], resampled['close'],
-                                             window=params["adx"]["window"], fillna=False).diff()
+                                                 window=params["adx"]["window"], fillna=False).diff()
         else:
-            df[f'adx_{period}_diff'] = pd.Series([])
+            # ta fails on short candles, its adx is 0 until 2 * window candles
+            df[f'adx_{period}_diff'] = pd.Series(0.0, index=resampled.index).diff()
         df[f'rsi_{period}_diff'] = momentum.rsi(resampled['close'], window=params["rsi"]["window"], fillna=False).diff()
         df[f'stoch_{period}_diff'] = momentum.stoch(resampled['high'], resampled['low'], resampled['close'],
                                                     window=params["stoch"]["window"],
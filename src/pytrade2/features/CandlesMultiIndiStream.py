@@ -0,0 +1,45 @@
+from typing import Dict
+
+import pandas as pd
+
+from pytrade2.features.CandlesMultiIndiFeatures import CandlesMultiIndiFeatures
+from pytrade2.features.indicators.IncrementalIndicators import IncrementalIndicators
+
+
+class CandlesMultiIndiStream:
+    """
+    Last row of CandlesMultiIndiFeatures.multi_indi_features, calculated incrementally.
+    Indicators state is kept between the calls, only new candles are processed.
+    """
+
+    def __init__(self, params: dict = None):
+        self.params = params or dict()
+        self.indicators: Dict[str, IncrementalIndicators] = {}
+
+    def last_features(self, candles_by_periods: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """ Features of the last candle, the same as multi_indi_features(candles_by_periods, params).tail(1)"""
+        indicators = {}
+        for period, candles in candles_by_periods.items():
+            period_indicators = self.indicators.get(period)
+            if period_indicators is None:
+                period_indicators = IncrementalIndicators(
+                    period, self.params.get(period, CandlesMultiIndiFeatures.default_params))
+            period_indicators.update(candles)
+            indicators[period] = period_indicators
+        # Forget removed periods
+        self.indicators = indicators
+
+        columns = ["time_hour", "time_minute"] + [col for ind in indicators.values() for col in ind.columns]
+        if not indicators:
+            return pd.DataFrame(columns=columns)
+        min_period = min(indicators.keys(), key=pd.Timedelta)
+        min_candles = candles_by_periods[min_period]
+        if min_candles.empty or any(ind.time is None for ind in indicators.values()):
+            return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name=min_candles.index.name))
+
+        # Time features of the last candle, indicators of the last buckets are forward filled
+        last_time = min_candles.index.max()
+        time = max([last_time] + [ind.time for ind in indicators.values()])
+        values = [last_time.hour, last_time.minute] + [value for ind in indicators.values() for value in ind.values]
+        return pd.DataFrame([values], columns=columns,
+                            index=pd.DatetimeIndex([time], name=min_candles.index.name), dtype=float)
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 
@@ -13,47 +14,42 @@ class FeatureCleaner:
         if dfindex.empty:
             return []
 
-        # Generate expected timestamps at the specified frequency
-        full_range = pd.date_range(start=dfindex.min(),
-                                   end=dfindex.max(),
-                                   freq=freq)
+        # Expected timestamps are min + k * freq, find k of existing ones
+        start_time = dfindex.min()
+        freq_ns = pd.Timedelta(freq).value
+        offsets = pd.DatetimeIndex(dfindex).asi8 - start_time.value
+        last = (dfindex.max().value - start_time.value) // freq_ns
+        present = np.unique(offsets[offsets % freq_ns == 0] // freq_ns)
 
-        # Find missing timestamps
-        missing_times = full_range.difference(dfindex)
-
-        # Group consecutive missing timestamps into intervals
-        gaps = [(dfindex.min(), dfindex.min() + start_delta)]
-        if len(missing_times) > 0:
-            current_start = missing_times[0]
-            prev_time = missing_times[0]
-
-            for time in missing_times[1:]:
-                if time != prev_time + pd.Timedelta(freq):
-                    # Gap ends here
-                    gaps.append((current_start, prev_time))
-                    current_start = time
-                prev_time = time
-
-            # Add the last gap
-            gaps.append((current_start, prev_time))
+        # Missing timestamps are between existing ones, last expected timestamp can be missing too
+        present = np.append(present, last + 1)
+        is_gap = np.diff(present) > 1
+        gap_starts = (present[:-1][is_gap] + 1) * freq_ns
+        gap_ends = (present[1:][is_gap] - 1) * freq_ns
 
+        gaps = [(start_time, start_time + start_delta)]
+        gaps.extend(zip(start_time + pd.to_timedelta(gap_starts, unit="ns"),
+                        start_time + pd.to_timedelta(gap_ends, unit="ns")))
         return [(start, end + start_delta) for start, end in gaps]
 
     @classmethod
     def get_gap_mask(cls, df: pd.DataFrame, gaps: [()]):
         """ Mask time series: True if df record good, bad if in time gap """
 
-        intervals = pd.IntervalIndex.from_tuples(
-            [(pd.to_datetime(start), pd.to_datetime(end)) for start, end in gaps],
-            closed='both'
-        )
-
-        # Vectorized check for timestamps in gaps
-        def is_in_any_gap(ts):
-            return any(interval.left <= ts <= interval.right for interval in intervals)
+        times = pd.DatetimeIndex(df.index).asi8
+        mask = np.zeros(len(times), dtype=bool)
+        if gaps and len(times):
+            # Gap intervals, closed both sides, sorted by start
+            intervals = np.array([(pd.Timestamp(start).value, pd.Timestamp(end).value) for start, end in gaps],
+                                 dtype=np.int64)
+            intervals = intervals[np.argsort(intervals[:, 0], kind="stable")]
+            # Time is in a gap if any gap, started before, ends after the time
+            max_ends = np.maximum.accumulate(intervals[:, 1])
+            pos = np.searchsorted(intervals[:, 0], times, side="right") - 1
+            mask = (pos >= 0) & (max_ends[np.maximum(pos, 0)] >= times)
 
         # Create mask (True = gap, False = not in gap)
-        return df.index.to_series().apply(is_in_any_gap)
+        return pd.Series(mask, index=df.index, name=df.index.name)
 
     @classmethod
     def exclude_gaps(cls, df: pd.DataFrame, gaps: [()]):
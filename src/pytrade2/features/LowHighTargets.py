@@ -30,7 +30,15 @@ class LowHighTargets:
 
         fut_low_delta = df["fut_low"] - df["close"]
         fut_high_delta = df["fut_high"] - df["close"]
-        max_loss = df["close"] * loss_coeff
+        df["signal"] = LowHighTargets.signal_of(df["close"], fut_low_delta, fut_high_delta, loss_coeff,
+                                                profit_loss_ratio)
+
+        return df[["signal"]]
+
+    @staticmethod
+    def signal_of(close, fut_low_delta, fut_high_delta, loss_coeff: float, profit_loss_ratio: float) -> np.ndarray:
+        """ Buy, sell or oom signal by future low and high deltas from close: actual for targets or predicted """
+        max_loss = close * loss_coeff
         min_profit = max_loss * profit_loss_ratio
         direction = np.where(-fut_low_delta > fut_high_delta, -1,
                              np.where(fut_low_delta < fut_high_delta, 1, 0)
@@ -41,6 +49,4 @@ class LowHighTargets:
         profit_ok = np.where(direction > 0,
                              fut_high_delta >= min_profit, # Trend up, high delta is profit
                              abs(fut_low_delta) >= min_profit) # Trend down, low delta is profit
-        df["signal"] = direction * (loss_ok & profit_ok).astype(int)
-
-        return df[["signal"]]
+        return direction * (loss_ok & profit_ok).astype(int)
@@ -0,0 +1,41 @@
+import math
+
+
+class EwmMean:
+    """
+    Streaming exponentially weighted mean like pandas ewm(alpha, min_periods, adjust=False).mean().
+    Nan values are not ignored, they decay the weight of the mean as pandas does. O(1) per new value.
+    """
+
+    def __init__(self, alpha: float, min_periods: int = 0):
+        self.alpha = alpha
+        self.min_periods = max(min_periods, 1)
+        self.reset()
+
+    @staticmethod
+    def of_span(span: int, min_periods: int = None):
+        """ Ema of span periods, min periods are the span by default, like ta does """
+        return EwmMean(2.0 / (span + 1.0), span if min_periods is None else min_periods)
+
+    def reset(self):
+        self._weighted = math.nan
+        self._old_wt = 1.0
+        self._nobs = 0
+
+    def update(self, value: float, commit: bool = True) -> float:
+        """ Mean including the value. If not commit, the value is not remembered. """
+        weighted, old_wt = self._weighted, self._old_wt
+        is_observation = value == value
+        nobs = self._nobs + is_observation
+        if weighted == weighted:
+            old_wt *= 1.0 - self.alpha
+            if is_observation:
+                if weighted != value:
+                    weighted = (old_wt * weighted + self.alpha * value) / (old_wt + self.alpha)
+                old_wt = 1.0
+        elif is_observation:
+            weighted = value
+
+        if commit:
+            self._weighted, self._old_wt, self._nobs = weighted, old_wt, nobs
+        return weighted if nobs >= self.min_periods else math.nan
@@ -0,0 +1,59 @@
+class IncrementalAdx:
+    """
+    Streaming average directional index, the same as trend.adx of ta library. O(1) per new candle.
+    Like ta, adx is 0 until 2 * window candles, directional movement sums are Wilder smoothed.
+    """
+
+    def __init__(self, window: int = 14):
+        if window == 0:
+            raise ValueError("window may not be 0")
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        # Candles count
+        self._n = 0
+        self._prev = None
+        # Smoothed true range, plus and minus directional movements
+        self._trs = self._dip = self._din = 0.0
+        # Sum of first window directional indices, then adx
+        self._di_sum = 0.0
+        self._adx = 0.0
+
+    def update(self, high: float, low: float, close: float, commit: bool = True) -> float:
+        """ Adx including the candle. If not commit, the candle is not remembered. """
+        n, w = self._n, self.window
+        trs, dip, din, di_sum, adx = self._trs, self._dip, self._din, self._di_sum, self._adx
+        if n:
+            prev_high, prev_low, prev_close = self._prev
+            # ta takes min/max by numpy, nan is propagated
+            tr = (prev_close if prev_close != prev_close or prev_close > high else high) \
+                 - (prev_close if prev_close != prev_close or prev_close < low else low)
+            diff_up, diff_down = high - prev_high, prev_low - low
+            pos = abs(diff_up * ((diff_up > diff_down) and (diff_up > 0)))
+            neg = abs(diff_down * ((diff_down > diff_up) and (diff_down > 0)))
+            if n <= w:
+                # Initial sums of the first window
+                trs, dip, din = trs + tr, dip + pos, din + neg
+            else:
+                trs = trs - trs / float(w) + tr
+                dip = dip - dip / float(w) + pos
+                din = din - din / float(w) + neg
+
+            if n >= w:
+                dip_pct = 100 * (dip / trs) if trs != 0 else 0
+                din_pct = 100 * (din / trs) if trs != 0 else 0
+                di = 100 * abs((dip_pct - din_pct) / (dip_pct + din_pct)) if dip_pct + din_pct != 0 else 0
+                # Directional index of n - w candle is in adx of n candle
+                if n < 2 * w - 1:
+                    di_sum += di
+                elif n == 2 * w - 1:
+                    adx = (di_sum + di) / w
+                else:
+                    adx = ((adx * (w - 1)) + di) / float(w)
+
+        if commit:
+            self._n = n + 1
+            self._prev = (high, low, close)
+            self._trs, self._dip, self._din, self._di_sum, self._adx = trs, dip, din, di_sum, adx
+        return adx
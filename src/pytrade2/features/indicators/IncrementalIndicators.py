@@ -0,0 +1,154 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from pytrade2.features.indicators.EwmMean import EwmMean
+from pytrade2.features.indicators.IncrementalAdx import IncrementalAdx
+from pytrade2.features.indicators.RollingExtremum import RollingExtremum
+from pytrade2.features.indicators.RollingMeanDev import RollingMeanDev
+
+
+class IncrementalIndicators:
+    """
+    Streaming indicators of a single period, the same *_diff columns as CandlesMultiIndiFeatures.indicators_of.
+    Each new candle updates the state in O(1), the history is not recalculated.
+    Closed buckets are committed to the state. The last bucket is a forming candle, it is calculated without commit.
+    Gap in candles resets the state, like CandlesMultiIndiFeatures.indicators_of starts again after the gap.
+    Nan prices are forward filled in both.
+    """
+
+    cci_constant = 0.015
+
+    def __init__(self, period: str, params: dict):
+        self.period = period
+        self.period_ns = pd.Timedelta(period).value
+        self.columns = [f"{name}_{period}_diff" for name in
+                        ["ichimoku_base_line", "ichimoku_conversion_line", "ichimoku_a", "ichimoku_b",
+                         "cci", "adx", "rsi", "stoch", "macd"]]
+
+        ichimoku = params["ichimoku"]
+        self._conv_high = RollingExtremum(ichimoku["window1"], is_max=True)
+        self._conv_low = RollingExtremum(ichimoku["window1"], is_max=False)
+        self._base_high = RollingExtremum(ichimoku["window2"], is_max=True)
+        self._base_low = RollingExtremum(ichimoku["window2"], is_max=False)
+        # ta does not require full window for ichimoku b
+        self._b_high = RollingExtremum(ichimoku["window3"], min_periods=0, is_max=True)
+        self._b_low = RollingExtremum(ichimoku["window3"], min_periods=0, is_max=False)
+        self._cci = RollingMeanDev(params["cca"]["window"])
+        self._adx = IncrementalAdx(params["adx"]["window"])
+        rsi_window = params["rsi"]["window"]
+        self._rsi_up = EwmMean(1 / rsi_window, rsi_window)
+        self._rsi_down = EwmMean(1 / rsi_window, rsi_window)
+        self._stoch_high = RollingExtremum(params["stoch"]["window"], is_max=True)
+        self._stoch_low = RollingExtremum(params["stoch"]["window"], is_max=False)
+        self._macd_fast = EwmMean.of_span(params["macd"]["fast"])
+        self._macd_slow = EwmMean.of_span(params["macd"]["slow"])
+        self._stateful = [self._conv_high, self._conv_low, self._base_high, self._base_low, self._b_high,
+                          self._b_low, self._cci, self._adx, self._rsi_up, self._rsi_down, self._stoch_high,
+                          self._stoch_low, self._macd_fast, self._macd_slow]
+
+        # Right edge of the last committed bucket
+        self._last_bucket = None
+        # Last committed high, low, close to fill nans
+        self._last_prices = np.full(3, np.nan)
+        # Last committed features without nans
+        self._committed_time, self._committed_values = None, None
+        # Last features without nans, including forming candle: label of the bucket and diffs
+        self.time, self.values = None, None
+        self.reset()
+
+    def reset(self):
+        """ Start calculation again, like there was no candles before """
+        for indicator in self._stateful:
+            indicator.reset()
+        self._prev_close = math.nan
+        self._prev_values = np.full(len(self.columns), np.nan)
+
+    def update(self, candles: pd.DataFrame):
+        """ Calculate indicators of the candles, which are newer than already committed ones """
+        if candles.empty:
+            return
+        if not candles.index.is_monotonic_increasing:
+            candles = candles.sort_index()
+        times = candles.index.values.astype("datetime64[ns]").view(np.int64)
+        buckets = -((-times) // self.period_ns) * self.period_ns
+        start = int(np.searchsorted(buckets, self._last_bucket, side="right")) if self._last_bucket is not None else 0
+        if start >= len(buckets):
+            return
+
+        buckets = buckets[start:]
+        prices = np.column_stack([candles[col].to_numpy(dtype=np.float64)[start:] for col in ["high", "low", "close"]])
+        prices = self._ffill(prices, self._last_prices)
+        # Aggregate candles of the same bucket like resample(period, closed="right")
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(buckets)]
+        highs = np.fmax.reduceat(prices[:, 0], starts)
+        lows = np.fmin.reduceat(prices[:, 1], starts)
+        closes = prices[ends - 1, 2]
+
+        last = len(starts) - 1
+        self.time, self.values = self._committed_time, self._committed_values
+        for i in range(len(starts)):
+            is_closed = i < last
+            bucket = buckets[starts[i]]
+            values = self.update_bar(bucket, highs[i], lows[i], closes[i], commit=is_closed)
+            if np.isnan(values).any():
+                continue
+            time = pd.Timestamp(bucket - self.period_ns)
+            if is_closed:
+                self._committed_time, self._committed_values = time, values
+            self.time, self.values = time, values
+        self._last_prices = np.array([highs[last - 1], lows[last - 1], closes[last - 1]]) if last else self._last_prices
+
+    def update_bar(self, bucket: int, high: float, low: float, close: float, commit: bool = True) -> np.ndarray:
+        """ Indicator diffs of a new candle of the period, closed right at the bucket. """
+        if self._last_bucket is not None and bucket - self._last_bucket != self.period_ns:
+            self.reset()
+
+        conv = 0.5 * (self._conv_high.update(high, commit) + self._conv_low.update(low, commit))
+        base = 0.5 * (self._base_high.update(high, commit) + self._base_low.update(low, commit))
+        ichimoku_a = 0.5 * (conv + base)
+        ichimoku_b = 0.5 * (self._b_high.update(high, commit) + self._b_low.update(low, commit))
+
+        typical_price = (high + low + close) / 3.0
+        mean, mean_dev = self._cci.update(typical_price, commit)
+        cci = self._div(typical_price - mean, self.cci_constant * mean_dev)
+
+        adx = self._adx.update(high, low, close, commit)
+
+        diff = close - self._prev_close
+        ema_up = self._rsi_up.update(diff if diff > 0 else 0.0, commit)
+        ema_down = self._rsi_down.update(-diff if diff < 0 else 0.0, commit)
+        rsi = 100.0 if ema_down == 0 else 100 - (100 / (1 + self._div(ema_up, ema_down)))
+
+        stoch_min = self._stoch_low.update(low, commit)
+        stoch_max = self._stoch_high.update(high, commit)
+        stoch = self._div(100 * (close - stoch_min), stoch_max - stoch_min)
+
+        macd = self._macd_fast.update(close, commit) - self._macd_slow.update(close, commit)
+
+        values = np.array([base, conv, ichimoku_a, ichimoku_b, cci, adx, rsi, stoch, macd])
+        diffs = values - self._prev_values
+        if commit:
+            self._prev_values = values
+            self._prev_close = close
+            self._last_bucket = bucket
+        return diffs
+
+    @staticmethod
+    def _ffill(prices: np.ndarray, last_prices: np.ndarray) -> np.ndarray:
+        """ Forward fill nan prices, starting from last known ones """
+        if not np.isnan(prices).any():
+            return prices
+        prices = np.vstack([last_prices, prices])
+        rows = np.where(np.isnan(prices), 0, np.arange(len(prices))[:, None])
+        np.maximum.accumulate(rows, axis=0, out=rows)
+        return np.take_along_axis(prices, rows, axis=0)[1:]
+
+    @staticmethod
+    def _div(a: float, b: float) -> float:
+        """ Division like numpy does it: inf or nan instead of the error """
+        if b == 0:
+            return math.nan if a == 0 or a != a else math.copysign(math.inf, a) * math.copysign(1.0, b)
+        return a / b
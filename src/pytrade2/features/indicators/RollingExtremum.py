@@ -0,0 +1,63 @@
+import math
+from collections import deque
+
+
+class RollingExtremum:
+    """
+    Streaming rolling max or min like pandas rolling(window, min_periods).max() or min().
+    Monotonic deque of (index, value), O(1) amortized per new value. NaN values are skipped.
+    """
+
+    def __init__(self, window: int, min_periods: int = None, is_max: bool = True):
+        self.window = window
+        self.min_periods = max(window if min_periods is None else min_periods, 1)
+        # Keep negated values for min, so the deque logic is the same
+        self._sign = 1.0 if is_max else -1.0
+        self.reset()
+
+    def reset(self):
+        self._n = 0
+        # Decreasing values, the first is the extremum of the window
+        self._values = deque()
+        # Indices of nan values in the window
+        self._nans = deque()
+
+    def update(self, value: float, commit: bool = True) -> float:
+        """ Extremum of the window ending with the value. If not commit, the value is not remembered. """
+        oldest = self._n - self.window
+        values, nans = self._values, self._nans
+        is_nan = value != value
+        value = self._sign * value
+
+        if commit:
+            while values and values[0][0] <= oldest:
+                values.popleft()
+            while nans and nans[0] <= oldest:
+                nans.popleft()
+            best = values[0][1] if values else math.nan
+            nan_count = len(nans)
+        else:
+            # Only one value can be out of the window, it is not removed yet
+            best = math.nan
+            for i, v in values:
+                if i > oldest:
+                    best = v
+                    break
+            nan_count = len(nans) - (1 if nans and nans[0] <= oldest else 0)
+
+        if is_nan:
+            nan_count += 1
+        elif not best >= value:
+            best = value
+
+        if commit:
+            if is_nan:
+                nans.append(self._n)
+            else:
+                while values and values[-1][1] <= value:
+                    values.pop()
+                values.append((self._n, value))
+            self._n += 1
+
+        count = min(self._n + (0 if commit else 1), self.window) - nan_count
+        return self._sign * best if count >= self.min_periods else math.nan
@@ -0,0 +1,48 @@
+import math
+
+import numpy as np
+
+
+class RollingMeanDev:
+    """
+    Streaming rolling mean and mean absolute deviation of the full window, as cci of ta calculates them.
+    Mean is a rolling sum. Mean deviation cannot be updated incrementally, it is O(window) over a preallocated ring.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self._ring = np.empty(window, dtype=np.float64)
+        self.reset()
+
+    def reset(self):
+        self._ring.fill(np.nan)
+        self._pos = 0
+        self._sum = 0.0
+        self._nan_count = self.window
+        # Recalculate the sum from the ring sometimes to avoid accumulated float error
+        self._updates = 0
+
+    def update(self, value: float, commit: bool = True) -> (float, float):
+        """ Mean and mean deviation of the window ending with the value """
+        ring = self._ring
+        old = ring[self._pos]
+        nan_count = self._nan_count + (value != value) - (old != old)
+        total = self._sum + (0.0 if value != value else value) - (0.0 if old != old else old)
+        if commit:
+            ring[self._pos] = value
+            self._pos = (self._pos + 1) % self.window
+            self._nan_count = nan_count
+            self._updates += 1
+            if self._updates % (self.window * 64) == 0:
+                total = float(np.nansum(ring))
+            self._sum = total
+        if nan_count:
+            return math.nan, math.nan
+
+        mean = total / self.window
+        if commit:
+            window = ring
+        else:
+            window = ring.copy()
+            window[self._pos] = value
+        return mean, float(np.mean(np.abs(window - np.mean(window))))
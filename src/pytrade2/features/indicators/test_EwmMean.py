@@ -0,0 +1,35 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from pytrade2.features.indicators.EwmMean import EwmMean
+
+
+class TestEwmMean(TestCase):
+
+    def test_update_should_be_equal_to_pandas_ewm(self):
+        values = np.random.default_rng(1).random(200)
+        values[::7] = np.nan
+        ewm = EwmMean(alpha=0.1, min_periods=14)
+
+        actual = [ewm.update(value) for value in values]
+
+        expected = pd.Series(values).ewm(alpha=0.1, min_periods=14, adjust=False).mean()
+        np.testing.assert_allclose(expected.values, actual, rtol=1e-12)
+
+    def test_of_span(self):
+        values = np.arange(30, dtype=float)
+        ewm = EwmMean.of_span(12)
+
+        actual = [ewm.update(value) for value in values]
+
+        expected = pd.Series(values).ewm(span=12, min_periods=12, adjust=False).mean()
+        np.testing.assert_allclose(expected.values, actual, rtol=1e-12)
+
+    def test_update_without_commit(self):
+        ewm = EwmMean(alpha=0.5)
+        ewm.update(2)
+
+        self.assertEqual(3, ewm.update(4, commit=False))
+        self.assertEqual(2, ewm.update(2))
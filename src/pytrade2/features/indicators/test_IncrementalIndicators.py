@@ -0,0 +1,66 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from pytrade2.features.CandlesMultiIndiFeatures import CandlesMultiIndiFeatures
+from pytrade2.features.indicators.IncrementalIndicators import IncrementalIndicators
+
+
+class TestIncrementalIndicators(TestCase):
+
+    @staticmethod
+    def candles_1min(n: int = 300) -> pd.DataFrame:
+        rnd = np.random.default_rng(1)
+        close = 100 + np.cumsum(rnd.normal(size=n))
+        return pd.DataFrame({"open": close, "high": close + rnd.random(n), "low": close - rnd.random(n),
+                             "close": close, "vol": rnd.random(n)},
+                            index=pd.DatetimeIndex(pd.date_range("2025-06-22 16:01", periods=n, freq="1min"),
+                                                   name="close_time"))
+
+    def assert_last_equal_to_ta(self, candles: pd.DataFrame, indicators: IncrementalIndicators, period: str):
+        expected = CandlesMultiIndiFeatures.indicators_of(candles, period, CandlesMultiIndiFeatures.default_params)
+        self.assertEqual(expected.columns.tolist(), indicators.columns)
+        self.assertEqual(expected.index[-1], indicators.time)
+        np.testing.assert_allclose(expected.iloc[-1].values, indicators.values, rtol=1e-8, atol=1e-9)
+
+    def test_update_bar_should_be_equal_to_ta(self):
+        candles = self.candles_1min()
+        indicators = IncrementalIndicators("1min", CandlesMultiIndiFeatures.default_params)
+
+        rows = [indicators.update_bar(time.value, high, low, close)
+                for time, high, low, close in candles[["high", "low", "close"]].itertuples()]
+
+        actual = pd.DataFrame(rows, columns=indicators.columns,
+                              index=candles.index - pd.Timedelta("1min")).dropna()
+        expected = CandlesMultiIndiFeatures.indicators_of(candles, "1min", CandlesMultiIndiFeatures.default_params)
+        pd.testing.assert_frame_equal(expected, actual, check_freq=False, check_names=False, rtol=1e-8, atol=1e-9)
+
+    def test_update_should_calc_forming_candle(self):
+        candles = self.candles_1min()
+        indicators = IncrementalIndicators("5min", CandlesMultiIndiFeatures.default_params)
+
+        # New 1min candles come one by one, the last 5min candle is not closed yet
+        for end in range(200, 213):
+            indicators.update(candles.iloc[:end])
+            self.assert_last_equal_to_ta(candles.iloc[:end], indicators, "5min")
+
+    def test_update_should_start_again_after_gap(self):
+        candles = self.candles_1min()
+        candles = pd.concat([candles.iloc[:100], candles.iloc[110:]])
+        indicators = IncrementalIndicators("1min", CandlesMultiIndiFeatures.default_params)
+
+        indicators.update(candles)
+
+        self.assert_last_equal_to_ta(candles.iloc[100:], indicators, "1min")
+
+    def test_update_should_keep_last_features_while_not_enough_candles(self):
+        candles = self.candles_1min()
+        indicators = IncrementalIndicators("1min", CandlesMultiIndiFeatures.default_params)
+        indicators.update(candles.iloc[:100])
+
+        # Gap, then only 2 new candles
+        indicators.update(pd.concat([candles.iloc[:100], candles.iloc[110:112]]))
+
+        # Features of the last candle before the gap
+        self.assertEqual(candles.index[99] - pd.Timedelta("1min"), indicators.time)
@@ -0,0 +1,39 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from pytrade2.features.indicators.RollingExtremum import RollingExtremum
+
+
+class TestRollingExtremum(TestCase):
+
+    @staticmethod
+    def values():
+        values = np.random.default_rng(1).random(200)
+        values[::7] = np.nan
+        return values
+
+    def rolling_of(self, extremum: RollingExtremum):
+        return [extremum.update(value) for value in self.values()]
+
+    def test_update_should_be_equal_to_rolling_max(self):
+        actual = self.rolling_of(RollingExtremum(5, is_max=True))
+        expected = pd.Series(self.values()).rolling(5).max()
+        np.testing.assert_array_equal(expected.values, actual)
+
+    def test_update_should_be_equal_to_rolling_min(self):
+        actual = self.rolling_of(RollingExtremum(5, min_periods=2, is_max=False))
+        expected = pd.Series(self.values()).rolling(5, min_periods=2).min()
+        np.testing.assert_array_equal(expected.values, actual)
+
+    def test_update_without_commit(self):
+        extremum = RollingExtremum(2, is_max=True)
+        extremum.update(3)
+        extremum.update(1)
+
+        # 3 is out of the window of 1 and 2
+        self.assertEqual(2, extremum.update(2, commit=False))
+        self.assertEqual(5, extremum.update(5, commit=False))
+        # Not committed values are not remembered
+        self.assertEqual(1, extremum.update(0))
@@ -16,69 +16,75 @@ class Level2Buckets:
         level2: DataFrame with level2 tick columns: datetime, price, bid_vol, ask_vol
         level2 price and volume for each time
         """
-        # Assign bucket number for each level2 item
-        level2.set_index("datetime")
-        level2 = self.assign_bucket(level2, l2size, buckets)
-
-        # Pivot buckets to feature columns: bucket_1, bucket_2 etc. with summary bucket's volume as value.
         maxbucket = buckets // 2 - 1
         minbucket = -buckets // 2
-        askfeatures = self.pivot_buckets(level2, 'ask_vol', 0, maxbucket)
-        bidfeatures = self.pivot_buckets(level2, 'bid_vol', minbucket, -1)
+        columns = [f"l2_bucket_{bucket}" for bucket in range(minbucket, maxbucket + 1)]
+
+        # Number of order book snapshot for each level2 item, snapshots are sorted by time
+        snapshots, times = pd.factorize(level2["datetime"], sort=True)
+        is_valid = snapshots >= 0
+        snapshots = snapshots[is_valid]
+        if not len(snapshots):
+            return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name="datetime"), dtype=float)
+        bid, bid_vol, ask, ask_vol = [level2[col].to_numpy(dtype=np.float64)[is_valid]
+                                      for col in ["bid", "bid_vol", "ask", "ask_vol"]]
+
+        # Assign bucket number for each level2 item
+        bucket = self.assign_bucket(snapshots, len(times), bid, bid_vol, ask, ask_vol, l2size, buckets)
 
-        # Ask + bid buckets
-        level2features = bidfeatures.merge(askfeatures, on='datetime').fillna(0)
-        level2features = level2features.rolling(past_window).agg('sum')
+        # Summary volume of each snapshot and bucket: bid buckets are from minbucket to -1, ask from 0 to maxbucket
+        is_bid = (bucket >= minbucket) & (bucket <= -1)
+        is_ask = (bucket >= 0) & (bucket <= maxbucket)
+        bucket_vol = np.where(is_bid, bid_vol, ask_vol)
+        is_side = is_bid | is_ask
+        cells = snapshots[is_side] * buckets + (bucket[is_side] - minbucket).astype(np.int64)
+        volumes = np.bincount(cells, weights=np.nan_to_num(bucket_vol[is_side]), minlength=len(times) * buckets)
+        volumes = volumes.reshape(len(times), buckets)
 
-        return level2features
+        # Only snapshots with both ask and bid items
+        has_bid = np.bincount(snapshots[is_bid], minlength=len(times)) > 0
+        has_ask = np.bincount(snapshots[is_ask], minlength=len(times)) > 0
+        has_both = has_bid & has_ask
+        level2features = pd.DataFrame(volumes[has_both], columns=columns,
+                                      index=pd.DatetimeIndex(times[has_both], name="datetime"))
+        return level2features.rolling(past_window).agg('sum')
 
-    def assign_bucket(self, level2: pd.DataFrame, l2size: int = 0, buckets: int = 20) -> pd.DataFrame:
+    @staticmethod
+    def assign_bucket(snapshots: np.ndarray, snapshots_count: int, bid: np.ndarray, bid_vol: np.ndarray,
+                      ask: np.ndarray, ask_vol: np.ndarray, l2size: int = 0, buckets: int = 20) -> np.ndarray:
         """
         To each level2 item set it's bucket number.
+        snapshots: order book snapshot number of each level2 item
         l2size: max-min price across all level2 snapshots
         buckets: split level2 snapshots to this number of items, calculate volume inside each bucket
         """
-        # Calc middle price between ask and bid
-        level2 = level2.set_index("datetime")
-        askmin = level2[level2['ask_vol'].notna()].groupby('datetime')['ask'].min().reset_index().set_index(
-            "datetime")
-        level2['price_min'] = askmin['ask']
-        bidmax = level2[level2['bid_vol'].notna()].groupby('datetime')['bid'].max().reset_index().set_index(
-            "datetime")
-        level2['price_max'] = bidmax['bid']
-        level2['price_middle'] = (askmin['ask'] + bidmax['bid']) / 2
+        # Calc middle price between min ask and max bid of each snapshot
+        askmin = np.full(snapshots_count, np.nan)
+        has_ask = ~np.isnan(ask_vol)
+        np.fmin.at(askmin, snapshots[has_ask], ask[has_ask])
+        bidmax = np.full(snapshots_count, np.nan)
+        has_bid = ~np.isnan(bid_vol)
+        np.fmax.at(bidmax, snapshots[has_bid], bid[has_bid])
+        price_middle = (askmin + bidmax) / 2
 
         # Assign a bucket number to each level2 item
         # scalar level2 size and bucket size
-        level2['price'] = np.where(level2['bid'].notna(), level2['bid'], level2['ask'])
+        price = np.where(~np.isnan(bid), bid, ask)
         if not l2size:
-            l2size = level2.groupby('datetime')['price'].agg(np.ptp).reset_index()['price'].median()
+            # Median of snapshot price ranges, nan price makes the range nan
+            price_max = np.full(snapshots_count, -np.inf)
+            np.maximum.at(price_max, snapshots, price)
+            price_min = np.full(snapshots_count, np.inf)
+            np.minimum.at(price_min, snapshots, price)
+            ranges = (price_max - price_min)[~np.isnan(price_max)]
+            l2size = np.median(ranges) if len(ranges) else np.nan
         # 10 ask steps + 10 bid steps
         # buckets = 20
         bucketsize = l2size / buckets
 
         # If price is too out, set maximum possible bucket
-        level2['bucket'] = (level2['price'] - level2['price_middle']) // bucketsize
+        with np.errstate(divide="ignore", invalid="ignore"):
+            bucket = (price - price_middle[snapshots]) // bucketsize
         maxbucket = buckets // 2 - 1
         minbucket = -buckets // 2
-        level2['bucket'] = level2['bucket'].clip(upper=maxbucket, lower=minbucket)
-        return level2
-
-    def pivot_buckets(self, level2: pd.DataFrame, vol_col_name: str, minbucket: int, maxbucket: int) -> pd.DataFrame:
-        """
-        Pivot dataframe to make bucket columns with volume values
-        """
-        # Calculate volume inside each group
-        grouped = level2[level2['bucket'].between(minbucket, maxbucket)].groupby(['datetime', 'bucket'])[
-            vol_col_name].sum().reset_index(level=1)
-
-        grouped['bucket'] = grouped['bucket'].astype(int)
-        features = grouped.reset_index().pivot_table(index='datetime', columns='bucket', values=vol_col_name)
-        # Add absent buckets (rare case)
-        for col in range(minbucket, maxbucket + 1):
-            if col not in features.columns:
-                features[col] = 0
-        features = features[sorted(features)]
-
-        features.columns = ['l2_bucket_' + str(col) for col in features.columns]
-        return features
+        return np.clip(bucket, minbucket, maxbucket)
@@ -1,49 +1,88 @@
+import numpy as np
 import pandas as pd
 
 
 class Level2Features:
+    columns = ["l2_bid_max", "l2_bid_vol", "l2_bid_expect", "l2_ask_min", "l2_ask_vol", "l2_ask_expect",
+               "l2_bid_ask_expect"]
+
     @staticmethod
     def expectation(level2_df: pd.DataFrame, period ="1min"):
         """ Expectations with volumes"""
-        # temp columns to calc expectations
-        df = level2_df.set_index("datetime")
-        df["bid_vol_mult"] = df["bid"] * df["bid_vol"]
-        df["ask_vol_mult"] = df["ask"] * df["ask_vol"]
+        times = pd.DatetimeIndex(level2_df["datetime"])
+        tz = times.tz
+        times = times.tz_localize(None) if tz is not None else times
+        times = times.values.astype("datetime64[ns]").view(np.int64)
+        bid, bid_vol, ask, ask_vol = [level2_df[col].to_numpy(dtype=np.float64)
+                                      for col in ["bid", "bid_vol", "ask", "ask_vol"]]
 
-        df["bidask"] = df["bid"].fillna(df["ask"])
-        df["bidask_vol"] = df["bid_vol"].fillna(df["ask_vol"])
-        df["bidask_vol_mult"] = df["bidask"] * df["bidask_vol"]
+        # Order book items, sorted by time
+        is_valid = times != pd.NaT.value
+        if not is_valid.all():
+            times, bid, bid_vol, ask, ask_vol = [a[is_valid] for a in (times, bid, bid_vol, ask, ask_vol)]
+        if not len(times):
+            df = pd.DataFrame(columns=Level2Features.columns, index=pd.DatetimeIndex([], name="datetime", tz=tz),
+                              dtype=float)
+            df["datetime"] = df.index
+            return df
+        if not (times[1:] >= times[:-1]).all():
+            order = np.argsort(times, kind="stable")
+            times, bid, bid_vol, ask, ask_vol = [a[order] for a in (times, bid, bid_vol, ask, ask_vol)]
 
-        # Group by time to get order books, aggregate order books
-        df = df.groupby("datetime").agg(
-            bid = ("bid", "sum"),
-            bid_vol = ("bid_vol", "sum"),
-            bid_vol_mult = ("bid_vol_mult", "sum"),
-            bid_max=("bid", "max"),
+        # Order books are segments of the same time, aggregate order books
+        starts = np.flatnonzero(np.r_[True, times[1:] != times[:-1]])
+        snapshot_times = times[starts]
 
-            ask=("ask", "sum"),
-            ask_vol=("ask_vol", "sum"),
-            ask_vol_mult = ("ask_vol_mult", "sum"),
-            ask_min=("ask", "min"),
+        # Temp buffer is reused, not to allocate new arrays of all order book items
+        buf = np.empty(len(times))
 
-            bidask_vol_mult = ("bidask_vol_mult", "sum")
+        def book_sum(values: np.ndarray):
+            """ Sum of each order book, nans are skipped """
+            if values is not buf:
+                np.copyto(buf, values)
+            np.copyto(buf, 0.0, where=np.isnan(buf))
+            return np.add.reduceat(buf, starts)
 
-        )
+        book_bid_vol = book_sum(bid_vol)
+        book_ask_vol = book_sum(ask_vol)
+        book_bid_vol_mult = book_sum(np.multiply(bid, bid_vol, out=buf))
+        book_ask_vol_mult = book_sum(np.multiply(ask, ask_vol, out=buf))
+        # Bid or ask if bid is nan
+        np.copyto(buf, bid)
+        np.copyto(buf, ask, where=np.isnan(bid))
+        buf *= np.where(np.isnan(bid_vol), ask_vol, bid_vol)
+        book_bidask_vol_mult = book_sum(buf)
 
         # calc expectations
-        df["bid_expect"] = df["bid_vol_mult"]/df["bid_vol"]
-        df["ask_expect"] = df["ask_vol_mult"]/df["ask_vol"]
-        df["bid_ask_expect"] = df["bidask_vol_mult"] / (df["bid_vol"] + df["ask_vol"])
-
-        # Without technical columns
-        df.columns = [f"l2_{col}" for col in df.columns]
-        # Return without temp columns
-        df = df[["l2_bid_max", "l2_bid_vol",  "l2_bid_expect",
-                   "l2_ask_min","l2_ask_vol","l2_ask_expect", "l2_bid_ask_expect"]]
-
-        # Resample, usually 1min
-        df = df.resample(period, label ="right", closed ="right").mean()
-        df["datetime"] = df.index
-        return df
+        with np.errstate(divide="ignore", invalid="ignore"):
+            features = np.column_stack([
+                np.fmax.reduceat(bid, starts),
+                book_bid_vol,
+                book_bid_vol_mult / book_bid_vol,
+                np.fmin.reduceat(ask, starts),
+                book_ask_vol,
+                book_ask_vol_mult / book_ask_vol,
+                book_bidask_vol_mult / (book_bid_vol + book_ask_vol)])
 
+        # Resample, usually 1min. Bins are closed and labeled right, aligned to start of the first day.
+        period_ns = pd.Timedelta(period).value
+        origin = snapshot_times[0] - snapshot_times[0] % pd.Timedelta("1d").value
+        labels = origin + -((origin - snapshot_times) // period_ns) * period_ns
+        bins = (labels - labels[0]) // period_ns
+        bin_starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+        is_value = ~np.isnan(features)
+        sums = np.add.reduceat(np.where(is_value, features, 0.0), bin_starts, axis=0)
+        counts = np.add.reduceat(is_value, bin_starts, axis=0)
+        # Empty bins are nan like in resample
+        bins_count = int(bins[-1]) + 1
+        means = np.full((bins_count, features.shape[1]), np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            means[bins[bin_starts]] = np.where(counts > 0, sums / counts, np.nan)
 
+        index = pd.date_range(pd.Timestamp(int(labels[0])), periods=bins_count, freq=pd.Timedelta(period),
+                              name="datetime")
+        if tz is not None:
+            index = index.tz_localize(tz)
+        df = pd.DataFrame(means, columns=Level2Features.columns, index=index)
+        df["datetime"] = df.index
+        return df
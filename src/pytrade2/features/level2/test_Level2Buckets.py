@@ -50,3 +50,35 @@ class TestLevel2Buckets(TestCase):
              'l2_bucket_2', 'l2_bucket_3', 'l2_bucket_4', 'l2_bucket_5',
              'l2_bucket_6', 'l2_bucket_7', 'l2_bucket_8', 'l2_bucket_9'],
             features.columns.tolist())
+
+    def test_level2_buckets_should_skip_snapshot_without_asks(self):
+        t1, t2 = datetime.fromisoformat('2021-11-26 17:39:00'), datetime.fromisoformat('2021-11-26 17:39:01')
+        data = pd.DataFrame([
+            # The second snapshot goes first, snapshots are sorted by time
+            {'datetime': t2, 'ask': 0.9, 'ask_vol': 3, 'bid_vol': None},
+            {'datetime': t2, 'bid': -0.9, 'ask_vol': None, 'bid_vol': 4},
+            {'datetime': t1, 'ask': 0.9, 'ask_vol': 1, 'bid_vol': None},
+            {'datetime': t1, 'bid': -0.9, 'ask_vol': None, 'bid_vol': 2},
+            # Bids only
+            {'datetime': datetime.fromisoformat('2021-11-26 17:39:02'), 'bid': -0.9, 'ask_vol': None, 'bid_vol': 1},
+        ])
+
+        features = Level2Buckets().level2_buckets(data, past_window="1s", l2size=20, buckets=20)
+
+        self.assertEqual([t1, t2], features.index.tolist())
+        self.assertEqual([2.0, 4.0], features["l2_bucket_-1"].tolist())
+        self.assertEqual([1.0, 3.0], features["l2_bucket_0"].tolist())
+
+    def test_level2_buckets_should_sum_past_window(self):
+        t1, t2 = datetime.fromisoformat('2021-11-26 17:39:00'), datetime.fromisoformat('2021-11-26 17:39:01')
+        data = pd.DataFrame([
+            {'datetime': t1, 'ask': 0.9, 'ask_vol': 1, 'bid_vol': None},
+            {'datetime': t1, 'bid': -0.9, 'ask_vol': None, 'bid_vol': 2},
+            {'datetime': t2, 'ask': 0.9, 'ask_vol': 3, 'bid_vol': None},
+            {'datetime': t2, 'bid': -0.9, 'ask_vol': None, 'bid_vol': 4},
+        ])
+
+        features = Level2Buckets().level2_buckets(data, past_window="2s", l2size=20, buckets=20)
+
+        self.assertEqual([2.0, 6.0], features["l2_bucket_-1"].tolist())
+        self.assertEqual([1.0, 4.0], features["l2_bucket_0"].tolist())
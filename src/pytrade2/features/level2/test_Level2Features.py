@@ -35,3 +35,32 @@ class TestLevel2Features(TestCase):
 
         self.assertEqual(2, expectations["l2_bid_max"].tolist()[0])
         self.assertEqual(3, expectations["l2_ask_min"].tolist()[0])
+
+    def test_expectation_should_resample_unsorted_order_books(self):
+        dt = datetime.fromisoformat('2021-11-26 17:39:00')
+        level2_data = pd.DataFrame([
+            # 17:42 order book goes first
+            {"datetime": dt + timedelta(minutes=3), "bid": 5, "bid_vol": 1},
+            {"datetime": dt + timedelta(minutes=3), "ask": 6, "ask_vol": 1},
+            {"datetime": dt, "bid": 1, "bid_vol": 1},
+            {"datetime": dt, "ask": 2, "ask_vol": 1},
+            {"datetime": dt + timedelta(seconds=1), "bid": 3, "bid_vol": 1},
+            {"datetime": dt + timedelta(seconds=1), "ask": 4, "ask_vol": 1},
+        ])
+
+        expectations = Level2Features().expectation(level2_data)
+
+        # Closed and labeled right: 17:39:01 is in 17:40 bin, 17:41 bin without data is nan
+        self.assertEqual([dt + timedelta(minutes=i) for i in range(4)], expectations.index.tolist())
+        self.assertEqual(expectations.index.tolist(), expectations["datetime"].tolist())
+        self.assertEqual([1, 3, 5], expectations["l2_bid_max"].dropna().tolist())
+        self.assertEqual([1.5, 3.5, 5.5], expectations["l2_bid_ask_expect"].dropna().tolist())
+        self.assertTrue(expectations.iloc[2][Level2Features.columns].isna().all())
+
+    def test_expectation_empty(self):
+        level2_data = pd.DataFrame(columns=["datetime", "bid", "bid_vol", "ask", "ask_vol"])
+
+        expectations = Level2Features().expectation(level2_data)
+
+        self.assertTrue(expectations.empty)
+        self.assertEqual(Level2Features.columns + ["datetime"], expectations.columns.tolist())
@@ -1,6 +1,7 @@
 from datetime import datetime
 from unittest import TestCase
 
+import numpy as np
 import pandas as pd
 
 from pytrade2.features.CandlesFeatures import CandlesFeatures
@@ -144,3 +145,64 @@ class TestCandlesFeatures(TestCase):
         self.assertEqual([1.5, 1.5, 3.5, 5.5], candles["low"].tolist())
         self.assertEqual([1.5, 3.5, 5.5, 7.5], candles["close"].tolist())
         self.assertEqual([30, 100, 180, 260], candles["vol"].tolist())
+
+    @staticmethod
+    def random_bid_ask(n: int = 1000):
+        rnd = np.random.default_rng(1)
+        times = np.sort(pd.Timestamp("2025-04-13").value + rnd.integers(0, 3600 * 10 ** 9, n) // 10 ** 6 * 10 ** 6)
+        # Duplicated times
+        times[100:110] = times[100]
+        index = pd.DatetimeIndex(times.view("datetime64[ns]"), name="datetime")
+        return pd.DataFrame({"datetime": index, "bid": rnd.random(n), "bid_vol": rnd.random(n), "ask": rnd.random(n),
+                             "ask_vol": rnd.random(n)}, index=index)
+
+    def test_rolling_candles_of_bid_ask_should_be_equal_to_rolling_agg(self):
+        bid_ask = self.random_bid_ask()
+        bid_ask.loc[bid_ask.index[::13], "bid"] = np.nan
+
+        # How rolling candles were calculated before
+        df = bid_ask.copy()
+        df["price"] = (df["bid"] + df["ask"]) / 2
+        df["vol"] = df["bid_vol"] + df["ask_vol"]
+        df["datetime"] = df["datetime"].astype('int64')
+        expected = df[["datetime", "price", "vol"]].rolling("1min", closed="right").agg({
+            'datetime': [lambda x: x.iloc[0], lambda x: x.iloc[-1]],
+            'price': [lambda x: x.iloc[0], 'max', 'min', lambda x: x.iloc[-1]],
+            'vol': 'sum'})
+        expected.columns = ['open_time', 'close_time', 'open', 'high', 'low', 'close', 'vol']
+        expected["open_time"] = pd.to_datetime(expected["open_time"])
+        expected["close_time"] = pd.to_datetime(expected["close_time"])
+        expected.set_index("close_time", inplace=True, drop=False)
+
+        actual = CandlesFeatures.rolling_candles_of_bid_ask(bid_ask, "1min")
+
+        pd.testing.assert_frame_equal(expected, actual, rtol=1e-12)
+
+    def test_rolling_ohlc_should_be_equal_to_rolling_agg(self):
+        bid_ask = self.random_bid_ask()
+        candles = pd.DataFrame({"open_time": bid_ask.index - pd.Timedelta("1min"), "close_time": bid_ask.index,
+                                "open": bid_ask["bid"], "high": bid_ask["ask"], "low": bid_ask["bid"],
+                                "close": bid_ask["ask"], "vol": bid_ask["bid_vol"]}, index=bid_ask.index)
+        candles.loc[candles.index[::7], "high"] = np.nan
+
+        # How rolling candles were calculated before
+        df = candles.copy()
+        df['open_time'] = df['open_time'].astype('int64')
+        df['close_time'] = df['close_time'].astype('int64')
+        expected = df.rolling("5min", closed='both').agg({
+            'open_time': 'min', 'close_time': 'max', 'open': lambda x: x.iloc[0], 'high': 'max', 'low': 'min',
+            'close': lambda x: x.iloc[-1], 'vol': 'sum'})
+        expected['open_time'] = pd.to_datetime(expected['open_time'], unit='ns')
+        expected['close_time'] = pd.to_datetime(expected['close_time'], unit='ns')
+
+        actual = CandlesFeatures.rolling_ohlc(candles, "5min")
+
+        pd.testing.assert_frame_equal(expected, actual, rtol=1e-12)
+
+    def test_window_agg(self):
+        values = np.array([3, 1, np.nan, 2, 5, 0], dtype=float)
+        starts = np.array([0, 0, 0, 1, 2, 5])
+
+        self.assertEqual([3, 3, 3, 2, 5, 0], CandlesFeatures.window_agg(np.fmax, values, starts).tolist())
+        self.assertEqual([3, 1, 1, 1, 2, 0], CandlesFeatures.window_agg(np.fmin, values, starts).tolist())
+        self.assertEqual([3, 4, 4, 3, 7, 0], CandlesFeatures.window_sum(values, starts).tolist())
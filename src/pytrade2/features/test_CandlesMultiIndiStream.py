@@ -0,0 +1,67 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from pytrade2.features.CandlesMultiIndiFeatures import CandlesMultiIndiFeatures
+from pytrade2.features.CandlesMultiIndiStream import CandlesMultiIndiStream
+from pytrade2.feed.CandlesAggregator import CandlesAggregator
+
+
+class TestCandlesMultiIndiStream(TestCase):
+
+    @staticmethod
+    def candles_1min(n: int) -> pd.DataFrame:
+        rnd = np.random.default_rng(1)
+        close_time = pd.date_range("2025-06-22 16:01", periods=n, freq="1min")
+        close = 100 + np.cumsum(rnd.normal(size=n))
+        return pd.DataFrame({"open_time": close_time - pd.Timedelta("1min"), "close_time": close_time,
+                             "open": close, "high": close + rnd.random(n), "low": close - rnd.random(n),
+                             "close": close, "vol": rnd.random(n)})
+
+    def test_last_features_should_be_equal_to_multi_indi_features(self):
+        candles = self.candles_1min(200)
+        aggregators = {period: CandlesAggregator(period, 1000) for period in ["1min", "5min"]}
+        stream = CandlesMultiIndiStream()
+
+        for i in range(len(candles)):
+            # New candle from the feed
+            candles_by_periods = {}
+            for period, aggregator in aggregators.items():
+                aggregator.add(candles.iloc[i:i + 1])
+                candles_by_periods[period] = aggregator.to_frame()
+
+            actual = stream.last_features(candles_by_periods)
+
+            if i >= 150:
+                expected = CandlesMultiIndiFeatures.multi_indi_features(candles_by_periods).tail(1)
+                pd.testing.assert_frame_equal(expected, actual, check_dtype=False, check_freq=False,
+                                              rtol=1e-8, atol=1e-9)
+
+    def test_last_features_should_be_equal_to_multi_indi_features_after_gap(self):
+        candles = self.candles_1min(300)
+        # 20 minutes gap, then nan price in the candle after the gap
+        candles = candles.drop(index=range(100, 120)).reset_index(drop=True)
+        candles.loc[101, ["high", "low", "close"]] = np.nan
+        aggregators = {period: CandlesAggregator(period, 1000) for period in ["1min", "5min"]}
+        stream = CandlesMultiIndiStream()
+
+        for i in range(len(candles)):
+            candles_by_periods = {}
+            for period, aggregator in aggregators.items():
+                aggregator.add(candles.iloc[i:i + 1])
+                candles_by_periods[period] = aggregator.to_frame()
+
+            actual = stream.last_features(candles_by_periods)
+
+            if i >= 150:
+                expected = CandlesMultiIndiFeatures.multi_indi_features(candles_by_periods).tail(1)
+                pd.testing.assert_frame_equal(expected, actual, check_dtype=False, check_freq=False,
+                                              rtol=1e-8, atol=1e-9, obj=f"Features of candle {i}")
+
+    def test_last_features_should_be_empty_if_not_enough_candles(self):
+        candles = self.candles_1min(10).set_index("close_time", drop=False)
+
+        features = CandlesMultiIndiStream().last_features({"1min": candles})
+
+        self.assertTrue(features.empty)
@@ -0,0 +1,54 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from pytrade2.features.FeatureCleaner import FeatureCleaner
+
+
+class TestFeatureCleaner(TestCase):
+
+    @staticmethod
+    def times(minutes: [int]) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex([pd.Timestamp("2025-06-22 16:00") + pd.Timedelta(minutes=m) for m in minutes])
+
+    def test_find_time_gaps(self):
+        gaps = FeatureCleaner.find_time_gaps(self.times([0, 1, 4, 5, 7, 8]), pd.Timedelta("1min"))
+
+        self.assertEqual([(pd.Timestamp("2025-06-22 16:00"), pd.Timestamp("2025-06-22 16:02")),
+                          (pd.Timestamp("2025-06-22 16:02"), pd.Timestamp("2025-06-22 16:04")),
+                          (pd.Timestamp("2025-06-22 16:06"), pd.Timestamp("2025-06-22 16:07"))], gaps)
+
+    def test_find_time_gaps_no_gaps(self):
+        gaps = FeatureCleaner.find_time_gaps(self.times([0, 1, 2]))
+
+        self.assertEqual([(pd.Timestamp("2025-06-22 16:00"), pd.Timestamp("2025-06-22 16:00"))], gaps)
+
+    def test_find_time_gaps_empty(self):
+        self.assertEqual([], FeatureCleaner.find_time_gaps(pd.DatetimeIndex([])))
+
+    def test_get_gap_mask(self):
+        df = pd.DataFrame({"value": range(10)}, index=self.times(range(10)))
+        gaps = [(pd.Timestamp("2025-06-22 16:06"), pd.Timestamp("2025-06-22 16:07")),
+                (pd.Timestamp("2025-06-22 16:01"), pd.Timestamp("2025-06-22 16:04")),
+                (pd.Timestamp("2025-06-22 16:02"), pd.Timestamp("2025-06-22 16:03"))]
+
+        mask = FeatureCleaner.get_gap_mask(df, gaps)
+
+        self.assertEqual(df.index.tolist(), mask.index.tolist())
+        self.assertEqual([False, True, True, True, True, False, True, True, False, False], mask.tolist())
+
+    def test_clean_should_be_equal_to_interval_check(self):
+        rnd = np.random.default_rng(1)
+        minutes = np.sort(rnd.choice(3 * 24 * 60, 3000, replace=False))
+        input_df = pd.DataFrame({"value": minutes}, index=self.times(minutes))
+        features = pd.DataFrame({"value": range(5000)}, index=self.times(range(5000)))
+        start_delta = pd.Timedelta("3min")
+        gaps = FeatureCleaner.find_time_gaps(input_df.index, start_delta)
+
+        actual = FeatureCleaner.clean(input_df, features, start_delta)
+
+        # Check each time against each interval, as it was before
+        expected = features[[not any(start <= time <= end for start, end in gaps) for time in features.index]]
+        pd.testing.assert_frame_equal(expected, actual)
+        self.assertGreater(len(gaps), 100)
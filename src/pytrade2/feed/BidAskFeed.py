@@ -1,51 +1,78 @@
 import multiprocessing
+import threading
 from datetime import datetime
 from typing import Dict
 
 import pandas as pd
 
 from pytrade2.exch.Exchange import Exchange
+from pytrade2.feed.FeedSnapshot import FeedSnapshot
+from pytrade2.feed.TicksBuffer import TicksBuffer
 
 
 class BidAskFeed:
+    """
+    New ticks are appended under short buffer lock only. Applied ticks are published as immutable snapshot,
+    data_lock of the strategy is not used by socket thread.
+    """
     kind = "bid_ask"
 
     def __init__(self, cfg: Dict[str, str], exchange_provider: Exchange, data_lock: multiprocessing.RLock,
                  new_data_event: multiprocessing.Event):
         self.websocket_feed = exchange_provider.websocket_feed(cfg["pytrade2.exchange"])
         self.websocket_feed.consumers.add(self)
-        cols = ['datetime', 'symbol', 'bid', 'bid_vol', 'ask', 'ask_vol']
-        self.bid_ask: pd.DataFrame = pd.DataFrame(columns=cols)
-        self.bid_ask_buf: pd.DataFrame = pd.DataFrame(columns=cols)  # Buffer
+        # Ticks storage without dataframe creation on each message
+        self._ticks = TicksBuffer()
+        self.snapshot = FeedSnapshot(self._ticks.frame())
         self.history_min_window = (pd.Timedelta(cfg.get("pytrade2.strategy.history.min.window"))
                                    + pd.Timedelta(cfg.get("pytrade2.strategy.predict.window", "0s")))
         self.history_max_window = (pd.Timedelta(cfg.get("pytrade2.strategy.history.max.window"))
                                    + pd.Timedelta(cfg.get("pytrade2.strategy.predict.window", "0s")))
+        # Strategy lock serializes appliers, buffer lock is for new ticks only
         self.data_lock = data_lock
+        self.buf_lock = threading.RLock()
         self.new_data_event = new_data_event
 
+    @property
+    def bid_ask(self) -> pd.DataFrame:
+        """ Applied ticks of the last snapshot, read only """
+        return self.snapshot.data
+
+    @bid_ask.setter
+    def bid_ask(self, bid_ask: pd.DataFrame):
+        self.snapshot = self.snapshot.next(bid_ask)
+
+    @property
+    def bid_ask_buf(self) -> pd.DataFrame:
+        """ New ticks, not applied yet """
+        with self.buf_lock:
+            return self._ticks.new_frame()
+
+    @bid_ask_buf.setter
+    def bid_ask_buf(self, buf: pd.DataFrame):
+        """ Replace new ticks. Empty buf means they have been consumed. """
+        with self.buf_lock:
+            self._ticks.drop_new()
+            self._ticks.extend(buf)
 
     def run(self):
         self.websocket_feed.run()
 
     def on_ticker(self, ticker: dict):
-        # Add new data to df
-        new_df = pd.DataFrame([ticker], columns=list(ticker.keys())).set_index("datetime", drop=False)
-        with self.data_lock:
-            self.bid_ask_buf = pd.concat([df for df in [self.bid_ask_buf, new_df] if not df.empty])
+        # Add new data to the buffer
+        with self.buf_lock:
+            self._ticks.append_dict(ticker)
         self.new_data_event.set()
 
     def apply_buf(self):
-        """ Add the buf to the data then clear the buf """
-        if self.bid_ask_buf.empty:
+        """ Add the buf to the data then clear the buf, publish new snapshot """
+        if not self._ticks.new_len:
             return
 
-        with self.data_lock:
-            self.bid_ask = pd.concat([df for df in [self.bid_ask, self.bid_ask_buf] if not df.empty]).sort_index()
-            self.bid_ask_buf = pd.DataFrame()
-            # Purge old data
-            min_time = self.bid_ask.index.max() - self.history_max_window
-            self.bid_ask = self.bid_ask[self.bid_ask.index > min_time]
+        with self.data_lock, self.buf_lock:
+            # Apply new ticks and purge old data. Published frames are views of rows which are never overwritten.
+            self._ticks.apply_new(self.history_max_window)
+            self.bid_ask = self._ticks.frame()
         return self.bid_ask
 
     def is_alive(self, maxdelta: pd.Timedelta):
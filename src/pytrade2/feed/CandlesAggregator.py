@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+
+
+class CandlesAggregator:
+    """
+    Incremental candles of a single period.
+    New 1min or same period candle updates the last open bucket or appends a new one, no resample of the whole history.
+    Keeps only last max_len candles.
+    """
+
+    columns = ["open_time", "close_time", "open", "high", "low", "close", "vol"]
+    time_columns = ["open_time", "close_time"]
+    value_columns = ["open", "high", "low", "close", "vol"]
+    _nat = np.datetime64("NaT", "ns").view(np.int64)
+    # Pre aggregate larger inputs in pandas, merge smaller ones candle by candle
+    bulk_len = 64
+
+    def __init__(self, period: str, max_len: int):
+        self.period = period
+        self.period_ns = pd.Timedelta(period).value
+        self.max_len = max(int(max_len), 1)
+        # Double capacity to trim old candles once per max_len appends, not on each append
+        self._capacity = 2 * self.max_len
+        self._bucket = np.empty(self._capacity, dtype=np.int64)
+        self._times = np.empty((self._capacity, len(self.time_columns)), dtype=np.int64)
+        self._values = np.empty((self._capacity, len(self.value_columns)), dtype=np.float64)
+        self._len = 0
+        # Last produced dataframe
+        self.frame = None
+
+    def __len__(self):
+        return min(self._len, self.max_len)
+
+    def bucket_of(self, close_time_ns):
+        """ Right edge of the bucket, closed right like resample(period, closed="right") """
+        return -((-close_time_ns) // self.period_ns) * self.period_ns
+
+    def reset(self, candles: pd.DataFrame = None):
+        """ Clear the candles, then aggregate given candles if any """
+        self._len = 0
+        self.frame = None
+        if candles is not None and not candles.empty:
+            self.add(candles)
+
+    def add(self, candles: pd.DataFrame):
+        """ Aggregate new candles. Usually they belong to the last bucket or to the next one. """
+        if candles.empty or "close_time" not in candles.columns:
+            return
+        if len(candles) > self.bulk_len:
+            # Large history, pre aggregate it by buckets in one pass
+            candles = self.aggregate(candles)
+        n = len(candles)
+        times = np.column_stack([self._times_of(candles, col, n) for col in self.time_columns])
+        values = np.column_stack([candles[col].to_numpy(dtype=np.float64)
+                                  if col in candles.columns else np.full(n, np.nan)
+                                  for col in self.value_columns])
+        order = np.argsort(times[:, 1], kind="stable")
+        buckets = self.bucket_of(times[:, 1])
+        for i in order:
+            if times[i, 1] != self._nat:
+                self._merge(buckets[i], times[i], values[i])
+
+    def aggregate(self, candles: pd.DataFrame) -> pd.DataFrame:
+        """ Aggregate candles to buckets of the period """
+        df = candles.reindex(columns=self.columns).reset_index(drop=True)
+        for col in self.time_columns:
+            df[col] = pd.to_datetime(df[col])
+        df = df[df["close_time"].notna()].sort_values("close_time", kind="stable")
+        buckets = self.bucket_of(df["close_time"].to_numpy(dtype="datetime64[ns]").view(np.int64))
+        return df.groupby(buckets, sort=True).agg(
+            {"open_time": "first", "close_time": "last", "open": "first", "high": "max", "low": "min",
+             "close": "last", "vol": "max"})
+
+    @staticmethod
+    def _times_of(candles: pd.DataFrame, col: str, n: int) -> np.ndarray:
+        """ Datetime column as int64 nanoseconds, NaT is min int64 """
+        if col not in candles.columns:
+            return np.full(n, CandlesAggregator._nat)
+        times = candles[col]
+        if times.dtype != "datetime64[ns]":
+            times = pd.to_datetime(times).astype("datetime64[ns]")
+        return times.to_numpy().view(np.int64)
+
+    def _merge(self, bucket: int, times: np.ndarray, values: np.ndarray):
+        """ Update existing bucket or add a new one """
+        n = self._len
+        if n and self._bucket[n - 1] == bucket:
+            pos = n - 1
+        elif not n or self._bucket[n - 1] < bucket:
+            # New candle, most frequent case
+            pos = self._append()
+            self._bucket[pos] = bucket
+            self._times[pos] = times
+            self._values[pos] = values
+            return
+        else:
+            # Late candle from the past
+            pos = int(np.searchsorted(self._bucket[:n], bucket))
+            if self._bucket[pos] != bucket:
+                pos = self._insert(pos)
+                self._bucket[pos] = bucket
+                self._times[pos] = times
+                self._values[pos] = values
+                return
+
+        # Update the bucket: open_time, open first, close_time, close last, high max, low min, vol max
+        old_times, old_values = self._times[pos], self._values[pos]
+        if old_times[0] == self._nat:
+            old_times[0] = times[0]
+        if times[1] != self._nat:
+            old_times[1] = times[1]
+        old_open, old_high, old_low, old_close, old_vol = old_values
+        new_open, new_high, new_low, new_close, new_vol = values
+        old_values[0] = new_open if np.isnan(old_open) else old_open
+        old_values[1] = np.fmax(old_high, new_high)
+        old_values[2] = np.fmin(old_low, new_low)
+        old_values[3] = old_close if np.isnan(new_close) else new_close
+        old_values[4] = np.fmax(old_vol, new_vol)
+
+    def _append(self) -> int:
+        """ Get position for a new last candle, trim old candles if capacity is exceeded """
+        if self._len == self._capacity:
+            self._trim()
+        self._len += 1
+        return self._len - 1
+
+    def _insert(self, pos: int) -> int:
+        """ Shift candles after pos to free pos for late candle """
+        if self._len == self._capacity:
+            shift = self._len - self.max_len
+            self._trim()
+            pos = max(pos - shift, 0)
+        n = self._len
+        self._bucket[pos + 1:n + 1] = self._bucket[pos:n].copy()
+        self._times[pos + 1:n + 1] = self._times[pos:n].copy()
+        self._values[pos + 1:n + 1] = self._values[pos:n].copy()
+        self._len += 1
+        return pos
+
+    def _trim(self):
+        """ Keep only last max_len candles """
+        start = max(self._len - self.max_len, 0)
+        if not start:
+            return
+        self._bucket[:self.max_len] = self._bucket[start:self._len]
+        self._times[:self.max_len] = self._times[start:self._len]
+        self._values[:self.max_len] = self._values[start:self._len]
+        self._len -= start
+
+    def to_frame(self) -> pd.DataFrame:
+        """ Last max_len candles indexed by close time, copied so later updates do not change it. Remember in self.frame """
+        start = max(self._len - self.max_len, 0)
+        times = self._times[start:self._len]
+        values = self._values[start:self._len].copy()
+        close_time = pd.DatetimeIndex(times[:, 1].astype("datetime64[ns]"), name="close_time")
+        df = pd.DataFrame(values, columns=self.value_columns, index=close_time)
+        df.insert(0, "open_time", times[:, 0].astype("datetime64[ns]"))
+        df.insert(1, "close_time", close_time)
+        self.frame = df
+        return df
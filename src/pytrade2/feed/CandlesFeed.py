@@ -1,7 +1,7 @@
 import logging
 import multiprocessing
-import os
 import re
+import threading
 from datetime import datetime
 from pathlib import Path
 from typing import Dict
@@ -9,26 +9,44 @@ from typing import Dict
 import pandas as pd
 
 from pytrade2.exch.Exchange import Exchange
+from pytrade2.feed.CandlesAggregator import CandlesAggregator
+from pytrade2.feed.FeedSnapshot import FeedSnapshot
 from pytrade2.feed.history.CandlesExchDownloader import CandlesExchDownloader
 
 
 class CandlesFeed:
-    """ Decorator for strategies. Reads candles from exchange """
+    """
+    Decorator for strategies. Reads candles from exchange.
+    Candles by interval are published as immutable snapshot: a new dict is published instead of changing the current.
+    """
 
     kind = "candles"
 
     def __init__(self, config, ticker: str, exchange_provider: Exchange, data_lock: multiprocessing.RLock,
                  new_data_event: multiprocessing.Event, tag):
         self._logger = logging.getLogger(self.__class__.__name__)
+        # Strategy lock serializes candles updates, buffer lock is for new stream candles only
         self.data_lock = data_lock
+        self.buf_lock = threading.RLock()
+        self.snapshot = FeedSnapshot(dict())
         self.exchange_candles_feed = exchange_provider.candles_feed(config["pytrade2.exchange"])
         self.exchange_candles_feed.consumers.add(self)
         self.downloader = CandlesExchDownloader(config, self.exchange_candles_feed, tag)
 
         self.ticker = ticker
-        self.candles_by_interval: Dict[str, pd.DataFrame] = dict()
         self.candles_by_interval_buf: Dict[str, pd.DataFrame] = dict()
         self.new_data_event = new_data_event
+        # Incremental candles aggregation for each period instead of resampling all history
+        self._aggregators: Dict[str, CandlesAggregator] = dict()
+        history_max_window = config.get("pytrade2.strategy.history.max.window")
+        self.history_max_window = pd.Timedelta(history_max_window) if history_max_window else pd.Timedelta(0)
+
+        # Current time, replay backtest sets simulated clock here
+        self.now = datetime.now
+        # History is read from files once, then candles are updated from the stream
+        self.is_history_loaded = False
+        # Bigger gaps between stream and history are filled by full history reload
+        self.max_gap_fill = pd.Timedelta(config.get("pytrade2.feed.candles.gap.fill.max", "1d"))
 
         periods_str = config.get("pytrade2.feed.candles.periods", "1min")
         periods = [s.strip() for s in periods_str.replace("'", "").split(",")]
@@ -42,11 +60,22 @@ class CandlesFeed:
         else:
             self.candles_cnt_by_interval = {}
 
+    @property
+    def candles_by_interval(self) -> Dict[str, pd.DataFrame]:
+        """ Candles of the last snapshot, read only """
+        return self.snapshot.data
+
+    @candles_by_interval.setter
+    def candles_by_interval(self, candles_by_interval: Dict[str, pd.DataFrame]):
+        self.snapshot = self.snapshot.next(candles_by_interval)
+
     def apply_history_days(self, history_days: int):
         """History days parameter changed, load absent"""
         self._logger.info(f"Applying new history days param: {history_days}")
         self.downloader.days = history_days
         self.downloader.download_absent_days(datetime.now())
+        # Reload history on next update
+        self.is_history_loaded = False
 
     @staticmethod
     def candles_counts_in_days(intervals: set[str], days: int) -> dict[str, int]:
@@ -72,11 +101,12 @@ class CandlesFeed:
                 self._logger.info(f"Applying candles counts to {new_counts}. Resetting accumulated data.")
                 self.candles_cnt_by_interval = new_counts
                 # Clear candles and buffers
-                self.candles_by_interval: Dict[str, pd.DataFrame] = dict()
-                self.candles_by_interval_buf: Dict[str, pd.DataFrame] = dict()
+                self.candles_by_interval = dict()
+                with self.buf_lock:
+                    self.candles_by_interval_buf: Dict[str, pd.DataFrame] = dict()
+                self._aggregators = dict()
 
                 # If changed, redownload candles
-                self.candles_by_interval_buf = dict()  # reset buf
                 if load_history:
                     # Reload history from exchange rest service
                     self.read_candles()
@@ -101,6 +131,7 @@ class CandlesFeed:
         candles_1min = self.read_candles_downloaded()
 
         # Produce initial candles
+        candles_by_interval = dict(self.candles_by_interval)
         for period, cnt in self.candles_cnt_by_interval.items():
             # Read cnt + 1 extra for diff candles
             # candles_new = pd.DataFrame(self.exchange_candles_feed.read_candles(self.ticker, period, cnt)) \
@@ -118,39 +149,115 @@ class CandlesFeed:
             # candles = pd.concat([candles_history, candles_new])
 
             self._logger.debug(f"Got {len(candles.index)} {self.ticker} {period} candles")
-            self.candles_by_interval[period] = candles
+            candles_by_interval[period] = candles
+        self.candles_by_interval = candles_by_interval
+        self.is_history_loaded = True
+
+    def update_candles(self):
+        """
+        Read history only once, later update candles from the stream.
+        Exchange is called only if there is a gap between last candle and now.
+        """
+        if not self.is_history_loaded:
+            self._logger.info(f"Loading {self.ticker} candles history")
+            self.read_candles()
+            return
+        self.apply_buf()
+        self.fill_gap(self.now())
+
+    def gap_start_of(self, now: datetime):
+        """ Last candle time of the most lagging period, None if no gap, NaT if some period has no candles """
+        last_times = []
+        for period in self.candles_cnt_by_interval:
+            candles = self.candles_by_interval.get(period)
+            if candles is None or candles.empty:
+                return pd.NaT
+            last_time = candles.index.max()
+            if now - last_time > pd.Timedelta(period) * 2:
+                last_times.append(last_time)
+        return min(last_times) if last_times else None
+
+    def fill_gap(self, now: datetime):
+        """ Fill the gap between last candles and now with 1min candles from exchange """
+        gap_start = self.gap_start_of(now)
+        if gap_start is None:
+            return
+        if pd.isnull(gap_start) or now - gap_start > self.max_gap_fill:
+            self._logger.info(f"{self.ticker} candles gap from {gap_start} to {now} is too big, reloading history")
+            self.read_candles()
+            return
+
+        self._logger.info(f"Filling {self.ticker} candles gap from {gap_start} to {now}")
+        candles_raw = self.exchange_candles_feed.read_candles(ticker=self.ticker,
+                                                              interval=self.downloader.period,
+                                                              limit=None,
+                                                              from_=gap_start.to_pydatetime(),
+                                                              to=now)
+        if not isinstance(candles_raw, list) or not candles_raw:
+            self._logger.info(f"Exchange returned no {self.ticker} candles from {gap_start} to {now}")
+            return
+        candles_1min = pd.DataFrame(candles_raw)
+        with self.data_lock:
+            candles_by_interval = dict(self.candles_by_interval)
+            for period in self.candles_cnt_by_interval:
+                aggregator = self.aggregator_of(period)
+                aggregator.add(candles_1min)
+                candles_by_interval[period] = aggregator.to_frame()
+            self.candles_by_interval = candles_by_interval
 
     def read_candles_downloaded(self):
         """ Read 1min candles from downloaded folder. Do not resample to other periods here. """
         candles_dir = self.downloader.download_dir
         period = self.downloader.period
         days = self.downloader.days
-        files = sorted([f for f in os.listdir(candles_dir) if f'_candles_{period}' in f])
+        storage = self.downloader.storage
+        files = [f for f in storage.list_files(candles_dir) if f'_candles_{period}' in f]
         # Read last days' files to one dataframe
-        df = pd.concat(
-            [pd.read_csv(Path(candles_dir, fname), parse_dates=["open_time", "close_time"]) for fname in files[-days:]])
+        df = pd.concat([storage.read(Path(candles_dir, fname)) for fname in files[-days:]])
         df = df.set_index("close_time", drop=False)
         return df
 
+    def max_candles_of(self, period: str) -> int:
+        """ How many candles of the period to keep: required count or history window, plus the forming candle """
+        cnt = self.candles_cnt_by_interval.get(period, 0)
+        history_cnt = self.history_max_window // pd.Timedelta(period)
+        return int(max(cnt, history_cnt)) + 1
+
+    def aggregator_of(self, period: str) -> CandlesAggregator:
+        """ Get candles aggregator of the period. Reload it if the candles were replaced, by read_candles for example"""
+        aggregator = self._aggregators.get(period)
+        candles = self.candles_by_interval.get(period)
+        max_len = self.max_candles_of(period)
+        if aggregator is None or aggregator.max_len != max_len or candles is not aggregator.frame:
+            aggregator = CandlesAggregator(period, max_len)
+            aggregator.reset(candles)
+            self._aggregators[period] = aggregator
+        return aggregator
+
     def apply_buf(self):
-        """ Combine candles with buffers"""
+        """ Combine candles with buffers, publish new candles snapshot """
         try:
             with (self.data_lock):
-                for period, buf in self.candles_by_interval_buf.items():
+                # Take the buffers, stream is locked only for this
+                bufs = dict()
+                with self.buf_lock:
+                    for period, buf in self.candles_by_interval_buf.items():
+                        if buf.empty or period not in self.candles_cnt_by_interval:
+                            self._logger.debug(
+                                f"Cannot apply buffer for period {period}. Buffer is good: {not buf.empty}, period is good: {period in self.candles_by_interval}")
+                            continue
+                        bufs[period] = buf
+                        self.candles_by_interval_buf[period] = pd.DataFrame()
+                if not bufs:
+                    return
+                candles_by_interval = dict(self.candles_by_interval)
+                for period, buf in bufs.items():
                     self._logger.debug(f"Applying buffer for {period}")
-                    if buf.empty or period not in self.candles_cnt_by_interval:
-                        self._logger.debug(
-                            f"Cannot apply buffer for period {period}. Buffer is good: {not buf.empty}, period is good: {period in self.candles_by_interval}")
-                        continue
-                    # candles + buf
-                    candles = self.candles_by_interval.get(period, pd.DataFrame())
-                    candles = pd.concat([df for df in [candles, buf] if not df.empty]).set_index("close_time", drop=False)
-                    candles_resampled = candles.resample(period, closed="right").agg(
-                        {'open_time': 'first', 'close_time': 'last', 'open': 'first', 'high': 'max', 'low': 'min',
-                         'close': 'last', 'vol': 'max'}).set_index('close_time', drop=False).sort_index()
-
-                    self.candles_by_interval[period] = candles_resampled
-                    self.candles_by_interval_buf[period] = pd.DataFrame()
+                    # Update only last candles with the buffer
+                    aggregator = self.aggregator_of(period)
+                    aggregator.add(buf)
+                    candles_by_interval[period] = aggregator.to_frame()
+                self.candles_by_interval = candles_by_interval
         except Exception as e:
             logging.error(f"Error in candles feed: {self.__class__.__name__}: {e}")
             raise e
@@ -161,7 +268,7 @@ class CandlesFeed:
         if period not in self.candles_cnt_by_interval:
             return
         candle_df = pd.DataFrame([candle]).set_index("close_time", drop=False)
-        with (self.data_lock):
+        with self.buf_lock:
             prev_buf = self.candles_by_interval_buf.get(period, pd.DataFrame())
             # Add to buffer
             self.candles_by_interval_buf[period] = pd.concat([df for df in [prev_buf, candle_df] if not df.empty])
@@ -175,7 +282,7 @@ class CandlesFeed:
         return True
 
     def is_alive(self, _):
-        dt = datetime.now()
+        dt = self.now()
         for i, c in self.candles_by_interval.items():
             # If double candle interval passed, and we did not get a new candle, we are dead
             # If candles are empty, it can be initial download at start, we are still alive
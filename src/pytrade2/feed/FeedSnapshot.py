@@ -0,0 +1,23 @@
+from datetime import datetime
+
+
+class FeedSnapshot:
+    """
+    Versioned data published by a feed: dataframe or dict of dataframes, which are never changed after publishing.
+    Feed publishes the next snapshot instead of changing the current one, so readers take the latest snapshot
+    without locks, and learning on a snapshot does not block new data.
+    """
+
+    __slots__ = ("version", "data", "time")
+
+    def __init__(self, data=None, version: int = 0, time: datetime = None):
+        self.version = version
+        self.data = data
+        self.time = time or datetime.utcnow()
+
+    def next(self, data) -> "FeedSnapshot":
+        """ New snapshot with the next version """
+        return FeedSnapshot(data, self.version + 1)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(version={self.version}, time={self.time})"
@@ -1,14 +1,19 @@
 import logging
 import multiprocessing
+import threading
 from datetime import datetime
 from typing import Dict, List
 
 import pandas as pd
 
 from pytrade2.exch.Exchange import Exchange
+from pytrade2.feed.FeedSnapshot import FeedSnapshot
+from pytrade2.feed.OrderBookSnapshot import OrderBookSnapshot
+from pytrade2.feed.TicksBuffer import TicksBuffer
 
 
 class Level2Feed:
+    """ Order book items are appended under short buffer lock, applied items are published as immutable snapshot """
     kind = "level2"
 
     def __init__(self, cfg: Dict[str, str], exchange_provider: Exchange, data_lock: multiprocessing.RLock,
@@ -17,15 +22,40 @@ class Level2Feed:
 
         self.websocket_feed = exchange_provider.websocket_feed(cfg["pytrade2.exchange"])
         self.websocket_feed.consumers.add(self)
-        self.level2: pd.DataFrame = pd.DataFrame(columns=["datetime", "bid", "bid_vol", "ask", "ask_vol"])
-        self.level2_buf: pd.DataFrame = pd.DataFrame(columns=["datetime", "bid", "bid_vol", "ask", "ask_vol"])  # Buffer
+        # Order book items storage without dataframe creation on each message
+        self._ticks = TicksBuffer()
+        self.snapshot = FeedSnapshot(self._ticks.frame())
         self.history_min_window = (pd.Timedelta(cfg.get("pytrade2.strategy.history.min.window"))
                                    + pd.Timedelta(cfg.get("pytrade2.strategy.predict.window", "0s")))
         self.history_max_window = (pd.Timedelta(cfg.get("pytrade2.strategy.history.max.window"))
                                    + pd.Timedelta(cfg.get("pytrade2.strategy.predict.window", "0s")))
+        # Strategy lock serializes appliers, buffer lock is for new items only
         self.data_lock = data_lock
+        self.buf_lock = threading.RLock()
         self.new_data_event = new_data_event
 
+    @property
+    def level2(self) -> pd.DataFrame:
+        """ Applied order book items of the last snapshot, read only """
+        return self.snapshot.data
+
+    @level2.setter
+    def level2(self, level2: pd.DataFrame):
+        self.snapshot = self.snapshot.next(level2)
+
+    @property
+    def level2_buf(self) -> pd.DataFrame:
+        """ New order book items, not applied yet """
+        with self.buf_lock:
+            return self._ticks.new_frame()
+
+    @level2_buf.setter
+    def level2_buf(self, buf: pd.DataFrame):
+        """ Replace new order book items. Empty buf means they have been consumed. """
+        with self.buf_lock:
+            self._ticks.drop_new()
+            self._ticks.extend(buf)
+
     def run(self):
         self.websocket_feed.run()
 
@@ -34,26 +64,32 @@ class Level2Feed:
         Got new order book items event
         """
         # self._logger.debug("Got new level2 items: %s", level2)
-        bid_ask_columns = ["datetime", "symbol", "bid", "bid_vol", "ask", "ask_vol"]
 
-        # Add new data to df
-        new_df = pd.DataFrame(level2, columns=bid_ask_columns).set_index("datetime", drop=False)
-        with self.data_lock:
-            self.level2_buf = pd.concat([df for df in [self.level2_buf, new_df] if not df.empty])
+        # Add new data to the buffer
+        with self.buf_lock:
+            for item in level2:
+                self._ticks.append_dict(item)
+
+        self.new_data_event.set()
+
+    def on_level2_snapshot(self, snapshot: OrderBookSnapshot):
+        """
+        Got new order book event, items are copied to the buffer without per item python objects
+        """
+        with self.buf_lock:
+            self._ticks.append_snapshot(snapshot)
 
         self.new_data_event.set()
 
     def apply_buf(self):
         """ Add level2 buf to level2 and purge old level2 """
-        if self.level2_buf.empty:
+        if not self._ticks.new_len:
             return self.level2
 
-        with self.data_lock:
-            self.level2 = pd.concat([df for df in [self.level2, self.level2_buf] if not df.empty])
-            self.level2_buf = pd.DataFrame()
-            # Purge old level2
-            min_time = self.level2["datetime"].max() - self.history_max_window
-            self.level2 = self.level2[self.level2["datetime"] > min_time]
+        with self.data_lock, self.buf_lock:
+            # Apply new items and purge old level2, publish them as new snapshot
+            self._ticks.apply_new(self.history_max_window)
+            self.level2 = self._ticks.frame()
         return self.level2
 
     def is_alive(self, maxdelta: pd.Timedelta):
@@ -0,0 +1,38 @@
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+
+
+class OrderBookSnapshot:
+    """
+    Compact order book: one time and symbol, prices and volumes of each side as numpy arrays.
+    bids and asks are float arrays of [price, volume] rows, without python objects per level.
+    """
+
+    __slots__ = ("datetime", "symbol", "bids", "asks")
+
+    def __init__(self, dt: datetime, symbol: str, bids: np.ndarray, asks: np.ndarray):
+        self.datetime = dt
+        self.symbol = symbol
+        self.bids = bids
+        self.asks = asks
+
+    @staticmethod
+    def of_levels(dt: datetime, symbol: str, bids: list, asks: list) -> "OrderBookSnapshot":
+        """ From exchange [[price, volume], ...] levels, prices and volumes can be strings """
+        return OrderBookSnapshot(dt, symbol, OrderBookSnapshot._side(bids), OrderBookSnapshot._side(asks))
+
+    def __len__(self):
+        return len(self.bids) + len(self.asks)
+
+    def to_dicts(self) -> List[Dict]:
+        """ Order book items like in level2 dataframe: bids, then asks """
+        return [{"datetime": self.datetime, "symbol": self.symbol, "bid": price, "bid_vol": vol}
+                for price, vol in self.bids.tolist()] + \
+            [{"datetime": self.datetime, "symbol": self.symbol, "ask": price, "ask_vol": vol}
+             for price, vol in self.asks.tolist()]
+
+    @staticmethod
+    def _side(levels: list) -> np.ndarray:
+        return np.array(levels, dtype=np.float64).reshape(-1, 2)
@@ -6,6 +6,7 @@ import pandas as pd
 
 from pytrade2.feed.CandlesFeed import CandlesFeed
 from pytrade2.feed.history.HistoryS3Downloader import HistoryS3Downloader
+from pytrade2.feed.history.PreprocCache import PreprocCache
 from pytrade2.feed.history.Preprocessor import Preprocessor
 
 
@@ -30,7 +31,8 @@ class StreamWithHistoryPreprocFeed(object):
             self.stream_feed.apply_periods("1min", history_days=history_days, load_history=False)
 
         self.kind = self.stream_feed.kind
-        self._preprocessor = Preprocessor(data_dir=self.data_dir)
+        self._preprocessor = Preprocessor(data_dir=self.data_dir, storage=self._history_downloader.storage,
+                                          max_workers=int(config.get("pytrade2.data.preprocess.workers", 0) or 0))
         self.is_good_history = False
         self._last_history_datetime = pd.Timestamp.min
         self._reload_history_interval = pd.Timedelta(
@@ -38,6 +40,11 @@ class StreamWithHistoryPreprocFeed(object):
         self._next_reload_history_datetime = datetime.now() + self._reload_history_interval
         self.preproc_data_df = pd.DataFrame()
 
+        # Preprocessed data cache to load the history fast after restart
+        is_cache_enabled = str(config.get("pytrade2.data.cache.enabled", True)).lower() == "true"
+        self._cache = PreprocCache(f"{self.data_dir}/cache/{self.kind}/{self.ticker}") \
+            if self.data_dir and is_cache_enabled else None
+
     def run(self):
         self.stream_feed.run()
 
@@ -110,14 +117,43 @@ class StreamWithHistoryPreprocFeed(object):
 
         # Initial get all local history window for learning
         if self.preproc_data_df.empty:
-            self.preproc_data_df = self._preprocessor.read_last_preproc_data(
-                self.ticker, self.kind, days=self.history_max_window.days)
+            self.preproc_data_df = self.read_initial_preproc_data()
         preproc_data_df =  self.preproc_incremental(stream_raw_df)
 
         # Set good history status only now after all long operations are done
         self.is_good_history = is_good_history_tmp
         return preproc_data_df
 
+    def read_initial_preproc_data(self) -> pd.DataFrame:
+        """ Read history window from the cache and preprocessed files, which are newer than the cache """
+        days = self.history_max_window.days
+        cache_last_time = self._cache.last_time if self._cache is not None else None
+        if cache_last_time is None:
+            # No cache, read all window from files
+            df = self._preprocessor.read_last_preproc_data(self.ticker, self.kind, days=days)
+        else:
+            # The same days window as for files: last days of the data
+            new_df = self._preprocessor.read_preproc_data_since(self.ticker, self.kind, cache_last_time)
+            last_time = new_df.index[-1] if not new_df.empty else cache_last_time
+            start = last_time.normalize() - pd.Timedelta(days=days - 1) if days > 0 else None
+            cached_df = self._cache.read(start)
+            self._logger.info(f"Read {len(cached_df)} cached {self.kind} {self.ticker} rows until {cache_last_time}, "
+                              f"{len(new_df)} new rows from preprocessed files")
+            df = pd.concat([d for d in [cached_df, new_df] if not d.empty]) if not new_df.empty else cached_df
+            if start is not None:
+                self._cache.compact(start)
+        self.update_cache(df)
+        return df
+
+    def update_cache(self, df: pd.DataFrame):
+        """ Append new preprocessed data to the cache. The last minute can be not complete yet, it is not cached. """
+        if self._cache is None or df.empty:
+            return
+        try:
+            self._cache.append(df[df.index < df.index[-1]])
+        except Exception as e:
+            self._logger.warning(f"Cannot update {self.kind} {self.ticker} cache: {e}")
+
     def preproc_incremental(self, stream_raw_df) -> pd.DataFrame:
         """
         Preprocess and append new stream data to old previous data
@@ -149,6 +185,7 @@ class StreamWithHistoryPreprocFeed(object):
         # Append new stream data to old previous data
         with self.data_lock:
             self.preproc_data_df = pd.concat([df for df in [self.preproc_data_df, stream_preproc_df] if not df.empty])
+        self.update_cache(self.preproc_data_df)
         self._logger.debug(
             f"Final preprocessed {self.kind} {self.ticker} data starts at {self.preproc_data_df.index[0]}, ends at {self.preproc_data_df.index[-1]}")
         return self.preproc_data_df
\ No newline at end of file
@@ -0,0 +1,174 @@
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from pytrade2.feed.OrderBookSnapshot import OrderBookSnapshot
+
+
+class TicksBuffer:
+    """
+    Preallocated columnar numpy storage of bid/ask or level2 ticks: datetime, symbol code, bid, bid_vol, ask, ask_vol.
+    New ticks are appended to the end without dataframe creation.
+    Rows are [start, new_start) - applied ticks, [new_start, end) - new ticks, not applied yet.
+    Old rows are never overwritten: when the storage is full, live rows are moved to new arrays.
+    So applied ticks dataframe can be a zero copy view, it is not changed by later appends.
+    """
+
+    columns = ["datetime", "symbol", "bid", "bid_vol", "ask", "ask_vol"]
+    value_columns = ["bid", "bid_vol", "ask", "ask_vol"]
+
+    def __init__(self, capacity: int = 1024):
+        self._capacity = max(capacity, 1)
+        self._times = np.empty(self._capacity, dtype=np.int64)
+        self._symbols = np.empty(self._capacity, dtype=np.int32)
+        self._values = np.empty((self._capacity, len(self.value_columns)), dtype=np.float64)
+        self._start = self._new_start = self._end = 0
+        self._symbol_codes: Dict[str, int] = {}
+        self._symbol_names: List[str] = []
+        self._is_sorted = True
+
+    def __len__(self):
+        return self._new_start - self._start
+
+    @property
+    def new_len(self):
+        return self._end - self._new_start
+
+    def symbol_code(self, symbol) -> int:
+        """ Symbol name to int code, -1 if no symbol """
+        if symbol is None or symbol != symbol:
+            return -1
+        code = self._symbol_codes.get(symbol)
+        if code is None:
+            code = self._symbol_codes[symbol] = len(self._symbol_names)
+            self._symbol_names.append(symbol)
+        return code
+
+    def append(self, dt, symbol, bid=np.nan, bid_vol=np.nan, ask=np.nan, ask_vol=np.nan):
+        """ Add new tick """
+        time_ns = pd.Timestamp(dt).value
+        pos = self._reserve(1)
+        if pos and time_ns < self._times[pos - 1]:
+            self._is_sorted = False
+        self._times[pos] = time_ns
+        self._symbols[pos] = self.symbol_code(symbol)
+        values = self._values[pos]
+        values[0], values[1], values[2], values[3] = bid, bid_vol, ask, ask_vol
+        self._end += 1
+
+    def append_dict(self, tick: dict):
+        """ Add new tick from dictionary with datetime, symbol, bid, bid_vol, ask, ask_vol keys"""
+        self.append(tick["datetime"], tick.get("symbol"),
+                    self._float(tick.get("bid")), self._float(tick.get("bid_vol")),
+                    self._float(tick.get("ask")), self._float(tick.get("ask_vol")))
+
+    def append_snapshot(self, snapshot: OrderBookSnapshot):
+        """ Add order book items: bids, then asks of the same time and symbol """
+        bids, asks = snapshot.bids, snapshot.asks
+        n = len(bids) + len(asks)
+        if not n:
+            return
+        time_ns = pd.Timestamp(snapshot.datetime).value
+        pos = self._reserve(n)
+        if pos and time_ns < self._times[pos - 1]:
+            self._is_sorted = False
+        self._times[pos:pos + n] = time_ns
+        self._symbols[pos:pos + n] = self.symbol_code(snapshot.symbol)
+        values = self._values[pos:pos + n]
+        values[:len(bids), :2] = bids
+        values[:len(bids), 2:] = np.nan
+        values[len(bids):, :2] = np.nan
+        values[len(bids):, 2:] = asks
+        self._end += n
+
+    def extend(self, ticks: pd.DataFrame):
+        """ Add many new ticks from dataframe with datetime column or index """
+        n = len(ticks)
+        if not n:
+            return
+        times = ticks["datetime"] if "datetime" in ticks.columns else ticks.index.to_series()
+        times = pd.to_datetime(times).to_numpy(dtype="datetime64[ns]").view(np.int64)
+        symbols = ticks["symbol"] if "symbol" in ticks.columns else [None] * n
+        codes = np.fromiter((self.symbol_code(symbol) for symbol in symbols), dtype=np.int32, count=n)
+        values = np.column_stack([ticks[col].to_numpy(dtype=np.float64) if col in ticks.columns
+                                  else np.full(n, np.nan) for col in self.value_columns])
+
+        pos = self._reserve(n)
+        last_time = self._times[pos - 1] if pos else np.iinfo(np.int64).min
+        if times[0] < last_time or np.any(np.diff(times) < 0):
+            self._is_sorted = False
+        self._times[pos:pos + n] = times
+        self._symbols[pos:pos + n] = codes
+        self._values[pos:pos + n] = values
+        self._end += n
+
+    def apply_new(self, history_window: pd.Timedelta = None):
+        """ New ticks become applied. Applied ticks older than history window from the last tick are purged. """
+        self._new_start = self._end
+        if not self._is_sorted:
+            self._sort()
+        if history_window is not None and not pd.isnull(history_window) and self._end > self._start:
+            min_time = self._times[self._end - 1] - pd.Timedelta(history_window).value
+            self._start += int(np.searchsorted(self._times[self._start:self._end], min_time, side="right"))
+
+    def drop_new(self):
+        """ Forget new ticks, they have been consumed without applying """
+        self._end = self._new_start
+
+    def frame(self) -> pd.DataFrame:
+        """ Zero copy read only dataframe of applied ticks """
+        return self._frame(self._start, self._new_start, copy=False)
+
+    def new_frame(self) -> pd.DataFrame:
+        """ Copy of new, not applied ticks """
+        return self._frame(self._new_start, self._end, copy=True)
+
+    def _frame(self, start: int, end: int, copy: bool) -> pd.DataFrame:
+        times = self._times[start:end].view("datetime64[ns]")
+        symbols = self._symbols[start:end]
+        values = self._values[start:end]
+        if copy:
+            times, symbols, values = times.copy(), symbols.copy(), values.copy()
+        else:
+            for arr in (times, symbols, values):
+                arr.flags.writeable = False
+        index = pd.DatetimeIndex(times, name="datetime", copy=False)
+        df = pd.DataFrame(values, index=index, columns=self.value_columns, copy=False)
+        df.insert(0, "datetime", index)
+        df.insert(1, "symbol", pd.Categorical.from_codes(symbols, categories=self._symbol_names))
+        return df
+
+    def _reserve(self, n: int) -> int:
+        """ Ensure space for n new rows at the end, return position for them """
+        if self._end + n > self._capacity:
+            live = self._end - self._start
+            capacity = self._capacity
+            while live + n > capacity // 2:
+                capacity *= 2
+            self._relocate(np.arange(self._start, self._end), capacity)
+        return self._end
+
+    def _sort(self):
+        """ Sort live rows by time, rarely needed for unordered ticks """
+        order = np.argsort(self._times[self._start:self._end], kind="stable") + self._start
+        self._relocate(order, self._capacity)
+        self._is_sorted = True
+
+    def _relocate(self, rows: np.ndarray, capacity: int):
+        """ Move given live rows to new arrays, previous views stay unchanged """
+        live_new = self._end - self._new_start
+        times = np.empty(capacity, dtype=np.int64)
+        symbols = np.empty(capacity, dtype=np.int32)
+        values = np.empty((capacity, len(self.value_columns)), dtype=np.float64)
+        n = len(rows)
+        times[:n] = self._times[rows]
+        symbols[:n] = self._symbols[rows]
+        values[:n] = self._values[rows]
+        self._times, self._symbols, self._values = times, symbols, values
+        self._capacity = capacity
+        self._start, self._new_start, self._end = 0, n - live_new, n
+
+    @staticmethod
+    def _float(value) -> float:
+        return np.nan if value is None else value
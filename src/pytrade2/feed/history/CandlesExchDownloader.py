@@ -6,6 +6,8 @@ from typing import Dict, List, Tuple
 
 import pandas as pd
 
+from pytrade2.feed.history.HistoryStorage import HistoryStorage
+
 
 class CandlesExchDownloader:
     """
@@ -23,6 +25,7 @@ class CandlesExchDownloader:
         self.ticker = self.config["pytrade2.tickers"].split(",")[-1]
         self.period = "1min"
         self.days = int(config.get("pytrade2.feed.candles.history.days", '2').strip())
+        self.storage = HistoryStorage.of_config(config)
 
     def get_start_date(self):
         """ In candles data folder find last file and parse date from it''s name"""
@@ -61,9 +64,10 @@ class CandlesExchDownloader:
         self._logger.debug(f"Start downloading candles to {self.download_dir}")
 
         for start, end in intervals:
-            file_name = f"{start.date()}_{self.ticker}_candles_{self.period}.csv"
-            file_path = Path(self.download_dir, f"{file_name}")
-            if file_path.exists() and skip_existing:
+            file_stem = f"{start.date()}_{self.ticker}_candles_{self.period}"
+            file_path = Path(self.download_dir, self.storage.file_name(file_stem))
+            if skip_existing and any(Path(self.download_dir, f"{file_stem}{ext}").exists()
+                                     for ext in HistoryStorage.readable_extensions):
                 continue
 
             # Get candles for the day from the service
@@ -76,9 +80,7 @@ class CandlesExchDownloader:
             if isinstance(candles_raw, list) and candles_raw:
                 candles = pd.DataFrame(candles_raw).set_index("close_time")
                 # Save to file system
-                candles.to_csv(str(file_path),
-                               header=True,
-                               mode='w')
+                self.storage.write(candles, file_path)
                 self._logger.debug(
                     f"{self.period} {len(candles)} candles from {candles.index.min()} to {candles.index.max()} for {end.date()} downloaded to {file_path}")
             else:
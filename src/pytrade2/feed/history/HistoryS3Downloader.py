@@ -1,17 +1,29 @@
+import json
 import logging
 import os
-from typing import Dict
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 
 import boto3
 import pandas as pd
 from botocore.client import BaseClient
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from pytrade2.feed.history.HistoryStorage import HistoryStorage
 
 
 class HistoryS3Downloader:
     """
-    Download necessary history data from s3
+    Download necessary history data from s3.
+    Files are downloaded concurrently by a shared s3 client. Changed files are detected by s3 ETag.
+    Interrupted download is resumed from the downloaded part, if s3 file has not changed.
     """
 
+    # Size of a ranged read of s3 file
+    chunk_size = 8 * 1024 * 1024
+
     def __init__(self, config: Dict, data_dir: str):
         self._logger = logging.getLogger(self.__class__.__name__)
         self._logger.info(f"Initializing {self.__class__.__name__}")
@@ -27,24 +39,28 @@ class HistoryS3Downloader:
 
         # local data directory
         self.data_dir = config.get("pytrade2.data.dir") if not data_dir else data_dir
+        self.storage = HistoryStorage.of_config(config)
+
+        # Parallel downloads, all threads use one s3 client with the pool of connections
+        self.download_workers = int(config.get("pytrade2.s3.download.workers", 8) or 8)
+        self._s3client: Optional[BaseClient] = None
+        self._s3client_lock = threading.Lock()
+        self._etags_lock = threading.Lock()
 
     def read_local_history(self, ticker: str, kind: str, start_date=pd.Timestamp.min,
-                           end_date=pd.Timestamp.max) -> pd.DataFrame:
-        """ Read data between start_date and end_date from local data directory."""
-        accumulated_df = pd.DataFrame()
+                           end_date=pd.Timestamp.max, columns=None) -> pd.DataFrame:
+        """ Read data between start_date and end_date from local data directory. Read only given columns if set."""
+        dfs = []
         local_dir = os.path.join(self.data_dir, "raw", kind)
-        for file in os.listdir(local_dir):
-            # Check date, encoded in filename like 2025-05-21_BTC-USDT_level2.csv.zip
+        for file in self.storage.list_files(local_dir):
+            # Check date, encoded in filename like 2025-05-21_BTC-USDT_level2.parquet
             datestr = file.split('_')[0]
             file_date = pd.to_datetime(datestr).date()
             if not (start_date <= file_date <= end_date):
                 continue
-            if not file.endswith(".csv") and not file.endswith(".csv.zip"):
-                self._logger.warning(f"Skipping file {file} in {local_dir}")
-                continue
-            self._logger.debug(f"Reading csv file {file} from {local_dir}")
-            df = pd.read_csv(f"{local_dir}/{file}")
-            accumulated_df = pd.concat([accumulated_df, df], ignore_index=True)
+            self._logger.debug(f"Reading file {file} from {local_dir}")
+            dfs.append(self.storage.read(os.path.join(local_dir, file), columns=columns))
+        accumulated_df = pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
 
         # Set index, try to use datetime column for price or candle data
         datetime_col = "datetime" if "datetime" in accumulated_df.columns else "close_time"
@@ -52,66 +68,85 @@ class HistoryS3Downloader:
         accumulated_df.set_index(datetime_col, inplace=True, drop=False)
         return accumulated_df.sort_index()
 
+    @property
+    def s3client(self) -> BaseClient:
+        """ Shared s3 client, created on first use. Boto3 client is thread safe. """
+        with self._s3client_lock:
+            if self._s3client is None:
+                session = boto3.session.Session()
+                self._s3client = session.client(service_name='s3', endpoint_url=self.s3_endpoint_url,
+                                                aws_access_key_id=self.s3_access_key,
+                                                aws_secret_access_key=self.s3_secret_key,
+                                                config=Config(max_pool_connections=self.download_workers,
+                                                              retries={"max_attempts": 5, "mode": "standard"}))
+            return self._s3client
+
     def update_local_history(self, ticker: str, start_date=pd.Timestamp.min, end_date=pd.Timestamp.max,
                              kinds=("level2", "candles", "bid_ask")) -> bool:
         """ Download new history data from s3 to local data directory.
         :returns: True if any files were downloaded, False otherwise.
         """
-        session = boto3.session.Session()
-        s3client = session.client(service_name='s3', endpoint_url=self.s3_endpoint_url,
-                                  aws_access_key_id=self.s3_access_key,
-                                  aws_secret_access_key=self.s3_secret_key)
         is_new_files = False
         for kind in kinds:
-            is_new_files |= self.download_s3_files_between_dates(s3client, self.s3_bucket, ticker,
+            is_new_files |= self.download_s3_files_between_dates(self.s3client, self.s3_bucket, ticker,
                                                                  os.path.join("data", "raw", kind),
                                                                  os.path.join(self.data_dir, "raw", kind),
                                                                  start_date,
                                                                  end_date)
         return is_new_files
 
+    def list_s3_objects(self, s3client: BaseClient, bucket_name, s3_dir) -> List[dict]:
+        """ All objects of s3 directory, listed page by page """
+        paginator = s3client.get_paginator("list_objects_v2")
+        return [obj for page in paginator.paginate(Bucket=bucket_name, Prefix=s3_dir)
+                for obj in page.get("Contents", [])]
 
     def get_download_list(self, s3client: BaseClient, bucket_name, ticker, s3_dir, local_dir, start_date, end_date):
-        """ Get list of files to download from s3 directory. Files are between start_date and end_date."""
-
-        # List objects in the bucket
-        objects = s3client.list_objects_v2(Bucket=bucket_name, Prefix=s3_dir)
+        """ Get s3 objects to download from s3 directory. Files are between start_date and end_date."""
 
-        if 'Contents' not in objects:
+        objects = self.list_s3_objects(s3client, bucket_name, s3_dir)
+        if not objects:
             self._logger.info(f"No files found in {bucket_name}/{s3_dir}")
+        etags = self.read_etags(local_dir)
 
         download_list = []
         # Filter files by date range
-        for obj in objects['Contents']:
+        for obj in objects:
             s3_file_path = obj['Key']
-            file_name = s3_file_path.split('/')[-1]
+            # Daily file or a part of daily parquet directory like 2025-05-21_BTC-USDT_level2.parquet/part-1.parquet
+            file_name = s3_file_path[len(s3_dir):].strip('/')
+            daily_name = file_name.split('/')[0]
             local_path = os.path.join(local_dir, file_name)
             # Extract date from filename (assuming format: YYYY-MM-DD_BTC-USDT_level2.csv.zip)
             try:
-                file_datetime_str = file_name.split('_')[0]
+                file_datetime_str = daily_name.split('_')[0]
                 file_datetime = pd.to_datetime(file_datetime_str)
                 if start_date <= file_datetime.date() <= end_date:
-                    # Skip non-csv.zip files
-                    if not file_name.endswith('.csv.zip'):
-                        self._logger.info(f"Skipping file {s3_file_path}, not a csv.zip file")
+                    # Skip not history files, csv is uploaded zipped
+                    if daily_name.endswith('.csv') or not self.storage.is_readable(file_name):
+                        self._logger.info(f"Skipping file {s3_file_path}, not a history file")
                         continue
                     # Append to download list or not
-                    local_exists_flag = os.path.exists(local_path)
-                    s3_is_newer_flag = local_exists_flag and obj['Size'] != os.path.getsize(local_path)
-                    if not local_exists_flag:
+                    if not os.path.exists(local_path):
                         self._logger.info(f"Local file {local_path} doesn't exist, will download it")
-                    elif s3_is_newer_flag:
+                        download_list.append(obj)
+                    elif file_name in etags:
+                        if etags[file_name] != obj['ETag']:
+                            self._logger.info(f"S3 file {s3_file_path} has changed, will download it")
+                            download_list.append(obj)
+                    elif obj['Size'] != os.path.getsize(local_path):
+                        # Downloaded before etags were saved, compare sizes
                         self._logger.info(
                             f"Local file {local_path} size is different from S3 file {s3_file_path}, will download it")
-                    # Local file doesn't exist or is older than S3 file
-                    if (not local_exists_flag) or s3_is_newer_flag:
-                        download_list.append(s3_file_path)
+                        download_list.append(obj)
+                    else:
+                        etags[file_name] = obj['ETag']
             except (IndexError, ValueError):
                 self._logger.info(f"Error parsing date from file {s3_file_path}, skipping")
                 continue
+        self.write_etags(local_dir, etags)
         return download_list
 
-
     def download_s3_files_between_dates(self, s3client: BaseClient, bucket_name, ticker, s3_dir, local_dir, start_date,
                                         end_date):
         """
@@ -122,19 +157,92 @@ class HistoryS3Downloader:
 
         # Get s3 list of files inside given date range
         download_list = sorted(
-            self.get_download_list(s3client, bucket_name, ticker, s3_dir, local_dir, start_date, end_date))
+            self.get_download_list(s3client, bucket_name, ticker, s3_dir, local_dir, start_date, end_date),
+            key=lambda obj: obj['Key'])
         if not download_list:
             self._logger.info(f"No changed files found in {bucket_name}/{s3_dir} between {start_date} and {end_date}")
             return False
         self._logger.info(
-            f"Found {len(download_list)} s3 files to download, from {download_list[0]} to {download_list[-1]}")
+            f"Found {len(download_list)} s3 files to download, from {download_list[0]['Key']} to {download_list[-1]['Key']}")
 
         # Create local directory if it doesn't exist
         os.makedirs(local_dir, exist_ok=True)
-        for s3_file_path in download_list:
-            file_name = s3_file_path.split('/')[-1]
-            local_path = os.path.join(local_dir, file_name)
-            self._logger.info(f"Downloading {s3_file_path} to {local_path}")
-            s3client.download_file(bucket_name, s3_file_path, local_path)
+        with ThreadPoolExecutor(max_workers=self.download_workers, thread_name_prefix="s3download") as executor:
+            futures = [executor.submit(self.download_s3_file, s3client, bucket_name, s3_dir, local_dir, obj)
+                       for obj in download_list]
+            # Raise the first error after all downloads are finished
+            for future in futures:
+                future.result()
         return True
 
+    def download_s3_file(self, s3client: BaseClient, bucket_name, s3_dir, local_dir, obj: dict):
+        """ Download s3 file by ranges to a part file, then rename it. Resume existing part of the same ETag. """
+        s3_file_path, etag, size = obj['Key'], obj['ETag'], obj['Size']
+        file_name = s3_file_path[len(s3_dir):].strip('/')
+        local_path = os.path.join(local_dir, file_name)
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+
+        # Part of another ETag is from a changed s3 file, it cannot be resumed
+        part_path = self.part_path(local_path, etag)
+        part_prefix = f".{os.path.basename(local_path)}."
+        for old_part_file in os.listdir(os.path.dirname(local_path)):
+            old_part_path = os.path.join(os.path.dirname(local_path), old_part_file)
+            if old_part_file.startswith(part_prefix) and old_part_file.endswith(".part") and old_part_path != part_path:
+                os.remove(old_part_path)
+        downloaded = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if downloaded > size:
+            downloaded = 0
+        if downloaded:
+            self._logger.info(f"Resuming {s3_file_path} download to {local_path} from {downloaded} of {size} bytes")
+        else:
+            self._logger.info(f"Downloading {s3_file_path} to {local_path}")
+
+        with open(part_path, "r+b" if downloaded else "wb") as f:
+            f.truncate(downloaded)
+            f.seek(downloaded)
+            while downloaded < size:
+                end = min(downloaded + self.chunk_size, size) - 1
+                try:
+                    # IfMatch fails if the file was changed during the download
+                    response = s3client.get_object(Bucket=bucket_name, Key=s3_file_path,
+                                                   Range=f"bytes={downloaded}-{end}", IfMatch=etag)
+                except ClientError as e:
+                    if e.response.get("Error", {}).get("Code") in ("PreconditionFailed", "412"):
+                        self._logger.info(f"S3 file {s3_file_path} changed during download, will download it later")
+                        return
+                    raise
+                for data in response["Body"].iter_chunks(1024 * 1024):
+                    f.write(data)
+                    downloaded += len(data)
+
+        os.replace(part_path, local_path)
+        with self._etags_lock:
+            etags = self.read_etags(local_dir)
+            etags[file_name] = etag
+            self.write_etags(local_dir, etags)
+
+    @staticmethod
+    def part_path(local_path: str, etag: str) -> str:
+        """ Hidden file of not completed download of s3 file version """
+        safe_etag = "".join(c for c in etag if c.isalnum() or c == "-")
+        return os.path.join(os.path.dirname(local_path), f".{os.path.basename(local_path)}.{safe_etag}.part")
+
+    @staticmethod
+    def etags_path(local_dir: str) -> str:
+        """ ETags of downloaded files are stored near the local directory: raw/level2.etags.json """
+        return f"{os.path.normpath(local_dir)}.etags.json"
+
+    def read_etags(self, local_dir: str) -> Dict[str, str]:
+        path = self.etags_path(local_dir)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def write_etags(self, local_dir: str, etags: Dict[str, str]):
+        path = self.etags_path(local_dir)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(etags, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
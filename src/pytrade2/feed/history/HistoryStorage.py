@@ -0,0 +1,212 @@
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+
+class HistoryStorage:
+    """
+    File format of history data: parquet by default, feather or csv.
+    Files are daily, named like 2025-05-21_BTC-USDT_level2.parquet.
+    Appended parquet file is a directory of parts, each append writes a new part. Compaction merges the parts.
+    Existing csv and csv.zip archives are always readable.
+    """
+
+    extensions = {"parquet": ".parquet", "feather": ".feather", "csv": ".csv"}
+    readable_extensions = (".parquet", ".feather", ".csv.zip", ".csv")
+    time_columns = ("datetime", "open_time", "close_time")
+    # Compacted part sorts before the parts appended after compaction
+    compacted_part_name = "part-0.parquet"
+
+    def __init__(self, data_format: str = "parquet"):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        if data_format not in self.extensions:
+            raise ValueError(f"Data format {data_format} is not supported, use one of {list(self.extensions)}")
+        if data_format != "csv" and not self.is_arrow_installed():
+            self._logger.warning(f"pyarrow is not installed, cannot use {data_format}, csv format will be used")
+            data_format = "csv"
+        self.data_format = data_format
+        self.extension = self.extensions[data_format]
+
+    @staticmethod
+    def of_config(config: Dict):
+        return HistoryStorage(config.get("pytrade2.data.format", "parquet") or "parquet")
+
+    @staticmethod
+    def is_arrow_installed() -> bool:
+        try:
+            import pyarrow
+            return True
+        except ImportError:
+            return False
+
+    @staticmethod
+    def is_readable(file_name: str) -> bool:
+        return str(file_name).endswith(HistoryStorage.readable_extensions)
+
+    @staticmethod
+    def stem(file_name: str) -> str:
+        """ File name without history file extension: 2025-05-21_BTC-USDT_level2 """
+        file_name = str(file_name)
+        for ext in HistoryStorage.readable_extensions:
+            if file_name.endswith(ext):
+                return file_name[:-len(ext)]
+        return file_name
+
+    def file_name(self, stem: str) -> str:
+        return f"{stem}{self.extension}"
+
+    def list_files(self, dir_: str) -> List[str]:
+        """
+        Sorted readable history files of the directory.
+        If the day is stored in different formats, current format is preferred.
+        """
+        if not os.path.exists(dir_):
+            return []
+        files_by_stem = {}
+        for file in sorted(os.listdir(dir_)):
+            if not self.is_readable(file):
+                continue
+            stem = self.stem(file)
+            if stem not in files_by_stem or file.endswith(self.extension):
+                files_by_stem[stem] = file
+        return [files_by_stem[stem] for stem in sorted(files_by_stem)]
+
+    def write(self, df: pd.DataFrame, path: Path) -> Path:
+        """ Write whole file, replace if exists """
+        path = Path(path)
+        if self.data_format == "csv":
+            df.to_csv(str(path), header=True)
+            return path
+        # Write to temp file and rename, readers never see partly written file
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        self._write_columnar(df, tmp_path)
+        if path.is_dir():
+            shutil.rmtree(path)
+        os.replace(tmp_path, path)
+        return path
+
+    def append(self, df: pd.DataFrame, path: Path) -> Path:
+        """ Append to the file, create if not exists. Return written file path. """
+        path = Path(path)
+        if self.data_format == "csv":
+            df.to_csv(str(path), header=not path.exists(), mode="a")
+            return path
+        if self.data_format == "parquet":
+            # Directory of parts, pandas reads it as a single dataset
+            path.mkdir(parents=True, exist_ok=True)
+            part_path = Path(path, f"part-{time.time_ns()}.parquet")
+            self._write_columnar(df, part_path)
+            return part_path
+        # Feather cannot be appended, rewrite it
+        if path.exists():
+            df = pd.concat([self.read(path), self._frame_to_write(df)], ignore_index=True)
+        return self.write(df, path)
+
+    def read(self, path, columns: Optional[List[str]] = None, start=None, end=None,
+             datetime_col: str = None) -> pd.DataFrame:
+        """
+        Read history file with typed time columns. Index is not set, columns are like in csv file.
+        :param columns: read only these columns
+        :param start, end: read only rows where datetime_col is inside [start, end]
+        """
+        path = str(path)
+        filters = []
+        if datetime_col and start is not None:
+            filters.append((datetime_col, ">=", pd.Timestamp(start)))
+        if datetime_col and end is not None:
+            filters.append((datetime_col, "<=", pd.Timestamp(end)))
+
+        if path.endswith(".parquet"):
+            # Predicate and columns are pushed down to parquet reader
+            if os.path.isdir(path):
+                df = self._read_parts(path, columns, filters)
+            else:
+                df = pd.read_parquet(path, columns=columns, filters=filters or None)
+            return df.reset_index() if df.index.name else df
+        if path.endswith(".feather"):
+            df = pd.read_feather(path, columns=columns)
+        else:
+            df = pd.read_csv(path, usecols=columns)
+            for col in self.time_columns:
+                if col in df.columns:
+                    df[col] = pd.to_datetime(df[col], format="ISO8601")
+        for col, op, value in filters:
+            df = df[df[col] >= value] if op == ">=" else df[df[col] <= value]
+        return df
+
+    @staticmethod
+    def part_files(path) -> List[Path]:
+        """ Sorted parts of appended parquet directory, temp files are skipped """
+        return sorted(part for part in Path(path).iterdir()
+                      if part.name.startswith("part-") and part.name.endswith(".parquet"))
+
+    def _read_parts(self, path: str, columns: Optional[List[str]], filters: list) -> pd.DataFrame:
+        """
+        Read parts of appended parquet directory. Each part schema is inferred from own rows, so all None column
+        of one part is null typed and the same column of another part is string. Promote them to common schema.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        tables = [pq.read_table(part, columns=columns, filters=filters or None) for part in self.part_files(path)]
+        if not tables:
+            return pd.DataFrame(columns=columns)
+        return pa.concat_tables(tables, promote_options="permissive").to_pandas()
+
+    def compact(self, path) -> Path:
+        """ Merge parts of appended parquet directory to single part. Return the directory. """
+        path = Path(path)
+        if not path.is_dir():
+            return path
+        parts = self.part_files(path)
+        compacted_path = Path(path, self.compacted_part_name)
+        if not parts or parts == [compacted_path]:
+            return path
+        self._logger.debug(f"Compacting {len(parts)} parts of {path}")
+        df = self._read_parts(str(path), None, [])
+        tmp_path = Path(path, f".{self.compacted_part_name}.tmp")
+        self._write_columnar(df, tmp_path)
+        # Replace compacted part first, then remove merged parts: a reader can see duplicates, but never loses rows
+        os.replace(tmp_path, compacted_path)
+        for part in parts:
+            if part != compacted_path:
+                os.remove(part)
+        return path
+
+    def _write_columnar(self, df: pd.DataFrame, path: Path):
+        df = self._frame_to_write(df)
+        try:
+            self._write_frame(df, path)
+        except (TypeError, ValueError) as e:
+            # Object column of mixed types cannot be typed, store it as strings
+            self._logger.debug(f"Cannot write {path} with typed columns, write object columns as strings: {e}")
+            for col in df.select_dtypes(include="object").columns:
+                df[col] = df[col].map(lambda value: value if value is None or isinstance(value, str) else str(value))
+            self._write_frame(df, path)
+
+    def _write_frame(self, df: pd.DataFrame, path: Path):
+        if self.data_format == "parquet":
+            df.to_parquet(path, index=False)
+        else:
+            df.to_feather(path)
+
+    @staticmethod
+    def _frame_to_write(df: pd.DataFrame) -> pd.DataFrame:
+        """ Named index becomes a column like in csv. If the index is a column already, index values are written. """
+        index = df.index
+        if index.name and index.name not in df.columns:
+            df = df.reset_index()
+        else:
+            df = df.reset_index(drop=True)
+            if index.name:
+                df[index.name] = index.to_numpy()
+        # Columnar formats need string column names
+        df.columns = [str(col) for col in df.columns]
+        # Categories can differ between appended parts, store values
+        for col in df.select_dtypes(include="category").columns:
+            df[col] = df[col].astype(object)
+        return df
@@ -0,0 +1,135 @@
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+class PreprocCache:
+    """
+    On-disk cache of preprocessed 1min data of a ticker and kind, read back by memory mapping.
+    Each column is a raw binary file, new rows are appended to the end of the files.
+    Index file is written the last, so its length is the number of completely written rows.
+    """
+
+    index_file = "index.bin"
+    meta_file = "meta.json"
+
+    def __init__(self, cache_dir: str):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self.cache_dir = cache_dir
+        self._index_path = Path(cache_dir, self.index_file)
+        self._meta_path = Path(cache_dir, self.meta_file)
+        self.meta = self._read_meta()
+        # Not supported columns are warned once
+        self._not_supported_columns = None
+
+    def __len__(self):
+        if not self.meta or not self._index_path.exists():
+            return 0
+        return os.path.getsize(self._index_path) // np.dtype(np.int64).itemsize
+
+    @property
+    def last_time(self) -> Optional[pd.Timestamp]:
+        """ Time of the last cached row, None if the cache is empty """
+        size = len(self)
+        if not size:
+            return None
+        return pd.Timestamp(int(self._map_index(size)[-1]))
+
+    def read(self, start=None) -> pd.DataFrame:
+        """ Cached rows from start time, inclusive. Only these rows are copied from the mapped files. """
+        size = len(self)
+        if not size:
+            return pd.DataFrame()
+        index = self._map_index(size)
+        first = int(np.searchsorted(index, pd.Timestamp(start).value)) if start is not None else 0
+        data = {name: self._map_column(name, dtype, size)[first:] for name, dtype in self.meta["columns"]}
+        return pd.DataFrame(data, index=pd.DatetimeIndex(index[first:].view("datetime64[ns]"),
+                                                         name=self.meta["index"]), copy=True)
+
+    def append(self, df: pd.DataFrame):
+        """ Append rows newer than the last cached one. Cache is cleared if the columns have changed. """
+        if df.empty:
+            return
+        if not df.index.is_monotonic_increasing:
+            df = df.sort_index()
+        last_time = self.last_time
+        if last_time is not None:
+            df = df[df.index > last_time]
+            if df.empty:
+                return
+
+        columns = [[str(col), str(df[col].dtype)] for col in df.columns]
+        if not all(isinstance(df[col].dtype, np.dtype) and df[col].dtype.kind in "biufM" for col in df.columns):
+            if columns != self._not_supported_columns:
+                self._not_supported_columns = columns
+                self._logger.warning(f"Cannot cache columns {columns}, only numbers and naive datetimes are supported")
+            else:
+                self._logger.debug(f"Cannot cache columns {columns}")
+            return
+        meta = {"index": df.index.name, "columns": columns}
+        if meta != self.meta:
+            if len(self):
+                self._logger.info(f"Cached columns changed, clear the cache {self.cache_dir}")
+            self.clear()
+            self._write_meta(meta)
+
+        size = len(self)
+        for name, dtype in columns:
+            self._append_values(self._column_path(name), size, df[name].to_numpy(dtype=dtype))
+        # Rows are committed when the index is written
+        index = df.index.values.astype("datetime64[ns]").view(np.int64)
+        self._append_values(self._index_path, size, index)
+
+    def compact(self, start):
+        """ Drop rows older than start time if they take most of the cache """
+        size = len(self)
+        if not size:
+            return
+        first = int(np.searchsorted(self._map_index(size), pd.Timestamp(start).value))
+        if first <= size - first:
+            return
+        self._logger.info(f"Drop {first} cached rows before {start} from {self.cache_dir}")
+        df = self.read(start)
+        self.clear()
+        self.append(df)
+
+    def clear(self):
+        if os.path.exists(self.cache_dir):
+            shutil.rmtree(self.cache_dir)
+        self.meta = None
+
+    def _map_index(self, size: int) -> np.ndarray:
+        return np.memmap(self._index_path, dtype=np.int64, mode="r", shape=(size,))
+
+    def _map_column(self, name: str, dtype: str, size: int) -> np.ndarray:
+        return np.memmap(self._column_path(name), dtype=np.dtype(dtype), mode="r", shape=(size,))
+
+    def _column_path(self, name: str) -> Path:
+        # Column number is used, column name can be not a valid file name
+        names = [col for col, _ in self.meta["columns"]]
+        return Path(self.cache_dir, f"column{names.index(name)}.bin")
+
+    @staticmethod
+    def _append_values(path: Path, size: int, values: np.ndarray):
+        """ Append after the first size rows, the rest is garbage of not committed append """
+        with open(path, "ab") as f:
+            f.truncate(size * values.itemsize)
+            f.write(np.ascontiguousarray(values).tobytes())
+
+    def _read_meta(self) -> Optional[dict]:
+        if not self._meta_path.exists():
+            return None
+        with open(self._meta_path) as f:
+            return json.load(f)
+
+    def _write_meta(self, meta: dict):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(self._meta_path, "w") as f:
+            json.dump(meta, f)
+        self.meta = meta
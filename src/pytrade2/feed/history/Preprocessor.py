@@ -1,15 +1,23 @@
 import logging
+import multiprocessing
 import os
 import pathlib
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 
 from pytrade2.features.level2.Level2Features import Level2Features
+from pytrade2.feed.history.HistoryStorage import HistoryStorage
 
 
 class Preprocessor:
-    def __init__(self, data_dir: str = "./data"):
+    def __init__(self, data_dir: str = "./data", storage: HistoryStorage = None, max_workers: int = None):
         self._logger = logging.getLogger(self.__class__.__name__)
         self.data_dir = data_dir
+        # Preprocessed data format, raw data can be in any readable format
+        self.storage = storage or HistoryStorage()
+        # Raw files are preprocessed in parallel processes, 1 to preprocess in current process
+        self.max_workers = max_workers or os.cpu_count() or 1
 
         self.data_dir_raw = f"{self.data_dir}/raw"
         self.data_dir_preproc = f"{self.data_dir}/preproc"
@@ -27,7 +35,7 @@ class Preprocessor:
     def get_unprocessed_raw_files(self, kind):
         """
         Compare raw files dir with preprocessed dir, get not processed raw files
-        Raw files have .csv.zip extension, processed are with .csv
+        Raw files are *.csv.zip, *.csv or columnar, processed are in storage format
         """
 
         raw_dir_kind = os.path.join(self.data_dir_raw, kind)
@@ -39,11 +47,14 @@ class Preprocessor:
         # Fill unprocessed file list
         unprocessed_list = []
         for raw_file in sorted(os.listdir(raw_dir_kind)):
-            if not raw_file.endswith(".csv.zip") and not raw_file.endswith(".csv"):
-                self._logger.warning(f"Raw file {raw_file} is not *.csv or *.csv.zip, skipping")
+            if raw_file.startswith("."):
+                # Hidden temp files like not completed downloads
+                continue
+            if not self.storage.is_readable(raw_file):
+                self._logger.warning(f"Raw file {raw_file} is not a history file, skipping")
                 continue
-            # If raw file is *.csv.zip, preproc will be *.csv not zipped
-            preproc_file = pathlib.Path(raw_file).stem if raw_file.endswith(".zip") else raw_file
+            # Preprocessed file has the same name in storage format
+            preproc_file = self.storage.file_name(self.storage.stem(raw_file))
             raw_file_path = os.path.join(raw_dir_kind, raw_file)
             preproc_file_path = os.path.join(preproc_dir_kind, f"{preproc_file}")
 
@@ -96,29 +107,40 @@ class Preprocessor:
         unprocessed_raw_files = self.get_unprocessed_raw_files(kind)
 
         file_paths = [f"{source_dir}/{f}" for f in unprocessed_raw_files]
-        self._logger.info(f"Preprocess {len(file_paths)} new {kind} raw files")
-        last_preproc_date = pd.Timestamp.min
-        for raw_file_path in file_paths:
-            self._logger.info(f"Read {ticker} {kind} data from {raw_file_path}")
-            # Read raw data
-            df = pd.read_csv(raw_file_path, parse_dates=True)
-            datetime_col = self.datetime_col(df)
-            df[datetime_col] = pd.to_datetime(df[datetime_col])
-            df.set_index(datetime_col, drop=False, inplace=True)
-
-            # Raw -> preprocessed transformation
-            df = self.transform(df, kind)
-            if not df.empty:
-                last_preproc_date = max(df.index[-1], last_preproc_date)
-
-            # Prepare target path
-            target_file_name = pathlib.Path(raw_file_path).stem
-            if not target_file_name.endswith("csv"): target_file_name += ".csv"
-            preprocessed_file_path = os.path.join(target_dir, target_file_name)
-
-            # Write to preprocessed dir
-            self._logger.info(f"Write preprocessed {ticker} {kind} data to {preprocessed_file_path}")
-            df.to_csv(preprocessed_file_path, header=True)
+        workers = min(self.max_workers, len(file_paths))
+        self._logger.info(f"Preprocess {len(file_paths)} new {kind} raw files in {max(workers, 1)} processes")
+        if workers > 1:
+            # Day files are independent, preprocess them in parallel. Spawn, not fork the process with threads.
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+                last_dates = list(executor.map(self.preprocess_raw_file, file_paths,
+                                               [target_dir] * len(file_paths),
+                                               [ticker] * len(file_paths),
+                                               [kind] * len(file_paths)))
+        else:
+            last_dates = [self.preprocess_raw_file(raw_file_path, target_dir, ticker, kind)
+                          for raw_file_path in file_paths]
+        return max(last_dates, default=pd.Timestamp.min)
+
+    def preprocess_raw_file(self, raw_file_path: str, target_dir: str, ticker: str, kind: str) -> pd.Timestamp:
+        """ Preprocess single raw file to target dir. Return last preprocessed time. """
+        self._logger.info(f"Read {ticker} {kind} data from {raw_file_path}")
+        # Read raw data
+        df = self.storage.read(raw_file_path)
+        datetime_col = self.datetime_col(df)
+        df[datetime_col] = pd.to_datetime(df[datetime_col])
+        df.set_index(datetime_col, drop=False, inplace=True)
+
+        # Raw -> preprocessed transformation
+        df = self.transform(df, kind)
+        last_preproc_date = df.index[-1] if not df.empty else pd.Timestamp.min
+
+        # Prepare target path
+        target_file_name = self.storage.file_name(self.storage.stem(pathlib.Path(raw_file_path).name))
+        preprocessed_file_path = os.path.join(target_dir, target_file_name)
+
+        # Write to preprocessed dir
+        self._logger.info(f"Write preprocessed {ticker} {kind} data to {preprocessed_file_path}")
+        self.storage.write(df, pathlib.Path(preprocessed_file_path))
         return last_preproc_date
 
     def read_last_preproc_data(self, ticker: str, kind: str, days=1):
@@ -127,14 +149,27 @@ class Preprocessor:
         source_dir = f"{self.data_dir_preproc}/{kind}"
         self._logger.info(f"Read {ticker} {kind} data for {days} days from {source_dir}")
 
-        file_paths = sorted(
-            [f"{source_dir}/{f}" for f in os.listdir(source_dir) if f.endswith(".csv")])[-days:]
+        file_paths = [f"{source_dir}/{f}" for f in self.storage.list_files(source_dir)][-days:]
 
-        df = pd.concat([pd.read_csv(f, parse_dates=True) for f in file_paths])
+        df = pd.concat([self.storage.read(f) for f in file_paths])
         datetime_col = self.datetime_col(df)
         df = self.clean_columns(df)
         return df
 
+    def read_preproc_data_since(self, ticker: str, kind: str, start: pd.Timestamp):
+        """ Read preprocessed data after start time, only files of start date and later are read """
+
+        source_dir = f"{self.data_dir_preproc}/{kind}"
+        start_date = str(start.date())
+        # File names start with the date: 2025-05-21_BTC-USDT_level2.parquet
+        file_paths = [f"{source_dir}/{f}" for f in self.storage.list_files(source_dir) if f[:10] >= start_date]
+        self._logger.info(f"Read {ticker} {kind} data after {start} from {len(file_paths)} files in {source_dir}")
+        if not file_paths:
+            return pd.DataFrame()
+
+        df = self.clean_columns(pd.concat([self.storage.read(f) for f in file_paths]))
+        return df[df.index > start]
+
     def clean_columns(self, df: pd.DataFrame):
         """ After level2, bidask or candles df has been read, set datetime index, clean columns which are not needed"""
         datetime_col = self.datetime_col(df)
@@ -145,11 +180,11 @@ class Preprocessor:
         df[datetime_col] = pd.to_datetime(df[datetime_col], format="ISO8601")
 
         if "close_time" in df.columns and "vol" in df.columns:
-            # remove duplicated
-            df = df.groupby(df["close_time"]) \
-                .apply(lambda x: x[x['vol'] == x['vol'].max()]) \
+            # remove duplicated, keep candles with max volume of the close time
+            max_vol = df.groupby("close_time")["vol"].transform("max")
+            df = df[df["vol"] == max_vol] \
+                .sort_values("close_time", kind="stable") \
                 .reset_index(drop=True)
-            # df = df.loc[df.groupby(df['close_time'])['vol'].idxmax()] #.reset_index(drop=True)
 
         df = df.set_index(datetime_col, drop=False, inplace=False)
         return df
@@ -0,0 +1,118 @@
+import os
+import tempfile
+from datetime import date
+from unittest import TestCase, skipIf
+
+import boto3
+
+from pytrade2.feed.history.HistoryS3Downloader import HistoryS3Downloader
+
+try:
+    from moto import mock_aws
+except ImportError:
+    mock_aws = None
+
+
+@skipIf(mock_aws is None, "moto is not installed")
+class TestHistoryS3Downloader(TestCase):
+    bucket = "pytrade2"
+    s3_dir = "data/raw/level2"
+
+    def setUp(self):
+        self.mock = mock_aws()
+        self.mock.start()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.data_dir = self.tmp_dir.name
+        self.local_dir = os.path.join(self.data_dir, "raw", "level2")
+        config = {"pytrade2.s3.endpoint_url": None, "pytrade2.s3.access_key": "test",
+                  "pytrade2.s3.secret_key": "test", "pytrade2.s3.bucket": self.bucket,
+                  "pytrade2.s3.download.workers": 4}
+        self.downloader = HistoryS3Downloader(config, data_dir=self.data_dir)
+        self.s3 = boto3.client("s3", region_name="us-east-1", aws_access_key_id="test",
+                               aws_secret_access_key="test")
+        self.s3.create_bucket(Bucket=self.bucket)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+        self.mock.stop()
+
+    def put(self, file_name: str, body: bytes):
+        self.s3.put_object(Bucket=self.bucket, Key=f"{self.s3_dir}/{file_name}", Body=body)
+
+    def update(self):
+        return self.downloader.update_local_history("BTC-USDT", date(2025, 5, 1), date(2025, 5, 31),
+                                                    kinds=["level2"])
+
+    def read_local(self, file_name: str) -> bytes:
+        with open(os.path.join(self.local_dir, file_name), "rb") as f:
+            return f.read()
+
+    def test_update_should_download_files_of_dates(self):
+        self.put("2025-05-21_BTC-USDT_level2.parquet", b"day21")
+        self.put("2025-05-22_BTC-USDT_level2.parquet/part-1.parquet", b"day22")
+        self.put("2025-06-01_BTC-USDT_level2.parquet", b"not in dates")
+        self.put("2025-05-21_BTC-USDT_level2.txt", b"not history file")
+
+        self.assertTrue(self.update())
+
+        self.assertEqual(["2025-05-21_BTC-USDT_level2.parquet", "2025-05-22_BTC-USDT_level2.parquet"],
+                         sorted(os.listdir(self.local_dir)))
+        self.assertEqual(b"day21", self.read_local("2025-05-21_BTC-USDT_level2.parquet"))
+        self.assertEqual(b"day22", self.read_local("2025-05-22_BTC-USDT_level2.parquet/part-1.parquet"))
+
+    def test_update_should_list_all_pages(self):
+        for i in range(1005):
+            self.put(f"2025-05-21_BTC-USDT_level2.parquet/part-{i:04d}.parquet", b"x")
+
+        self.update()
+
+        self.assertEqual(1005, len(os.listdir(os.path.join(self.local_dir, "2025-05-21_BTC-USDT_level2.parquet"))))
+
+    def test_update_should_download_only_changed(self):
+        self.put("2025-05-21_BTC-USDT_level2.parquet", b"day21")
+        self.put("2025-05-22_BTC-USDT_level2.parquet", b"day22")
+        self.update()
+
+        # Not changed
+        self.assertFalse(self.update())
+
+        # The same size, other content
+        self.put("2025-05-22_BTC-USDT_level2.parquet", b"DAY22")
+        self.assertTrue(self.update())
+        self.assertEqual(b"DAY22", self.read_local("2025-05-22_BTC-USDT_level2.parquet"))
+
+    def test_update_should_compare_size_if_no_etag(self):
+        # Downloaded before etags
+        os.makedirs(self.local_dir)
+        with open(os.path.join(self.local_dir, "2025-05-21_BTC-USDT_level2.parquet"), "wb") as f:
+            f.write(b"day21")
+        self.put("2025-05-21_BTC-USDT_level2.parquet", b"day21")
+
+        self.assertFalse(self.update())
+        self.assertIn("2025-05-21_BTC-USDT_level2.parquet", self.downloader.read_etags(self.local_dir))
+
+    def test_download_should_resume_part(self):
+        self.downloader.chunk_size = 4
+        self.put("2025-05-21_BTC-USDT_level2.parquet", b"0123456789")
+        obj = self.downloader.list_s3_objects(self.s3, self.bucket, self.s3_dir)[0]
+        local_path = os.path.join(self.local_dir, "2025-05-21_BTC-USDT_level2.parquet")
+        os.makedirs(self.local_dir)
+        # Interrupted download of this version and a part of older version
+        with open(self.downloader.part_path(local_path, obj["ETag"]), "wb") as f:
+            f.write(b"01234")
+        with open(self.downloader.part_path(local_path, "old"), "wb") as f:
+            f.write(b"old")
+
+        self.downloader.download_s3_file(self.s3, self.bucket, self.s3_dir, self.local_dir, obj)
+
+        self.assertEqual(b"0123456789", self.read_local("2025-05-21_BTC-USDT_level2.parquet"))
+        self.assertEqual(["2025-05-21_BTC-USDT_level2.parquet"], os.listdir(self.local_dir))
+
+    def test_download_changed_during_download_should_skip(self):
+        self.put("2025-05-21_BTC-USDT_level2.parquet", b"day21")
+        obj = self.downloader.list_s3_objects(self.s3, self.bucket, self.s3_dir)[0]
+        self.put("2025-05-21_BTC-USDT_level2.parquet", b"changed")
+
+        self.downloader.download_s3_file(self.s3, self.bucket, self.s3_dir, self.local_dir, obj)
+
+        self.assertFalse(os.path.exists(os.path.join(self.local_dir, "2025-05-21_BTC-USDT_level2.parquet")))
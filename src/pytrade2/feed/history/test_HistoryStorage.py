@@ -0,0 +1,157 @@
+import os
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import pandas as pd
+
+from pytrade2.feed.history.HistoryStorage import HistoryStorage
+
+
+class TestHistoryStorage(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.dir = self.tmp_dir.name
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    @staticmethod
+    def level2(start: str, periods: int) -> pd.DataFrame:
+        times = pd.date_range(start, periods=periods, freq="1s")
+        return pd.DataFrame({"datetime": times,
+                             "bid": range(periods),
+                             "ask": [float(i) + 0.5 for i in range(periods)],
+                             "ticker": "BTC-USDT"}).set_index("datetime", drop=False)
+
+    def test_write_read_should_keep_columns_and_types(self):
+        df = self.level2("2025-05-21 00:00:00", 3)
+        for data_format in ["parquet", "feather", "csv"]:
+            storage = HistoryStorage(data_format)
+            path = storage.write(df, Path(self.dir, storage.file_name("2025-05-21_BTC-USDT_level2")))
+
+            actual = storage.read(path)
+
+            self.assertTrue({"datetime", "bid", "ask", "ticker"}.issubset(actual.columns), data_format)
+            self.assertTrue(pd.api.types.is_datetime64_any_dtype(actual["datetime"]), data_format)
+            self.assertEqual(df["datetime"].tolist(), actual["datetime"].tolist())
+            self.assertEqual(df["ask"].tolist(), actual["ask"].tolist())
+
+    def test_write_columnar_should_not_duplicate_index_column(self):
+        df = self.level2("2025-05-21 00:00:00", 2)
+        for data_format in ["parquet", "feather"]:
+            storage = HistoryStorage(data_format)
+            path = storage.write(df, Path(self.dir, storage.file_name("2025-05-21_BTC-USDT_level2")))
+
+            self.assertEqual(["datetime", "bid", "ask", "ticker"], storage.read(path).columns.tolist())
+
+    def test_write_should_store_unnamed_index_as_columns_only(self):
+        df = pd.DataFrame({"bid": [1.0, 2.0]})
+        storage = HistoryStorage("parquet")
+        path = storage.write(df, Path(self.dir, "2025-05-21_BTC-USDT_level2.parquet"))
+
+        self.assertEqual(["bid"], storage.read(path).columns.tolist())
+
+    def test_write_should_add_named_index_column(self):
+        df = self.level2("2025-05-21 00:00:00", 2).drop(columns="datetime")
+        storage = HistoryStorage("parquet")
+        path = storage.write(df, Path(self.dir, "2025-05-21_BTC-USDT_level2.parquet"))
+
+        self.assertEqual(["datetime", "bid", "ask", "ticker"], storage.read(path).columns.tolist())
+
+    def test_append_should_read_parquet_parts_as_single_file(self):
+        storage = HistoryStorage("parquet")
+        path = Path(self.dir, "2025-05-21_BTC-USDT_level2.parquet")
+        storage.append(self.level2("2025-05-21 00:00:00", 2), path)
+        part_path = storage.append(self.level2("2025-05-21 00:00:02", 3), path)
+
+        actual = storage.read(path).sort_values("datetime")
+
+        self.assertTrue(path.is_dir())
+        self.assertEqual(path, part_path.parent)
+        self.assertEqual(2, len(os.listdir(path)))
+        self.assertEqual(5, len(actual))
+        self.assertEqual(pd.date_range("2025-05-21 00:00:00", periods=5, freq="1s").tolist(),
+                         actual["datetime"].tolist())
+
+    def test_read_should_promote_all_none_column_of_part(self):
+        storage = HistoryStorage("parquet")
+        path = Path(self.dir, "2025-05-21_BTC-USDT_signal_ext.parquet")
+        first, second = self.level2("2025-05-21 00:00:00", 2), self.level2("2025-05-21 00:00:02", 2)
+        first["status"], second["status"] = None, "opened"
+        storage.append(first, path)
+        storage.append(second, path)
+
+        actual = storage.read(path).sort_values("datetime")
+
+        self.assertEqual([None, None, "opened", "opened"], actual["status"].tolist())
+
+    def test_compact_should_merge_parts(self):
+        storage = HistoryStorage("parquet")
+        path = Path(self.dir, "2025-05-21_BTC-USDT_level2.parquet")
+        first = self.level2("2025-05-21 00:00:00", 2)
+        first["status"] = None
+        storage.append(first, path)
+        storage.append(self.level2("2025-05-21 00:00:02", 3), path)
+
+        storage.compact(path)
+        storage.append(self.level2("2025-05-21 00:00:05", 1), path)
+        storage.compact(path)
+
+        self.assertEqual([HistoryStorage.compacted_part_name], os.listdir(path))
+        self.assertEqual(pd.date_range("2025-05-21 00:00:00", periods=6, freq="1s").tolist(),
+                         storage.read(path)["datetime"].tolist())
+
+    def test_append_should_rewrite_feather(self):
+        storage = HistoryStorage("feather")
+        path = Path(self.dir, "2025-05-21_BTC-USDT_level2.feather")
+        storage.append(self.level2("2025-05-21 00:00:00", 2), path)
+        storage.append(self.level2("2025-05-21 00:00:02", 3), path)
+
+        self.assertEqual(5, len(storage.read(path)))
+
+    def test_append_csv_should_write_header_once(self):
+        storage = HistoryStorage("csv")
+        path = Path(self.dir, "2025-05-21_BTC-USDT_level2.csv")
+        storage.append(self.level2("2025-05-21 00:00:00", 2), path)
+        storage.append(self.level2("2025-05-21 00:00:02", 3), path)
+
+        self.assertEqual(5, len(storage.read(path)))
+
+    def test_read_should_prune_columns_and_rows(self):
+        df = self.level2("2025-05-21 00:00:00", 10)
+        for data_format in ["parquet", "feather", "csv"]:
+            storage = HistoryStorage(data_format)
+            path = storage.write(df, Path(self.dir, storage.file_name("2025-05-21_BTC-USDT_level2")))
+
+            actual = storage.read(path, columns=["datetime", "bid"], datetime_col="datetime",
+                                  start="2025-05-21 00:00:03", end="2025-05-21 00:00:05")
+
+            self.assertEqual(["datetime", "bid"], actual.columns.tolist(), data_format)
+            self.assertEqual([3, 4, 5], actual["bid"].tolist(), data_format)
+
+    def test_list_files_should_prefer_current_format(self):
+        for file in ["2025-05-21_BTC-USDT_level2.csv.zip", "2025-05-22_BTC-USDT_level2.csv",
+                     "2025-05-22_BTC-USDT_level2.parquet", "2025-05-23_BTC-USDT_level2.feather",
+                     ".2025-05-24_BTC-USDT_level2.parquet.tmp", "readme.txt"]:
+            Path(self.dir, file).touch()
+
+        actual = HistoryStorage("parquet").list_files(self.dir)
+
+        self.assertEqual(["2025-05-21_BTC-USDT_level2.csv.zip", "2025-05-22_BTC-USDT_level2.parquet",
+                          "2025-05-23_BTC-USDT_level2.feather"], actual)
+
+    def test_list_files_should_be_empty_if_no_dir(self):
+        self.assertEqual([], HistoryStorage("parquet").list_files(str(Path(self.dir, "not_exists"))))
+
+    def test_stem(self):
+        self.assertEqual("2025-05-21_BTC-USDT_level2", HistoryStorage.stem("2025-05-21_BTC-USDT_level2.csv.zip"))
+        self.assertEqual("2025-05-21_BTC-USDT_level2", HistoryStorage.stem("2025-05-21_BTC-USDT_level2.parquet"))
+
+    def test_of_config_should_default_to_parquet(self):
+        self.assertEqual(".parquet", HistoryStorage.of_config({}).extension)
+        self.assertEqual(".csv", HistoryStorage.of_config({"pytrade2.data.format": "csv"}).extension)
+
+    def test_unknown_format_should_raise(self):
+        with self.assertRaises(ValueError):
+            HistoryStorage("xlsx")
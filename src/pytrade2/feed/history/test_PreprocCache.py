@@ -0,0 +1,126 @@
+import os
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import pandas as pd
+
+from pytrade2.feed.history.PreprocCache import PreprocCache
+
+
+class TestPreprocCache(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = str(Path(self.tmp_dir.name, "cache", "level2", "BTC-USDT"))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    @staticmethod
+    def preproc(start: str, periods: int) -> pd.DataFrame:
+        times = pd.date_range(start, periods=periods, freq="1min")
+        return pd.DataFrame({"datetime": times,
+                             "l2_bid_vol": [float(i) for i in range(periods)],
+                             "count": range(periods)},
+                            index=pd.DatetimeIndex(times, name="datetime"))
+
+    def test_read_empty(self):
+        cache = PreprocCache(self.cache_dir)
+
+        self.assertEqual(0, len(cache))
+        self.assertIsNone(cache.last_time)
+        self.assertTrue(cache.read().empty)
+
+    def test_append_should_read_the_same_data(self):
+        df = self.preproc("2025-05-21 00:00", 5)
+        PreprocCache(self.cache_dir).append(df)
+
+        # New cache instance like after restart
+        cache = PreprocCache(self.cache_dir)
+
+        self.assertEqual(5, len(cache))
+        self.assertEqual(df.index[-1], cache.last_time)
+        pd.testing.assert_frame_equal(df, cache.read(), check_freq=False)
+
+    def test_append_should_skip_already_cached(self):
+        cache = PreprocCache(self.cache_dir)
+        cache.append(self.preproc("2025-05-21 00:00", 5))
+        cache.append(self.preproc("2025-05-21 00:03", 5))
+
+        actual = cache.read()
+
+        self.assertEqual(pd.date_range("2025-05-21 00:00", periods=8, freq="1min").tolist(), actual.index.tolist())
+        self.assertEqual([0, 1, 2, 3, 4, 2, 3, 4], actual["count"].tolist())
+
+    def test_append_should_ignore_not_committed_rows(self):
+        cache = PreprocCache(self.cache_dir)
+        cache.append(self.preproc("2025-05-21 00:00", 2))
+        # Column of interrupted append is longer than the index
+        with open(Path(self.cache_dir, "column1.bin"), "ab") as f:
+            f.write(b"garbage!")
+
+        cache.append(self.preproc("2025-05-21 00:02", 1))
+
+        self.assertEqual([0.0, 1.0, 0.0], cache.read()["l2_bid_vol"].tolist())
+
+    def test_append_changed_columns_should_clear(self):
+        cache = PreprocCache(self.cache_dir)
+        cache.append(self.preproc("2025-05-21 00:00", 2))
+
+        cache.append(self.preproc("2025-05-21 00:02", 2).drop(columns="count"))
+
+        self.assertEqual(["datetime", "l2_bid_vol"], cache.read().columns.tolist())
+        self.assertEqual(2, len(cache))
+
+    def test_append_not_supported_columns_should_skip(self):
+        cache = PreprocCache(self.cache_dir)
+        df = self.preproc("2025-05-21 00:00", 2)
+        df["ticker"] = "BTC-USDT"
+
+        cache.append(df)
+
+        self.assertEqual(0, len(cache))
+
+    def test_append_not_supported_columns_should_warn_once(self):
+        cache = PreprocCache(self.cache_dir)
+        df = self.preproc("2025-05-21 00:00", 2)
+        df["ticker"] = "BTC-USDT"
+
+        with self.assertLogs("PreprocCache", level="DEBUG") as logs:
+            cache.append(df)
+            cache.append(self.preproc("2025-05-21 00:02", 2).assign(ticker="BTC-USDT"))
+
+        self.assertEqual(["WARNING", "DEBUG"], [record.levelname for record in logs.records])
+
+    def test_read_from_start(self):
+        cache = PreprocCache(self.cache_dir)
+        cache.append(self.preproc("2025-05-21 00:00", 5))
+
+        actual = cache.read(pd.Timestamp("2025-05-21 00:03"))
+
+        self.assertEqual([3, 4], actual["count"].tolist())
+
+    def test_compact_should_drop_old_rows(self):
+        cache = PreprocCache(self.cache_dir)
+        cache.append(self.preproc("2025-05-21 00:00", 5))
+
+        cache.compact(pd.Timestamp("2025-05-21 00:03"))
+
+        self.assertEqual([3, 4], cache.read()["count"].tolist())
+
+    def test_compact_should_keep_if_few_old_rows(self):
+        cache = PreprocCache(self.cache_dir)
+        cache.append(self.preproc("2025-05-21 00:00", 5))
+
+        cache.compact(pd.Timestamp("2025-05-21 00:01"))
+
+        self.assertEqual(5, len(cache))
+
+    def test_clear(self):
+        cache = PreprocCache(self.cache_dir)
+        cache.append(self.preproc("2025-05-21 00:00", 5))
+
+        cache.clear()
+
+        self.assertEqual(0, len(cache))
+        self.assertFalse(os.path.exists(self.cache_dir))
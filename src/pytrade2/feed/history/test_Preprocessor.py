@@ -1,7 +1,10 @@
+import tempfile
+from pathlib import Path
 from unittest import TestCase
 
 import pandas as pd
 
+from pytrade2.feed.history.HistoryStorage import HistoryStorage
 from pytrade2.feed.history.Preprocessor import Preprocessor
 
 
@@ -35,3 +38,42 @@ class TestPreprocessor(TestCase):
         ]).set_index("close_time", drop=False)
         preprocessed = Preprocessor(None).transform(input, "candles")
         self.assertEqual(2, len(preprocessed))
+
+    def test_clean_columns_should_keep_max_vol_candle_of_close_time(self):
+        input = pd.DataFrame([
+            {"close_time": "2025-05-28 00:02:00", "close": 3, "vol": 1, "ticker": "BTC-USDT"},
+            {"close_time": "2025-05-28 00:01:00", "close": 1, "vol": 1, "ticker": "BTC-USDT"},
+            {"close_time": "2025-05-28 00:01:00", "close": 2, "vol": 2, "ticker": "BTC-USDT"},
+            {"close_time": "2025-05-28 00:02:00", "close": 4, "vol": 1, "ticker": "BTC-USDT"},
+        ])
+
+        cleaned = Preprocessor(None).clean_columns(input)
+
+        self.assertEqual(["close_time", "close", "vol"], cleaned.columns.tolist())
+        self.assertEqual(pd.to_datetime(["2025-05-28 00:01:00", "2025-05-28 00:02:00", "2025-05-28 00:02:00"]).tolist(),
+                         cleaned.index.tolist())
+        # Candles with the same max volume are kept in original order
+        self.assertEqual([2, 3, 4], cleaned["close"].tolist())
+
+    def test_preprocess_last_raw_data_parallel_should_be_the_same_as_serial(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            raw_dir = Path(data_dir, "raw", "level2")
+            raw_dir.mkdir(parents=True)
+            for day in ["2025-05-27", "2025-05-28", "2025-05-29"]:
+                times = pd.date_range(f"{day} 00:00:00", periods=300, freq="1s")
+                pd.DataFrame({"datetime": times, "bid": 1.0, "bid_vol": 2.0, "ask": None, "ask_vol": None}) \
+                    .set_index("datetime", drop=False) \
+                    .to_csv(Path(raw_dir, f"{day}_BTC-USDT_level2.csv"))
+            serial = Preprocessor(data_dir, HistoryStorage("parquet"), max_workers=1)
+            serial.data_dir_preproc = f"{data_dir}/preproc_serial"
+            parallel = Preprocessor(data_dir, HistoryStorage("parquet"), max_workers=2)
+
+            serial_last_date = serial.preprocess_last_raw_data("BTC-USDT", "level2")
+            parallel_last_date = parallel.preprocess_last_raw_data("BTC-USDT", "level2")
+
+            self.assertEqual(pd.Timestamp("2025-05-29 00:05:00"), serial_last_date)
+            self.assertEqual(serial_last_date, parallel_last_date)
+            pd.testing.assert_frame_equal(serial.read_last_preproc_data("BTC-USDT", "level2", days=3),
+                                          parallel.read_last_preproc_data("BTC-USDT", "level2", days=3))
+            # All processed
+            self.assertEqual(pd.Timestamp.min, parallel.preprocess_last_raw_data("BTC-USDT", "level2"))
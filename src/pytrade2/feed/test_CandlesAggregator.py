@@ -0,0 +1,90 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from pytrade2.feed.CandlesAggregator import CandlesAggregator
+
+
+class TestCandlesAggregator(TestCase):
+
+    @staticmethod
+    def candle(close_time: str, open_=1, high=1, low=1, close=1, vol=1):
+        close_time = pd.Timestamp(close_time)
+        return {"open_time": close_time - pd.Timedelta("1min"), "close_time": close_time, "open": open_, "high": high,
+                "low": low, "close": close, "vol": vol}
+
+    @staticmethod
+    def resampled(candles: pd.DataFrame, period: str):
+        """ Full history resample, how candles were aggregated before """
+        return candles.set_index("close_time", drop=False).resample(period, closed="right").agg(
+            {'open_time': 'first', 'close_time': 'last', 'open': 'first', 'high': 'max', 'low': 'min',
+             'close': 'last', 'vol': 'max'}).dropna(subset=["close_time"]).set_index('close_time', drop=False)
+
+    def test_add_should_update_last_candle(self):
+        aggregator = CandlesAggregator("1min", 10)
+        aggregator.add(pd.DataFrame([self.candle("2025-06-22 16:51", open_=1, high=2, low=1, close=2, vol=10)]))
+        aggregator.add(pd.DataFrame([self.candle("2025-06-22 16:51", open_=5, high=3, low=0, close=3, vol=20)]))
+
+        df = aggregator.to_frame()
+        self.assertEqual([pd.Timestamp("2025-06-22 16:51")], df.index.tolist())
+        self.assertEqual([1], df["open"].tolist())
+        self.assertEqual([3], df["high"].tolist())
+        self.assertEqual([0], df["low"].tolist())
+        self.assertEqual([3], df["close"].tolist())
+        self.assertEqual([20], df["vol"].tolist())
+
+    def test_add_should_skip_nan(self):
+        aggregator = CandlesAggregator("1min", 10)
+        aggregator.add(pd.DataFrame([self.candle("2025-06-22 16:51", open_=1, high=2, low=1, close=2, vol=10)]))
+        aggregator.add(pd.DataFrame([{"close_time": pd.Timestamp("2025-06-22 16:51"), "close": 3}]))
+
+        df = aggregator.to_frame()
+        self.assertEqual([1], df["open"].tolist())
+        self.assertEqual([2], df["high"].tolist())
+        self.assertEqual([3], df["close"].tolist())
+        self.assertEqual([10], df["vol"].tolist())
+        self.assertEqual([pd.Timestamp("2025-06-22 16:50")], df["open_time"].tolist())
+
+    def test_add_should_append_new_bucket(self):
+        aggregator = CandlesAggregator("5min", 10)
+        aggregator.add(pd.DataFrame([self.candle("2025-06-22 16:55"), self.candle("2025-06-22 16:56")]))
+
+        df = aggregator.to_frame()
+        self.assertEqual([pd.Timestamp("2025-06-22 16:55"), pd.Timestamp("2025-06-22 16:56")], df.index.tolist())
+
+    def test_add_late_candle(self):
+        aggregator = CandlesAggregator("1min", 10)
+        aggregator.add(pd.DataFrame([self.candle("2025-06-22 16:51"), self.candle("2025-06-22 16:53")]))
+        aggregator.add(pd.DataFrame([self.candle("2025-06-22 16:52")]))
+
+        df = aggregator.to_frame()
+        self.assertEqual(
+            [pd.Timestamp("2025-06-22 16:51"), pd.Timestamp("2025-06-22 16:52"), pd.Timestamp("2025-06-22 16:53")],
+            df.index.tolist())
+
+    def test_to_frame_should_keep_max_len(self):
+        aggregator = CandlesAggregator("1min", 3)
+        for minute in range(10, 20):
+            aggregator.add(pd.DataFrame([self.candle(f"2025-06-22 16:{minute}", close=minute)]))
+
+        df = aggregator.to_frame()
+        self.assertEqual(3, len(aggregator))
+        self.assertEqual([17, 18, 19], df["close"].tolist())
+
+    def test_add_should_be_equal_to_resample(self):
+        # Candle updates of 5min period every 20 seconds
+        rnd = np.random.default_rng(1)
+        times = pd.date_range("2025-06-22 16:00:20", periods=600, freq="20s")
+        candles = pd.DataFrame({"open_time": times.floor("5min"), "close_time": times,
+                                "open": rnd.random(len(times)), "high": rnd.random(len(times)),
+                                "low": rnd.random(len(times)), "close": rnd.random(len(times)),
+                                "vol": rnd.random(len(times))})
+
+        aggregator = CandlesAggregator("5min", 1000)
+        for i in range(0, len(candles), 7):
+            aggregator.add(candles.iloc[i:i + 7])
+
+        expected = self.resampled(candles, "5min")
+        actual = aggregator.to_frame()
+        pd.testing.assert_frame_equal(expected, actual, check_freq=False)
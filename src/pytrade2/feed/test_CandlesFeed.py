@@ -180,3 +180,76 @@ class TestCandlesFeed(TestCase):
         candles_feed.apply_buf()
         self.assertTrue(candles_feed.candles_by_interval_buf["1min"].empty)
         self.assertEqual(len(candles_feed.candles_by_interval["1min"].index.tolist()), 2)
+
+    def test_apply_buf_should_publish_new_candles_snapshot(self):
+        candles_feed = self.new_candles_feed({"pytrade2.feed.candles.periods": "1min",
+                                              "pytrade2.feed.candles.counts": "2"})
+        candle = {"interval": "1min", "open_time": pd.Timestamp("2025-06-22 16:50"),
+                  "close_time": pd.Timestamp("2025-06-22 16:51"), "open": 100, "high": 110, "low": 90, "close": 105,
+                  "vol": 100}
+        candles_feed.on_candle(candle)
+        candles_feed.apply_buf()
+        prev_snapshot = candles_feed.snapshot
+        prev_candles = prev_snapshot.data["1min"].copy()
+
+        # Update of the same candle, then a new one
+        candles_feed.on_candle({**candle, "high": 120})
+        candles_feed.on_candle({**candle, "open_time": pd.Timestamp("2025-06-22 16:51"),
+                                "close_time": pd.Timestamp("2025-06-22 16:52")})
+        candles_feed.apply_buf()
+
+        # Published candles are not changed by the update
+        pd.testing.assert_frame_equal(prev_candles, prev_snapshot.data["1min"])
+        self.assertEqual(prev_snapshot.version + 1, candles_feed.snapshot.version)
+        self.assertEqual([120, 110], candles_feed.candles_by_interval["1min"]["high"].tolist())
+
+    def test_update_candles_should_read_history_once(self):
+        candles_feed = self.new_candles_feed({"pytrade2.feed.candles.periods": "1min",
+                                              "pytrade2.feed.candles.counts": "1"})
+        candles_feed.read_candles.side_effect = lambda: setattr(candles_feed, "is_history_loaded", True)
+        candles_feed.fill_gap = MagicMock()
+
+        candles_feed.update_candles()
+        candles_feed.update_candles()
+
+        # History was read only once, then only stream updates
+        candles_feed.read_candles.assert_called_once()
+        candles_feed.fill_gap.assert_called_once()
+
+    def test_gap_start_of(self):
+        candles_feed = self.new_candles_feed({"pytrade2.feed.candles.periods": "1min,5min",
+                                              "pytrade2.feed.candles.counts": "1,1"})
+        now = datetime(year=2025, month=6, day=22, hour=16, minute=50)
+        candles_feed.candles_by_interval = {
+            "1min": pd.DataFrame(index=[now - timedelta(minutes=1)], data={"close": 1}),
+            "5min": pd.DataFrame(index=[now - timedelta(minutes=5)], data={"close": 1})}
+        # Stream is good
+        self.assertIsNone(candles_feed.gap_start_of(now))
+
+        # 1min candles are lagging
+        candles_feed.candles_by_interval["1min"] = pd.DataFrame(index=[now - timedelta(minutes=3)], data={"close": 1})
+        self.assertEqual(now - timedelta(minutes=3), candles_feed.gap_start_of(now))
+
+        # No candles
+        candles_feed.candles_by_interval["1min"] = pd.DataFrame()
+        self.assertTrue(pd.isnull(candles_feed.gap_start_of(now)))
+
+    def test_fill_gap_should_read_gap_from_exchange(self):
+        candles_feed = self.new_candles_feed({"pytrade2.feed.candles.periods": "1min",
+                                              "pytrade2.feed.candles.counts": "10"})
+        now = datetime(year=2025, month=6, day=22, hour=16, minute=50)
+        candles_feed.on_candle({"interval": "1min", "open_time": now - timedelta(minutes=6),
+                                "close_time": now - timedelta(minutes=5), "open": 1, "high": 1, "low": 1,
+                                "close": 1, "vol": 1})
+        candles_feed.apply_buf()
+        candles_feed.exchange_candles_feed.read_candles.return_value = [
+            {"open_time": now - timedelta(minutes=i + 1), "close_time": now - timedelta(minutes=i), "open": 2,
+             "high": 2, "low": 2, "close": 2, "vol": 2} for i in range(4, -1, -1)]
+
+        candles_feed.fill_gap(now)
+
+        # Candles of the gap should be added from the exchange, history should not be reloaded
+        candles_feed.read_candles.assert_not_called()
+        candles = candles_feed.candles_by_interval["1min"]
+        self.assertEqual([now - timedelta(minutes=i) for i in range(5, -1, -1)], candles.index.tolist())
+        self.assertEqual([1, 2, 2, 2, 2, 2], candles["close"].tolist())
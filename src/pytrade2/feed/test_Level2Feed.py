@@ -1,4 +1,5 @@
 import multiprocessing
+import threading
 from datetime import datetime, timedelta
 from unittest import TestCase
 from unittest.mock import MagicMock
@@ -6,6 +7,7 @@ from unittest.mock import MagicMock
 import pandas as pd
 
 from pytrade2.feed.Level2Feed import Level2Feed
+from pytrade2.feed.OrderBookSnapshot import OrderBookSnapshot
 
 
 class TestLevel2Feed(TestCase):
@@ -76,3 +78,69 @@ class TestLevel2Feed(TestCase):
         level2_feed = self.new_level2_feed()
         level2_feed.level2 = pd.DataFrame(index = [datetime.utcnow() - timedelta(minutes=10) ], data = {"bid": 1})
         self.assertFalse(level2_feed.is_alive(pd.Timedelta('1min')))
+
+    def test_on_level2_should_add_to_buf(self):
+        level2_feed = self.new_level2_feed()
+        level2_feed.level2_buf = pd.DataFrame()
+        dt = datetime.fromisoformat("2023-11-26 00:12")
+
+        # Call
+        level2_feed.on_level2([{"datetime": dt, "symbol": "BTC-USDT", "bid": 1, "bid_vol": 2},
+                               {"datetime": dt, "symbol": "BTC-USDT", "ask": 3, "ask_vol": 4}])
+        self.assertEqual(2, len(level2_feed.level2_buf))
+        self.assertTrue(level2_feed.level2.empty)
+
+        level2_feed.apply_buf()
+        self.assertTrue(level2_feed.level2_buf.empty)
+        self.assertEqual([dt, dt], level2_feed.level2["datetime"].tolist())
+        self.assertEqual([1, 3], level2_feed.level2["bid"].fillna(3).tolist())
+
+    def test_on_level2_snapshot_should_add_to_buf(self):
+        level2_feed = self.new_level2_feed()
+        level2_feed.level2_buf = pd.DataFrame()
+        dt = datetime.fromisoformat("2023-11-26 00:12")
+
+        # Call
+        level2_feed.on_level2_snapshot(OrderBookSnapshot.of_levels(dt, "BTC-USDT", [[1, 2]], [[3, 4]]))
+        self.assertEqual(2, len(level2_feed.level2_buf))
+        self.assertTrue(level2_feed.new_data_event.is_set())
+
+        level2_feed.apply_buf()
+        self.assertEqual([dt, dt], level2_feed.level2["datetime"].tolist())
+        self.assertEqual([1, 3], level2_feed.level2["bid"].fillna(3).tolist())
+        self.assertEqual([2, 4], level2_feed.level2["ask_vol"].fillna(2).tolist())
+
+    def test_apply_buf_should_publish_new_snapshot(self):
+        level2_feed = self.new_level2_feed()
+        level2_feed.history_max_window = pd.Timedelta('2min')
+        prev_snapshot = level2_feed.snapshot
+
+        level2_feed.apply_buf()
+        level2_feed.on_level2([{"datetime": datetime.fromisoformat("2023-11-26 00:12"), "bid": 1, "bid_vol": 1}])
+
+        # Previous snapshot is not changed, new items are not applied until next apply
+        self.assertTrue(prev_snapshot.data.empty)
+        self.assertEqual(prev_snapshot.version + 1, level2_feed.snapshot.version)
+        self.assertEqual(3, len(level2_feed.snapshot.data))
+
+    def test_on_level2_should_not_wait_for_data_lock(self):
+        level2_feed = self.new_level2_feed()
+        items = [{"datetime": datetime.fromisoformat("2023-11-26 00:12"), "bid": 1, "bid_vol": 1}]
+        # Strategy holds data lock in another thread, long learning for example
+        learning, learned = threading.Event(), threading.Event()
+
+        def learn():
+            with level2_feed.data_lock:
+                learning.set()
+                learned.wait(10)
+
+        learn_thread = threading.Thread(target=learn)
+        learn_thread.start()
+        learning.wait(10)
+
+        received = threading.Thread(target=level2_feed.on_level2, args=(items,))
+        received.start()
+        received.join(5)
+        self.assertFalse(received.is_alive())
+        learned.set()
+        learn_thread.join()
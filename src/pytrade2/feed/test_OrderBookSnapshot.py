@@ -0,0 +1,29 @@
+from datetime import datetime
+from unittest import TestCase
+
+from pytrade2.feed.OrderBookSnapshot import OrderBookSnapshot
+
+
+class TestOrderBookSnapshot(TestCase):
+    dt = datetime.fromisoformat("2025-06-22 16:50")
+
+    def test_of_levels_should_parse_strings(self):
+        snapshot = OrderBookSnapshot.of_levels(self.dt, "BTC-USDT", [["1.01", "1.1"], ["1.02", "1.2"]],
+                                               [["2.01", "2.1"]])
+
+        self.assertEqual(3, len(snapshot))
+        self.assertEqual([[1.01, 1.1], [1.02, 1.2]], snapshot.bids.tolist())
+        self.assertEqual([[2.01, 2.1]], snapshot.asks.tolist())
+
+    def test_of_levels_empty_side(self):
+        snapshot = OrderBookSnapshot.of_levels(self.dt, "BTC-USDT", [], [[2.01, 2.1]])
+
+        self.assertEqual((0, 2), snapshot.bids.shape)
+        self.assertEqual(1, len(snapshot))
+
+    def test_to_dicts(self):
+        snapshot = OrderBookSnapshot.of_levels(self.dt, "BTC-USDT", [[1.01, 1.1]], [[2.01, 2.1]])
+
+        self.assertEqual([{"datetime": self.dt, "symbol": "BTC-USDT", "bid": 1.01, "bid_vol": 1.1},
+                          {"datetime": self.dt, "symbol": "BTC-USDT", "ask": 2.01, "ask_vol": 2.1}],
+                         snapshot.to_dicts())
@@ -1,10 +1,13 @@
+import tempfile
 from collections import defaultdict
+from pathlib import Path
 from unittest import TestCase
 from unittest.mock import MagicMock
 
 import pandas as pd
 
 from pytrade2.feed.StreamWithHistoryPreprocFeed import StreamWithHistoryPreprocFeed
+from pytrade2.feed.history.HistoryStorage import HistoryStorage
 
 
 class TestStreamHistoryPreprocFeed(TestCase):
@@ -114,3 +117,34 @@ class TestStreamHistoryPreprocFeed(TestCase):
             pd.to_datetime("2025-05-28 00:01:00"),
             pd.to_datetime("2025-05-28 00:02:00"),
         ], preprocessed.index.tolist())
+
+    def test_read_initial_preproc_data_should_read_cache_and_new_files(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            config = defaultdict(str)
+            config["pytrade2.data.dir"] = data_dir
+            config["pytrade2.tickers"] = "BTC-USDT"
+            config["pytrade2.strategy.history.max.window"] = "1d"
+            stream_feed = MagicMock()
+            stream_feed.kind = "level2"
+            preproc_dir = Path(data_dir, "preproc", "level2")
+            preproc_dir.mkdir(parents=True)
+            storage = HistoryStorage("parquet")
+
+            def write_preproc(start, periods):
+                times = pd.date_range(start, periods=periods, freq="1min")
+                df = pd.DataFrame({"datetime": times, "l2_bid_vol": 1.0}).set_index("datetime", drop=False)
+                storage.write(df, Path(preproc_dir, storage.file_name(f"{times[0].date()}_BTC-USDT_level2")))
+
+            # First start reads files, cache all except the last minute
+            write_preproc("2025-05-28 00:00", 3)
+            feed = StreamWithHistoryPreprocFeed(config, stream_feed)
+            self.assertEqual(3, len(feed.read_initial_preproc_data()))
+            self.assertEqual(pd.Timestamp("2025-05-28 00:01"), feed._cache.last_time)
+
+            # Restart reads the cache and only newer data from files
+            write_preproc("2025-05-28 00:00", 5)
+            feed = StreamWithHistoryPreprocFeed(config, stream_feed)
+            actual = feed.read_initial_preproc_data()
+
+            self.assertEqual(pd.date_range("2025-05-28 00:00", periods=5, freq="1min").tolist(), actual.index.tolist())
+            self.assertEqual(pd.Timestamp("2025-05-28 00:03"), feed._cache.last_time)
@@ -0,0 +1,122 @@
+import warnings
+from datetime import datetime, timedelta
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from pytrade2.feed.OrderBookSnapshot import OrderBookSnapshot
+from pytrade2.feed.TicksBuffer import TicksBuffer
+
+
+class TestTicksBuffer(TestCase):
+    dt = datetime.fromisoformat("2025-06-22 16:50")
+
+    def tick(self, seconds: int, bid=1.0):
+        return {"datetime": self.dt + timedelta(seconds=seconds), "symbol": "BTC-USDT", "bid": bid, "bid_vol": 2.0,
+                "ask": bid + 1, "ask_vol": 3.0}
+
+    def test_append_should_go_to_new(self):
+        ticks = TicksBuffer()
+        ticks.append_dict(self.tick(0))
+        ticks.append_dict(self.tick(1))
+
+        self.assertEqual(0, len(ticks))
+        self.assertEqual(2, ticks.new_len)
+        new_frame = ticks.new_frame()
+        self.assertEqual(TicksBuffer.columns, new_frame.columns.tolist())
+        self.assertEqual([self.dt, self.dt + timedelta(seconds=1)], new_frame.index.tolist())
+        self.assertEqual(["BTC-USDT", "BTC-USDT"], new_frame["symbol"].tolist())
+        self.assertTrue(ticks.frame().empty)
+
+    def test_append_snapshot_should_be_the_same_as_items(self):
+        snapshot = OrderBookSnapshot.of_levels(self.dt, "BTC-USDT", [[1.01, 1.1], [1.02, 1.2]], [[2.01, 2.1]])
+        snapshot_ticks, dict_ticks = TicksBuffer(capacity=2), TicksBuffer(capacity=2)
+
+        snapshot_ticks.append_snapshot(snapshot)
+        for item in snapshot.to_dicts():
+            dict_ticks.append_dict(item)
+
+        pd.testing.assert_frame_equal(dict_ticks.new_frame(), snapshot_ticks.new_frame())
+
+    def test_apply_new(self):
+        ticks = TicksBuffer()
+        ticks.append_dict(self.tick(0, 1))
+        ticks.append_dict(self.tick(1, 2))
+        ticks.apply_new()
+
+        self.assertEqual(0, ticks.new_len)
+        self.assertEqual([1, 2], ticks.frame()["bid"].tolist())
+        self.assertEqual([2, 3], ticks.frame()["ask"].tolist())
+
+    def test_apply_new_should_purge_old(self):
+        ticks = TicksBuffer()
+        for i in range(5):
+            ticks.append_dict(self.tick(i, i))
+        ticks.apply_new(pd.Timedelta("2s"))
+
+        self.assertEqual([3, 4], ticks.frame()["bid"].tolist())
+
+    def test_apply_new_should_not_purge_if_history_window_is_not_set(self):
+        ticks = TicksBuffer()
+        for i in range(5):
+            ticks.append_dict(self.tick(i, i))
+        # Not configured window like pd.Timedelta(config.get(...)) of None, NaT value must not overflow
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            ticks.apply_new(pd.Timedelta(None))
+
+        self.assertEqual([0, 1, 2, 3, 4], ticks.frame()["bid"].tolist())
+
+    def test_apply_new_should_sort(self):
+        ticks = TicksBuffer()
+        ticks.append_dict(self.tick(2, 2))
+        ticks.append_dict(self.tick(0, 0))
+        ticks.append_dict(self.tick(1, 1))
+        ticks.apply_new()
+
+        self.assertEqual([0, 1, 2], ticks.frame()["bid"].tolist())
+        self.assertTrue(ticks.frame().index.is_monotonic_increasing)
+
+    def test_drop_new(self):
+        ticks = TicksBuffer()
+        ticks.append_dict(self.tick(0, 0))
+        ticks.apply_new()
+        ticks.append_dict(self.tick(1, 1))
+        ticks.drop_new()
+
+        self.assertEqual(0, ticks.new_len)
+        self.assertEqual([0], ticks.frame()["bid"].tolist())
+
+    def test_frame_should_not_change_after_appends(self):
+        ticks = TicksBuffer(capacity=2)
+        ticks.append_dict(self.tick(0, 0))
+        ticks.append_dict(self.tick(1, 1))
+        ticks.apply_new()
+        frame = ticks.frame()
+
+        # Grow the storage, frame should not be affected
+        for i in range(2, 100):
+            ticks.append_dict(self.tick(i, i))
+        ticks.apply_new(pd.Timedelta("2s"))
+
+        self.assertEqual([0, 1], frame["bid"].tolist())
+        self.assertEqual([98, 99], ticks.frame()["bid"].tolist())
+
+    def test_frame_should_be_read_only(self):
+        ticks = TicksBuffer()
+        ticks.append_dict(self.tick(0, 0))
+        ticks.apply_new()
+
+        with self.assertRaises(ValueError):
+            ticks.frame()["bid"].to_numpy()[0] = 1
+
+    def test_extend(self):
+        ticks = TicksBuffer()
+        ticks.extend(pd.DataFrame([self.tick(0, 0), {"datetime": self.dt + timedelta(seconds=1), "ask": 5}]))
+        ticks.apply_new()
+
+        frame = ticks.frame()
+        self.assertEqual([1, 5], frame["ask"].tolist())
+        self.assertTrue(np.isnan(frame["bid"].tolist()[1]))
+        self.assertEqual(["BTC-USDT", None], [None if pd.isna(s) else s for s in frame["symbol"].tolist()])
@@ -41,10 +41,15 @@ class MetricServer:
         return check_token
 
     @staticmethod
-    @app.route("/metrics")
+    def has_metrics() -> bool:
+        """ Metrics are set by the app. Without the app, like in downloader, metrics are not recorded. """
+        return MetricServer.metrics is not None
+
+    @staticmethod
+    @app.route("/metrics", endpoint="metrics")
     @require_api_token
-    def metrics():
-        """ Flask endpoint for metrics"""
+    def metrics_endpoint():
+        """ Flask endpoint for metrics. Not named metrics not to shadow metrics attribute. """
         return MetricServer.prometheus_wsgi_app
 
     @staticmethod
@@ -1,4 +1,4 @@
-from prometheus_client import Gauge
+from prometheus_client import Gauge, Summary, Histogram
 
 from pytrade2.datamodel.Trade import Trade
 from pytrade2.metrics.MetricsBase import MetricsBase
@@ -11,6 +11,7 @@ class Metrics(MetricsBase):
         app_name, strategy_name = app_name.lower(), strategy_name.lower()
         self.strategy = Metrics.Strategy(app_name, strategy_name)
         self.broker = Metrics.Broker(app_name, strategy_name)
+        self.exchange = Metrics.Exchange(app_name, strategy_name)
 
     class Strategy:
         def __init__(self, app_name: str, strategy: str):
@@ -50,6 +51,21 @@ class Metrics(MetricsBase):
                 self.process_duration_sec = Gauge("strategy_process_duration_sec",
                                                   "Process new data duration", namespace=app_name,
                                                   subsystem=strategy, registry=MetricsBase.registry,  labelnames=["strategy"]).labels(strategy = MetricsBase.strategy)
+                self.stage_sec = Histogram("strategy_process_stage_sec", "Process new data stage duration",
+                                           namespace=app_name, subsystem=strategy, registry=MetricsBase.registry,
+                                           labelnames=["strategy", "stage"],
+                                           buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                                                    0.5, 1, 2.5))
+                self.staleness_sec = Histogram("strategy_process_staleness_sec",
+                                               "Time from last data used by the decision to the decision",
+                                               namespace=app_name, subsystem=strategy, registry=MetricsBase.registry,
+                                               labelnames=["strategy"],
+                                               buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+                                               ).labels(strategy=MetricsBase.strategy)
+
+            def of_stage(self, stage: str):
+                """ Duration histogram of the processing stage """
+                return self.stage_sec.labels(strategy=MetricsBase.strategy, stage=stage)
 
         class Prediction:
             def __init__(self, app_name: str, strategy: str):
@@ -79,6 +95,16 @@ class Metrics(MetricsBase):
             self.account = Metrics.Broker.Account(namespace, strategy)
             self.order = Metrics.Broker.Order(namespace, strategy)
             self.trade = Metrics.Broker.Trade(namespace, strategy)
+            self.trailing_stop = Metrics.Broker.TrailingStop(namespace, strategy)
+
+        class TrailingStop:
+            def __init__(self, app_name: str, strategy: str):
+                self.move_wait_sec = Summary("broker_ts_move_wait_sec", "Trailing stop move wait in worker queue",
+                                             namespace=app_name, subsystem=strategy, registry=MetricsBase.registry,
+                                             labelnames=["strategy"]).labels(strategy=MetricsBase.strategy)
+                self.move_sec = Summary("broker_ts_move_sec", "Trailing stop move exchange calls duration",
+                                        namespace=app_name, subsystem=strategy, registry=MetricsBase.registry,
+                                        labelnames=["strategy"]).labels(strategy=MetricsBase.strategy)
 
         class Account:
             def __init__(self, app_name: str, strategy: str):
@@ -121,3 +147,33 @@ class Metrics(MetricsBase):
                 else:
                     self.in_trade.set(0)
                     self.trade_profit.set(0)
+
+    class Exchange:
+        def __init__(self, app_name: str, strategy: str):
+            self.websocket = Metrics.Exchange.WebSocket(app_name, strategy)
+            self.rest = Metrics.Exchange.Rest(app_name, strategy)
+
+        class WebSocket:
+            def __init__(self, app_name: str, strategy: str):
+                self.decode_sec = Summary("exchange_websocket_decode_sec", "Websocket message decompress and parse duration",
+                                          namespace=app_name, subsystem=strategy, registry=MetricsBase.registry,
+                                          labelnames=["strategy", "topic"])
+                self.dispatch_sec = Summary("exchange_websocket_dispatch_sec", "Websocket message consumers duration",
+                                            namespace=app_name, subsystem=strategy, registry=MetricsBase.registry,
+                                            labelnames=["strategy", "topic"])
+
+            def of_topic(self, topic: str):
+                """ Decode and dispatch summaries of the topic """
+                return (self.decode_sec.labels(strategy=MetricsBase.strategy, topic=topic),
+                        self.dispatch_sec.labels(strategy=MetricsBase.strategy, topic=topic))
+
+        class Rest:
+            def __init__(self, app_name: str, strategy: str):
+                self.request_sec = Histogram("exchange_rest_request_sec", "Rest request duration",
+                                             namespace=app_name, subsystem=strategy, registry=MetricsBase.registry,
+                                             labelnames=["strategy", "method", "path"],
+                                             buckets=(0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 2, 5, 10))
+
+            def of_path(self, method: str, path: str):
+                """ Request duration histogram of the path """
+                return self.request_sec.labels(strategy=MetricsBase.strategy, method=method, path=path)
@@ -51,8 +51,10 @@ class KerasLowHighClassificationStrategy(StrategyBase):
                                               self.candles_feed.candles_cnt_by_interval)
 
     def predict(self, x):
-        x_trans = self.X_pipe.transform(x)
-        y_pred_raw = self.model.predict(x_trans, verbose=0)
+        with self.stage("predict_transform"):
+            x_trans = self.X_pipe.transform(x)
+        with self.stage("predict_model"):
+            y_pred_raw = self.model.predict(x_trans, verbose=0)
         y_pred_trans = self.y_pipe.inverse_transform(y_pred_raw)
         last_signal = y_pred_trans[-1][0] if y_pred_trans.size > 0 else 0
         return pd.DataFrame(data=[{"signal": last_signal}], index=x.tail(1).index)
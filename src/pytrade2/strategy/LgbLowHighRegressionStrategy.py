@@ -10,6 +10,7 @@ from pytrade2.exch.Exchange import Exchange
 from pytrade2.strategy.common.StrategyBase import StrategyBase
 from pytrade2.features.LowHighTargets import LowHighTargets
 from pytrade2.features.CandlesMultiIndiFeatures import CandlesMultiIndiFeatures
+from pytrade2.features.CandlesMultiIndiStream import CandlesMultiIndiStream
 from pytrade2.strategy.signal_.SignalByFutLowHigh import SignalByFutLowHigh
 
 
@@ -41,25 +42,33 @@ class LgbLowHighRegressionStrategy(StrategyBase):
         self.model_name = "MultiOutputRegressorLgb"
         self.history_days = int(config.get("pytrade2.feed.candles.history.days", "2"))
         self.indi_params = config.get("pytrade2.features.indicators")
+        # Last features are calculated incrementally, by new candles only
+        self.indicators_stream = CandlesMultiIndiStream(self.indi_params)
 
         self._logger.info(f"Target period: {self.target_period}")
 
+    def run(self):
+        # Strategy is periodical, but candles are updated from the stream between the periods
+        self.candles_feed.run()
+        super().run()
+
     def can_learn(self) -> bool:
         # Only candles feed is for data. Bid ask feed is for trailing stop support, don't check it.
 
         return bool(self.candles_feed.candles_by_interval)
 
     def prepare_xy(self) -> (pd.DataFrame, pd.DataFrame):
-        with self.data_lock:
-            x = CandlesMultiIndiFeatures.multi_indi_features(self.candles_feed.candles_by_interval, params=self.indi_params)
+        # Frozen candles snapshot, new candles are published to the feed meanwhile without waiting for us
+        candles_by_interval = self.candles_feed.candles_by_interval
+        x = CandlesMultiIndiFeatures.multi_indi_features(candles_by_interval, params=self.indi_params)
 
-            # Candles with minimal period
-            min_period = min(self.candles_feed.candles_by_interval.keys(), key=pd.Timedelta)
-            candles = self.candles_feed.candles_by_interval[min_period]
-            y = LowHighTargets.fut_lohi(candles, self.target_period)
+        # Candles with minimal period
+        min_period = min(candles_by_interval.keys(), key=pd.Timedelta)
+        candles = candles_by_interval[min_period]
+        y = LowHighTargets.fut_lohi(candles, self.target_period)
 
-            # y has less items because of diff()
-            x = x[x.index.isin(y.index)]
+        # y has less items because of diff()
+        x = x[x.index.isin(y.index)]
 
         return x, y
 
@@ -67,14 +76,14 @@ class LgbLowHighRegressionStrategy(StrategyBase):
         self._logger.debug(f"Preparing last x. Candles by interval: {self.candles_feed.candles_by_interval.keys()}")
 
         with self.data_lock:
-            self.candles_feed.read_candles()
+            # History is read once, then updated from the stream. Exchange is called only to fill a gap.
+            self.candles_feed.update_candles()
+        candles_by_interval = self.candles_feed.candles_by_interval
 
         if self._logger.isEnabledFor(logging.DEBUG):
             self._logger.debug("Last candles:\n" + "\n".join(
-                [f"{period} : {candles.tail()}" for period, candles in
-                 self.candles_feed.candles_by_interval.items()]))
-        x = CandlesMultiIndiFeatures.multi_indi_features_last(
-            self.candles_feed.candles_by_interval) if self.candles_feed.candles_by_interval else pd.DataFrame.empty
+                [f"{period} : {candles.tail()}" for period, candles in candles_by_interval.items()]))
+        x = self.indicators_stream.last_features(candles_by_interval) if candles_by_interval else pd.DataFrame.empty
         self._logger.debug(f"Prepared last x: {x}")
         return x
 
@@ -82,8 +91,10 @@ class LgbLowHighRegressionStrategy(StrategyBase):
         # Save to buffer, actual persist by schedule of data persister
         self.data_persister.add_to_buf(self.ticker, {'x': x})
         with self.data_lock:
-            x_trans = self.X_pipe.transform(x)
-            y_arr = self.model.predict(x_trans)
+            with self.stage("predict_transform"):
+                x_trans = self.X_pipe.transform(x)
+            with self.stage("predict_model"):
+                y_arr = self.model.predict(x_trans)
             y_arr = self.y_pipe.inverse_transform(y_arr)
             y_arr = y_arr.reshape((-1, 2))[-1]  # Last and only row
             fut_low_diff, fut_high_diff = y_arr[0], y_arr[1]
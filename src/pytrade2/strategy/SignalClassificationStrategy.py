@@ -135,8 +135,10 @@ class SignalClassificationStrategy(StrategyBase):
         self._logger.debug(f"Predicting signal")
         self.data_persister.add_to_buf(self.ticker, {'x': x})
         with self.data_lock:
-            x_trans = self.X_pipe.transform(x)
-            y_arr = self.model.predict(x_trans)
+            with self.stage("predict_transform"):
+                x_trans = self.X_pipe.transform(x)
+            with self.stage("predict_model"):
+                y_arr = self.model.predict(x_trans)
             self.y_pipe.is_fitted = False
             y_arr = self.y_pipe.inverse_transform(y_arr)
 
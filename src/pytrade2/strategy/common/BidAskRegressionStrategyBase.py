@@ -41,10 +41,9 @@ class BidAskRegressionStrategyBase(StrategyBase):
 
     def prepare_xy(self) -> (pd.DataFrame, pd.DataFrame):
         """ Prepare train data """
-        with self.data_lock:
-            # Copy data for this thread only
-            bid_ask = self.bid_ask_feed.bid_ask.copy()
-            level2 = self.level2_feed.level2.copy()
+        # Published snapshots are not changed by feeds, no need to lock or copy them
+        bid_ask = self.bid_ask_feed.bid_ask
+        level2 = self.level2_feed.level2
 
         return PredictBidAskFeatures.features_targets_of(
             bid_ask,
@@ -56,10 +55,12 @@ class BidAskRegressionStrategyBase(StrategyBase):
 
     def predict(self, x) -> pd.DataFrame:
         # X - features with absolute values, x_prepared - nd array fith final scaling and normalization
-        x_trans = self.X_pipe.transform(x)
+        with self.stage("predict_transform"):
+            x_trans = self.X_pipe.transform(x)
 
         # Predict
-        y = self.model.predict(x_trans, verbose=0)
+        with self.stage("predict_model"):
+            y = self.model.predict(x_trans, verbose=0)
         y = y.reshape((-1, 4))
 
         # Get prediction result
@@ -1,14 +1,18 @@
+import copy
+import functools
 import gc
 import logging
 import multiprocessing
 import time
 import traceback
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from threading import Thread, Event, Timer
-from typing import Dict
+from typing import Dict, Optional
 
 import pandas as pd
 # import tensorflow.python.keras.backend
+from sklearn.base import clone
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler, MaxAbsScaler
@@ -73,6 +77,8 @@ class StrategyBase:
         self.model = None
         self.broker = None
         self.is_processing = False
+        # Stage name -> duration histogram, see stage()
+        self._stage_metrics = {}
         self.is_learn_enabled = config.get("pytrade2.strategy.learn.enabled", "true").lower() == "true"
         self.is_learned = False
 
@@ -297,20 +303,24 @@ class StrategyBase:
                 f"Learning on last data. Train data len: {train_X.shape[0]} from {min(train_X.index)} to {max(train_X.index)}")
             if len(train_X.index) >= self.min_xy_len:
                 start_time = datetime.utcnow()
-                if not (self.X_pipe and self.y_pipe):
-                    self.X_pipe, self.y_pipe = self.create_pipe(train_X, train_y)
+                # Fit copies, prediction uses current pipes and model until new ones are ready
+                if self.X_pipe and self.y_pipe:
+                    x_pipe, y_pipe = copy.deepcopy(self.X_pipe), copy.deepcopy(self.y_pipe)
+                else:
+                    x_pipe, y_pipe = self.create_pipe(train_X, train_y)
                 # Final scaling and normalization
-                X_trans, y_trans = self.X_pipe.fit_transform(train_X), self.y_pipe.fit_transform(train_y)
+                X_trans, y_trans = x_pipe.fit_transform(train_X), y_pipe.fit_transform(train_y)
 
                 # If x window transformation applied, x size reduced => adjust y
                 y_trans = y_trans[-X_trans.shape[0]:]
 
                 # Get or create model, parameters
-                if not self.model:
-                    self.model = self.create_model(X_trans.shape[-1], y_trans.shape[-1])
+                model = self.model_to_fit(X_trans.shape[-1], y_trans.shape[-1])
 
                 # Train
-                self.model.fit(X_trans, y_trans)
+                model.fit(X_trans, y_trans)
+                with self.data_lock:
+                    self.X_pipe, self.y_pipe, self.model = x_pipe, y_pipe, model
                 self.is_learned = True
 
                 # Save weights and xy new delta
@@ -329,6 +339,15 @@ class StrategyBase:
             if self.learn_interval and self.is_learn_enabled:
                 Timer(self.learn_interval.seconds, self.learn).start()
 
+    def model_to_fit(self, x_size, y_size):
+        """ Unfitted copy of current model if it can be cloned, current or new model otherwise """
+        if not self.model:
+            return self.create_model(x_size, y_size)
+        try:
+            return clone(self.model)
+        except TypeError:
+            return self.model
+
     def apply_params(self, params: dict) -> None:
         """ After last model and params read from mlflow, apply params to strategy"""
         for name, val in {name: val for name, val in params.items() if hasattr(self, name)}.items():
@@ -354,37 +373,90 @@ class StrategyBase:
         with (self.data_lock):
             [feed.apply_buf() for feed in self._feeds]
 
+    @contextmanager
+    def stage(self, name: str):
+        """ Measure duration of processing stage to the histogram of the stage """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            try:
+                metric = self._stage_metrics.get(name)
+                if metric is None and MetricServer.has_metrics():
+                    metric = self._stage_metrics[name] = MetricServer.metrics.strategy.process.of_stage(name)
+                if metric is not None:
+                    metric.observe(time.perf_counter() - start_time)
+            except Exception as e:
+                # Metrics never break the stage
+                self._logger.debug(f"Cannot observe duration of stage {name}: {e}")
+
+    @staticmethod
+    def timed_stage(name: str):
+        """ Decorator of strategy method to measure it as processing stage """
+
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(self, *args, **kwargs):
+                with self.stage(name):
+                    return func(self, *args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    @staticmethod
+    def last_data_time(x) -> Optional[pd.Timestamp]:
+        """ Time of the last data in features, None if features are not indexed by time """
+        if isinstance(getattr(x, "index", None), pd.DatetimeIndex) and not x.empty:
+            return x.index[-1]
+        return None
+
+    def observe_staleness(self, x):
+        """ Time from last data used by the decision to now """
+        last_time = self.last_data_time(x)
+        if last_time is not None and MetricServer.has_metrics():
+            now = pd.Timestamp.utcnow() if last_time.tzinfo else pd.Timestamp(datetime.utcnow())
+            MetricServer.metrics.strategy.process.staleness_sec.observe((now - last_time).total_seconds())
+
     def process_new_data(self):
 
         if self.model and not self.is_processing and self.is_learned:
             start_time = datetime.utcnow()
             try:
                 self.is_processing = True
-                self.apply_buffers()
+                with self.stage("apply_buffers"):
+                    self.apply_buffers()
 
-                x = self.prepare_last_x()
+                with self.stage("prepare_last_x"):
+                    x = self.prepare_last_x()
                 # x can be dataframe or np array, check is it empty
                 if (hasattr(x, 'empty') and x.empty) or (hasattr(x, 'shape') and x.shape[0] == 0):
                     self._logger.info('Cannot process new data: features are empty. ')
                     return
                 # Predict
-                y_pred = self.predict(x)
+                with self.stage("predict"):
+                    y_pred = self.predict(x)
 
                 # Update current trade status
-                self.check_cur_trade()
+                with self.stage("check_cur_trade"):
+                    self.check_cur_trade()
 
                 # Open or close or do nothing
-                self.process_prediction(y_pred)
+                self.observe_staleness(x)
+                with self.stage("process_prediction"):
+                    self.process_prediction(y_pred)
 
                 # Save to disk for analysis
                 # y_pred["datetime"] = dt
-                self.data_persister.save_last_data(self.ticker, {'y_pred': y_pred})
+                with self.stage("save_last_data"):
+                    self.data_persister.save_last_data(self.ticker, {'y_pred': y_pred})
             except Exception as e:
                 self._logger.error(f"{e}. Traceback: {traceback.format_exc()}")
             finally:
                 # Set metrics
                 process_duration = datetime.utcnow() - start_time
-                MetricServer.metrics.strategy.process.process_duration_sec.set(process_duration.total_seconds())
+                if MetricServer.has_metrics():
+                    MetricServer.metrics.strategy.process.process_duration_sec.set(process_duration.total_seconds())
                 self.is_processing = False
 
     def process_prediction(self, y_pred):
@@ -1,6 +1,11 @@
+from datetime import datetime, timedelta
 from unittest import TestCase
 from unittest.mock import MagicMock
 
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+from pytrade2.metrics.MetricServer import MetricServer
 from pytrade2.strategy.common.StrategyBase import StrategyBase
 
 
@@ -79,3 +84,123 @@ class TestStrategyBase(TestCase):
 
         strategy.apply_params({"is_trailing_stop": True})
         self.assertTrue(strategy.is_trailing_stop)
+
+    def test_learn_should_replace_model_and_pipes_with_fitted_copies(self):
+        metrics = MetricServer.metrics
+        MetricServer.metrics = MagicMock()
+        try:
+            strategy = self.new_strategy()
+            strategy.learn_interval = None
+            strategy.model_persister = MagicMock()
+            index = pd.date_range("2025-06-22 16:50", periods=5, freq="1min")
+            x = pd.DataFrame({"x1": range(5), "x2": range(5, 10)}, index=index, dtype=float)
+            y = pd.DataFrame({"y": range(10, 15)}, index=index, dtype=float)
+            strategy.prepare_xy = MagicMock(return_value=(x, y))
+            prev_model = strategy.model = LinearRegression()
+            prev_x_pipe, prev_y_pipe = strategy.X_pipe, strategy.y_pipe = strategy.create_pipe(x, y)
+
+            strategy.learn()
+
+            # Previous model and pipes could be used for prediction during learning, they are not changed
+            self.assertIsNot(prev_model, strategy.model)
+            self.assertFalse(hasattr(prev_model, "coef_"))
+            self.assertIsNot(prev_x_pipe, strategy.X_pipe)
+            self.assertIsNot(prev_y_pipe, strategy.y_pipe)
+            self.assertTrue(hasattr(strategy.model, "coef_"))
+            self.assertTrue(strategy.is_learned)
+        finally:
+            MetricServer.metrics = metrics
+
+    def test_process_new_data_should_observe_stages_and_staleness(self):
+        metrics = MetricServer.metrics
+        MetricServer.metrics = MagicMock()
+        try:
+            strategy = self.new_strategy()
+            strategy.model, strategy.is_learned = MagicMock(), True
+            strategy.broker, strategy.data_persister = MagicMock(), MagicMock()
+            last_time = datetime.utcnow() - timedelta(seconds=10)
+            x = pd.DataFrame({"x1": [1.0]}, index=[last_time])
+            strategy.prepare_last_x = MagicMock(return_value=x)
+            strategy.predict = MagicMock(return_value=x)
+            strategy.process_prediction = MagicMock()
+
+            strategy.process_new_data()
+
+            process_metrics = MetricServer.metrics.strategy.process
+            self.assertEqual(["apply_buffers", "prepare_last_x", "predict", "check_cur_trade", "process_prediction",
+                              "save_last_data"],
+                             [call.args[0] for call in process_metrics.of_stage.call_args_list])
+            self.assertEqual(6, process_metrics.of_stage.return_value.observe.call_count)
+            staleness = process_metrics.staleness_sec.observe.call_args.args[0]
+            self.assertGreaterEqual(staleness, 10)
+            self.assertLess(staleness, 60)
+        finally:
+            MetricServer.metrics = metrics
+
+    def test_process_new_data_should_process_prediction_if_metrics_are_not_set(self):
+        metrics = MetricServer.metrics
+        MetricServer.metrics = None
+        try:
+            strategy = self.new_strategy()
+            strategy.model, strategy.is_learned = MagicMock(), True
+            strategy.broker, strategy.data_persister = MagicMock(), MagicMock()
+            x = pd.DataFrame({"x1": [1.0]}, index=[datetime.utcnow()])
+            strategy.prepare_last_x = MagicMock(return_value=x)
+            strategy.predict = MagicMock(return_value=x)
+            strategy.process_prediction = MagicMock()
+
+            strategy.process_new_data()
+
+            strategy.process_prediction.assert_called_once_with(x)
+            strategy.data_persister.save_last_data.assert_called_once()
+            self.assertFalse(strategy.is_processing)
+        finally:
+            MetricServer.metrics = metrics
+
+    def test_stage_should_not_fail_if_metrics_failed(self):
+        metrics = MetricServer.metrics
+        MetricServer.metrics = MagicMock()
+        MetricServer.metrics.strategy.process.of_stage.side_effect = AttributeError()
+        try:
+            strategy = self.new_strategy()
+
+            with strategy.stage("my_stage"):
+                result = 1
+
+            self.assertEqual(1, result)
+        finally:
+            MetricServer.metrics = metrics
+
+    def test_timed_stage_should_observe_decorated_method(self):
+        class StageStrategy(TestStrategyBase.MyStrategy):
+            @StrategyBase.timed_stage("my_stage")
+            def my_stage(self, value):
+                return value * 2
+
+        metrics = MetricServer.metrics
+        MetricServer.metrics = MagicMock()
+        try:
+            strategy = StageStrategy(self.new_strategy().config)
+
+            self.assertEqual(4, strategy.my_stage(2))
+            strategy.my_stage(3)
+
+            # Histogram of the stage is created once
+            MetricServer.metrics.strategy.process.of_stage.assert_called_once_with("my_stage")
+            self.assertEqual(2, MetricServer.metrics.strategy.process.of_stage.return_value.observe.call_count)
+        finally:
+            MetricServer.metrics = metrics
+
+    def test_stage_should_observe_when_failed(self):
+        metrics = MetricServer.metrics
+        MetricServer.metrics = MagicMock()
+        try:
+            strategy = self.new_strategy()
+
+            with self.assertRaises(ValueError):
+                with strategy.stage("failed_stage"):
+                    raise ValueError()
+
+            MetricServer.metrics.strategy.process.of_stage.return_value.observe.assert_called_once()
+        finally:
+            MetricServer.metrics = metrics
@@ -1,6 +1,7 @@
 import concurrent.futures.thread
 import logging
 import os
+import shutil
 import threading
 import zipfile
 from collections import defaultdict
@@ -11,6 +12,7 @@ from typing import Dict, Optional
 import boto3
 import pandas as pd
 
+from pytrade2.feed.history.HistoryStorage import HistoryStorage
 from pytrade2.strategy.persist.Boto3Hack import Boto3Hack
 
 
@@ -31,6 +33,9 @@ class DataPersister:
             self.s3_bucket = config['pytrade2.s3.bucket']
             self.s3_endpoint_url = config['pytrade2.s3.endpoint_url']
 
+        # Data files format
+        self.storage = HistoryStorage.of_config(config)
+
         # Directory for model weights and price data
         self.account_dir = self.db_path = None
         self.data_dir = config.get("pytrade2.data.dir")
@@ -62,7 +67,8 @@ class DataPersister:
                 if not f.startswith(keep_prefix):
                     f = os.path.join(data_dir, f)
                     self._logger.debug(f"Purging {f}")
-                    os.remove(f)
+                    # Appended parquet file is a directory of parts
+                    shutil.rmtree(f) if os.path.isdir(f) else os.remove(f)
 
     def add_to_buf(self, ticker: str,  # X_last: pd.DataFrame, y_pred_last: pd.DataFrame,
                        data_last: Dict[str, pd.DataFrame]):
@@ -110,26 +116,32 @@ class DataPersister:
         self.purge_data_files(self.account_dir)
 
     def persist_df(self, df: pd.DataFrame, dir_: str, data_tag: str, ticker: str, mode = "a") -> Optional[Path]:
-        """ Save file locally, append if exists"""
+        """ Save file locally, append if exists. Return written file to copy to s3."""
         if df.empty:
             return None
         time = df.index[-1]
         file_name = f"{pd.to_datetime(time).date()}_{ticker}_{data_tag}"
         Path(dir_).mkdir(parents=True, exist_ok=True)  # ensure directory exists
-        file_path = Path(dir_, f"{file_name}.csv")
+        file_path = Path(dir_, self.storage.file_name(file_name))
         self._logger.debug(f"Saving last {data_tag} data to {file_path}")
-        df.to_csv(str(file_path),
-                  header=not file_path.exists(),
-                  mode=mode)
-        return file_path
+        if mode == "a":
+            # For parquet it is a new part of daily directory, return the directory to upload all parts
+            self.storage.append(df, file_path)
+            return file_path
+        return self.storage.write(df, file_path)
 
     def copy2s3(self, datapath: Path, compress=True):
         if not self.s3_enabled:
             return
+        if datapath and Path(datapath).is_dir():
+            # Parquet directory of appended parts: merge the parts, upload the whole day
+            datapath = Path(self.storage.compact(datapath), self.storage.compacted_part_name)
         if not os.path.exists(datapath):
             self._logger.debug(f"{datapath} does not exist, cannot upload it to s3")
             return
 
+        # Columnar files are compressed already
+        compress = compress and datapath.suffix == ".csv"
         if compress:
             # Compress to temp zip before uploading to s3
             zippath = datapath.with_suffix(datapath.suffix + '.zip')
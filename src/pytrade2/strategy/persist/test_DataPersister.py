@@ -0,0 +1,55 @@
+import os
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+import pandas as pd
+
+from pytrade2.feed.history.HistoryStorage import HistoryStorage
+from pytrade2.strategy.persist.DataPersister import DataPersister
+
+
+class TestDataPersister(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.dir = self.tmp_dir.name
+        self.persister = DataPersister({"pytrade2.s3.enabled": "true",
+                                        "pytrade2.s3.access_key": "key",
+                                        "pytrade2.s3.secret_key": "secret",
+                                        "pytrade2.s3.bucket": "bucket",
+                                        "pytrade2.s3.endpoint_url": "http://localhost",
+                                        "pytrade2.data.format": "parquet"}, "raw")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    @staticmethod
+    def bid_ask(start: str, periods: int) -> pd.DataFrame:
+        return pd.DataFrame({"bid": range(periods), "ask": range(1, periods + 1)},
+                            index=pd.date_range(start, periods=periods, freq="1s", name="datetime"))
+
+    @patch("pytrade2.strategy.persist.DataPersister.boto3")
+    def test_copy2s3_should_upload_all_parts_saved_before(self, boto3):
+        self.persister.persist_df(self.bid_ask("2025-05-21 00:00:00", 2), self.dir, "bid_ask", "BTC-USDT")
+        path = self.persister.persist_df(self.bid_ask("2025-05-21 00:00:02", 3), self.dir, "bid_ask", "BTC-USDT")
+
+        self.persister.copy2s3(path)
+
+        # Parts are compacted to one file with all rows, it is uploaded
+        uploaded_path = boto3.client.return_value.upload_file.call_args.args[0]
+        self.assertEqual(Path(path, HistoryStorage.compacted_part_name), uploaded_path)
+        self.assertEqual([HistoryStorage.compacted_part_name], os.listdir(path))
+        self.assertEqual(5, len(pd.read_parquet(uploaded_path)))
+
+    @patch("pytrade2.strategy.persist.DataPersister.boto3")
+    def test_copy2s3_should_not_compact_parts_if_s3_disabled(self, boto3):
+        self.persister.s3_enabled = False
+        self.persister.persist_df(self.bid_ask("2025-05-21 00:00:00", 2), self.dir, "bid_ask", "BTC-USDT")
+        path = self.persister.persist_df(self.bid_ask("2025-05-21 00:00:02", 3), self.dir, "bid_ask", "BTC-USDT")
+
+        self.persister.copy2s3(path)
+
+        boto3.client.assert_not_called()
+        self.assertEqual(2, len(os.listdir(path)))
+        self.assertNotIn(HistoryStorage.compacted_part_name, os.listdir(path))